@@ -0,0 +1,127 @@
+"""
+Ad Classifier - 广告 / 低质量推文分类器
+关键词和账号规则从配置文件加载，启动时编译成单个多模式匹配自动机，每条推文只扫描一次
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+DEFAULT_RULES_PATH = Path(__file__).parent / "ad_rules.json"
+
+# 纯 ASCII 单词类规则需要词边界（避免 "ad" 命中 "read" / "had"），中文等无需边界
+_ASCII_WORD = re.compile(r"^[a-z0-9_]+$")
+
+
+def _is_word_char(ch: str) -> bool:
+    # 以字母数字为边界，下划线视为分隔符（如 nike_ad 里的 ad）
+    return ch.isascii() and ch.isalnum()
+
+
+class _MultiPatternMatcher:
+    """
+    多模式匹配器
+    安装了 pyahocorasick 时使用 Aho-Corasick 自动机，否则退化为单个交替正则
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = sorted({t.strip().lower() for t in terms if t.strip()}, key=len, reverse=True)
+        self._bounded = {t for t in self.terms if _ASCII_WORD.match(t)}
+        self._automaton = None
+        self._regex = None
+
+        if not self.terms:
+            return
+
+        try:
+            import ahocorasick
+
+            automaton = ahocorasick.Automaton()
+            for term in self.terms:
+                automaton.add_word(term, term)
+            automaton.make_automaton()
+            self._automaton = automaton
+        except ImportError:
+            bounded = [re.escape(t) for t in self.terms if t in self._bounded]
+            plain = [re.escape(t) for t in self.terms if t not in self._bounded]
+            parts = []
+            if bounded:
+                parts.append(rf"(?<![a-z0-9])(?:{'|'.join(bounded)})(?![a-z0-9])")
+            parts.extend(plain)
+            self._regex = re.compile("|".join(parts))
+
+    def search(self, text: str) -> Optional[str]:
+        """返回第一个命中的规则（text 需已小写）"""
+        if self._automaton is not None:
+            for end, term in self._automaton.iter(text):
+                if term in self._bounded:
+                    start = end - len(term) + 1
+                    if start > 0 and _is_word_char(text[start - 1]):
+                        continue
+                    if end + 1 < len(text) and _is_word_char(text[end + 1]):
+                        continue
+                return term
+            return None
+
+        if self._regex is not None:
+            match = self._regex.search(text)
+            return match.group(0) if match else None
+
+        return None
+
+
+class AdClassifier:
+    """
+    广告分类器
+
+    classify() 返回命中原因（如 "keyword:推广" / "account:ad" / "low_engagement"），
+    未命中返回 None
+    """
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.rules = rules
+        self._keywords = _MultiPatternMatcher(rules.get("keywords", []))
+        self._accounts = _MultiPatternMatcher(rules.get("accounts", []))
+
+        low = rules.get("low_engagement") or {}
+        self._min_views = low.get("min_views")
+        self._max_likes = low.get("max_likes", 0)
+        self._max_replies = low.get("max_replies", 0)
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "AdClassifier":
+        """从 JSON 规则文件加载（默认 AD_RULES_PATH 或内置 agents/ad_rules.json）"""
+        path = Path(os.path.expanduser(path or os.getenv("AD_RULES_PATH") or DEFAULT_RULES_PATH))
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def classify(self, tweet: Dict[str, Any]) -> Optional[str]:
+        """检测推文是否为广告或低质量内容，返回命中原因"""
+        keyword = self._keywords.search(tweet.get("content", "").lower())
+        if keyword:
+            return f"keyword:{keyword}"
+
+        account = self._accounts.search(tweet.get("author", "").lower())
+        if account:
+            return f"account:{account}"
+
+        # 过滤低质量推文（浏览量高但几乎没有互动，可能是垃圾内容）
+        if self._min_views is not None:
+            engagement = tweet.get("engagement", {})
+            if (
+                engagement.get("views", 0) > self._min_views
+                and engagement.get("likes", 0) < self._max_likes
+                and engagement.get("replies", 0) < self._max_replies
+            ):
+                return "low_engagement"
+
+        return None
+
+    def is_ad(self, tweet: Dict[str, Any]) -> bool:
+        return self.classify(tweet) is not None
+
+    def classify_batch(self, tweets: List[Dict[str, Any]]) -> List[Optional[str]]:
+        return [self.classify(tweet) for tweet in tweets]
@@ -1,3 +1,3 @@
-from .agent import AnalyseAgent
+from .agent import AnalyseAgent, IncrementalAnalysis
 
-__all__ = ["AnalyseAgent"]
+__all__ = ["AnalyseAgent", "IncrementalAnalysis"]
@@ -4,10 +4,35 @@ Analyse Agent - 推文分析代理
 """
 
 import os
-from typing import Dict, Any, List, Optional
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 from agents.base import BaseAgent
+from agents.llm_cache import LLMCache
 from agents.llm_factory import LLMFactory, SimpleLLM
+from agents.analyse_agent.packer import PromptPacker
+
+
+# 摘要格式要求（单次分析和分块归并共用，保证输出格式一致）
+DIGEST_REQUIREMENTS = """【分析要求】
+请用简洁的中文总结：
+
+1. **🔥 热点话题**（2-4个最重要的）
+   - 简述每个话题的核心内容
+
+2. **💡 值得关注的观点**（如果有）
+   - 有见地的讨论或独特视角
+
+3. **📊 潜在机会信号**（如果有）
+   - 技术趋势、投资信号等
+
+4. **🎯 行动建议**（可选）
+   - 建议深入了解的话题
+
+请保持简洁，每个要点 1-2 句话即可。使用 Markdown 格式。"""
 
 
 class AnalyseAgent(BaseAgent):
@@ -21,6 +46,8 @@ class AnalyseAgent(BaseAgent):
         provider: str = None,
         strategy_path: str = None,
         temperature: float = 0.3,
+        use_cache: bool = None,
+        cache_path: str = None,
     ):
         """
         初始化 Analyse Agent
@@ -29,6 +56,8 @@ class AnalyseAgent(BaseAgent):
             provider: LLM 提供方（如果为 None，从环境变量读取）
             strategy_path: 分析策略文件路径（可选）
             temperature: LLM 温度参数
+            use_cache: 是否启用响应缓存（如果为 None，从 LLM_CACHE 读取）
+            cache_path: 缓存数据库路径（默认 {DATA_DIR}/llm_cache.db）
         """
         super().__init__(name="AnalyseAgent")
 
@@ -36,18 +65,43 @@ class AnalyseAgent(BaseAgent):
         self.strategy_path = strategy_path
         self.strategy = self._load_strategy() if strategy_path else None
 
-        # 初始化 LLM
-        self.llm = SimpleLLM(provider)
+        data_dir = Path(os.path.expanduser(os.getenv("DATA_DIR", "~/.twitter-monitor")))
+
+        # 初始化 LLM（provider 调用链的熔断 / 延迟统计跨运行保存）
+        self.llm = SimpleLLM(provider, health_path=str(data_dir / "llm_health.db"))
         self._log(f"LLM: {self.llm}", "success")
 
+        # 按 token 预算挑选 / 切分推文（预算取调用链中最小的 <PROVIDER>_PROMPT_BUDGET）
+        self.packer = PromptPacker(
+            budget=self.llm.prompt_budget,
+            tweet_max_tokens=int(os.getenv("ANALYSE_TWEET_MAX_TOKENS", "200")),
+            half_life_hours=float(os.getenv("ANALYSE_RECENCY_HALF_LIFE_HOURS", "6")),
+        )
+
+        # 响应缓存（重试 / 崩溃恢复时相同 prompt 不再消耗 token）
+        if use_cache is None:
+            use_cache = os.getenv("LLM_CACHE", "true").lower() == "true"
+        self.cache: Optional[LLMCache] = None
+        if use_cache:
+            self.cache = LLMCache(
+                cache_path or str(data_dir / "llm_cache.db"),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL_HOURS", "24")) * 3600,
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000")),
+            )
+
         self.is_initialized = True
 
-    def execute(self, tweets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def execute(
+        self,
+        tweets: List[Dict[str, Any]],
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
         """
         分析推文列表
 
         Args:
-            tweets: 推文列表，每个推文包含 id, content, author
+            tweets: 推文列表，每个推文包含 id, content, author（话题聚类后为每簇的代表推文，带 cluster_size）
+            on_delta: 流式回调，以目前为止的摘要文本调用（分块模式下只流式输出归并步骤）
 
         Returns:
             包含分析结果的字典
@@ -55,72 +109,239 @@ class AnalyseAgent(BaseAgent):
         if not tweets:
             return self._error("没有推文需要分析")
 
-        self._log(f"开始分析 {len(tweets)} 条推文")
-
-        # 构建 prompt
-        prompt = self._build_prompt(tweets)
+        tweet_count = sum(t.get("cluster_size", 1) for t in tweets)
+        if tweet_count > len(tweets):
+            self._log(f"开始分析 {tweet_count} 条推文（{len(tweets)} 个话题）")
+        else:
+            self._log(f"开始分析 {tweet_count} 条推文")
 
-        # 调用 LLM
+        chunks = self._split_chunks(tweets)
         try:
-            summary = self.llm.invoke(
-                prompt=prompt,
-                system=self._get_system_prompt(),
-                max_tokens=2000,
-                temperature=self.temperature,
-            )
+            if len(chunks) > 1:
+                summary, cached = self._analyse_chunked(chunks, tweet_count, on_delta)
+            else:
+                # 构建 prompt 并调用 LLM
+                prompt = self._build_prompt(tweets)
+                summary, cached = self._invoke(
+                    prompt, self._get_system_prompt(), max_tokens=2000, on_delta=on_delta
+                )
         except Exception as e:
             return self._error(f"LLM 调用失败: {e}")
 
-        self._log("分析完成", "success")
+        return self._analysis_result(summary, tweet_count, cached, len(chunks))
+
+    def start_incremental(self) -> "IncrementalAnalysis":
+        """
+        开始流水线分析：推文分批 add()，凑满一块即开始 map 分析，最后 finish() 归并
+
+        块大小为 ANALYSE_CHUNK_SIZE（默认 MAX_TWEETS_TO_ANALYZE）
+        """
+        max_tweets = int(os.getenv("MAX_TWEETS_TO_ANALYZE", "20"))
+        return IncrementalAnalysis(
+            self,
+            chunk_size=max(1, int(os.getenv("ANALYSE_CHUNK_SIZE", str(max_tweets)))),
+            max_workers=max(1, int(os.getenv("ANALYSE_MAX_WORKERS", "4"))),
+        )
 
+    def _analysis_result(self, summary: str, tweet_count: int, cached: bool, chunks: int) -> Dict[str, Any]:
+        self._log("分析完成" + (" (缓存命中)" if cached else ""), "success")
+        if self.cache is not None:
+            stats = self.cache.stats()
+            self._log(
+                f"LLM 缓存累计: 命中 {stats['hits']}, 未命中 {stats['misses']}, 条目 {stats['entries']}",
+                "info",
+            )
         return self._success(
             data={
                 "summary": summary,
-                "tweet_count": len(tweets),
-                "provider": self.llm.provider,
-                "model": self.llm.model,
+                "tweet_count": tweet_count,
+                "provider": self.llm.last_provider,
+                "model": self.llm.last_model,
+                "cached": cached,
+                "chunks": chunks,
             },
-            message=f"成功分析 {len(tweets)} 条推文",
+            message=f"成功分析 {tweet_count} 条推文",
+        )
+
+    def _split_chunks(self, tweets: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        按分析模式切分推文
+
+        ANALYSE_MODE:
+            single  - 只分析一次，在 token 预算内按分数挑选最多 MAX_TWEETS_TO_ANALYZE 条
+            chunked - 始终分块，每块最多 ANALYSE_CHUNK_SIZE 条且不超过 token 预算
+            auto    - 超过 MAX_TWEETS_TO_ANALYZE 时分块（默认）
+        """
+        mode = os.getenv("ANALYSE_MODE", "auto").strip().lower()
+        max_tweets = int(os.getenv("MAX_TWEETS_TO_ANALYZE", "20"))
+        chunk_size = max(1, int(os.getenv("ANALYSE_CHUNK_SIZE", str(max_tweets))))
+
+        if mode == "single" or (mode == "auto" and len(tweets) <= max_tweets):
+            return [tweets]
+        return self.packer.split(tweets, chunk_size)
+
+    def _analyse_chunked(
+        self,
+        chunks: List[List[Dict[str, Any]]],
+        tweet_count: int,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> tuple[str, bool]:
+        """
+        Map-Reduce 分析：各分块在有界线程池中并发生成局部摘要，再归并为最终摘要
+
+        Returns:
+            (最终摘要, 是否全部命中缓存)
+        """
+        max_workers = max(1, int(os.getenv("ANALYSE_MAX_WORKERS", "4")))
+        total = sum(len(chunk) for chunk in chunks)
+        self._log(f"分块分析: {total} 条推文 → {len(chunks)} 块 (并发 {max_workers})")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(self._summarize_chunk, chunk, i, len(chunks))
+                for i, chunk in enumerate(chunks, 1)
+            ]
+        return self._reduce_chunks(futures, tweet_count, on_delta)
+
+    def _summarize_chunk(
+        self, chunk: List[Dict[str, Any]], index: int, total: Optional[int]
+    ) -> tuple[str, bool]:
+        """map：生成一块推文的局部要点"""
+        prompt = self._build_map_prompt(chunk, index, total)
+        return self._invoke(prompt, self._get_system_prompt(), max_tokens=800)
+
+    def _reduce_chunks(
+        self,
+        futures: List[Future],
+        tweet_count: int,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> tuple[str, bool]:
+        """reduce：收集各块局部要点（容忍部分失败）并归并为最终摘要"""
+        partials, all_cached = [], True
+        for i, future in enumerate(futures, 1):
+            try:
+                partial, cached = future.result()
+                partials.append(partial)
+                all_cached = all_cached and cached
+            except Exception as e:
+                self._log(f"第 {i}/{len(futures)} 块分析失败: {e}", "warning")
+
+        if not partials:
+            raise RuntimeError("所有分块分析均失败")
+
+        self._log(f"归并 {len(partials)} 份局部摘要")
+        prompt = self._build_reduce_prompt(partials, tweet_count)
+        summary, cached = self._invoke(
+            prompt, self._get_system_prompt(), max_tokens=2000, on_delta=on_delta
+        )
+        return summary, all_cached and cached
+
+    def _invoke(
+        self,
+        prompt: str,
+        system: str,
+        max_tokens: int = 2000,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> tuple[str, bool]:
+        """
+        调用 LLM，优先读取缓存（命中时把完整结果回调一次 on_delta）
+
+        Returns:
+            (响应文本, 是否命中缓存)
+        """
+        key = None
+        if self.cache is not None:
+            key = LLMCache.make_key(
+                self.llm.provider, self.llm.model, system, prompt, self.temperature, max_tokens
+            )
+            started = time.perf_counter()
+            cached = self.cache.get(key)
+            self._count("llm_cache_lookups", result="hit" if cached is not None else "miss")
+            if cached is not None:
+                self._log(f"LLM 缓存命中 ({(time.perf_counter() - started) * 1000:.1f}ms)", "info")
+                if on_delta is not None:
+                    on_delta(cached)
+                return cached, True
+
+        response = self.llm.invoke(
+            prompt=prompt,
+            system=system,
+            max_tokens=max_tokens,
+            temperature=self.temperature,
+            on_delta=on_delta,
         )
 
+        if key is not None and response:
+            if (self.llm.last_provider, self.llm.last_model) == (self.llm.provider, self.llm.model):
+                self.cache.put(key, self.llm.provider, self.llm.model, response)
+            else:
+                # 缓存键对应首选 provider，故障切换后备选 provider 的回答不写入缓存
+                self._log(f"响应来自备选 provider {self.llm.last_provider}，不写入缓存", "info")
+        return response, False
+
     def _get_system_prompt(self) -> str:
         """获取系统提示"""
         if self.strategy:
             return f"你是一个专业的社交媒体分析师。\n\n分析策略:\n{self.strategy}"
         return "你是一个专业的社交媒体分析师，擅长从推文中提取热点话题和有价值的信息。"
 
-    def _build_prompt(self, tweets: List[Dict[str, Any]]) -> str:
-        """构建分析提示"""
-        max_tweets = int(os.getenv("MAX_TWEETS_TO_ANALYZE", "20"))
-        # 格式化推文
-        tweets_text = "\n\n---\n\n".join(
+    def _format_tweets(self, tweets: List[Dict[str, Any]]) -> str:
+        """格式化推文（注明折叠的相似推文数和同话题推文数，供判断话题热度）"""
+        return "\n\n---\n\n".join(
             [
                 f"@{t.get('author', 'unknown')}:\n{t.get('content', '')}"
-                for t in tweets[:max_tweets]  # 从环境变量读取
+                + (f"\n（另有 {t['duplicate_count']} 条相似推文）" if t.get("duplicate_count") else "")
+                + (
+                    f"\n（同一话题共 {t['cluster_size']} 条推文，"
+                    f"其他作者: {', '.join('@' + a for a in t.get('cluster_authors', []))}）"
+                    if t.get("cluster_size", 1) > 1
+                    else ""
+                )
+                for t in tweets
             ]
         )
 
+    def _build_prompt(self, tweets: List[Dict[str, Any]]) -> str:
+        """构建分析提示（在 token 预算内按互动和时效挑选推文）"""
+        max_tweets = int(os.getenv("MAX_TWEETS_TO_ANALYZE", "20"))
+        selected, tokens = self.packer.select(tweets, max_count=max_tweets)
+        self._log(f"选取 {len(selected)}/{len(tweets)} 条推文 (~{tokens} tokens)")
+        self._count("prompt_tokens", tokens)
+        tweets_text = self._format_tweets(selected)
+
         return f"""分析以下 Twitter/X 推文，提取热点和要点。
 
 【推文内容】
 {tweets_text}
 
-【分析要求】
-请用简洁的中文总结：
+{DIGEST_REQUIREMENTS}"""
 
-1. **🔥 热点话题**（2-4个最重要的）
-   - 简述每个话题的核心内容
+    def _build_map_prompt(
+        self, tweets: List[Dict[str, Any]], index: int, total: Optional[int]
+    ) -> str:
+        """构建分块（map）提示：只提炼要点，供归并使用（流水线模式下总组数未知，total 为 None）"""
+        group = f"{index}/{total}" if total else str(index)
+        return f"""以下是第 {group} 组 Twitter/X 推文（共 {len(tweets)} 条）。
 
-2. **💡 值得关注的观点**（如果有）
-   - 有见地的讨论或独特视角
+【推文内容】
+{self._format_tweets(tweets)}
 
-3. **📊 潜在机会信号**（如果有）
-   - 技术趋势、投资信号等
+【要求】
+用简洁的中文列出这组推文中的要点，每条一行，以 "- " 开头：
+- 标注涉及的话题，并保留关键的作者 @用户名、数字和结论
+- 相同话题合并为一条，注明讨论的推文数量
+- 不超过 8 条，不要写开场白或总结"""
 
-4. **🎯 行动建议**（可选）
-   - 建议深入了解的话题
+    def _build_reduce_prompt(self, partials: List[str], tweet_count: int) -> str:
+        """构建归并（reduce）提示：把各组要点合并为最终摘要"""
+        sections = "\n\n".join(
+            f"【第 {i} 组要点】\n{partial}" for i, partial in enumerate(partials, 1)
+        )
+        return f"""以下是从 {tweet_count} 条 Twitter/X 推文中分组提炼出的要点，请合并去重，按整体重要性提取热点和要点。
 
-请保持简洁，每个要点 1-2 句话即可。使用 Markdown 格式。"""
+{sections}
+
+{DIGEST_REQUIREMENTS}"""
 
     def _load_strategy(self) -> Optional[str]:
         """加载分析策略文件"""
@@ -132,3 +353,70 @@ class AnalyseAgent(BaseAgent):
         except Exception as e:
             self._log(f"加载策略文件失败: {e}", "warning")
             return None
+
+
+class IncrementalAnalysis:
+    """
+    流水线分析：推文分批到达（抓取仍在滚动时），每凑满一块（chunk_size 条或 token 预算）
+    就在线程池中开始 map 分析，finish() 时把剩余推文作为最后一块，再归并为最终摘要
+
+    整个运行只有一块推文时（推文数不超过块大小），finish() 按普通 execute() 分析，结果与非流水线模式一致
+    """
+
+    def __init__(self, agent: AnalyseAgent, chunk_size: int, max_workers: int):
+        self.agent = agent
+        self.chunk_size = chunk_size
+        self.tweets: List[Dict[str, Any]] = []
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_tokens = 0
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analyse")
+
+    @property
+    def submitted(self) -> int:
+        """已提交 map 分析的块数"""
+        return len(self._futures)
+
+    def add(self, tweets: List[Dict[str, Any]]):
+        """加入一批新推文（可在抓取线程中调用）"""
+        with self._lock:
+            self.tweets.extend(tweets)
+            for tweet, tokens in self.agent.packer.prepare(tweets):
+                if self._buffer and self._buffer_tokens + tokens > self.agent.packer.budget:
+                    self._flush()
+                self._buffer.append(tweet)
+                self._buffer_tokens += tokens
+                if len(self._buffer) >= self.chunk_size:
+                    self._flush()
+
+    def _flush(self):
+        self._submit(self._buffer)
+        self._buffer, self._buffer_tokens = [], 0
+
+    def _submit(self, chunk: List[Dict[str, Any]]):
+        index = len(self._futures) + 1
+        self.agent._log(f"流水线: 开始分析第 {index} 块 ({len(chunk)} 条)", "info")
+        self._futures.append(self._pool.submit(self.agent._summarize_chunk, chunk, index, None))
+
+    def finish(self, on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """抓取结束后调用：提交剩余推文并归并，返回与 AnalyseAgent.execute() 相同结构的结果"""
+        with self._lock:
+            if not self._futures:
+                self._pool.shutdown()
+                return self.agent.execute(self.tweets, on_delta=on_delta)
+            if self._buffer:
+                self._flush()
+
+        try:
+            summary, cached = self.agent._reduce_chunks(self._futures, len(self.tweets), on_delta)
+        except Exception as e:
+            return self.agent._error(f"LLM 调用失败: {e}")
+        finally:
+            self._pool.shutdown()
+
+        return self.agent._analysis_result(summary, len(self.tweets), cached, len(self._futures))
+
+    def cancel(self):
+        """放弃分析（抓取失败时），不等待已提交的块"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,185 @@
+"""
+Prompt Packer - 按 token 预算挑选和打包推文
+估算每条推文的 token 数，去掉链接 / 媒体占位符等样板文本，按互动和时效打分，
+在预算内挑选推文，使 prompt 大小、成本和延迟不随抓取数量增长
+"""
+
+import math
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 样板文本：链接、快照里的媒体 / 折叠占位符（只去掉独立出现的英文标记）
+_URL_RE = re.compile(r"https?://\S+|\bpic\.twitter\.com/\S+")
+_MARKER_RE = re.compile(
+    r"(?<![A-Za-z])(?:Image|GIF|Show more|Show this thread|Translate post|Quote)(?![A-Za-z])"
+    r"(?=\s*(?:(?:Image|GIF|Show more|Show this thread|Translate post|Quote)\b\s*)*$)"
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 每条推文在 prompt 中的固定开销（分隔符 + "@author:" 换行）
+_TWEET_OVERHEAD_TOKENS = 6
+# 相似推文数 / 同话题推文数注释的开销（不含作者名）
+_ANNOTATION_TOKENS = 12
+
+
+@lru_cache(maxsize=1)
+def _tiktoken_encoder():
+    """tiktoken 编码器（可选依赖；未安装或词表无法下载时返回 None）"""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    估算 token 数
+
+    安装了 tiktoken 时使用 cl100k_base 精确计数；否则按经验公式估算：
+    ASCII 约 4 字符 / token，中文等非 ASCII 字符约 1 token / 字（偏保守）
+    """
+    if not text:
+        return 0
+    encoder = _tiktoken_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    ascii_chars = sum(1 for ch in text if ch.isascii())
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """截断到最多 max_tokens 个 token（超出时末尾加省略号）"""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    encoder = _tiktoken_encoder()
+    if encoder is not None:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens]) + "…"
+    # 经验公式下按比例截断字符，再逐步收缩到预算内
+    cut = max(1, len(text) * max_tokens // tokens)
+    while cut > 1 and count_tokens(text[:cut]) > max_tokens:
+        cut = cut * 9 // 10
+    return text[:cut] + "…"
+
+
+def clean_text(text: str) -> str:
+    """去掉链接、媒体占位符和多余空白"""
+    text = _URL_RE.sub(" ", text)
+    text = _MARKER_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class PromptPacker:
+    """
+    推文打包器
+
+    - prepare(): 清理样板文本、按 tweet_max_tokens 截断，得到 (推文副本, token 数)
+    - select(): 按分数挑选推文直到用完预算（单次分析）
+    - split(): 按条数和预算切块（分块分析，每块都不超过预算）
+
+    分数 = (1 + log(1 + 互动数 + 相似推文数 + 同话题推文数)) × 时效衰减（每 half_life_hours 小时减半），
+    推文带 trend_rate（EngagementTracker 外推的每小时互动增量）时用它代替累计互动数
+    """
+
+    def __init__(
+        self,
+        budget: int = 4000,
+        tweet_max_tokens: int = 200,
+        half_life_hours: float = 6.0,
+    ):
+        self.budget = budget
+        self.tweet_max_tokens = tweet_max_tokens
+        self.half_life_hours = half_life_hours
+
+    def prepare(self, tweets: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], int]]:
+        """清理并截断推文内容，返回 (推文副本, 含固定开销的 token 数) 列表"""
+        packed = []
+        for tweet in tweets:
+            content = truncate_tokens(clean_text(tweet.get("content", "")), self.tweet_max_tokens)
+            tokens = (
+                count_tokens(content)
+                + count_tokens(tweet.get("author", ""))
+                + _TWEET_OVERHEAD_TOKENS
+            )
+            if tweet.get("duplicate_count"):
+                tokens += _ANNOTATION_TOKENS
+            if tweet.get("cluster_size", 1) > 1:
+                tokens += _ANNOTATION_TOKENS + count_tokens(" ".join(tweet.get("cluster_authors", [])))
+            packed.append(({**tweet, "content": content}, tokens))
+        return packed
+
+    def score(self, tweet: Dict[str, Any], now: Optional[float] = None) -> float:
+        engagement = tweet.get("engagement", {})
+        if "trend_rate" in tweet:
+            # 有互动快照时按外推的每小时互动增量计：正在起飞的推文优先于又老又大的推文
+            momentum = tweet["trend_rate"]
+        else:
+            momentum = (
+                engagement.get("likes", 0)
+                + 2 * engagement.get("reposts", 0)
+                + 2 * engagement.get("replies", 0)
+            )
+        interactions = (
+            momentum
+            + tweet.get("duplicate_count", 0)
+            + tweet.get("cluster_size", 1) - 1
+        )
+        value = 1 + math.log1p(interactions)
+
+        timestamp = tweet.get("timestamp") or 0
+        if not timestamp or self.half_life_hours <= 0:
+            return value
+        age_hours = max(0.0, ((now or time.time()) - timestamp) / 3600)
+        return value * 0.5 ** (age_hours / self.half_life_hours)
+
+    def select(
+        self,
+        tweets: List[Dict[str, Any]],
+        max_count: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        按分数从高到低挑选推文，直到用完预算或达到 max_count
+
+        Returns:
+            (入选推文副本（保持输入顺序）, 入选推文的 token 总数)
+        """
+        packed = self.prepare(tweets)
+        order = sorted(
+            range(len(packed)), key=lambda i: self.score(packed[i][0], now), reverse=True
+        )
+
+        chosen, used = set(), 0
+        for i in order:
+            if max_count is not None and len(chosen) >= max_count:
+                break
+            tokens = packed[i][1]
+            if used + tokens > self.budget:
+                # 放不下这条，继续尝试更短的推文
+                continue
+            chosen.add(i)
+            used += tokens
+
+        return [packed[i][0] for i in sorted(chosen)], used
+
+    def split(
+        self, tweets: List[Dict[str, Any]], max_count: int
+    ) -> List[List[Dict[str, Any]]]:
+        """按顺序切块：每块最多 max_count 条且不超过预算（单条推文已截断，总能放下）"""
+        chunks: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        used = 0
+        for tweet, tokens in self.prepare(tweets):
+            if current and (len(current) >= max_count or used + tokens > self.budget):
+                chunks.append(current)
+                current, used = [], 0
+            current.append(tweet)
+            used += tokens
+        if current:
+            chunks.append(current)
+        return chunks
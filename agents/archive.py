@@ -0,0 +1,152 @@
+"""
+Tweet Archive - 推文归档与全文检索
+过滤阶段把新推文的完整数据（链接、互动、发布时间）批量写入 tweet_archive（表结构见 storage 迁移 #4），
+FTS5 索引正文和作者，按关键词 / 作者 / 时间范围查询几个月的数据也只需毫秒级
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from agents import metrics, storage
+
+
+# trigram 分词按 3 字符子串建索引，中英文都能做子串匹配；更短的词退回 LIKE 扫描
+_TRIGRAM_MIN_CHARS = 3
+
+
+def _archive_key(tweet: Dict[str, Any]) -> str:
+    """
+    归档主键：真实推文 ID；快照兜底的 ref_id（如 e123）每次快照都会复用，
+    改用作者 + 正文的哈希，避免之后同一 ref_id 的另一条推文被 INSERT OR IGNORE 丢弃
+    """
+    tweet_id = str(tweet["id"])
+    if tweet_id.isdigit():
+        return tweet_id
+    raw = f"{tweet.get('author', '')}\0{tweet.get('content', '')}"
+    return "h" + hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _fts_tokenizer(conn: sqlite3.Connection) -> Optional[str]:
+    """FTS 表使用的分词器（没有 FTS 表时返回 None）"""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'tweet_archive_fts'"
+    ).fetchone()
+    if row is None:
+        return None
+    return "trigram" if "trigram" in row[0] else "unicode61"
+
+
+class TweetArchive:
+    """
+    推文归档
+    - add(): 每批一次 executemany 写入（已归档的 ID 忽略）
+    - search(): 关键词走 FTS5 MATCH，作者 / 时间范围走 B-tree 索引，按发布时间倒序
+    """
+
+    def __init__(self, conn: sqlite3.Connection, retention_days: int = 0):
+        self.conn = conn
+        # 0 表示永久保留
+        self.retention_days = retention_days
+        self.tokenizer = _fts_tokenizer(conn)
+
+    def add(self, tweets: List[Dict[str, Any]]) -> int:
+        """批量归档推文，返回新写入的行数"""
+        if not tweets:
+            return 0
+
+        now = int(time.time())
+        rows = []
+        for tweet in tweets:
+            engagement = tweet.get("engagement", {})
+            rows.append((
+                _archive_key(tweet),
+                tweet.get("author", ""),
+                tweet.get("content", ""),
+                tweet.get("url", ""),
+                int(tweet.get("timestamp") or now),
+                engagement.get("likes", 0),
+                engagement.get("reposts", 0),
+                engagement.get("replies", 0),
+                json.dumps(tweet, ensure_ascii=False),
+            ))
+
+        with metrics.timer("db_query_seconds", op="archive"):
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO tweet_archive "
+                "(tweet_id, author, content, url, created_at, likes, reposts, replies, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.commit()
+        # rowcount 不含触发器写入的 FTS 行
+        added = cursor.rowcount
+        metrics.incr("archived_tweets", added)
+        return added
+
+    def purge_expired(self) -> int:
+        if self.retention_days <= 0:
+            return 0
+        return storage.purge_older_than(self.conn, "tweet_archive", "archived_at", self.retention_days)
+
+    def search(
+        self,
+        query: str = "",
+        author: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        检索归档推文
+
+        Args:
+            query: 关键词（空格分隔，全部命中才返回）
+            author: 作者用户名（不区分大小写，可带 @）
+            since / until: 发布时间范围（Unix 时间戳，until 不含）
+            limit: 最多返回条数
+
+        Returns:
+            推文字典列表（归档时的完整数据），按发布时间倒序
+        """
+        conditions, params = [], []
+        fts_terms = []
+        for term in query.split():
+            if self.tokenizer and (
+                self.tokenizer != "trigram" or len(term) >= _TRIGRAM_MIN_CHARS
+            ):
+                fts_terms.append('"' + term.replace('"', '""') + '"')
+            else:
+                conditions.append("a.content LIKE ?")
+                params.append(f"%{term}%")
+        if fts_terms:
+            conditions.append(
+                "a.rowid IN (SELECT rowid FROM tweet_archive_fts WHERE tweet_archive_fts MATCH ?)"
+            )
+            params.append(" ".join(fts_terms))
+        if author:
+            conditions.append("a.author = ? COLLATE NOCASE")
+            params.append(author.lstrip("@"))
+        if since is not None:
+            conditions.append("a.created_at >= ?")
+            params.append(int(since))
+        if until is not None:
+            conditions.append("a.created_at < ?")
+            params.append(int(until))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with metrics.timer("db_query_seconds", op="archive_search"):
+            rows = self.conn.execute(
+                f"SELECT a.data, a.created_at FROM tweet_archive a {where} "
+                "ORDER BY a.created_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        tweets = []
+        for data, created_at in rows:
+            tweet = json.loads(data)
+            # 没有解析出发布时间的推文按归档时间计
+            tweet["timestamp"] = tweet.get("timestamp") or created_at
+            tweets.append(tweet)
+        return tweets
@@ -4,10 +4,14 @@ Base Agent - 所有 Agent 的基类
 """
 
 import os
+import functools
+import time
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from agents import metrics
+
 
 class BaseAgent(ABC):
     """
@@ -15,6 +19,37 @@ class BaseAgent(ABC):
     所有 Agent 都继承此类，实现统一接口
     """
 
+    def __init_subclass__(cls, **kwargs):
+        """子类的 execute() 自动记录耗时和结果状态（agent_execute_seconds）"""
+        super().__init_subclass__(**kwargs)
+        execute = cls.__dict__.get("execute")
+        if execute is None or getattr(execute, "_metered", False):
+            return
+
+        @functools.wraps(execute)
+        def metered(self, *args, **kwargs):
+            # 子类 execute 调用 super().execute() 时只记录最外层
+            if getattr(self, "_metering", False):
+                return execute(self, *args, **kwargs)
+            self._metering = True
+            started = time.perf_counter()
+            status = "exception"
+            try:
+                result = execute(self, *args, **kwargs)
+                status = result.get("status", "unknown") if isinstance(result, dict) else "unknown"
+                return result
+            finally:
+                self._metering = False
+                metrics.observe(
+                    "agent_execute_seconds",
+                    time.perf_counter() - started,
+                    agent=self.name,
+                    status=status,
+                )
+
+        metered._metered = True
+        cls.execute = metered
+
     def __init__(self, name: str = "BaseAgent"):
         self.name = name
         self.is_initialized = False
@@ -53,6 +88,14 @@ class BaseAgent(ABC):
             "timestamp": datetime.now().isoformat(),
         }
 
+    def _timer(self, name: str, **labels: str):
+        """记录一段耗时（上下文管理器），自动带上 agent 标签"""
+        return metrics.timer(name, agent=self.name, **labels)
+
+    def _count(self, name: str, value: float = 1, **labels: str):
+        """累加计数器，自动带上 agent 标签"""
+        metrics.incr(name, value, agent=self.name, **labels)
+
     def _log(self, message: str, level: str = "info"):
         """统一日志格式"""
         symbols = {"info": "ℹ️", "success": "✓", "error": "✗", "warning": "⚠️"}
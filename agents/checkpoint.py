@@ -0,0 +1,82 @@
+"""
+Run Checkpoints - 工作流检查点
+每个节点成功完成后把工作流状态写入 run_checkpoints（按 run_id 覆盖为最新一次），
+推送失败或进程中断后可以从最后完成的节点继续（graph.py --resume），不必重新抓取和调用 LLM
+"""
+
+import json
+import sqlite3
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from agents import metrics, storage
+
+
+RUNNING = "running"
+# 正常结束（推送成功，或没有新推文）；其他状态（error / push_failed / 中断时的 running）都可以恢复
+DONE = "done"
+
+
+class Checkpoint(NamedTuple):
+    run_id: str
+    node: str
+    status: str
+    state: Dict[str, Any]
+    updated_at: float
+
+    @property
+    def resumable(self) -> bool:
+        return self.status != DONE
+
+
+class RunCheckpoints:
+    """
+    工作流检查点存储
+
+    - save(): 节点完成后覆盖保存整个状态（一条运行一行，状态为 running）
+    - finish(): 运行结束时记录最终状态
+    - load(): 指定 run_id 或最近一次运行的检查点
+    """
+
+    def __init__(self, conn: sqlite3.Connection, retention_days: int = 7):
+        self.conn = conn
+        self.retention_days = retention_days
+
+    def save(self, run_id: str, node: str, state: Dict[str, Any]):
+        with metrics.timer("db_query_seconds", op="checkpoint"):
+            self.conn.execute(
+                """
+                INSERT INTO run_checkpoints (run_id, node, status, state, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(run_id) DO UPDATE SET
+                    node = excluded.node,
+                    status = excluded.status,
+                    state = excluded.state,
+                    updated_at = excluded.updated_at
+                """,
+                (run_id, node, RUNNING, json.dumps(state, ensure_ascii=False), time.time()),
+            )
+            self.conn.commit()
+
+    def finish(self, run_id: str, status: str):
+        """记录运行的最终状态（没有保存过检查点的运行不记录）"""
+        self.conn.execute(
+            "UPDATE run_checkpoints SET status = ?, updated_at = ? WHERE run_id = ?",
+            (status, time.time(), run_id),
+        )
+        self.conn.commit()
+
+    def load(self, run_id: Optional[str] = None) -> Optional[Checkpoint]:
+        """读取指定运行（run_id 为 None 时为最近一次运行）的检查点"""
+        query = "SELECT run_id, node, status, state, updated_at FROM run_checkpoints"
+        if run_id:
+            row = self.conn.execute(f"{query} WHERE run_id = ?", (run_id,)).fetchone()
+        else:
+            row = self.conn.execute(f"{query} ORDER BY updated_at DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return Checkpoint(row[0], row[1], row[2], json.loads(row[3]), row[4])
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.retention_days * 86400
+        return storage.purge(self.conn, "run_checkpoints", "updated_at < ?", (cutoff,))
@@ -0,0 +1,176 @@
+"""
+Topic Clustering - 分析前的本地话题聚类
+按字符 n-gram 计算稀疏 TF-IDF（中英文通用），用余弦相似度把同一话题的推文聚成一簇，
+只把每簇的代表推文和簇大小交给 LLM，同样的 token 预算覆盖更多不同话题
+"""
+
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agents.dedup import normalize
+
+# numpy 导入约需 60ms，第一次计算时才由 _numpy() 导入，不拖慢启动；置为 None 则强制走纯 Python
+_NOT_LOADED = object()
+np: Any = _NOT_LOADED
+
+
+def _numpy():
+    """按需导入 numpy（可选依赖：未安装时用倒排表在纯 Python 中计算相似度）"""
+    global np
+    if np is _NOT_LOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+SparseVector = Dict[str, float]
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = (2, 3)) -> Counter:
+    """字符 n-gram 词频（文本需已归一化）"""
+    low, high = ngram_range
+    grams = Counter()
+    for n in range(low, high + 1):
+        grams.update(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def tfidf(documents: Sequence[Counter]) -> List[SparseVector]:
+    """
+    稀疏 TF-IDF 向量（次线性 tf、平滑 idf，L2 归一化）
+
+    Returns:
+        每篇文档一个 {特征: 权重} 字典
+    """
+    df = Counter()
+    for grams in documents:
+        df.update(grams.keys())
+    total = len(documents)
+
+    vectors = []
+    for grams in documents:
+        vector = {
+            gram: (1 + math.log(tf)) * (math.log((1 + total) / (1 + df[gram])) + 1)
+            for gram, tf in grams.items()
+        }
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        vectors.append({gram: w / norm for gram, w in vector.items()})
+    return vectors
+
+
+def similarity_matrix(vectors: List[SparseVector]) -> Any:
+    """
+    两两余弦相似度（向量已归一化，即点积）
+
+    只在至少两篇文档中出现的特征上计算：只出现一次的特征不影响任何一对文档的点积。
+    安装了 numpy 时把这些特征列组成稠密矩阵做一次矩阵乘法，否则按倒排表累加
+    """
+    df = Counter()
+    for vector in vectors:
+        df.update(vector.keys())
+    columns = {gram: i for i, gram in enumerate(g for g, n in df.items() if n > 1)}
+    size = len(vectors)
+
+    if _numpy() is not None:
+        matrix = np.zeros((size, max(1, len(columns))), dtype=np.float32)
+        for row, vector in enumerate(vectors):
+            for gram, weight in vector.items():
+                column = columns.get(gram)
+                if column is not None:
+                    matrix[row, column] = weight
+        return matrix @ matrix.T
+
+    postings: Dict[str, List[Tuple[int, float]]] = {}
+    for row, vector in enumerate(vectors):
+        for gram, weight in vector.items():
+            if gram in columns:
+                postings.setdefault(gram, []).append((row, weight))
+    scores = [[0.0] * size for _ in range(size)]
+    for entries in postings.values():
+        for i, (a, wa) in enumerate(entries):
+            for b, wb in entries[i:]:
+                scores[a][b] += wa * wb
+                if a != b:
+                    scores[b][a] += wa * wb
+    return scores
+
+
+def _engagement(tweet: Dict[str, Any]) -> int:
+    engagement = tweet.get("engagement", {})
+    return sum(engagement.get(key, 0) for key in ("likes", "reposts", "replies")) + tweet.get(
+        "duplicate_count", 0
+    )
+
+
+class TopicClusterer:
+    """
+    话题聚类
+
+    按互动从高到低依次处理推文：与已有簇代表的相似度不低于 threshold 时并入最相似的簇，
+    否则成为新簇的代表。只和代表比较，避免单链聚类把话题串成一条长链；
+    代表始终是簇内互动最高的推文
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.35,
+        ngram_range: Tuple[int, int] = (2, 3),
+        max_authors: int = 3,
+    ):
+        self.threshold = threshold
+        self.ngram_range = ngram_range
+        self.max_authors = max_authors
+
+    def assign(self, tweets: List[Dict[str, Any]]) -> List[int]:
+        """返回每条推文所属簇代表的下标"""
+        documents = [char_ngrams(normalize(t.get("content", "")), self.ngram_range) for t in tweets]
+        scores = similarity_matrix(tfidf(documents))
+
+        order = sorted(range(len(tweets)), key=lambda i: _engagement(tweets[i]), reverse=True)
+        leaders: List[int] = []
+        assignment = [0] * len(tweets)
+        for i in order:
+            best: Optional[int] = None
+            if leaders and documents[i]:
+                if np is not None:
+                    row = scores[i, leaders]
+                    j = int(row.argmax())
+                    if row[j] >= self.threshold:
+                        best = leaders[j]
+                else:
+                    j = max(leaders, key=lambda leader: scores[i][leader])
+                    if scores[i][j] >= self.threshold:
+                        best = j
+            if best is None:
+                leaders.append(i)
+                best = i
+            assignment[i] = best
+        return assignment
+
+    def cluster(self, tweets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        聚类并返回每簇的代表推文副本（保持输入顺序），附带:
+            cluster_size    - 簇内推文数
+            cluster_authors - 簇内其他推文的作者（最多 max_authors 个）
+        """
+        if len(tweets) < 2:
+            return [{**t, "cluster_size": 1, "cluster_authors": []} for t in tweets]
+
+        assignment = self.assign(tweets)
+        members: Dict[int, List[int]] = {}
+        for i, leader in enumerate(assignment):
+            members.setdefault(leader, []).append(i)
+
+        representatives = []
+        for leader in sorted(members):
+            others = [tweets[i].get("author", "") for i in members[leader] if i != leader]
+            representatives.append({
+                **tweets[leader],
+                "cluster_size": len(members[leader]),
+                "cluster_authors": list(dict.fromkeys(others))[:self.max_authors],
+            })
+        return representatives
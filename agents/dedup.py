@@ -0,0 +1,242 @@
+"""
+Near-Duplicate Index - 近似重复推文检测
+转发、引用和复制粘贴的新闻往往只差几个字符：按字符 n-gram 计算 MinHash 签名，
+LSH 分段索引找候选，把近似重复折叠为一条代表推文
+"""
+
+import hashlib
+import random
+import re
+import sqlite3
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from agents import metrics, storage
+
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_MASK64 = (1 << 64) - 1
+# multiply-shift 哈希族：h(x) = ((a·x + b) mod 2^64) >> 32，a 为奇数；固定种子保证签名跨运行可比较
+_rng = random.Random(0x7477)
+_PERMUTATIONS = [
+    (_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)
+]
+
+# 归一化：去掉 RT 前缀、链接、@提及和标点空白，只保留文字（含中文）
+_RT_PREFIX = re.compile(r"^rt\s+@\w+:?\s*")
+_URL = re.compile(r"https?://\S+|\bt\.co/\S+|\bpic\.twitter\.com/\S+")
+_MENTION = re.compile(r"@\w+")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """归一化推文文本（小写，去掉链接 / 提及 / 标点和空白）"""
+    text = _RT_PREFIX.sub("", text.lower())
+    text = _MENTION.sub(" ", _URL.sub(" ", text))
+    return _NON_WORD.sub("", text)
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """字符 n-gram 集合（中英文通用，不依赖分词）"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash(features: set) -> Tuple[int, ...]:
+    """计算 NUM_PERM 个 32 位最小哈希值"""
+    values = [
+        int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little")
+        for f in features
+    ]
+    return tuple(
+        min(((a * x + b) & _MASK64) >> 32 for x in values) for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """由签名估计 Jaccard 相似度"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def _engagement(tweet: Dict[str, Any]) -> int:
+    engagement = tweet.get("engagement", {})
+    return sum(engagement.get(key, 0) for key in ("likes", "reposts", "replies"))
+
+
+class NearDuplicateIndex:
+    """
+    近似重复索引
+
+    - 签名估计的 Jaccard 相似度不低于 threshold 视为近似重复
+    - 签名切成 BANDS 段，每段一个哈希表，只比较至少一段完全相同的候选，不做两两比较
+      （ROWS=4 时相似度 0.7 的两条推文成为候选的概率约 99%）
+    - 最近 history_days 天的签名保存在 tweet_signatures 表，启动时加载；
+      与历史重复的推文直接丢弃，与本次运行中已保留的推文重复时折叠到该代表推文
+      （代表推文的 duplicate_count / duplicate_authors 递增）
+    - collapse() 算出的签名先放在 pending 中，推送成功后由 save() 写入数据库；
+      推送失败时 discard() 丢弃，这些推文下次运行不会被当作历史重复
+    """
+
+    def __init__(
+        self,
+        conn: Optional[sqlite3.Connection] = None,
+        threshold: float = 0.7,
+        history_days: int = 3,
+        min_chars: int = 20,
+    ):
+        self.conn = conn
+        self.threshold = threshold
+        self.history_days = history_days
+        self.min_chars = min_chars
+
+        # 尚未持久化的签名（tweet_id → 签名字节）
+        self.pending: Dict[str, bytes] = {}
+        # 签名 → 代表推文（历史签名为 None）
+        self._entries: Dict[Tuple[int, ...], Optional[Dict[str, Any]]] = {}
+        self._tables: List[Dict[Tuple[int, ...], List[Tuple[int, ...]]]] = [
+            {} for _ in range(BANDS)
+        ]
+
+        # tweet_signatures 的表结构见 storage 迁移 #3，conn 需已执行 storage.migrate()
+        if self.conn is not None:
+            self.load_history()
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def load_history(self):
+        """加载保留期内的历史签名"""
+        self._entries.clear()
+        for table in self._tables:
+            table.clear()
+        rows = self.conn.execute(
+            "SELECT signature FROM tweet_signatures WHERE seen_at >= datetime('now', ?)",
+            (f"-{self.history_days} days",),
+        )
+        for (blob,) in rows:
+            self._add(tuple(array("I", blob)), None)
+
+    def purge_expired(self):
+        """分批清理超过保留期的签名；有删除时重新加载索引"""
+        if self.conn is None:
+            return
+        if storage.purge_older_than(self.conn, "tweet_signatures", "seen_at", self.history_days):
+            self.load_history()
+
+    def save(self, signatures: Optional[Iterable[Tuple[str, bytes]]] = None):
+        """
+        持久化签名
+
+        Args:
+            signatures: (tweet_id, 签名字节) 列表，None 表示全部 pending 签名
+        """
+        if signatures is None:
+            signatures = list(self.pending.items())
+        rows = [(str(tweet_id), blob) for tweet_id, blob in signatures]
+        for tweet_id, _ in rows:
+            self.pending.pop(tweet_id, None)
+        if self.conn is None or not rows:
+            return
+        with metrics.timer("db_query_seconds", op="save_signatures"):
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tweet_signatures (tweet_id, signature) VALUES (?, ?)",
+                rows,
+            )
+            self.conn.commit()
+
+    def pop_pending(self) -> Dict[str, bytes]:
+        """取出尚未持久化的签名（由调用方在推送成功后交给 save()）"""
+        pending, self.pending = self.pending, {}
+        return pending
+
+    def discard(self):
+        """丢弃本次运行未持久化的签名，内存索引恢复为数据库中的历史"""
+        self.pending.clear()
+        if self.conn is not None:
+            self.load_history()
+
+    def new_run(self):
+        """开始新一轮运行：上一轮保留的代表推文转为历史"""
+        for signature in self._entries:
+            self._entries[signature] = None
+
+    def signature(self, tweet: Dict[str, Any]) -> Optional[Tuple[int, ...]]:
+        """推文签名（归一化后过短的推文返回 None，不参与近似去重）"""
+        text = normalize(tweet.get("content", ""))
+        if len(text) < max(self.min_chars, 1):
+            return None
+        return minhash(shingles(text))
+
+    def find(self, signature: Tuple[int, ...]) -> Optional[Tuple[int, ...]]:
+        """查找相似度最高且不低于阈值的已有签名"""
+        if signature in self._entries:
+            return signature
+        best, best_score = None, self.threshold
+        checked = set()
+        for band, table in enumerate(self._tables):
+            for candidate in table.get(signature[band * ROWS:(band + 1) * ROWS], ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                score = similarity(signature, candidate)
+                if score >= best_score:
+                    best, best_score = candidate, score
+        return best
+
+    def _add(self, signature: Tuple[int, ...], representative: Optional[Dict[str, Any]]):
+        if signature in self._entries:
+            return
+        self._entries[signature] = representative
+        for band, table in enumerate(self._tables):
+            table.setdefault(signature[band * ROWS:(band + 1) * ROWS], []).append(signature)
+
+    def collapse(self, tweets: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        折叠一批新推文中的近似重复
+
+        同一批内互为近似重复的推文保留互动最高的一条；与本次运行之前批次的推文重复时
+        计入那条代表推文；与历史重复时丢弃
+
+        Returns:
+            (保留的推文（保持输入顺序）, 折叠 / 丢弃的推文数)
+        """
+        if not tweets:
+            return [], 0
+
+        dropped = set()
+        counts = Counter()
+
+        for tweet in sorted(tweets, key=_engagement, reverse=True):
+            signature = self.signature(tweet)
+            if signature is None:
+                continue
+            if self.conn is not None:
+                self.pending[str(tweet.get("id", ""))] = array("I", signature).tobytes()
+
+            match = self.find(signature)
+            if match is None:
+                tweet.setdefault("duplicate_count", 0)
+                self._add(signature, tweet)
+                continue
+
+            representative = self._entries[match]
+            dropped.add(id(tweet))
+            self._add(signature, representative)
+            if representative is None:
+                counts["history"] += 1
+            else:
+                counts["batch"] += 1
+                representative["duplicate_count"] = representative.get("duplicate_count", 0) + 1
+                representative.setdefault("duplicate_authors", []).append(tweet.get("author", ""))
+
+        for kind, count in counts.items():
+            metrics.incr("near_duplicates", count, kind=kind)
+
+        kept = [tweet for tweet in tweets if id(tweet) not in dropped]
+        return kept, len(dropped)
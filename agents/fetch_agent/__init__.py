@@ -1,3 +1,4 @@
 from .agent import FetchAgent
+from .multi_source import MultiSourceFetchAgent, parse_sources
 
-__all__ = ["FetchAgent"]
+__all__ = ["FetchAgent", "MultiSourceFetchAgent", "parse_sources"]
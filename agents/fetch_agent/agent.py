@@ -5,12 +5,88 @@ Fetch Agent - 推文抓取代理
 
 import json
 import os
-import re
 import subprocess
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional
 
 from agents.base import BaseAgent
+from agents.fetch_agent.cdp_client import CDPSession, CDPConnectionError
+from agents.fetch_agent.parser import parse_snapshot
+from agents.fetch_agent.timeline import TimelineCapture, decode_timeline_response
+
+
+# 标记当前已渲染的 article（像素滚动回退路径使用）
+_MARK_ARTICLES_JS = """
+(function() {
+    document.querySelectorAll('article').forEach(function(article) {
+        article.setAttribute('data-tm-seen', '1');
+    });
+    return { marked: true };
+})()
+"""
+
+# 等待时间线出现 article 或登录表单，%d 为超时毫秒数
+_WAIT_PAGE_READY_JS = """
+new Promise(function(resolve) {
+    var start = Date.now();
+    function check() {
+        if (document.querySelector('article')) {
+            return resolve({ ready: true, state: 'timeline', waited: Date.now() - start });
+        }
+        if (document.querySelector('input[autocomplete="username"], a[href="/login"]')) {
+            return resolve({ ready: true, state: 'login', waited: Date.now() - start });
+        }
+        if (Date.now() - start > %d) {
+            return resolve({ ready: false, waited: Date.now() - start });
+        }
+        setTimeout(check, 100);
+    }
+    check();
+})
+"""
+
+# 等待出现未标记的 article，之后 DOM 静默 250ms 视为渲染完成，%d 为超时毫秒数
+_WAIT_NEW_ARTICLES_JS = """
+new Promise(function(resolve) {
+    var start = Date.now();
+    var timeoutMs = %d;
+    var settleTimer = null;
+    var observer = null;
+    function finish(ready) {
+        if (observer) { observer.disconnect(); }
+        clearTimeout(settleTimer);
+        resolve({ ready: ready, waited: Date.now() - start });
+    }
+    function check() {
+        if (document.querySelector('article:not([data-tm-seen])')) {
+            clearTimeout(settleTimer);
+            settleTimer = setTimeout(function() { finish(true); }, 250);
+        }
+    }
+    observer = new MutationObserver(check);
+    observer.observe(document.body, { childList: true, subtree: true });
+    setTimeout(function() { finish(false); }, timeoutMs);
+    check();
+})
+"""
+
+# 点击时间线顶部的标签页（如 "Following"），%s 为 JSON 编码的标签文字
+_SELECT_TAB_JS = """
+(function() {
+    var label = %s;
+    var tabs = Array.from(document.querySelectorAll('[role="tab"]'));
+    var tab = tabs.find(function(t) { return t.textContent.trim() === label; });
+    if (!tab) { return { success: false, tabs: tabs.length }; }
+    if (tab.getAttribute('aria-selected') === 'true') { return { success: true, selected: true }; }
+    document.querySelectorAll('article').forEach(function(article) {
+        article.setAttribute('data-tm-seen', '1');
+    });
+    tab.click();
+    return { success: true, selected: false };
+})()
+"""
 
 
 class FetchAgent(BaseAgent):
@@ -22,31 +98,126 @@ class FetchAgent(BaseAgent):
         data_dir: str = None,
         scroll_count: int = 3,
         cdp_port: int = None,
+        browser_driver: str = None,
+        fetch_mode: str = None,
+        max_scroll_count: int = None,
+        seen_filter: Optional[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]] = None,
+        target_id: str = None,
+        name: str = "FetchAgent",
+        record_dir: str = None,
     ):
-        super().__init__(name="FetchAgent")
+        super().__init__(name=name)
 
         self.session = session or os.getenv("BROWSER_SESSION", "twitter")
         self.data_dir = Path(
             os.path.expanduser(data_dir or os.getenv("DATA_DIR", "~/.twitter-monitor"))
         )
         self.scroll_count = scroll_count
+        # 自适应滚动：提供 seen_filter（返回以前未见过的推文）时，滚动到已读位置即停止，最多 max_scroll_count 次
+        self.seen_filter = seen_filter
+        self.max_scroll_count = max(
+            max_scroll_count or int(os.getenv("MAX_SCROLL_COUNT", "10")), scroll_count
+        )
+        self.last_scroll_stats: Dict[str, Any] = {}
+        self.wait_stats: Dict[str, float] = {}
         self.cdp_port = cdp_port or int(os.getenv("CDP_PORT", "9222"))
+        # 指定 target_id 时只操作这个标签页（多源并发抓取时每个来源一个标签页）
+        self.target_id = target_id
         self.state_file = self.data_dir / "twitter_auth.json"
 
-        self._log(f"CDP Port: {self.cdp_port}", "info")
+        # 浏览器驱动: cdp (进程内持久连接) / agent-browser (每条命令一个子进程)
+        self.browser_driver = (
+            browser_driver or os.getenv("BROWSER_DRIVER", "cdp")
+        ).strip().lower()
+        self._cdp: Optional[CDPSession] = None
+        self._capture: Optional[TimelineCapture] = None
+
+        # 录制模式：把每次抓取的 snapshot / eval 原始输出写入 JSONL，供离线回放基准使用
+        record_dir = record_dir or os.getenv("RECORD_DIR")
+        self.record_dir = Path(os.path.expanduser(record_dir)) if record_dir else None
+        self._record_file: Optional[Path] = None
+
+        # 抓取模式: snapshot (无障碍树快照 + 正则) / network (拦截时间线 GraphQL 响应，需 cdp 驱动)
+        self.fetch_mode = (fetch_mode or os.getenv("FETCH_MODE", "snapshot")).strip().lower()
+
+        self._log(
+            f"CDP Port: {self.cdp_port} (driver: {self.browser_driver}, mode: {self.fetch_mode})",
+            "info",
+        )
         self.is_initialized = True
 
-    def execute(self, url: str = "https://x.com/home") -> Dict[str, Any]:
-        self._log(f"开始抓取: {url}")
+    def execute(
+        self,
+        url: str = "https://x.com/home",
+        tab: str = None,
+        on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        抓取时间线
+
+        Args:
+            url: 时间线页面地址
+            tab: 页面加载后需要切换到的标签页文字（如 "Following"）
+            on_batch: 每次滚动收集后以本批次新增的推文调用（流水线模式下边抓取边过滤 / 分析）
+        """
+        self._log(f"开始抓取: {url}" + (f" [{tab}]" if tab else ""))
+        self.wait_stats = {"chrome_startup": 0.0, "page_ready": 0.0, "scroll": 0.0}
+        if self.record_dir is not None:
+            self._start_recording(url, tab)
+
+        error = self.ensure_browser()
+        if error:
+            return self._error(error)
+
+        # network 模式需要在刷新页面之前开始监听
+        capture = self._start_capture() if self.fetch_mode == "network" else None
+
+        if self.target_id:
+            # 专属标签页：直接导航到来源地址
+            success, output = self._run_browser("open", url)
+            if not success:
+                return self._error(f"打开页面失败: {output}")
+        else:
+            error = self._open_or_reload(url)
+            if error:
+                return self._error(error)
+
+        # 等待时间线（或登录页）渲染出来，而不是等 networkidle（X 的长轮询可能永远到不了）
+        started = time.monotonic()
+        self._wait_for_page_ready(timeout=float(os.getenv("PAGE_READY_TIMEOUT", "15")))
+        self.wait_stats["page_ready"] = time.monotonic() - started
 
-        # 检查 CDP 是否在运行，如果没有则启动
+        # 验证是否成功登录
+        self._log("验证登录状态...", "info")
+        is_logged_in, login_error = self._verify_login()
+        if not is_logged_in:
+            return self._error(login_error)
+
+        if tab:
+            if capture is not None:
+                # 丢弃切换前默认标签页的响应
+                try:
+                    capture.harvest()
+                except (CDPConnectionError, RuntimeError, TimeoutError):
+                    pass
+                # 切换后重新等待新标签页的首个响应
+                capture.responses_seen = 0
+            self._select_tab(tab)
+
+        return self._scroll_and_collect(capture, on_batch)
+
+    def ensure_browser(self) -> Optional[str]:
+        """
+        检查 CDP 是否在运行，如果没有则启动 Chrome
+
+        Returns:
+            错误信息，成功时为 None
+        """
         import urllib.request
-        chrome_was_running = False
 
         try:
             urllib.request.urlopen(f"http://localhost:{self.cdp_port}/json/version", timeout=2)
             self._log("CDP 浏览器已在运行", "info")
-            chrome_was_running = True
         except Exception:
             self._log("CDP 浏览器未运行，正在启动...", "info")
             # 启动 Chrome
@@ -65,16 +236,18 @@ class FetchAgent(BaseAgent):
                 stderr=subprocess.DEVNULL
             )
 
-            # 等待启动
-            import time
-            time.sleep(3)
-
-            # 验证启动成功
-            try:
-                urllib.request.urlopen(f"http://localhost:{self.cdp_port}/json/version", timeout=2)
-                self._log("Chrome 启动成功", "success")
-            except Exception:
-                return self._error(f"Chrome 启动失败，请手动运行: ./login.sh")
+            # 轮询 /json/version 直到 CDP 就绪
+            started = time.monotonic()
+            ready = self._wait_for_cdp(timeout=float(os.getenv("CHROME_STARTUP_TIMEOUT", "15")))
+            self.wait_stats["chrome_startup"] = time.monotonic() - started
+            if not ready:
+                return "Chrome 启动失败，请手动运行: ./login.sh"
+            self._log(f"Chrome 启动成功 ({self.wait_stats['chrome_startup']:.1f}s)", "success")
+        return None
+
+    def _open_or_reload(self, url: str) -> Optional[str]:
+        """复用已打开的 Twitter 页面并刷新，没有则打开新页面；返回错误信息"""
+        import urllib.request
 
         # 检查是否已有活跃的页面访问 Twitter
         try:
@@ -93,7 +266,7 @@ class FetchAgent(BaseAgent):
             if not twitter_page_found:
                 success, output = self._run_browser("open", url)
                 if not success:
-                    return self._error(f"打开页面失败: {output}")
+                    return f"打开页面失败: {output}"
                 self._log("打开新 Twitter 页面", "info")
             else:
                 # 刷新页面确保是最新的
@@ -102,7 +275,7 @@ class FetchAgent(BaseAgent):
                     self._log(f"刷新页面失败，尝试重新打开: {output}", "warning")
                     success, output = self._run_browser("open", url)
                     if not success:
-                        return self._error(f"打开页面失败: {output}")
+                        return f"打开页面失败: {output}"
                 else:
                     self._log("复用已有页面并刷新", "success")
 
@@ -110,58 +283,116 @@ class FetchAgent(BaseAgent):
             self._log(f"检查页面失败，尝试打开新页面: {e}", "warning")
             success, output = self._run_browser("open", url)
             if not success:
-                return self._error(f"打开页面失败: {output}")
-
-        self._run_browser("wait", "--load", "networkidle")
-
-        # 验证是否成功登录
-        self._log("验证登录状态...", "info")
-        is_logged_in, login_error = self._verify_login()
-        if not is_logged_in:
-            return self._error(login_error)
-
+                return f"打开页面失败: {output}"
+        return None
+
+    def _select_tab(self, tab: str) -> bool:
+        """切换时间线标签页，并等待新标签页的推文渲染"""
+        result = self._eval_json(_SELECT_TAB_JS % json.dumps(tab))
+        if not result or not result.get("success"):
+            self._log(f"未找到标签页: {tab}", "warning")
+            return False
+        if not result.get("selected"):
+            self._wait_for_new_articles(timeout_ms=int(os.getenv("SCROLL_WAIT_TIMEOUT_MS", "3000")))
+        return True
+
+    def _scroll_and_collect(
+        self,
+        capture: Optional[TimelineCapture],
+        on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ) -> Dict[str, Any]:
+        """滚动时间线并收集推文，直到到达高水位、停滞或滚动次数上限"""
         # 多次滚动，每次滚动后收集推文（避免丢失）
         all_tweets = {}  # 使用 dict 去重，key 是 (author, content_hash)
-        self._log(f"开始滚动加载推文 ({self.scroll_count} 次)...", "info")
-
-        for scroll_num in range(self.scroll_count):
-            # 获取当前快照
-            success, output = self._run_browser("snapshot", "--json")
-            if success:
+        # 至少收集一批（SCROLL_COUNT=0 时只读取首屏，不滚动）
+        if self.seen_filter is not None:
+            max_scrolls = max(self.max_scroll_count, 1)
+            self._log(f"开始自适应滚动 (最多 {max_scrolls} 次，到达已读推文即停止)...", "info")
+        else:
+            max_scrolls = max(self.scroll_count, 1)
+            self._log(f"开始滚动加载推文 ({max_scrolls} 次)...", "info")
+
+        idle_batches = 0
+        stop_reason = "limit"
+        seen_ids = set()  # 真实推文 ID（ref_id 每次快照都会变化，不参与）
+        for scroll_num in range(max_scrolls):
+            tweets = self._collect_batch(capture)
+            if capture is not None and not capture.responses_seen:
+                # 等待后仍没有时间线响应（接口不可用）：本次运行只读取快照，不与接口推文混用
+                self._log("未收到时间线响应，本次运行改为读取快照", "warning")
+                self._stop_capture(capture)
+                capture = None
+                tweets = self._collect_batch(None)
+            tweets = tweets or []
+            fresh = []
+
+            # 合并到总列表（按真实推文 ID，以及 author + content 前50字符去重）
+            for tweet in tweets:
+                # 使用 author + content 的前50个字符作为唯一标识
+                # 避免同一个作者的不同推文被误判为重复
+                content_preview = tweet["content"][:50]
+                tweet_key = f"{tweet['author']}_{content_preview}"
+                tweet_id = str(tweet.get("id", ""))
+
+                if tweet_key not in all_tweets and tweet_id not in seen_ids:
+                    all_tweets[tweet_key] = tweet
+                    if tweet_id.isdigit():
+                        seen_ids.add(tweet_id)
+                    fresh.append(tweet)
+            added = len(fresh)
+
+            if on_batch is not None and fresh:
                 try:
-                    snapshot = json.loads(output)
-                    tweets = self._extract_tweets(snapshot)
-
-                    # 合并到总列表（按 author + content 前50字符去重）
-                    for tweet in tweets:
-                        # 使用 author + content 的前50个字符作为唯一标识
-                        # 避免同一个作者的不同推文被误判为重复
-                        content_preview = tweet["content"][:50]
-                        tweet_key = f"{tweet['author']}_{content_preview}"
-
-                        if tweet_key not in all_tweets:
-                            all_tweets[tweet_key] = tweet
-
-                    self._log(
-                        f"第 {scroll_num + 1}/{self.scroll_count} 次: "
-                        f"当前批次 {len(tweets)} 条, 累计 {len(all_tweets)} 条",
-                        "info"
-                    )
-                except json.JSONDecodeError as e:
-                    self._log(f"解析快照失败: {e}", "warning")
+                    on_batch(fresh)
+                except Exception as e:
+                    # 回调失败不影响抓取，调用方会用最终结果补齐
+                    self._log(f"批次回调失败: {e}", "warning")
+
+            self._log(
+                f"第 {scroll_num + 1}/{max_scrolls} 次: "
+                f"当前批次 {len(tweets)} 条, 新增 {added} 条, 累计 {len(all_tweets)} 条",
+                "info"
+            )
+
+            if self.seen_filter is not None:
+                # 高水位：整批都是以前运行中见过的推文，说明已经追上上次的位置
+                if self._reached_high_water_mark(tweets):
+                    stop_reason = "high_water_mark"
+                    self._log("当前批次全部为已读推文，停止滚动", "info")
+                    break
+                # 连续两批没有新内容，时间线没有继续加载
+                idle_batches = idle_batches + 1 if added == 0 else 0
+                if idle_batches >= 2:
+                    stop_reason = "stalled"
+                    self._log("连续两批没有新推文，停止滚动", "warning")
+                    break
 
             # 继续滚动（最后一次不需要滚动）
-            if scroll_num < self.scroll_count - 1:
+            if scroll_num < max_scrolls - 1:
                 # 使用 JavaScript 精确滚动到最后一个推文
                 success = self._scroll_to_next_batch()
 
                 if not success:
                     # 如果 JS 滚动失败，回退到像素滚动
+                    self._eval_json(_MARK_ARTICLES_JS)
                     self._run_browser("scroll", "down", "1200")
 
-                self._run_browser("wait", "2000")
-                if scroll_num % 2 == 0:
-                    self._run_browser("wait", "1000")
+                # 等待新的 article 渲染出来（超时上限与原固定等待一致）
+                started = time.monotonic()
+                self._wait_for_new_articles(timeout_ms=int(os.getenv("SCROLL_WAIT_TIMEOUT_MS", "3000")))
+                self.wait_stats["scroll"] += time.monotonic() - started
+
+        self.last_scroll_stats = {"scrolls": scroll_num + 1, "stop_reason": stop_reason}
+
+        total_wait = sum(self.wait_stats.values())
+        self._log(
+            f"等待耗时 {total_wait:.1f}s: Chrome 启动 {self.wait_stats['chrome_startup']:.1f}s, "
+            f"页面就绪 {self.wait_stats['page_ready']:.1f}s, 滚动加载 {self.wait_stats['scroll']:.1f}s",
+            "info",
+        )
+
+        if capture is not None:
+            self._stop_capture(capture)
 
         # 转换为列表并按时间排序
         final_tweets = list(all_tweets.values())
@@ -170,10 +401,140 @@ class FetchAgent(BaseAgent):
         self._log(f"✓ 总计提取到 {len(final_tweets)} 条推文", "success")
 
         return self._success(
-            data={"tweets": final_tweets, "count": len(final_tweets)},
+            data={
+                "tweets": final_tweets,
+                "count": len(final_tweets),
+                "scrolls": self.last_scroll_stats["scrolls"],
+                "stop_reason": self.last_scroll_stats["stop_reason"],
+                "wait_seconds": round(total_wait, 2),
+            },
             message=f"成功抓取 {len(final_tweets)} 条推文",
         )
 
+    def _wait_for_cdp(self, timeout: float = 15) -> bool:
+        """以指数退避轮询 /json/version，直到 Chrome 的 CDP 端口可用"""
+        import urllib.request
+
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        while True:
+            try:
+                urllib.request.urlopen(
+                    f"http://localhost:{self.cdp_port}/json/version", timeout=1
+                )
+                return True
+            except Exception:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, 1.0)
+
+    def _eval_json(self, js_code: str) -> Any:
+        """执行页面脚本并返回结果（Promise 会被等待）"""
+        success, output = self._run_browser("eval", "--json", js_code)
+        if not success:
+            return None
+        try:
+            return json.loads(output).get("data", {}).get("result")
+        except (json.JSONDecodeError, AttributeError):
+            return None
+
+    def _wait_for_page_ready(self, timeout: float = 15) -> bool:
+        """等待时间线中出现 article，或出现登录表单（交给 _verify_login 判断）"""
+        result = self._eval_json(_WAIT_PAGE_READY_JS % int(timeout * 1000))
+        ready = bool(result and result.get("ready"))
+        if not ready:
+            self._log(f"页面在 {timeout:.0f}s 内未渲染出推文，继续验证登录状态", "warning")
+        return ready
+
+    def _wait_for_new_articles(self, timeout_ms: int = 3000) -> bool:
+        """等待滚动后渲染出未标记过的 article，并在 DOM 短暂稳定后返回"""
+        result = self._eval_json(_WAIT_NEW_ARTICLES_JS % timeout_ms)
+        return bool(result and result.get("ready"))
+
+    def _reached_high_water_mark(self, tweets: List[Dict[str, Any]]) -> bool:
+        """批次内带真实推文 ID 的推文是否全部在以前的运行中见过"""
+        # ref_id 兜底的 ID 每次快照都会变化，不能用于判断
+        known = [t for t in tweets if str(t.get("id", "")).isdigit()]
+        if not known:
+            return False
+        return not self.seen_filter(known)
+
+    def _start_capture(self) -> Optional[TimelineCapture]:
+        """开始监听时间线接口响应，失败时回退到快照模式"""
+        if self.browser_driver != "cdp":
+            self._log("network 模式需要 BROWSER_DRIVER=cdp，回退到快照模式", "warning")
+            return None
+        try:
+            if self._cdp is None:
+                self._cdp = CDPSession(port=self.cdp_port, target_id=self.target_id)
+            if not self._cdp.connected:
+                self._cdp.connect()
+            # 复用同一个监听器，避免提前返回的轮次在会话上残留处理器
+            if self._capture is None or self._capture.session is not self._cdp:
+                self._capture = TimelineCapture(self._cdp)
+            self._capture.start()
+            return self._capture
+        except (CDPConnectionError, RuntimeError, TimeoutError) as e:
+            self._log(f"开启网络监听失败，回退到快照模式: {e}", "warning")
+            return None
+
+    def _stop_capture(self, capture: TimelineCapture):
+        """停止监听时间线响应（连接已断开时忽略错误）"""
+        try:
+            capture.stop()
+        except (CDPConnectionError, RuntimeError, TimeoutError):
+            pass
+
+    def _harvest(self, capture: TimelineCapture) -> List[Dict[str, Any]]:
+        """取回时间线响应；刷新后还没有收到任何响应时，最多等待 TIMELINE_FIRST_RESPONSE_TIMEOUT 秒"""
+        payloads = capture.harvest()
+        if capture.responses_seen:
+            return payloads
+
+        started = time.monotonic()
+        deadline = started + float(os.getenv("TIMELINE_FIRST_RESPONSE_TIMEOUT", "5"))
+        while not capture.responses_seen and time.monotonic() < deadline:
+            time.sleep(0.1)
+            payloads.extend(capture.harvest())
+        # 首个响应到达前的等待计入页面就绪
+        self.wait_stats["page_ready"] = self.wait_stats.get("page_ready", 0.0) + time.monotonic() - started
+        return payloads
+
+    def _collect_batch(self, capture: Optional[TimelineCapture]) -> Optional[List[Dict[str, Any]]]:
+        """
+        收集当前批次推文
+
+        network 模式下只解码时间线响应，本批没有新响应或读取失败时返回空列表 / None，不读取快照；
+        快照推文的 ID（ref_id）和正文与接口推文不同，两者混用会让同一条推文重复出现。
+        没有 capture（快照模式，或 _scroll_and_collect 判定接口不可用）时读取无障碍树快照
+        """
+        if capture is not None:
+            try:
+                tweets = []
+                payloads = self._harvest(capture)
+                for payload in payloads:
+                    tweets.extend(decode_timeline_response(payload))
+                self._count("timeline_responses", len(payloads))
+                if tweets:
+                    self._count("articles_parsed", len(tweets), mode="network")
+                    self._log(f"从时间线接口解码 {len(tweets)} 条推文", "info")
+                return tweets
+            except (CDPConnectionError, RuntimeError, TimeoutError) as e:
+                self._log(f"读取时间线响应失败，跳过本批: {e}", "warning")
+                return None
+
+        success, output = self._run_browser("snapshot", "--json")
+        if not success:
+            return None
+        self._count("snapshot_bytes", len(output))
+        try:
+            return self._extract_tweets(json.loads(output))
+        except json.JSONDecodeError as e:
+            self._log(f"解析快照失败: {e}", "warning")
+            return None
+
     def _verify_login(self) -> tuple[bool, str]:
         """
         验证是否已成功登录 Twitter
@@ -273,6 +634,62 @@ class FetchAgent(BaseAgent):
         return True, ""
 
     def _run_browser(self, *args) -> tuple[bool, str]:
+        """执行浏览器命令，优先走持久 CDP 会话，连接不可用时回退到 agent-browser 子进程"""
+        started = time.perf_counter()
+        with self._timer("browser_call_seconds", command=args[0] if args else "", driver=self.browser_driver):
+            success, output = self._dispatch_browser(*args)
+        if self._record_file is not None and args and args[0] in ("snapshot", "eval"):
+            self._record_call(args, success, output, time.perf_counter() - started)
+        return success, output
+
+    def _start_recording(self, url: str, tab: Optional[str]):
+        """为本次抓取新建录制文件，第一行为元数据"""
+        self.record_dir.mkdir(parents=True, exist_ok=True)
+        slug = "".join(c if c.isalnum() else "_" for c in self.name).strip("_").lower()
+        self._record_file = self.record_dir / f"{datetime.now():%Y%m%d-%H%M%S}-{slug}.jsonl"
+        meta = {
+            "type": "meta",
+            "url": url,
+            "tab": tab,
+            "fetch_mode": self.fetch_mode,
+            "browser_driver": self.browser_driver,
+            "recorded_at": datetime.now().isoformat(),
+        }
+        with open(self._record_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+        self._log(f"录制浏览器输出: {self._record_file}", "info")
+
+    def _record_call(self, args: tuple, success: bool, output: str, elapsed: float):
+        entry = {
+            "type": "call",
+            "args": list(args),
+            "success": success,
+            "output": output,
+            "elapsed_ms": round(elapsed * 1000, 1),
+        }
+        try:
+            with open(self._record_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            self._log(f"写入录制文件失败: {e}", "warning")
+            self._record_file = None
+
+    def _dispatch_browser(self, *args) -> tuple[bool, str]:
+        if self.browser_driver == "cdp":
+            try:
+                if self._cdp is None:
+                    self._cdp = CDPSession(port=self.cdp_port, target_id=self.target_id)
+                return self._cdp.run(*args)
+            except CDPConnectionError as e:
+                self.close()
+                # agent-browser 无法指定标签页，专属标签页不回退
+                if self.target_id:
+                    return False, f"标签页不可用: {e}"
+                self._log(f"CDP 会话不可用，回退到 agent-browser: {e}", "warning")
+
+        return self._run_agent_browser(*args)
+
+    def _run_agent_browser(self, *args) -> tuple[bool, str]:
         """Run agent-browser command using CDP mode to connect to existing Chrome"""
         cmd = ["agent-browser", "--cdp", str(self.cdp_port), *args]
         try:
@@ -283,6 +700,13 @@ class FetchAgent(BaseAgent):
         except Exception as e:
             return False, str(e)
 
+    def close(self):
+        """关闭持久 CDP 会话（浏览器本身保持运行）"""
+        if self._cdp is not None:
+            self._cdp.close()
+            self._cdp = None
+        self._capture = None
+
     def _scroll_to_next_batch(self) -> bool:
         """使用 JavaScript 精确滚动 - 每次滚动1条推文的高度"""
         # 使用 IIFE 而非箭头函数，因为 agent-browser eval 不支持箭头函数
@@ -291,6 +715,9 @@ class FetchAgent(BaseAgent):
             const articles = Array.from(document.querySelectorAll('article'));
             const viewportHeight = window.innerHeight;
 
+            // 标记当前已渲染的 article，滚动后据此判断是否有新内容
+            articles.forEach(function(article) { article.setAttribute('data-tm-seen', '1'); });
+
             if (articles.length === 0) {
                 return { success: false, count: 0 };
             }
@@ -342,70 +769,10 @@ class FetchAgent(BaseAgent):
         return False
 
     def _extract_tweets(self, snapshot: dict) -> List[Dict[str, Any]]:
-        tweets = []
-        skipped_reasons = {
-            "too_short": 0,
-            "carousel": 0,
-            "video": 0,
-            "no_author": 0,
-        }
-
-        # agent-browser --json 返回 {"success": true, "data": {"refs": {...}}}
-        refs = snapshot.get("data", {}).get("refs", {})
-        snapshot_text = snapshot.get("data", {}).get("snapshot", "")
-
-        for ref_id, ref_data in refs.items():
-            if ref_data.get("role") == "article":
-                name = ref_data.get("name", "")
-
-                # 降低长度要求，只要有内容就尝试提取
-                if not name or len(name) < 20:
-                    skipped_reasons["too_short"] += 1
-                    continue
-
-                # 过滤 Carousel（轮播推荐/广告区）
-                if "carousel" in name.lower():
-                    skipped_reasons["carousel"] += 1
-                    continue
-
-                # 从 name 中提取作者 (@username)
-                author_match = re.search(r"@(\w+)", name)
-                if not author_match:
-                    skipped_reasons["no_author"] += 1
-                    continue
-
-                author = author_match.group(1)
-
-                # 提取时间信息
-                time_str = self._extract_time(name)
-                timestamp = self._parse_time_to_timestamp(time_str)
-
-                # 提取互动数据 (replies, reposts, likes, views)
-                engagement = self._extract_engagement(name)
-
-                # 提取推文 URL
-                tweet_url = self._extract_tweet_url(author, snapshot_text, ref_id)
-
-                # 从 name 中提取 tweet ID (从 URL 模式)
-                tweet_id = ref_id  # 使用 ref_id 作为 fallback
-
-                # 提取实际内容（去除元数据）
-                content = self._extract_content(name, author, time_str)
-
-                tweets.append(
-                    {
-                        "id": tweet_id,
-                        "content": content,
-                        "author": author,
-                        "time": time_str,
-                        "timestamp": timestamp,
-                        "engagement": engagement,
-                        "url": tweet_url,
-                    }
-                )
-
-        # 按时间戳排序（最新的在前面）
-        tweets.sort(key=lambda t: t.get("timestamp", 0), reverse=True)
+        """从 agent-browser 快照中解析推文（单次扫描，见 parser.parse_snapshot）"""
+        tweets, skipped_reasons = parse_snapshot(snapshot)
+        self._count("articles_parsed", len(tweets), mode="snapshot")
+        self._count("articles_skipped", sum(skipped_reasons.values()))
 
         # 输出统计信息
         self._log(
@@ -418,119 +785,3 @@ class FetchAgent(BaseAgent):
         )
 
         return tweets
-
-    def _extract_tweet_url(self, author: str, snapshot_text: str, ref_id: str) -> str:
-        """从 snapshot 中提取推文 URL"""
-        # 在 snapshot 文本中查找该作者的 status URL
-        # 格式类似: /url: /author/status/1234567890
-        pattern = rf"/url: /{author}/status/(\d+)"
-        match = re.search(pattern, snapshot_text)
-
-        if match:
-            status_id = match.group(1)
-            return f"https://x.com/{author}/status/{status_id}"
-
-        # 如果找不到，返回作者主页
-        return f"https://x.com/{author}"
-
-    def _extract_time(self, name: str) -> str:
-        """从 name 中提取时间信息"""
-        # 匹配 "4 hours ago", "Jan 28", "15h" 等格式
-        time_patterns = [
-            r"(\d+)\s+hours?\s+ago",
-            r"(\d+)h\b",
-            r"(\d+)\s+minutes?\s+ago",
-            r"(\d+)m\b",
-            r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d+",
-        ]
-        for pattern in time_patterns:
-            match = re.search(pattern, name)
-            if match:
-                return match.group(0)
-        return "unknown"
-
-    def _parse_time_to_timestamp(self, time_str: str) -> int:
-        """将时间字符串转换为时间戳（用于排序）"""
-        import time as time_module
-        from datetime import datetime, timedelta
-
-        now = datetime.now()
-
-        # 小时前
-        match = re.match(r"(\d+)\s*h", time_str)
-        if match:
-            hours = int(match.group(1))
-            return int((now - timedelta(hours=hours)).timestamp())
-
-        # "X hours ago"
-        match = re.match(r"(\d+)\s+hours?\s+ago", time_str)
-        if match:
-            hours = int(match.group(1))
-            return int((now - timedelta(hours=hours)).timestamp())
-
-        # 分钟前
-        match = re.match(r"(\d+)\s*m", time_str)
-        if match:
-            minutes = int(match.group(1))
-            return int((now - timedelta(minutes=minutes)).timestamp())
-
-        # 日期格式 "Jan 28"
-        if "Jan" in time_str or "Feb" in time_str or "Dec" in time_str:
-            # 粗略估计：假设是昨天或前天
-            return int((now - timedelta(days=1)).timestamp())
-
-        # 默认返回0（最旧）
-        return 0
-
-    def _extract_engagement(self, name: str) -> dict:
-        """提取互动数据"""
-        engagement = {
-            "replies": 0,
-            "reposts": 0,
-            "likes": 0,
-            "views": 0,
-        }
-
-        # 匹配 "63 replies, 12 reposts, 1058 likes, 313816 views"
-        replies_match = re.search(r"(\d+)\s+repl(?:y|ies)", name)
-        reposts_match = re.search(r"(\d+)\s+repost", name)
-        likes_match = re.search(r"(\d+)\s+like", name)
-        views_match = re.search(r"(\d+)\s+views", name)
-
-        if replies_match:
-            engagement["replies"] = int(replies_match.group(1))
-        if reposts_match:
-            engagement["reposts"] = int(reposts_match.group(1))
-        if likes_match:
-            engagement["likes"] = int(likes_match.group(1))
-        if views_match:
-            engagement["views"] = int(views_match.group(1))
-
-        return engagement
-
-    def _extract_content(self, name: str, author: str, time_str: str) -> str:
-        """提取推文实际内容，去除作者名和时间等元数据"""
-        # 去除开头的 "作者名 Verified account @username 时间"
-        content = name
-
-        # 移除 Verified account
-        content = re.sub(r"Verified account", "", content)
-
-        # 移除作者名（假设在开头）
-        content = re.sub(r"^[^@]+@\w+\s+", "", content)
-
-        # 移除时间
-        content = content.replace(time_str, "")
-
-        # 移除 "Embedded video" 和播放控制文本
-        content = re.sub(r"Embedded video\s*", "", content)
-        content = re.sub(r"Play Video\s*", "", content)
-        content = re.sub(r"Play\s+Embed\s*", "", content)
-
-        # 移除尾部的互动数据
-        content = re.sub(r"\d+\s+repl(?:y|ies).*$", "", content)
-
-        # 清理多余空格
-        content = " ".join(content.split())
-
-        return content[:500]
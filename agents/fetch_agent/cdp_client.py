@@ -0,0 +1,373 @@
+"""
+CDP Session - 持久化的 Chrome DevTools Protocol 客户端
+每个 FetchAgent 复用一条 DevTools WebSocket 连接，命令接口与 agent-browser 保持一致，
+避免每条命令都启动一次 Node 进程并重新握手
+"""
+
+import json
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class CDPConnectionError(Exception):
+    """CDP 连接不可用（未安装 websocket-client / 浏览器未启动 / 连接断开）"""
+
+
+# 快照中不单独输出的 AX 角色（只展开其子节点）
+_TRANSPARENT_ROLES = {
+    "generic",
+    "none",
+    "presentation",
+    "StaticText",
+    "InlineTextBox",
+    "LineBreak",
+    "RootWebArea",
+    "WebArea",
+    "group",
+    "paragraph",
+    "LayoutTable",
+    "LayoutTableRow",
+    "LayoutTableCell",
+}
+
+
+class CDPSession:
+    """
+    持久 CDP 会话
+    提供与 agent-browser 相同的命令面: open / reload / wait / scroll / eval / snapshot
+    返回值同样是 (success, output)，output 的 JSON 结构与 agent-browser --json 一致
+    """
+
+    def __init__(
+        self,
+        port: int = 9222,
+        host: str = "localhost",
+        timeout: float = 60,
+        target_id: Optional[str] = None,
+    ):
+        self.port = port
+        self.host = host
+        self.timeout = timeout
+        self.target_id = target_id
+        self.ws = None
+        # 未被处理器消费的事件只保留最近一部分，避免常驻模式下无限增长
+        self.events: deque = deque(maxlen=1000)
+        self.event_handlers: List[Callable[[Dict[str, Any]], None]] = []
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    # ========== 连接管理 ==========
+
+    @property
+    def connected(self) -> bool:
+        return self.ws is not None and self.ws.connected
+
+    def connect(self) -> "CDPSession":
+        """连接到目标页面（优先已打开的 x.com 页面）"""
+        try:
+            import websocket
+        except ImportError as e:
+            raise CDPConnectionError("未安装 websocket-client") from e
+
+        target = self._find_target()
+        try:
+            self.ws = websocket.create_connection(
+                target["webSocketDebuggerUrl"],
+                timeout=self.timeout,
+                suppress_origin=True,
+                enable_multithread=True,
+            )
+        except Exception as e:
+            raise CDPConnectionError(f"连接 DevTools WebSocket 失败: {e}") from e
+
+        self.target_id = target.get("id")
+        self.send("Page.enable")
+        self.send("Runtime.enable")
+        return self
+
+    def close(self):
+        if self.ws is not None:
+            try:
+                self.ws.close()
+            except Exception:
+                pass
+        self.ws = None
+
+    def _http_json(self, path: str, method: str = "GET") -> Any:
+        request = urllib.request.Request(
+            f"http://{self.host}:{self.port}{path}", method=method
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.loads(response.read())
+
+    def list_targets(self) -> List[Dict[str, Any]]:
+        """列出浏览器中的页面（不需要 WebSocket 连接）"""
+        try:
+            return [p for p in self._http_json("/json") if p.get("type") == "page"]
+        except Exception as e:
+            raise CDPConnectionError(f"无法访问 CDP 端口 {self.port}: {e}") from e
+
+    def create_target(self, url: str = "about:blank") -> str:
+        """新建标签页，返回 target id"""
+        try:
+            return self._http_json(f"/json/new?{url}", method="PUT")["id"]
+        except Exception as e:
+            raise CDPConnectionError(f"创建新页面失败: {e}") from e
+
+    def close_target(self, target_id: str):
+        """关闭标签页"""
+        try:
+            urllib.request.urlopen(
+                f"http://{self.host}:{self.port}/json/close/{target_id}", timeout=5
+            ).close()
+        except Exception:
+            pass
+
+    def _find_target(self) -> Dict[str, Any]:
+        try:
+            pages = [
+                p for p in self._http_json("/json") if p.get("type") == "page"
+            ]
+        except Exception as e:
+            raise CDPConnectionError(f"无法访问 CDP 端口 {self.port}: {e}") from e
+
+        if self.target_id:
+            for page in pages:
+                if page.get("id") == self.target_id:
+                    return page
+            raise CDPConnectionError(f"目标页面不存在: {self.target_id}")
+
+        for page in pages:
+            if "x.com" in page.get("url", ""):
+                return page
+        if pages:
+            return pages[0]
+
+        try:
+            return self._http_json("/json/new?about:blank", method="PUT")
+        except Exception as e:
+            raise CDPConnectionError(f"创建新页面失败: {e}") from e
+
+    def send(
+        self, method: str, params: Optional[Dict[str, Any]] = None, timeout: float = None
+    ) -> Dict[str, Any]:
+        """发送 CDP 命令并等待对应 id 的响应，期间收到的事件写入 self.events"""
+        if not self.connected:
+            raise CDPConnectionError("CDP 会话未连接")
+
+        import websocket
+
+        with self._lock:
+            self._next_id += 1
+            message_id = self._next_id
+            deadline = time.monotonic() + (timeout or self.timeout)
+            try:
+                self.ws.send(
+                    json.dumps({"id": message_id, "method": method, "params": params or {}})
+                )
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"{method} 超时")
+                    self.ws.settimeout(remaining)
+                    message = json.loads(self.ws.recv())
+                    if message.get("id") == message_id:
+                        break
+                    if "method" in message:
+                        self._dispatch_event(message)
+            except TimeoutError:
+                raise
+            except websocket.WebSocketTimeoutException as e:
+                raise TimeoutError(f"{method} 超时") from e
+            except Exception as e:
+                self.close()
+                raise CDPConnectionError(f"CDP 连接中断: {e}") from e
+
+        if "error" in message:
+            raise RuntimeError(message["error"].get("message", str(message["error"])))
+        return message.get("result", {})
+
+    def _dispatch_event(self, message: Dict[str, Any]):
+        self.events.append(message)
+        for handler in self.event_handlers:
+            handler(message)
+
+    def drain_events(self, method: Optional[str] = None) -> List[Dict[str, Any]]:
+        """取出已缓存的事件（可按 method 过滤）"""
+        events = list(self.events)
+        if method is None:
+            self.events.clear()
+            return events
+        matched = [e for e in events if e.get("method") == method]
+        self.events = deque(
+            (e for e in events if e.get("method") != method), maxlen=self.events.maxlen
+        )
+        return matched
+
+    # ========== agent-browser 兼容命令 ==========
+
+    def run(self, *args) -> Tuple[bool, str]:
+        """
+        执行与 agent-browser 相同的命令
+
+        Raises:
+            CDPConnectionError: 连接不可用，由调用方回退到子进程模式
+        """
+        if not args:
+            return False, "缺少命令"
+
+        if not self.connected:
+            self.connect()
+
+        command, params = args[0], list(args[1:])
+        handler = getattr(self, f"_cmd_{command}", None)
+        if handler is None:
+            return False, f"不支持的命令: {command}"
+
+        try:
+            return True, handler(params)
+        except CDPConnectionError:
+            raise
+        except Exception as e:
+            return False, str(e)
+
+    def _cmd_open(self, params: List[str]) -> str:
+        url = params[0] if params else "about:blank"
+        result = self.send("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            raise RuntimeError(result["errorText"])
+        self._wait_ready_state()
+        return json.dumps({"success": True, "data": {"url": url}})
+
+    def _cmd_reload(self, params: List[str]) -> str:
+        self.send("Page.reload", {"ignoreCache": False})
+        self._wait_ready_state()
+        return json.dumps({"success": True, "data": {}})
+
+    def _cmd_wait(self, params: List[str]) -> str:
+        if params and params[0] == "--load":
+            # networkidle 在 X 的长轮询下往往等不到，统一按 load 完成处理
+            self._wait_ready_state()
+        elif params:
+            time.sleep(int(params[0]) / 1000)
+        return json.dumps({"success": True, "data": {}})
+
+    def _cmd_scroll(self, params: List[str]) -> str:
+        direction = params[0] if params else "down"
+        amount = int(params[1]) if len(params) > 1 else 300
+        dx, dy = {
+            "down": (0, amount),
+            "up": (0, -amount),
+            "right": (amount, 0),
+            "left": (-amount, 0),
+        }.get(direction, (0, amount))
+        self.evaluate(f"window.scrollBy({dx}, {dy})")
+        return json.dumps({"success": True, "data": {}})
+
+    def _cmd_eval(self, params: List[str]) -> str:
+        script = [p for p in params if p != "--json"]
+        # 与 agent-browser (Playwright) 一致：返回 Promise 时等待其结果
+        value = self.evaluate(script[0] if script else "undefined", await_promise=True)
+        return json.dumps({"success": True, "data": {"result": value}})
+
+    def _cmd_snapshot(self, params: List[str]) -> str:
+        snapshot_text, refs = self.snapshot()
+        if "--json" not in params:
+            return snapshot_text
+        return json.dumps(
+            {"success": True, "data": {"snapshot": snapshot_text, "refs": refs}},
+            ensure_ascii=False,
+        )
+
+    # ========== 底层能力 ==========
+
+    def evaluate(self, expression: str, await_promise: bool = False) -> Any:
+        result = self.send(
+            "Runtime.evaluate",
+            {
+                "expression": expression,
+                "returnByValue": True,
+                "awaitPromise": await_promise,
+            },
+        )
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise RuntimeError(
+                details.get("exception", {}).get("description") or details.get("text")
+            )
+        return result.get("result", {}).get("value")
+
+    def _wait_ready_state(self, timeout: float = 30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self.evaluate("document.readyState") == "complete":
+                    return
+            except RuntimeError:
+                # 导航过程中执行上下文会被销毁，继续等待
+                pass
+            time.sleep(0.1)
+
+    def snapshot(self) -> Tuple[str, Dict[str, Dict[str, str]]]:
+        """
+        通过 Accessibility.getFullAXTree 生成与 agent-browser 相同格式的快照
+
+        Returns:
+            (snapshot_text, refs)，refs 形如 {"e1": {"role": "article", "name": "..."}}
+        """
+        nodes = self.send("Accessibility.getFullAXTree").get("nodes", [])
+        by_id = {node["nodeId"]: node for node in nodes}
+        child_ids = {cid for node in nodes for cid in node.get("childIds", [])}
+        roots = [node for node in nodes if node["nodeId"] not in child_ids]
+
+        lines: List[str] = []
+        refs: Dict[str, Dict[str, str]] = {}
+        stack = [(node, 0) for node in reversed(roots)]
+
+        while stack:
+            node, depth = stack.pop()
+            role = node.get("role", {}).get("value", "")
+            name = node.get("name", {}).get("value", "")
+            visible = not node.get("ignored") and role not in _TRANSPARENT_ROLES
+
+            child_depth = depth
+            if visible:
+                ref_id = f"e{len(refs) + 1}"
+                refs[ref_id] = {"role": role, "name": name}
+                label = f' "{name}"' if name else ""
+                lines.append(f"{'  ' * depth}- {role}{label} [ref={ref_id}]")
+
+                url = self._node_property(node, "url")
+                if url:
+                    lines.append(f"{'  ' * (depth + 1)}- /url: {self._relative_url(url)}")
+                child_depth = depth + 1
+
+            for child_id in reversed(node.get("childIds", [])):
+                child = by_id.get(child_id)
+                if child is not None:
+                    stack.append((child, child_depth))
+
+        return "\n".join(lines), refs
+
+    @staticmethod
+    def _node_property(node: Dict[str, Any], prop: str) -> Optional[str]:
+        for item in node.get("properties", []):
+            if item.get("name") == prop:
+                return item.get("value", {}).get("value")
+        return None
+
+    @staticmethod
+    def _relative_url(url: str) -> str:
+        for prefix in ("https://x.com", "https://twitter.com"):
+            if url.startswith(prefix):
+                return url[len(prefix):] or "/"
+        return url
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,287 @@
+"""
+Multi-Source Fetch - 多来源并发抓取
+每个来源（Home / Following / 列表 / 用户主页 / 搜索）使用独立的 CDP 标签页和独立的高水位，
+并发抓取后合并为一条去重的推文流
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+from agents.base import BaseAgent
+from agents.fetch_agent.agent import FetchAgent
+from agents.fetch_agent.cdp_client import CDPConnectionError, CDPSession
+
+
+SeenFilter = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+BatchCallback = Callable[[List[Dict[str, Any]]], None]
+
+
+def parse_sources(spec: str) -> List[Dict[str, Any]]:
+    """
+    解析 FETCH_SOURCES
+
+    格式（逗号分隔）:
+        home              For You 时间线
+        following         Following 时间线
+        list:<列表 ID>     列表
+        user:<用户名>      用户主页
+        search:<关键词>    搜索（最新）
+
+    chronological 表示时间线按时间倒序，可以用推文 ID 作为高水位
+    """
+    sources = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kind, _, value = item.partition(":")
+        kind, value = kind.strip().lower(), value.strip()
+
+        if kind == "home":
+            source = {"url": "https://x.com/home", "tab": None, "chronological": False}
+        elif kind == "following":
+            source = {"url": "https://x.com/home", "tab": "Following", "chronological": True}
+        elif kind == "list" and value:
+            source = {"url": f"https://x.com/i/lists/{value}", "tab": None, "chronological": True}
+        elif kind == "user" and value:
+            value = value.lstrip("@")
+            source = {"url": f"https://x.com/{value}", "tab": None, "chronological": True}
+        elif kind == "search" and value:
+            source = {
+                "url": f"https://x.com/search?q={quote(value)}&src=typed_query&f=live",
+                "tab": None,
+                "chronological": True,
+            }
+        else:
+            raise ValueError(f"无法识别的抓取来源: {item}")
+
+        source["name"] = f"{kind}:{value}" if value else kind
+        if all(s["name"] != source["name"] for s in sources):
+            sources.append(source)
+    return sources
+
+
+def _id_value(tweet_id: Any) -> int:
+    text = str(tweet_id)
+    return int(text) if text.isdigit() else 0
+
+
+class MultiSourceFetchAgent(BaseAgent):
+    """
+    多来源抓取代理
+
+    - 每个来源一个 FetchAgent，绑定各自的标签页（CDP target），在线程池中并发执行
+    - 按时间排序的来源以上次抓到的最大推文 ID 为高水位；Home 为推荐流，仍使用全局已读判断
+    - agent-browser 驱动无法指定标签页，此时按顺序在同一页面抓取
+    """
+
+    def __init__(
+        self,
+        sources: List[Dict[str, Any]],
+        seen_filter: Optional[SeenFilter] = None,
+        **fetch_kwargs: Any,
+    ):
+        super().__init__(name="MultiSourceFetchAgent")
+
+        self.sources = sources
+        self.seen_filter = seen_filter
+        self.fetch_kwargs = fetch_kwargs
+        # 各来源线程共享调用方的数据库连接，已读判断串行执行
+        self._seen_lock = threading.Lock()
+
+        # 不绑定标签页的代理：负责启动浏览器，以及 agent-browser 驱动下的顺序抓取
+        self.launcher = FetchAgent(**fetch_kwargs)
+        self._agents: Dict[str, FetchAgent] = {}
+
+        self._log(f"抓取来源: {', '.join(s['name'] for s in sources)}", "info")
+        self.is_initialized = True
+
+    def execute(
+        self,
+        cursors: Optional[Dict[str, str]] = None,
+        on_batch: Optional[BatchCallback] = None,
+    ) -> Dict[str, Any]:
+        """
+        并发抓取所有来源
+
+        Args:
+            cursors: 来源名 → 上次抓到的最大推文 ID
+            on_batch: 每个来源每次滚动后以新增推文调用（带 source 字段，可能在多个线程中同时调用）
+
+        Returns:
+            data 中 tweets 为合并去重后的推文，cursors 为本次各来源的新高水位
+        """
+        cursors = cursors or {}
+        started = time.monotonic()
+
+        error = self.launcher.ensure_browser()
+        if error:
+            return self._error(error)
+
+        if self.launcher.browser_driver == "cdp":
+            try:
+                results = self._fetch_concurrently(cursors, on_batch)
+            except CDPConnectionError as e:
+                self._log(f"创建标签页失败，改为顺序抓取: {e}", "warning")
+                results = self._fetch_sequentially(cursors, on_batch)
+        else:
+            results = self._fetch_sequentially(cursors, on_batch)
+
+        elapsed = time.monotonic() - started
+        return self._merge(results, cursors, elapsed)
+
+    def _fetch_concurrently(
+        self, cursors: Dict[str, str], on_batch: Optional[BatchCallback] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        agents = {source["name"]: self._agent_for(source) for source in self.sources}
+
+        def run(source: Dict[str, Any]) -> Dict[str, Any]:
+            agent = agents[source["name"]]
+            agent.seen_filter = self._seen_filter_for(source, cursors.get(source["name"]))
+            return self._timed(agent, source, on_batch)
+
+        with ThreadPoolExecutor(max_workers=len(self.sources)) as pool:
+            futures = {s["name"]: pool.submit(run, s) for s in self.sources}
+        return {name: future.result() for name, future in futures.items()}
+
+    def _fetch_sequentially(
+        self, cursors: Dict[str, str], on_batch: Optional[BatchCallback] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for source in self.sources:
+            self.launcher.seen_filter = self._seen_filter_for(source, cursors.get(source["name"]))
+            results[source["name"]] = self._timed(self.launcher, source, on_batch)
+        return results
+
+    def _timed(
+        self, agent: FetchAgent, source: Dict[str, Any], on_batch: Optional[BatchCallback] = None
+    ) -> Dict[str, Any]:
+        tagged = None
+        if on_batch is not None:
+            def tagged(tweets: List[Dict[str, Any]]):
+                on_batch([{**tweet, "source": source["name"]} for tweet in tweets])
+
+        started = time.monotonic()
+        try:
+            result = agent.execute(url=source["url"], tab=source["tab"], on_batch=tagged)
+        except Exception as e:
+            result = self._error(str(e))
+        result["elapsed"] = time.monotonic() - started
+        return result
+
+    def _agent_for(self, source: Dict[str, Any]) -> FetchAgent:
+        """获取来源对应的标签页代理，标签页被关闭时重新创建"""
+        probe = CDPSession(port=self.launcher.cdp_port)
+        alive = {page.get("id") for page in probe.list_targets()}
+
+        agent = self._agents.get(source["name"])
+        if agent is not None and agent.target_id in alive:
+            return agent
+        if agent is not None:
+            agent.close()
+
+        agent = FetchAgent(
+            **self.fetch_kwargs,
+            target_id=probe.create_target(),
+            name=f"FetchAgent:{source['name']}",
+        )
+        self._agents[source["name"]] = agent
+        return agent
+
+    def _seen_filter_for(
+        self, source: Dict[str, Any], cursor: Optional[str]
+    ) -> Optional[SeenFilter]:
+        """来源的高水位判断：时间倒序的来源比较推文 ID，推荐流使用全局已读记录"""
+        if self.seen_filter is None:
+            return None
+
+        if source["chronological"]:
+            if not cursor:
+                # 首次抓取该来源，没有高水位，按固定次数滚动
+                return None
+            mark = _id_value(cursor)
+            return lambda tweets: [t for t in tweets if _id_value(t.get("id")) > mark]
+
+        def locked(tweets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            with self._seen_lock:
+                return self.seen_filter(tweets)
+
+        return locked
+
+    def _merge(
+        self, results: Dict[str, Dict[str, Any]], cursors: Dict[str, str], elapsed: float
+    ) -> Dict[str, Any]:
+        """按推文 ID 合并各来源结果（无真实 ID 时按作者 + 内容前缀），记录首个来源"""
+        merged: Dict[str, Dict[str, Any]] = {}
+        stats: Dict[str, Dict[str, Any]] = {}
+        new_cursors = dict(cursors)
+
+        for source in self.sources:
+            name = source["name"]
+            result = results[name]
+            if result["status"] != "success":
+                self._log(f"[{name}] 抓取失败: {result.get('error')}", "warning")
+                stats[name] = {"count": 0, "error": result.get("error"), "elapsed": result["elapsed"]}
+                continue
+
+            data = result["data"]
+            for tweet in data["tweets"]:
+                tweet_id = str(tweet.get("id", ""))
+                key = tweet_id if tweet_id.isdigit() else f"{tweet['author']}_{tweet['content'][:50]}"
+                if key not in merged:
+                    merged[key] = {**tweet, "source": name}
+
+            newest = max((_id_value(t.get("id")) for t in data["tweets"]), default=0)
+            if newest > _id_value(new_cursors.get(name, 0)):
+                new_cursors[name] = str(newest)
+
+            stats[name] = {
+                "count": data["count"],
+                "scrolls": data["scrolls"],
+                "stop_reason": data["stop_reason"],
+                "elapsed": result["elapsed"],
+            }
+            self._log(
+                f"[{name}] {data['count']} 条推文, 滚动 {data['scrolls']} 次 "
+                f"({data['stop_reason']}), 耗时 {result['elapsed']:.1f}s",
+                "info",
+            )
+
+        succeeded = [s for s in stats.values() if "error" not in s]
+        if not succeeded:
+            return self._error("所有来源抓取失败", data={"sources": stats})
+
+        tweets = sorted(merged.values(), key=lambda t: t.get("timestamp", 0), reverse=True)
+        slowest = max(s["elapsed"] for s in stats.values())
+        self._log(
+            f"✓ {len(self.sources)} 个来源合并后 {len(tweets)} 条推文, "
+            f"总耗时 {elapsed:.1f}s (最慢来源 {slowest:.1f}s)",
+            "success",
+        )
+
+        return self._success(
+            data={
+                "tweets": tweets,
+                "count": len(tweets),
+                "scrolls": sum(s["scrolls"] for s in succeeded),
+                "stop_reason": ", ".join(
+                    f"{name}:{s.get('stop_reason', 'error')}" for name, s in stats.items()
+                ),
+                "sources": stats,
+                "cursors": new_cursors,
+                "elapsed": round(elapsed, 2),
+            },
+            message=f"成功从 {len(succeeded)} 个来源抓取 {len(tweets)} 条推文",
+        )
+
+    def close(self):
+        """关闭各来源的标签页和 CDP 会话"""
+        probe = CDPSession(port=self.launcher.cdp_port)
+        for agent in self._agents.values():
+            agent.close()
+            probe.close_target(agent.target_id)
+        self._agents.clear()
+        self.launcher.close()
@@ -0,0 +1,222 @@
+"""
+Snapshot Parser - agent-browser 快照解析
+所有正则在模块加载时编译；快照文本只扫描一次，建立 作者 → 推文 URL 和 article ref → 推文 URL 的索引
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_AUTHOR_RE = re.compile(r"@(\w+)")
+
+# 匹配 "4 hours ago", "Jan 28", "15h" 等格式（按优先级排列）
+_TIME_RES = [
+    re.compile(r"(\d+)\s+hours?\s+ago"),
+    re.compile(r"(\d+)h\b"),
+    re.compile(r"(\d+)\s+minutes?\s+ago"),
+    re.compile(r"(\d+)m\b"),
+    re.compile(r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d+"),
+]
+
+_HOURS_RE = re.compile(r"(\d+)\s*h")
+_HOURS_AGO_RE = re.compile(r"(\d+)\s+hours?\s+ago")
+_MINUTES_RE = re.compile(r"(\d+)\s*m")
+
+# 匹配 "63 replies, 12 reposts, 1058 likes, 313816 views"
+_ENGAGEMENT_RES = {
+    "replies": re.compile(r"(\d+)\s+repl(?:y|ies)"),
+    "reposts": re.compile(r"(\d+)\s+repost"),
+    "likes": re.compile(r"(\d+)\s+like"),
+    "views": re.compile(r"(\d+)\s+views"),
+}
+
+_CONTENT_CLEANUPS = [
+    (re.compile(r"Verified account"), ""),
+    # 移除开头的作者名（"作者名 @username "）
+    (re.compile(r"^[^@]+@\w+\s+"), ""),
+]
+_MEDIA_CLEANUPS = [
+    re.compile(r"Embedded video\s*"),
+    re.compile(r"Play Video\s*"),
+    re.compile(r"Play\s+Embed\s*"),
+    # 尾部的互动数据
+    re.compile(r"\d+\s+repl(?:y|ies).*$"),
+]
+
+# 快照中只关心两类行: article 节点（带 ref）和推文 status 链接
+_SNAPSHOT_LINE_RE = re.compile(
+    r"^[ \t]*- (?:"
+    r"article\b[^\n]*?\[ref=(?P<ref>\w+)\]"
+    r"|/url: /(?P<author>\w+)/status/(?P<status>\d+)"
+    r")",
+    re.MULTILINE,
+)
+
+
+class SnapshotIndex:
+    """
+    快照 URL 索引（一次扫描构建）
+
+    - author_status: 作者 → 快照中该作者第一个 status ID（与旧版 re.search 语义一致）
+    - ref_status: article ref → 该 article 下出现的 (作者, status ID) 列表
+    """
+
+    def __init__(self, snapshot_text: str):
+        self.author_status: Dict[str, str] = {}
+        self.ref_status: Dict[str, List[Tuple[str, str]]] = {}
+
+        current_ref: Optional[str] = None
+        for match in _SNAPSHOT_LINE_RE.finditer(snapshot_text):
+            ref = match.group("ref")
+            if ref:
+                current_ref = ref
+                continue
+
+            author, status = match.group("author"), match.group("status")
+            self.author_status.setdefault(author, status)
+            if current_ref is not None:
+                self.ref_status.setdefault(current_ref, []).append((author, status))
+
+    def status_for(self, author: str, ref_id: str) -> Tuple[Optional[str], bool]:
+        """
+        查找推文 status ID
+
+        Returns:
+            (status_id, exact)，exact 表示是否在该 article 内部按作者精确命中
+        """
+        for link_author, status in self.ref_status.get(ref_id, ()):
+            if link_author.lower() == author.lower():
+                return status, True
+        return self.author_status.get(author), False
+
+
+def extract_time(name: str) -> str:
+    """从 name 中提取时间信息"""
+    for pattern in _TIME_RES:
+        match = pattern.search(name)
+        if match:
+            return match.group(0)
+    return "unknown"
+
+
+def parse_time_to_timestamp(time_str: str, now: Optional[datetime] = None) -> int:
+    """将时间字符串转换为时间戳（用于排序）"""
+    now = now or datetime.now()
+
+    # 小时前（"4h" / "4 hours ago"）
+    match = _HOURS_RE.match(time_str) or _HOURS_AGO_RE.match(time_str)
+    if match:
+        return int((now - timedelta(hours=int(match.group(1)))).timestamp())
+
+    # 分钟前
+    match = _MINUTES_RE.match(time_str)
+    if match:
+        return int((now - timedelta(minutes=int(match.group(1)))).timestamp())
+
+    # 日期格式 "Jan 28"
+    if "Jan" in time_str or "Feb" in time_str or "Dec" in time_str:
+        # 粗略估计：假设是昨天或前天
+        return int((now - timedelta(days=1)).timestamp())
+
+    # 默认返回0（最旧）
+    return 0
+
+
+def extract_engagement(name: str) -> Dict[str, int]:
+    """提取互动数据"""
+    engagement = {}
+    for key, pattern in _ENGAGEMENT_RES.items():
+        match = pattern.search(name)
+        engagement[key] = int(match.group(1)) if match else 0
+    return engagement
+
+
+def extract_content(name: str, time_str: str) -> str:
+    """提取推文实际内容，去除作者名和时间等元数据"""
+    content = name
+    for pattern, replacement in _CONTENT_CLEANUPS:
+        content = pattern.sub(replacement, content)
+
+    content = content.replace(time_str, "")
+
+    for pattern in _MEDIA_CLEANUPS:
+        content = pattern.sub("", content)
+
+    # 清理多余空格
+    content = " ".join(content.split())
+
+    return content[:500]
+
+
+def parse_snapshot(
+    snapshot: Dict[str, Any], now: Optional[datetime] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    解析 agent-browser --json 快照
+
+    Args:
+        snapshot: {"success": true, "data": {"snapshot": str, "refs": {...}}}
+        now: 计算相对时间的基准（默认当前时间）
+
+    Returns:
+        (按时间从新到旧排序的推文列表, 跳过原因统计)
+    """
+    now = now or datetime.now()
+    tweets = []
+    skipped = {
+        "too_short": 0,
+        "carousel": 0,
+        "video": 0,
+        "no_author": 0,
+    }
+
+    data = snapshot.get("data", {})
+    refs = data.get("refs", {})
+    index = SnapshotIndex(data.get("snapshot", ""))
+
+    for ref_id, ref_data in refs.items():
+        if ref_data.get("role") != "article":
+            continue
+
+        name = ref_data.get("name", "")
+
+        # 降低长度要求，只要有内容就尝试提取
+        if not name or len(name) < 20:
+            skipped["too_short"] += 1
+            continue
+
+        # 过滤 Carousel（轮播推荐/广告区）
+        if "carousel" in name.lower():
+            skipped["carousel"] += 1
+            continue
+
+        author_match = _AUTHOR_RE.search(name)
+        if not author_match:
+            skipped["no_author"] += 1
+            continue
+
+        author = author_match.group(1)
+        time_str = extract_time(name)
+        status_id, exact = index.status_for(author, ref_id)
+
+        tweets.append(
+            {
+                # article 内精确命中 status 链接时使用真实推文 ID，否则以 ref_id 兜底
+                "id": status_id if exact else ref_id,
+                "content": extract_content(name, time_str),
+                "author": author,
+                "time": time_str,
+                "timestamp": parse_time_to_timestamp(time_str, now),
+                "engagement": extract_engagement(name),
+                "url": (
+                    f"https://x.com/{author}/status/{status_id}"
+                    if status_id
+                    else f"https://x.com/{author}"
+                ),
+            }
+        )
+
+    # 按时间戳排序（最新的在前面）
+    tweets.sort(key=lambda t: t.get("timestamp", 0), reverse=True)
+    return tweets, skipped
@@ -0,0 +1,220 @@
+"""
+Timeline Capture - 从 X 的 GraphQL 时间线响应中直接解码推文
+通过 CDP Network 事件拦截 HomeTimeline 等接口的 JSON，获得真实推文 ID、精确时间和互动数据
+"""
+
+import base64
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from agents.fetch_agent.cdp_client import CDPSession
+
+
+# 时间线类 GraphQL 接口（Home / Following / 列表 / 用户主页 / 搜索）
+TIMELINE_URL_RE = re.compile(
+    r"/i/api/graphql/[^/]+/"
+    r"(HomeTimeline|HomeLatestTimeline|ListLatestTweetsTimeline|UserTweets|SearchTimeline)"
+)
+
+_CREATED_AT_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+
+
+def format_relative_time(timestamp: int, now: Optional[datetime] = None) -> str:
+    """格式化为与页面一致的相对时间（"35m" / "2h" / "Jan 28"）"""
+    now = now or datetime.now(timezone.utc)
+    created = datetime.fromtimestamp(timestamp, timezone.utc)
+    seconds = (now - created).total_seconds()
+
+    if seconds < 3600:
+        return f"{max(int(seconds // 60), 0)}m"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h"
+    return f"{created.strftime('%b')} {created.day}"
+
+
+def _iter_instructions(payload: Any) -> Iterator[Dict[str, Any]]:
+    """递归查找所有 instructions（不同接口的嵌套路径不同）"""
+    if isinstance(payload, dict):
+        instructions = payload.get("instructions")
+        if isinstance(instructions, list):
+            yield from instructions
+        for value in payload.values():
+            if isinstance(value, (dict, list)):
+                yield from _iter_instructions(value)
+    elif isinstance(payload, list):
+        for value in payload:
+            yield from _iter_instructions(value)
+
+
+def _iter_item_contents(instruction: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    entries = instruction.get("entries") or []
+    if instruction.get("entry"):
+        entries = [instruction["entry"]]
+
+    for entry in entries:
+        content = entry.get("content", {})
+        if "itemContent" in content:
+            yield content["itemContent"]
+        # 对话 / 模块形式的条目
+        for item in content.get("items", []):
+            item_content = item.get("item", {}).get("itemContent")
+            if item_content:
+                yield item_content
+
+
+def _unwrap_tweet(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if result.get("__typename") == "TweetWithVisibilityResults":
+        result = result.get("tweet", {})
+    if not result.get("rest_id") or "legacy" not in result:
+        return None
+    # 转推：使用原推文（与快照模式展示的内容一致）
+    retweeted = result["legacy"].get("retweeted_status_result", {}).get("result")
+    if retweeted:
+        return _unwrap_tweet(retweeted) or result
+    return result
+
+
+def _screen_name(tweet: Dict[str, Any]) -> str:
+    user = tweet.get("core", {}).get("user_results", {}).get("result", {})
+    return (
+        user.get("core", {}).get("screen_name")
+        or user.get("legacy", {}).get("screen_name")
+        or "unknown"
+    )
+
+
+def decode_tweet(result: Dict[str, Any], now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """把单个 tweet_results.result 转换为 FetchAgent 的推文结构"""
+    tweet = _unwrap_tweet(result)
+    if tweet is None:
+        return None
+
+    legacy = tweet["legacy"]
+    author = _screen_name(tweet)
+
+    # 长推文的完整内容在 note_tweet 中
+    content = (
+        tweet.get("note_tweet", {})
+        .get("note_tweet_results", {})
+        .get("result", {})
+        .get("text")
+        or legacy.get("full_text", "")
+    )
+
+    timestamp = 0
+    created_at = legacy.get("created_at")
+    if created_at:
+        try:
+            timestamp = int(datetime.strptime(created_at, _CREATED_AT_FORMAT).timestamp())
+        except ValueError:
+            pass
+
+    views = tweet.get("views", {}).get("count", 0)
+
+    return {
+        "id": tweet["rest_id"],
+        "content": " ".join(content.split())[:500],
+        "author": author,
+        "time": format_relative_time(timestamp, now) if timestamp else "unknown",
+        "timestamp": timestamp,
+        "engagement": {
+            "replies": int(legacy.get("reply_count", 0)),
+            "reposts": int(legacy.get("retweet_count", 0)) + int(legacy.get("quote_count", 0)),
+            "likes": int(legacy.get("favorite_count", 0)),
+            "views": int(views or 0),
+        },
+        "url": f"https://x.com/{author}/status/{tweet['rest_id']}",
+    }
+
+
+def decode_timeline_response(
+    payload: Dict[str, Any], now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    解码一次时间线 GraphQL 响应
+
+    Returns:
+        推文列表（跳过推广内容，按响应中的顺序）
+    """
+    tweets = []
+    for instruction in _iter_instructions(payload):
+        for item_content in _iter_item_contents(instruction):
+            # 推广推文带有 promotedMetadata
+            if item_content.get("promotedMetadata"):
+                continue
+            result = item_content.get("tweet_results", {}).get("result")
+            if not result:
+                continue
+            tweet = decode_tweet(result, now)
+            if tweet:
+                tweets.append(tweet)
+    return tweets
+
+
+class TimelineCapture:
+    """
+    在 CDP 会话上监听时间线接口响应
+
+    用法:
+        capture = TimelineCapture(session)
+        capture.start()
+        ... 刷新 / 滚动 ...
+        payloads = capture.harvest()
+    """
+
+    def __init__(self, session: CDPSession, url_pattern: "re.Pattern[str]" = TIMELINE_URL_RE):
+        self.session = session
+        self.url_pattern = url_pattern
+        self._pending: Dict[str, str] = {}
+        self._finished: List[str] = []
+        # 本次 start() 以来取回的时间线响应数
+        self.responses_seen = 0
+
+    def start(self):
+        self._pending.clear()
+        self._finished.clear()
+        self.responses_seen = 0
+        if self._handle_event not in self.session.event_handlers:
+            self.session.event_handlers.append(self._handle_event)
+        self.session.send("Network.enable", {"maxResourceBufferSize": 8 * 1024 * 1024})
+
+    def stop(self):
+        if self._handle_event in self.session.event_handlers:
+            self.session.event_handlers.remove(self._handle_event)
+        if self.session.connected:
+            self.session.send("Network.disable")
+
+    def _handle_event(self, message: Dict[str, Any]):
+        # 事件处理器在 send() 持锁期间被调用，这里只记录，不能再发命令
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.responseReceived":
+            url = params.get("response", {}).get("url", "")
+            if self.url_pattern.search(url):
+                self._pending[params["requestId"]] = url
+        elif method == "Network.loadingFinished":
+            if params.get("requestId") in self._pending:
+                self._finished.append(params["requestId"])
+
+    def harvest(self) -> List[Dict[str, Any]]:
+        """取回已完成的时间线响应 JSON"""
+        # 发一条空命令，把缓冲中的网络事件读出来
+        self.session.evaluate("0")
+
+        payloads = []
+        finished, self._finished = self._finished, []
+        for request_id in finished:
+            self._pending.pop(request_id, None)
+            try:
+                body = self.session.send("Network.getResponseBody", {"requestId": request_id})
+                text = body.get("body", "")
+                if body.get("base64Encoded"):
+                    text = base64.b64decode(text).decode("utf-8")
+                payloads.append(json.loads(text))
+                self.responses_seen += 1
+            except (RuntimeError, ValueError):
+                # 响应体已被浏览器回收或不是 JSON
+                continue
+        return payloads
@@ -0,0 +1,140 @@
+"""
+LLM Cache - 基于 SQLite 的 LLM 响应缓存
+以 (provider, model, system, prompt, temperature, max_tokens) 的哈希为键，支持 TTL 和容量淘汰
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class LLMCache:
+    """
+    LLM 响应缓存
+    - get() 命中时更新命中次数和最近命中时间
+    - put() 写入后清理过期条目，并按最近使用时间淘汰超出容量的条目
+    - 命中 / 未命中次数持久化在 llm_cache_stats 表
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: float = 86400,
+        max_entries: int = 1000,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # 分块分析会在线程池中并发读写，连接跨线程共享并用锁串行化
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                response TEXT,
+                created_at REAL,
+                last_hit_at REAL,
+                hits INTEGER DEFAULT 0
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER DEFAULT 0
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        system: Optional[str],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+        payload = json.dumps(
+            [provider, model, system or "", prompt, round(temperature, 4), max_tokens],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                self._bump("misses")
+                self.conn.commit()
+                return None
+
+            self.conn.execute(
+                "UPDATE llm_cache SET hits = hits + 1, last_hit_at = ? WHERE cache_key = ?",
+                (now, key),
+            )
+            self._bump("hits")
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key: str, provider: str, model: str, response: str):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                    (cache_key, provider, model, response, created_at, last_hit_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, provider, model, response, now, now),
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now: float):
+        self.conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        self.conn.execute(
+            """
+            DELETE FROM llm_cache WHERE cache_key IN (
+                SELECT cache_key FROM llm_cache
+                ORDER BY last_hit_at DESC
+                LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+    def _bump(self, name: str):
+        self.conn.execute(
+            """
+            INSERT INTO llm_cache_stats (name, value) VALUES (?, 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1
+            """,
+            (name,),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counters = dict(self.conn.execute("SELECT name, value FROM llm_cache_stats"))
+            entries = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "entries": entries,
+        }
+
+    def close(self):
+        self.conn.close()
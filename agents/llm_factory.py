@@ -1,12 +1,21 @@
 """
 LLM Factory - 统一的 LLM 创建工厂
 支持多 Provider 一键切换，兼容 LangChain
+SimpleLLM 支持按 LLM_PROVIDER_CHAIN 故障切换、熔断和对冲请求
 """
 
 import os
-from typing import Optional, Dict, Any, Union
-from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, List, Union
+
+from agents import metrics
+from agents.llm_health import ProviderHealth
+
+if TYPE_CHECKING:
+    # LangChain 只在 LLMFactory.create() 中用到，运行时按需导入（主流程只用 SimpleLLM）
+    from langchain_core.language_models import BaseChatModel
 
 
 # Provider 配置映射
@@ -16,6 +25,8 @@ PROVIDER_CONFIGS = {
         "base_url_env": "LOCAL_BASE_URL",
         "api_key_env": "LOCAL_API_KEY",
         "model_env": "LOCAL_MODEL",
+        "timeout_env": "LOCAL_TIMEOUT",
+        "prompt_budget_env": "LOCAL_PROMPT_BUDGET",
         "defaults": {
             "base_url": "http://127.0.0.1:8045/v1",
             "api_key": "sk-xxx",
@@ -27,6 +38,8 @@ PROVIDER_CONFIGS = {
         "base_url_env": "ARK_BASE_URL",
         "api_key_env": "ARK_API_KEY",
         "model_env": "ARK_MODEL",
+        "timeout_env": "ARK_TIMEOUT",
+        "prompt_budget_env": "ARK_PROMPT_BUDGET",
         "defaults": {
             "base_url": "https://ark.cn-beijing.volces.com/api/v3",
             "api_key": "",
@@ -38,6 +51,8 @@ PROVIDER_CONFIGS = {
         "base_url_env": "ONE_BASE_URL",
         "api_key_env": "ONE_API_KEY",
         "model_env": "ONE_MODEL",
+        "timeout_env": "ONE_TIMEOUT",
+        "prompt_budget_env": "ONE_PROMPT_BUDGET",
         "defaults": {
             "base_url": "https://lboneapi.longbridge-inc.com/v1",
             "api_key": "",
@@ -49,6 +64,8 @@ PROVIDER_CONFIGS = {
         "base_url_env": "ANTHROPIC_BASE_URL",
         "api_key_env": "ANTHROPIC_API_KEY",
         "model_env": "ANTHROPIC_MODEL",
+        "timeout_env": "ANTHROPIC_TIMEOUT",
+        "prompt_budget_env": "ANTHROPIC_PROMPT_BUDGET",
         "defaults": {
             "base_url": "https://api.anthropic.com/v1",
             "api_key": "",
@@ -60,6 +77,8 @@ PROVIDER_CONFIGS = {
         "base_url_env": "OPENAI_BASE_URL",
         "api_key_env": "OPENAI_API_KEY",
         "model_env": "OPENAI_MODEL",
+        "timeout_env": "OPENAI_TIMEOUT",
+        "prompt_budget_env": "OPENAI_PROMPT_BUDGET",
         "defaults": {
             "base_url": "https://api.openai.com/v1",
             "api_key": "",
@@ -71,6 +90,8 @@ PROVIDER_CONFIGS = {
         "base_url_env": "OLLAMA_BASE_URL",
         "api_key_env": "OLLAMA_API_KEY",
         "model_env": "OLLAMA_MODEL",
+        "timeout_env": "OLLAMA_TIMEOUT",
+        "prompt_budget_env": "OLLAMA_PROMPT_BUDGET",
         "defaults": {
             "base_url": "http://localhost:11434",
             "api_key": "ollama",
@@ -82,6 +103,8 @@ PROVIDER_CONFIGS = {
         "base_url_env": "GEMINI_BASE_URL",
         "api_key_env": "GEMINI_API_KEY",
         "model_env": "GEMINI_MODEL",
+        "timeout_env": "GEMINI_TIMEOUT",
+        "prompt_budget_env": "GEMINI_PROMPT_BUDGET",
         "defaults": {
             "base_url": "http://127.0.0.1:8045/v1",
             "api_key": "sk-xxx",
@@ -119,12 +142,42 @@ class LLMFactory:
             "base_url": os.getenv(config["base_url_env"], defaults["base_url"]),
             "api_key": os.getenv(config["api_key_env"], defaults["api_key"]),
             "model": os.getenv(config["model_env"], defaults["model"]),
+            "timeout": float(os.getenv(config["timeout_env"], os.getenv("LLM_TIMEOUT", "180"))),
+            "prompt_budget": int(
+                os.getenv(config["prompt_budget_env"], os.getenv("LLM_PROMPT_BUDGET", "4000"))
+            ),
         }
 
+    @staticmethod
+    def get_chain(provider: Optional[str] = None) -> List[str]:
+        """
+        获取 provider 调用链（按顺序故障切换）
+
+        LLM_PROVIDER_CHAIN 为逗号分隔的 provider 列表，未设置时只有 LLM_PROVIDER 一个；
+        显式指定 provider 时它排在第一位
+        """
+        chain = [
+            name.strip().lower()
+            for name in os.getenv("LLM_PROVIDER_CHAIN", "").split(",")
+            if name.strip()
+        ]
+        if provider:
+            chain = [provider.strip().lower()] + chain
+        elif not chain:
+            chain = [LLMFactory.get_provider()]
+
+        # 去重（未知 provider 会回退到 local，也按回退后的名字去重）
+        resolved: List[str] = []
+        for name in chain:
+            name = name if name in PROVIDER_CONFIGS else "local"
+            if name not in resolved:
+                resolved.append(name)
+        return resolved
+
     @staticmethod
     def create(
         provider: Optional[str] = None, temperature: float = 0.3, **kwargs
-    ) -> BaseChatModel:
+    ) -> "BaseChatModel":
         """
         创建 LangChain ChatModel
 
@@ -162,12 +215,12 @@ class LLMFactory:
         )
 
     @staticmethod
-    def create_simple(provider: Optional[str] = None) -> "SimpleLLM":
+    def create_simple(provider: Optional[str] = None, **kwargs) -> "SimpleLLM":
         """
         创建简单的 LLM 包装器（不依赖完整 LangChain）
         用于简单场景，直接调用 OpenAI SDK
         """
-        return SimpleLLM(provider)
+        return SimpleLLM(provider, **kwargs)
 
 
 class SimpleLLM:
@@ -175,24 +228,103 @@ class SimpleLLM:
     简单的 LLM 包装器
     直接使用 OpenAI SDK，不依赖 LangChain 的复杂功能
     适用于简单的单轮对话场景
+
+    调用链中有多个 provider 时：
+    - 按顺序调用，失败或超时（<PROVIDER>_TIMEOUT / LLM_TIMEOUT）后切换到下一个
+    - 每个 provider 一个熔断器，最近调用的失败 / 超慢比例过高时暂时跳过（全部熔断时仍按顺序尝试）
+    - 对冲模式（LLM_HEDGE=true）：当前请求超过该 provider 的 p90 延迟仍未返回时，
+      同时向下一个 provider 发请求，先返回的结果胜出
+    - 流式输出（on_delta）：第一个产出 token 的 provider 负责回调，它失败时由下一个接管
     """
 
-    def __init__(self, provider: Optional[str] = None):
-        from openai import OpenAI
+    def __init__(
+        self,
+        provider: Optional[str] = None,
+        chain: Optional[List[str]] = None,
+        health_path: Optional[str] = None,
+        hedge: Optional[bool] = None,
+    ):
+        """
+        Args:
+            provider: 首选 provider（如果为 None，从环境变量读取）
+            chain: 完整调用链（指定时忽略 provider 和 LLM_PROVIDER_CHAIN）
+            health_path: 熔断器 / 延迟统计持久化路径（None 表示只保存在内存）
+            hedge: 是否启用对冲请求（如果为 None，从 LLM_HEDGE 读取）
+        """
+        names = chain or LLMFactory.get_chain(provider)
+        self.backends = [self._create_backend(name, len(names) > 1) for name in names]
+
+        primary = self.backends[0]
+        self.config = primary["config"]
+        self.provider = primary["provider"]
+        self.model = primary["model"]
+        # OpenAI SDK 导入约需 0.5s，第一次请求时才创建客户端（见 _client），不拖慢启动
+        self._client_lock = threading.Lock()
+        # 同一个 prompt 可能切换到调用链上任何一个 provider，取最小的预算
+        self.prompt_budget = min(b["config"]["prompt_budget"] for b in self.backends)
 
-        self.config = LLMFactory.get_config(provider)
-        self.provider = self.config["provider"]
-        self.model = self.config["model"]
+        self.health = ProviderHealth(
+            health_path,
+            window=int(os.getenv("LLM_BREAKER_WINDOW", "20")),
+            min_calls=int(os.getenv("LLM_BREAKER_MIN_CALLS", "3")),
+            failure_rate=float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5")),
+            slow_seconds=float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "60")),
+            cooldown=float(os.getenv("LLM_BREAKER_COOLDOWN", "120")),
+        )
+        if hedge is None:
+            hedge = os.getenv("LLM_HEDGE", "false").lower() == "true"
+        self.hedge = hedge and len(self.backends) > 1
+        # 延迟样本不足时的对冲等待时间
+        self.hedge_delay = float(os.getenv("LLM_HEDGE_DELAY", "20"))
+        self.hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "5"))
+
+        # 最近一次调用实际由哪个 provider 返回（分块分析并发调用，按线程记录）
+        self._local = threading.local()
+
+    @staticmethod
+    def _create_backend(provider: str, failover: bool) -> Dict[str, Any]:
+        config = LLMFactory.get_config(provider)
 
         # Ollama 需要特殊处理 base_url
-        base_url = self.config["base_url"]
-        if self.provider == "ollama" and not base_url.endswith("/v1"):
+        base_url = config["base_url"]
+        if config["provider"] == "ollama" and not base_url.endswith("/v1"):
             base_url = f"{base_url}/v1"
 
-        self.client = OpenAI(
-            base_url=base_url,
-            api_key=self.config["api_key"],
-        )
+        client_kwargs = {"timeout": config["timeout"]}
+        if failover:
+            # 有备选 provider 时不在 SDK 内部重试，直接切换
+            client_kwargs["max_retries"] = 0
+
+        return {
+            "config": config,
+            "provider": config["provider"],
+            "model": config["model"],
+            "client_kwargs": {"base_url": base_url, "api_key": config["api_key"], **client_kwargs},
+            "client": None,
+        }
+
+    def _client(self, backend: Dict[str, Any]):
+        """provider 的 OpenAI 客户端（第一次调用时创建；对冲请求可能并发调用）"""
+        with self._client_lock:
+            if backend["client"] is None:
+                from openai import OpenAI
+
+                backend["client"] = OpenAI(**backend["client_kwargs"])
+            return backend["client"]
+
+    @property
+    def client(self):
+        """首选 provider 的 OpenAI 客户端"""
+        return self._client(self.backends[0])
+
+    @property
+    def last_provider(self) -> str:
+        """当前线程最近一次调用实际使用的 provider"""
+        return getattr(self._local, "provider", self.provider)
+
+    @property
+    def last_model(self) -> str:
+        return getattr(self._local, "model", self.model)
 
     def invoke(
         self,
@@ -200,6 +332,7 @@ class SimpleLLM:
         system: Optional[str] = None,
         max_tokens: int = 2000,
         temperature: float = 0.3,
+        on_delta: Optional[Callable[[str], None]] = None,
     ) -> str:
         """
         调用 LLM
@@ -209,23 +342,202 @@ class SimpleLLM:
             system: 系统提示（可选）
             max_tokens: 最大 token 数
             temperature: 温度
+            on_delta: 流式回调，每收到新 token 时以目前为止的完整文本调用（在请求线程中执行）
 
         Returns:
             LLM 响应文本
+
+        Raises:
+            调用链上所有 provider 都失败时抛出最后一个异常
         """
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
         messages.append({"role": "user", "content": prompt})
+        request = {"messages": messages, "max_tokens": max_tokens, "temperature": temperature}
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            max_tokens=max_tokens,
-            temperature=temperature,
+        # 流式输出只转发一个 provider 的 token，避免对冲请求交替覆盖
+        owner: Dict[str, Any] = {"backend": None}
+        owner_lock = threading.Lock()
+        emit = None
+        if on_delta is not None:
+            def emit(backend: Dict[str, Any], text: str):
+                with owner_lock:
+                    if owner["backend"] is None:
+                        owner["backend"] = backend
+                    if owner["backend"] is not backend:
+                        return
+                try:
+                    on_delta(text)
+                except Exception as e:
+                    # 回调失败（如推送中间状态出错）不影响 LLM 请求本身
+                    print(f"⚠️ LLM 流式回调失败: {type(e).__name__}: {e}")
+
+        remaining = list(self.backends)
+        skipped: List[Dict[str, Any]] = []
+        last_error: Optional[Exception] = None
+
+        # 第一轮遵守熔断；熔断跳过的 provider 在其他 provider 都失败后作为最后手段再试
+        for ignore_breakers in (False, True):
+            if ignore_breakers:
+                remaining, skipped = skipped, []
+            running: Dict[Future, Dict[str, Any]] = {}
+
+            while remaining or running:
+                if not running:
+                    backend = self._next_backend(remaining, skipped, ignore_breakers)
+                    if backend is None:
+                        break
+                    running[self._submit(backend, request, emit)] = backend
+
+                timeout = None
+                if self.hedge and remaining and len(running) == 1:
+                    timeout = self._hedge_delay(next(iter(running.values())))
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # 超过 p90 仍未返回：向下一个 provider 发对冲请求
+                    backend = self._next_backend(remaining, skipped, ignore_breakers)
+                    if backend is not None:
+                        metrics.incr("llm_hedged_requests", provider=backend["provider"])
+                        running[self._submit(backend, request, emit)] = backend
+                    continue
+
+                for future in done:
+                    backend = running.pop(future)
+                    try:
+                        content = future.result()
+                    except Exception as e:
+                        last_error = e
+                        with owner_lock:
+                            if owner["backend"] is backend:
+                                owner["backend"] = None
+                        print(f"⚠️ LLM {backend['provider']} 调用失败: {type(e).__name__}: {e}")
+                        continue
+                    if backend is not self.backends[0]:
+                        metrics.incr("llm_failover", provider=backend["provider"])
+                    # 未完成的对冲请求在后台线程中继续，结果只计入延迟统计
+                    self._local.provider = backend["provider"]
+                    self._local.model = backend["model"]
+                    return content
+
+            if not skipped:
+                break
+
+        raise last_error or RuntimeError("没有可用的 LLM provider")
+
+    def _next_backend(
+        self,
+        remaining: List[Dict[str, Any]],
+        skipped: List[Dict[str, Any]],
+        ignore_breakers: bool,
+    ) -> Optional[Dict[str, Any]]:
+        """取出调用链中下一个可用的 provider，熔断中的移入 skipped"""
+        while remaining:
+            backend = remaining.pop(0)
+            if ignore_breakers or self.health.allow(backend["provider"]):
+                return backend
+            skipped.append(backend)
+        return None
+
+    def _hedge_delay(self, backend: Dict[str, Any]) -> float:
+        p90 = self.health.p90(backend["provider"], self.hedge_min_samples)
+        return self.hedge_delay if p90 is None else p90
+
+    def _submit(
+        self,
+        backend: Dict[str, Any],
+        request: Dict[str, Any],
+        emit: Optional[Callable[[Dict[str, Any], str], None]] = None,
+    ) -> Future:
+        """
+        在后台线程中发起请求
+
+        使用守护线程而不是线程池：输掉的对冲请求不会阻塞进程退出
+        """
+        future: Future = Future()
+
+        def run():
+            try:
+                future.set_result(self._request(backend, request, emit))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"llm-{backend['provider']}", daemon=True).start()
+        return future
+
+    def _request(
+        self,
+        backend: Dict[str, Any],
+        request: Dict[str, Any],
+        emit: Optional[Callable[[Dict[str, Any], str], None]] = None,
+    ) -> str:
+        """调用单个 provider，并记录延迟 / token / 熔断统计"""
+        labels = {"provider": backend["provider"], "model": backend["model"]}
+        # 客户端在计时前创建，首次导入 SDK 的耗时不计入延迟统计和熔断判断
+        client = self._client(backend)
+        started = time.perf_counter()
+        try:
+            if emit is None:
+                response = client.chat.completions.create(
+                    model=backend["model"], **request
+                )
+                usage = getattr(response, "usage", None)
+                content = response.choices[0].message.content
+            else:
+                content, usage = self._stream(backend, request, emit, started, labels)
+        except Exception:
+            metrics.incr("llm_request_errors", **labels)
+            self._record(backend, time.perf_counter() - started, False)
+            raise
+
+        latency = time.perf_counter() - started
+        metrics.observe("llm_request_seconds", latency, **labels)
+        if usage is not None:
+            metrics.incr("llm_prompt_tokens", usage.prompt_tokens or 0, **labels)
+            metrics.incr("llm_completion_tokens", usage.completion_tokens or 0, **labels)
+        self._record(backend, latency, True)
+
+        return content
+
+    def _stream(
+        self,
+        backend: Dict[str, Any],
+        request: Dict[str, Any],
+        emit: Callable[[Dict[str, Any], str], None],
+        started: float,
+        labels: Dict[str, str],
+    ) -> tuple:
+        """流式请求，逐块回调目前为止的文本，返回 (完整文本, usage)"""
+        stream = self._client(backend).chat.completions.create(
+            model=backend["model"], stream=True, **request
         )
+        parts: List[str] = []
+        usage = None
+        for chunk in stream:
+            # 部分兼容接口在最后一个块中返回 usage
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if not parts:
+                metrics.observe("llm_first_token_seconds", time.perf_counter() - started, **labels)
+            parts.append(delta)
+            emit(backend, "".join(parts))
+        return "".join(parts), usage
+
+    def _record(self, backend: Dict[str, Any], latency: float, ok: bool):
+        if self.health.record(backend["provider"], latency, ok):
+            breaker = self.health.breaker(backend["provider"])
+            print(f"⚠️ LLM {backend['provider']} 熔断器状态: {breaker.state}")
 
-        return response.choices[0].message.content
+    def close(self):
+        self.health.close()
 
     def __repr__(self) -> str:
-        return f"SimpleLLM(provider={self.provider}, model={self.model})"
+        if len(self.backends) == 1:
+            return f"SimpleLLM(provider={self.provider}, model={self.model})"
+        chain = " → ".join(f"{b['provider']}/{b['model']}" for b in self.backends)
+        return f"SimpleLLM(chain={chain}{', hedge' if self.hedge else ''})"
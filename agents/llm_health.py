@@ -0,0 +1,225 @@
+"""
+LLM Health - Provider 熔断器和延迟统计
+按 provider 记录最近的调用结果（延迟 / 成功与否），驱动 SimpleLLM 的故障切换和对冲请求
+
+- 最近 window 次调用中失败或超慢的比例达到阈值时熔断（open），cooldown 秒内跳过该 provider
+- 冷却结束后放行一次探测请求（half_open），成功则恢复，失败则继续熔断
+- p90() 返回最近成功调用的延迟分位数，用作对冲请求的触发时间
+- 指定 db_path 时调用记录和熔断状态持久化到 SQLite，单次运行（cron）之间也能累积统计
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# (时间戳, 延迟秒数, 是否成功)
+_Sample = Tuple[float, float, bool]
+
+
+class CircuitBreaker:
+    """
+    单个 provider 的熔断器
+
+    一次调用失败（异常 / 超时）或延迟超过 slow_seconds 都记为"坏"调用；
+    最近 window 次调用中至少 min_calls 次且坏调用比例 >= failure_rate 时熔断
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        window: int = 10,
+        min_calls: int = 3,
+        failure_rate: float = 0.5,
+        slow_seconds: float = 0,
+        cooldown: float = 60,
+    ):
+        self.provider = provider
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.cooldown = cooldown
+        self.samples: Deque[_Sample] = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _is_bad(self, latency: float, ok: bool) -> bool:
+        return not ok or (self.slow_seconds > 0 and latency > self.slow_seconds)
+
+    def bad_rate(self) -> float:
+        with self._lock:
+            if not self.samples:
+                return 0.0
+            return sum(self._is_bad(lat, ok) for _, lat, ok in self.samples) / len(self.samples)
+
+    def allow(self) -> bool:
+        """是否可以向该 provider 发请求（half_open 时只放行一次探测）"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.time() - self.opened_at < self.cooldown:
+                    return False
+                self.state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, latency: float, ok: bool) -> bool:
+        """
+        记录一次调用结果
+
+        Returns:
+            熔断状态是否发生变化
+        """
+        now = time.time()
+        bad = self._is_bad(latency, ok)
+        with self._lock:
+            previous = self.state
+            self.samples.append((now, latency, ok))
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if bad:
+                    self.state, self.opened_at = OPEN, now
+                else:
+                    # 探测成功：丢弃熔断前的记录，重新开始统计
+                    self.state = CLOSED
+                    self.samples.clear()
+                    self.samples.append((now, latency, ok))
+            elif self.state == CLOSED and len(self.samples) >= self.min_calls:
+                bad_count = sum(self._is_bad(lat, good) for _, lat, good in self.samples)
+                if bad_count / len(self.samples) >= self.failure_rate:
+                    self.state, self.opened_at = OPEN, now
+            return self.state != previous
+
+    def latency_quantile(self, q: float, min_samples: int = 5) -> Optional[float]:
+        """最近成功调用的延迟分位数，样本不足时返回 None"""
+        with self._lock:
+            latencies = sorted(lat for _, lat, ok in self.samples if ok)
+        if len(latencies) < min_samples:
+            return None
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+    def __repr__(self) -> str:
+        return f"CircuitBreaker({self.provider}, {self.state}, bad_rate={self.bad_rate():.0%})"
+
+
+class ProviderHealth:
+    """
+    所有 provider 的熔断器集合，可选持久化到 SQLite
+
+    Args:
+        db_path: 持久化数据库路径（None 表示只保存在内存）
+        **breaker_kwargs: 传给每个 CircuitBreaker 的参数
+    """
+
+    def __init__(self, db_path: Optional[str] = None, **breaker_kwargs):
+        self.breaker_kwargs = breaker_kwargs
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.conn: Optional[sqlite3.Connection] = None
+
+        if db_path:
+            path = Path(db_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 对冲请求在后台线程中记录结果，连接跨线程共享并用锁串行化
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_calls (
+                    provider TEXT,
+                    ts REAL,
+                    latency REAL,
+                    ok INTEGER
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_provider ON llm_calls (provider, ts)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_breakers (
+                    provider TEXT PRIMARY KEY,
+                    state TEXT,
+                    opened_at REAL
+                )
+            """)
+            self.conn.commit()
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(provider)
+            if breaker is None:
+                breaker = CircuitBreaker(provider, **self.breaker_kwargs)
+                self._load(breaker)
+                self.breakers[provider] = breaker
+            return breaker
+
+    def allow(self, provider: str) -> bool:
+        return self.breaker(provider).allow()
+
+    def record(self, provider: str, latency: float, ok: bool) -> bool:
+        """记录调用结果，返回熔断状态是否变化"""
+        breaker = self.breaker(provider)
+        changed = breaker.record(latency, ok)
+        self._save(breaker, latency, ok)
+        return changed
+
+    def p90(self, provider: str, min_samples: int = 5) -> Optional[float]:
+        return self.breaker(provider).latency_quantile(0.9, min_samples)
+
+    def _load(self, breaker: CircuitBreaker):
+        if self.conn is None:
+            return
+        with self._db_lock:
+            rows = self.conn.execute(
+                "SELECT ts, latency, ok FROM llm_calls WHERE provider = ? ORDER BY ts DESC LIMIT ?",
+                (breaker.provider, breaker.window),
+            ).fetchall()
+            state = self.conn.execute(
+                "SELECT state, opened_at FROM llm_breakers WHERE provider = ?", (breaker.provider,)
+            ).fetchone()
+        breaker.samples.extend((ts, latency, bool(ok)) for ts, latency, ok in reversed(rows))
+        if state and state[0] != CLOSED:
+            # 上次运行中断在探测阶段时按熔断处理，等冷却结束再探测
+            breaker.state, breaker.opened_at = OPEN, state[1]
+
+    def _save(self, breaker: CircuitBreaker, latency: float, ok: bool):
+        with self._db_lock:
+            # 输掉的对冲请求可能在 close() 之后才返回
+            if self.conn is None:
+                return
+            self.conn.execute(
+                "INSERT INTO llm_calls (provider, ts, latency, ok) VALUES (?, ?, ?, ?)",
+                (breaker.provider, time.time(), latency, int(ok)),
+            )
+            # 只保留最近 window 条
+            self.conn.execute(
+                """
+                DELETE FROM llm_calls WHERE provider = ? AND rowid NOT IN (
+                    SELECT rowid FROM llm_calls WHERE provider = ? ORDER BY ts DESC LIMIT ?
+                )
+                """,
+                (breaker.provider, breaker.provider, breaker.window),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_breakers (provider, state, opened_at) VALUES (?, ?, ?)",
+                (breaker.provider, breaker.state, breaker.opened_at),
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self._db_lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
@@ -0,0 +1,230 @@
+"""
+Metrics - 运行指标收集
+按运行（run_id）汇总各阶段耗时和计数，写入 SQLite metrics 表和 Prometheus textfile
+
+用法:
+    recorder = metrics.start_run(run_id)
+    with metrics.timer("node_seconds", node="fetch"):
+        ...
+    metrics.incr("snapshot_bytes", len(output))
+    recorder.flush(conn, textfile)
+
+未开始运行时所有记录调用都是空操作，单独使用各 Agent 不受影响
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# 指标名统一前缀（Prometheus）
+PREFIX = "twitter_monitor"
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRecorder:
+    """
+    单次运行的指标汇总
+
+    - observe(): 耗时等采样值，按 (name, labels) 汇总 count / sum / min / max
+    - incr(): 计数器，按 (name, labels) 累加
+    所有方法线程安全（多来源抓取在线程池中记录）
+    """
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.started_at = time.time()
+        self.samples: Dict[Tuple[str, _LabelKey], List[float]] = {}
+        self.counters: Dict[Tuple[str, _LabelKey], float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> Tuple[str, _LabelKey]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = self._key(name, labels)
+        with self._lock:
+            stats = self.samples.get(key)
+            if stats is None:
+                self.samples[key] = [1, value, value, value]
+            else:
+                stats[0] += 1
+                stats[1] += value
+                stats[2] = min(stats[2], value)
+                stats[3] = max(stats[3], value)
+
+    def incr(self, name: str, value: float = 1, **labels: str):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def rows(self) -> List[tuple]:
+        """(name, labels_json, kind, count, sum, min, max)"""
+        with self._lock:
+            rows = [
+                (name, json.dumps(dict(labels)), "summary", int(s[0]), s[1], s[2], s[3])
+                for (name, labels), s in self.samples.items()
+            ]
+            rows += [
+                (name, json.dumps(dict(labels)), "counter", 1, value, value, value)
+                for (name, labels), value in self.counters.items()
+            ]
+        return sorted(rows)
+
+    def flush(self, conn: Optional[sqlite3.Connection] = None, textfile: Optional[str] = None):
+        """写入 SQLite metrics 表（表结构见 storage 迁移 #3），并覆盖 Prometheus textfile"""
+        rows = self.rows()
+        if conn is not None:
+            conn.executemany(
+                """
+                INSERT INTO metrics (run_id, ts, name, labels, kind, count, sum, min, max)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [(self.run_id, self.started_at, *row) for row in rows],
+            )
+            conn.commit()
+        if textfile:
+            write_textfile(textfile, rows, self.run_id, self.started_at)
+
+
+# ========== 当前运行 ==========
+
+_current: Optional[MetricsRecorder] = None
+
+
+def start_run(run_id: str) -> MetricsRecorder:
+    """开始记录一次运行（之后的 timer / incr / observe 都记到这个运行）"""
+    global _current
+    _current = MetricsRecorder(run_id)
+    return _current
+
+
+def end_run() -> Optional[MetricsRecorder]:
+    global _current
+    recorder, _current = _current, None
+    return recorder
+
+
+def current() -> Optional[MetricsRecorder]:
+    return _current
+
+
+def observe(name: str, value: float, **labels: str):
+    if _current is not None:
+        _current.observe(name, value, **labels)
+
+
+def incr(name: str, value: float = 1, **labels: str):
+    if _current is not None:
+        _current.incr(name, value, **labels)
+
+
+@contextmanager
+def timer(name: str, **labels: str) -> Iterator[None]:
+    if _current is None:
+        yield
+        return
+    with _current.timer(name, **labels):
+        yield
+
+
+# ========== 持久化 ==========
+
+def purge(conn: sqlite3.Connection, retention_days: int):
+    # storage 依赖 metrics，在函数内导入避免循环导入
+    from agents import storage
+
+    storage.purge(conn, "metrics", "ts < ?", (time.time() - retention_days * 86400,))
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def write_textfile(path: str, rows: List[tuple], run_id: str, started_at: float):
+    """
+    写入 node_exporter textfile collector 格式（最近一次运行的值，原子替换）
+
+    summary 类指标输出 _count / _sum / _max，计数器输出 _total
+    """
+    lines: List[str] = []
+    declared = set()
+
+    def declare(metric: str, kind: str):
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f"# TYPE {metric} {kind}")
+
+    for name, labels_json, kind, count, total, _, maximum in rows:
+        labels = _prom_labels(json.loads(labels_json))
+        metric = f"{PREFIX}_{name}"
+        if kind == "summary":
+            for suffix, value in (("_count", count), ("_sum", total), ("_max", maximum)):
+                declare(metric + suffix, "gauge")
+                lines.append(f"{metric}{suffix}{labels} {value:g}")
+        else:
+            declare(metric + "_total", "gauge")
+            lines.append(f"{metric}_total{labels} {total:g}")
+
+    declare(f"{PREFIX}_last_run_timestamp_seconds", "gauge")
+    lines.append(f'{PREFIX}_last_run_timestamp_seconds{{run_id="{run_id}"}} {started_at:.0f}')
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(target.suffix + ".tmp")
+    tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp, target)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def report(conn: sqlite3.Connection, days: int = 7, name_prefix: str = "") -> List[dict]:
+    """
+    按 (指标, 标签) 汇总最近 days 天各次运行的 p50 / p95
+
+    summary 类指标按每次运行的 sum 计算（即每次运行该阶段的总耗时）
+    """
+    per_run: Dict[Tuple[str, str, str], List[float]] = {}
+    for name, labels, kind, total in conn.execute(
+        "SELECT name, labels, kind, sum FROM metrics WHERE ts >= ? AND name LIKE ? ORDER BY ts",
+        (time.time() - days * 86400, f"{name_prefix}%"),
+    ):
+        per_run.setdefault((name, labels, kind), []).append(total)
+
+    return [
+        {
+            "name": name,
+            "labels": json.loads(labels),
+            "kind": kind,
+            "runs": len(values),
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "max": max(values),
+        }
+        for (name, labels, kind), values in sorted(per_run.items())
+    ]
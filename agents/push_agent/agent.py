@@ -4,12 +4,17 @@ Push Agent - 推送代理
 """
 
 import os
+import time
+from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
 
-import requests
-
 from agents.base import BaseAgent
+from agents.push_agent.delivery import DEFAULT_API_BASE, SENT, TelegramDelivery
+
+
+# Telegram 消息长度限制 4096 字符
+MAX_MESSAGE_LENGTH = 4000
 
 
 class PushAgent(BaseAgent):
@@ -22,6 +27,7 @@ class PushAgent(BaseAgent):
         self,
         bot_token: str = None,
         chat_id: str = None,
+        outbox_path: str = None,
     ):
         """
         初始化 Push Agent
@@ -29,6 +35,7 @@ class PushAgent(BaseAgent):
         Args:
             bot_token: Telegram Bot Token
             chat_id: Telegram Chat ID
+            outbox_path: 发件箱数据库路径（默认 {DATA_DIR}/outbox.db）
         """
         super().__init__(name="PushAgent")
 
@@ -40,6 +47,23 @@ class PushAgent(BaseAgent):
         else:
             self._log("Telegram 配置已加载", "success")
 
+        self.delivery: Optional[TelegramDelivery] = None
+        if self.bot_token:
+            data_dir = Path(os.path.expanduser(os.getenv("DATA_DIR", "~/.twitter-monitor")))
+            self.delivery = TelegramDelivery(
+                self.bot_token,
+                outbox_path or str(data_dir / "outbox.db"),
+                api_base=os.getenv("TELEGRAM_API_BASE", DEFAULT_API_BASE),
+                per_chat_interval=float(os.getenv("TELEGRAM_PER_CHAT_INTERVAL", "1.0")),
+                global_rate=float(os.getenv("TELEGRAM_GLOBAL_RATE", "30")),
+                max_attempts=int(os.getenv("TELEGRAM_MAX_ATTEMPTS", "5")),
+            )
+            self.flush_timeout = float(os.getenv("TELEGRAM_FLUSH_TIMEOUT", "120"))
+            # 流式推送时两次编辑之间的最小间隔（秒）
+            self.edit_interval = float(os.getenv("TELEGRAM_EDIT_INTERVAL", "1.5"))
+        # 上次运行中断时遗留的消息在第一次推送前投递（构造时不阻塞启动）
+        self._leftover_flushed = False
+
         self.is_initialized = True
 
     def execute(
@@ -49,6 +73,9 @@ class PushAgent(BaseAgent):
         provider: str = "unknown",
         model: str = "unknown",
         tweets: list = None,
+        message_id: int = None,
+        trending: list = None,
+        dedup_key: str = None,
     ) -> Dict[str, Any]:
         """
         推送分析结果到 Telegram
@@ -59,6 +86,9 @@ class PushAgent(BaseAgent):
             provider: LLM 提供方
             model: 使用的模型
             tweets: 原始推文列表
+            message_id: 流式推送时 start_stream() 已发送的消息，编辑为最终内容而不是重新发送
+            trending: 之前已推送过、正在升温的推文（带 trend_rate）
+            dedup_key: 发件箱去重键前缀，同一键重复推送时重试原消息（恢复运行时不会重复发送）
 
         Returns:
             推送结果
@@ -69,22 +99,80 @@ class PushAgent(BaseAgent):
         if not summary:
             return self._error("没有内容需要推送")
 
+        self._flush_leftover()
         self._log("准备推送到 Telegram")
 
         # 格式化消息
-        message = self._format_message(summary, tweet_count, provider, model, tweets or [])
-
-        # 发送消息
-        success = self._send_message(message)
+        message = self._format_message(
+            summary, tweet_count, provider, model, tweets or [], trending=trending or []
+        )
+
+        # 发送消息（流式推送时编辑已发送的消息，编辑失败则重新发送）
+        edited = bool(message_id) and self._send_message(
+            message,
+            method="editMessageText",
+            dedup_key=f"{dedup_key}:edit" if dedup_key else None,
+            message_id=message_id,
+        )
+        success = edited or self._send_message(
+            message, dedup_key=f"{dedup_key}:send" if dedup_key else None
+        )
 
         if success:
-            self._log("推送成功", "success")
+            self._log("推送成功" + (" (更新流式消息)" if edited else ""), "success")
             return self._success(
-                data={"message_length": len(message)}, message="成功推送到 Telegram"
+                data={"message_length": len(message), "edited": edited},
+                message="成功推送到 Telegram",
             )
         else:
             return self._error("推送失败")
 
+    def start_stream(
+        self,
+        tweet_count: int,
+        provider: str,
+        model: str,
+        tweets: list,
+        trending: list = None,
+        message_id: int = None,
+    ) -> Optional["MessageStream"]:
+        """
+        流式推送：先发送推文列表（摘要位置显示"生成中"），返回用于逐步编辑这条消息的 MessageStream
+
+        Args:
+            message_id: 恢复运行时上次已发送的消息，继续编辑它而不是再发一条
+
+        Returns:
+            MessageStream，发送失败或 Telegram 未配置时返回 None
+        """
+        if not self.bot_token or not self.chat_id:
+            return None
+        self._flush_leftover()
+
+        def render(partial: str, failed: bool = False) -> str:
+            return self._truncate(
+                self._format_message(
+                    partial, tweet_count, provider, model, tweets,
+                    streaming=not failed, failed=failed, trending=trending or [],
+                )
+            )
+
+        if message_id:
+            self._log("继续编辑上次发送的流式消息", "info")
+            return MessageStream(self, message_id, render, self.edit_interval)
+
+        outbox_id = self.delivery.enqueue(
+            self.chat_id, render(""), parse_mode="HTML", disable_web_page_preview=True
+        )
+        self.delivery.flush(timeout=self.flush_timeout)
+        status = self.delivery.status(outbox_id)
+        if status["status"] != SENT or not status["message_id"]:
+            self._log(f"流式消息发送失败: {status['error']}", "warning")
+            return None
+
+        self._log("推文列表已推送，摘要生成中", "success")
+        return MessageStream(self, status["message_id"], render, self.edit_interval)
+
     def _format_message(
         self,
         summary: str,
@@ -92,15 +180,28 @@ class PushAgent(BaseAgent):
         provider: str,
         model: str,
         tweets: list,
+        streaming: bool = False,
+        trending: list = None,
+        failed: bool = False,
     ) -> str:
-        """格式化 Telegram 消息 - 使用 HTML 格式"""
+        """
+        格式化 Telegram 消息 - 使用 HTML 格式
+
+        streaming=True 时 summary 是未完成的摘要，末尾追加"生成中"提示；
+        failed=True 时摘要位置显示生成失败提示（流式消息的摘要没有生成出来）
+        """
         now = datetime.now().strftime("%Y-%m-%d %H:%M")
 
         # 将 Markdown 摘要转换为 HTML
         summary_html = self._markdown_to_html(summary)
+        if streaming:
+            summary_html = (summary_html + "\n\n" if summary_html else "") + "<i>⏳ 生成中...</i>"
+        elif failed:
+            summary_html = "<i>⚠️ 摘要生成失败，恢复运行后会更新这条消息</i>"
 
         # 构建推文列表（按时间从新到旧）
         tweets_section = self._format_tweets_list(tweets)
+        trending_section = self._format_trending(trending or [])
 
         return f"""📱 <b>Twitter/X 热点速递</b>
 
@@ -111,7 +212,7 @@ class PushAgent(BaseAgent):
 📝 <b>推文详情</b> (按时间排序)
 
 {tweets_section}
-
+{trending_section}
 ━━━━━━━━━━━━━━━━
 
 🤖 <b>AI 分析摘要</b>
@@ -143,17 +244,37 @@ class PushAgent(BaseAgent):
             # 互动数据
             likes = engagement.get("likes", 0)
             views = engagement.get("views", 0)
+            duplicates = tweet.get("duplicate_count", 0)
+            similar = f" | 🔁 另有 {duplicates} 条相似" if duplicates else ""
 
             # HTML 超链接格式：<a href="url">text</a>
             tweet_line = f"""<b>{i}. <a href="{url}">@{author}</a></b> ({time})
 {content_html}
-👍 {likes} | 👁 {self._format_number(views)}
+👍 {likes} | 👁 {self._format_number(views)}{similar}
 
 """
             lines.append(tweet_line)
 
         return "".join(lines)
 
+    def _format_trending(self, trending: list) -> str:
+        """之前已推送、正在升温的推文（按外推的每小时互动增量排序）"""
+        if not trending:
+            return ""
+
+        lines = ["━━━━━━━━━━━━━━━━\n\n🚀 <b>正在升温</b>\n"]
+        for tweet in trending:
+            author = tweet.get("author", "unknown")
+            url = tweet.get("url", f"https://x.com/{author}")
+            content = tweet.get("content", "")
+            content_preview = content[:80] + "..." if len(content) > 80 else content
+            rate = self._format_number(int(tweet.get("trend_rate", 0)))
+            lines.append(
+                f"• <a href=\"{url}\">@{author}</a> 📈 +{rate}/小时\n"
+                f"{self._escape_html(content_preview)}\n"
+            )
+        return "\n".join(lines) + "\n"
+
     def _escape_html(self, text: str) -> str:
         """转义 HTML 特殊字符"""
         # 替换图片标记
@@ -214,34 +335,103 @@ class PushAgent(BaseAgent):
             return f"{num/1000:.1f}K"
         return str(num)
 
+    @staticmethod
+    def _truncate(message: str) -> str:
+        if len(message) > MAX_MESSAGE_LENGTH:
+            message = message[:MAX_MESSAGE_LENGTH] + "\n\n<i>(内容已截断)</i>"
+        return message
+
+    def _flush_leftover(self):
+        """第一次推送前投递上次运行遗留在发件箱中的消息"""
+        if self._leftover_flushed:
+            return
+        self._leftover_flushed = True
+        leftover = self.delivery.pending_count()
+        if leftover:
+            self._log(f"发件箱中有 {leftover} 条未投递消息，继续发送")
+            self.delivery.flush(timeout=self.flush_timeout)
+
     def _send_message(
         self,
         message: str,
         parse_mode: str = "HTML",
+        method: str = "sendMessage",
+        dedup_key: Optional[str] = None,
+        **extra: Any,
     ) -> bool:
-        """发送 Telegram 消息"""
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-
-        # Telegram 消息长度限制 4096 字符
-        if len(message) > 4000:
-            message = message[:4000] + "\n\n<i>(内容已截断)</i>"
-
-        try:
-            response = requests.post(
-                url,
-                json={
-                    "chat_id": self.chat_id,
-                    "text": message,
-                    "parse_mode": parse_mode,
-                    "disable_web_page_preview": True,
-                },
-                timeout=30,
-            )
-
-            if response.status_code != 200:
-                self._log(f"Telegram API 错误: {response.text}", "error")
-                return False
+        """发送 Telegram 消息（经发件箱投递，429 / 5xx 自动重试）"""
+        outbox_id = self.delivery.enqueue(
+            self.chat_id,
+            self._truncate(message),
+            parse_mode=parse_mode,
+            dedup_key=dedup_key,
+            method=method,
+            disable_web_page_preview=True,
+            **extra,
+        )
+        stats = self.delivery.flush(timeout=self.flush_timeout)
+        if stats["retries"]:
+            self._log(f"Telegram 重试 {stats['retries']} 次")
+
+        status = self.delivery.status(outbox_id)
+        if status["status"] == SENT:
             return True
-        except Exception as e:
-            self._log(f"发送消息失败: {e}", "error")
-            return False
+        self._log(f"Telegram API 错误: {status['error']} (状态: {status['status']})", "error")
+        return False
+
+    def close(self):
+        """关闭 HTTP 连接池和发件箱"""
+        if self.delivery is not None:
+            self.delivery.close()
+            self.delivery = None
+
+
+class MessageStream:
+    """
+    随 LLM 流式输出编辑同一条 Telegram 消息
+
+    update() 按 min_interval 节流，中间状态直接调用 editMessageText（失败或限速时跳过，不重试）；
+    最终内容由 PushAgent.execute(message_id=...) 经发件箱可靠投递
+    """
+
+    def __init__(self, agent: PushAgent, message_id: int, render, min_interval: float = 1.5):
+        self.agent = agent
+        self.message_id = message_id
+        self.render = render
+        self.min_interval = min_interval
+        self.edits = 0
+        self._last_edit = time.monotonic()
+        self._last_text = ""
+
+    def update(self, partial: str):
+        """LLM 产出新 token 时调用，partial 为目前为止的完整摘要"""
+        now = time.monotonic()
+        if now - self._last_edit < self.min_interval:
+            return
+        text = self.render(partial)
+        if text == self._last_text:
+            return
+
+        self._last_edit = now
+        ok, _ = self.agent.delivery.request(
+            "editMessageText",
+            {
+                "chat_id": self.agent.chat_id,
+                "message_id": self.message_id,
+                "text": text,
+                "parse_mode": "HTML",
+                "disable_web_page_preview": True,
+            },
+        )
+        if ok:
+            self.edits += 1
+            self._last_text = text
+
+    def fail(self, dedup_key: Optional[str] = None) -> bool:
+        """摘要生成失败：经发件箱把"生成中"改为失败提示，避免聊天中留下半成品消息"""
+        return self.agent._send_message(
+            self.render("", failed=True),
+            method="editMessageText",
+            dedup_key=dedup_key,
+            message_id=self.message_id,
+        )
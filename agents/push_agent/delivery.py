@@ -0,0 +1,430 @@
+"""
+Telegram Delivery - 带连接池、持久化发件箱和限流的 Telegram 投递层
+
+- 所有请求复用同一个 requests.Session（keep-alive，避免每次推送重新握手 TLS）；
+  requests 导入较慢，第一次发送时才导入并创建 Session，不拖慢启动
+- 消息先写入 SQLite 发件箱再发送，进程重启后继续投递未完成的消息
+- 调用方指定的 dedup_key 只入队一次，发送成功后标记为 sent，不会重复投递；
+  不指定时每次入队都是一条新消息（内容相同的消息之后仍可以正常发送）
+- 遵守单聊天 / 全局速率限制；429 按 retry_after 等待，5xx 和网络错误指数退避
+"""
+
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents import metrics, storage
+
+
+DEFAULT_API_BASE = "https://api.telegram.org"
+
+# 发件箱状态
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+
+class RateLimiter:
+    """
+    单聊天最小间隔 + 全局令牌桶
+
+    Telegram 建议: 同一聊天约 1 条/秒，所有聊天合计约 30 条/秒
+    """
+
+    def __init__(self, per_chat_interval: float = 1.0, global_rate: float = 30.0):
+        self.per_chat_interval = per_chat_interval
+        self.global_rate = global_rate
+        self._chat_next: Dict[str, float] = {}
+        self._tokens = global_rate
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def delay_for(self, chat_id: str) -> float:
+        """距离该聊天可以发送还需等待的秒数（0 表示可以立即发送）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(self._chat_next.get(chat_id, 0.0) - now, 0.0)
+            if self.global_rate > 0 and self._tokens < 1:
+                wait = max(wait, (1 - self._tokens) / self.global_rate)
+            return wait
+
+    def acquire(self, chat_id: str):
+        """记录一次发送（调用前应确保 delay_for() 为 0）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            self._chat_next[chat_id] = now + self.per_chat_interval
+
+    def hold(self, chat_id: str, seconds: float):
+        """收到 429 后在 retry_after 秒内暂停该聊天"""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._chat_next[chat_id] = max(self._chat_next.get(chat_id, 0.0), until)
+
+    def _refill(self, now: float):
+        if self.global_rate <= 0:
+            self._tokens = float("inf")
+            return
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._tokens = min(self.global_rate, self._tokens + elapsed * self.global_rate)
+
+
+class TelegramDelivery:
+    """
+    Telegram 投递队列
+
+    用法:
+        delivery = TelegramDelivery(bot_token, "outbox.db")
+        delivery.enqueue(chat_id, text, parse_mode="HTML")
+        stats = delivery.flush(timeout=60)
+    """
+
+    def __init__(
+        self,
+        bot_token: str,
+        db_path: str,
+        api_base: str = DEFAULT_API_BASE,
+        per_chat_interval: float = 1.0,
+        global_rate: float = 30.0,
+        max_attempts: int = 5,
+        request_timeout: float = 30,
+        pool_size: int = 4,
+    ):
+        self.bot_token = bot_token
+        self.api_base = api_base.rstrip("/")
+        self.max_attempts = max_attempts
+        self.request_timeout = request_timeout
+        self.limiter = RateLimiter(per_chat_interval, global_rate)
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # 每条消息状态变更都要提交，WAL 下提交不必每次同步整个数据库文件
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS telegram_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dedup_key TEXT UNIQUE,
+                chat_id TEXT,
+                method TEXT,
+                payload TEXT,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at REAL DEFAULT 0,
+                last_error TEXT,
+                message_id INTEGER,
+                created_at REAL,
+                sent_at REAL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_status ON telegram_outbox (status, id)"
+        )
+        self.conn.commit()
+
+    def enqueue(
+        self,
+        chat_id: str,
+        text: str,
+        parse_mode: Optional[str] = "HTML",
+        dedup_key: Optional[str] = None,
+        method: str = "sendMessage",
+        **extra: Any,
+    ) -> int:
+        """
+        写入发件箱
+
+        Args:
+            dedup_key: 去重键（如按运行生成），None 表示不去重
+            method: Bot API 方法（sendMessage / editMessageText，编辑时 extra 中带 message_id）
+
+        Returns:
+            发件箱记录 ID（同一 dedup_key 重复入队时返回已有记录，已失败的记录重新排队）
+        """
+        payload: Dict[str, Any] = {"chat_id": chat_id, "text": text, **extra}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        key = dedup_key or uuid.uuid4().hex
+
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR IGNORE INTO telegram_outbox
+                    (dedup_key, chat_id, method, payload, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, str(chat_id), method, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+            # 同一 dedup_key 重复入队（如恢复推送失败的运行）：重试原记录而不是再发一条
+            self.conn.execute(
+                """
+                UPDATE telegram_outbox SET status = ?, attempts = 0, next_attempt_at = 0
+                WHERE dedup_key = ? AND status = ?
+                """,
+                (PENDING, key, FAILED),
+            )
+            self.conn.commit()
+            row = self.conn.execute(
+                "SELECT id FROM telegram_outbox WHERE dedup_key = ?", (key,)
+            ).fetchone()
+        return row[0]
+
+    @property
+    def session(self):
+        """共享的 requests.Session（第一次发送时创建）"""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def request(self, method: str, payload: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """
+        立即调用一次 Bot API（不经发件箱、不重试），用于可以丢弃的中间状态（如流式编辑）
+
+        聊天处于限速等待中时直接返回失败，不阻塞调用方
+
+        Returns:
+            (是否成功, 响应 JSON)
+        """
+        chat_id = str(payload.get("chat_id", ""))
+        if self.limiter.delay_for(chat_id) > 0:
+            return False, {"description": "rate limited"}
+        self.limiter.acquire(chat_id)
+
+        url = f"{self.api_base}/bot{self.bot_token}/{method}"
+        session = self.session
+        from requests import RequestException
+
+        started = time.perf_counter()
+        try:
+            response = session.post(url, json=payload, timeout=self.request_timeout)
+        except RequestException as e:
+            metrics.observe(
+                "telegram_request_seconds", time.perf_counter() - started, method=method, code="error"
+            )
+            return False, {"description": str(e)}
+        metrics.observe(
+            "telegram_request_seconds",
+            time.perf_counter() - started,
+            method=method,
+            code=str(response.status_code),
+        )
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = {"description": response.text[:200]}
+        if response.status_code == 429:
+            self.limiter.hold(chat_id, float((body.get("parameters") or {}).get("retry_after", 1)))
+        ok = (response.status_code == 200 and body.get("ok", True)) or self._not_modified(body)
+        return ok, body
+
+    @staticmethod
+    def _not_modified(body: Dict[str, Any]) -> bool:
+        """editMessageText 内容未变化时 Bot API 返回 400，视为成功"""
+        return "message is not modified" in str(body.get("description", ""))
+
+    def status(self, outbox_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, attempts, last_error, message_id FROM telegram_outbox WHERE id = ?",
+                (outbox_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "attempts": row[1], "error": row[2], "message_id": row[3]}
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM telegram_outbox WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+    def flush(self, timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        按入队顺序投递待发送消息，直到发件箱清空或超时
+
+        同一聊天内严格按顺序发送（前一条未成功时后续消息等待）
+
+        Returns:
+            {"sent": n, "failed": n, "pending": n, "retries": n}
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        stats = {"sent": 0, "failed": 0, "pending": 0, "retries": 0}
+
+        while deadline is None or time.monotonic() < deadline:
+            rows = self._load_pending()
+            if not rows:
+                break
+
+            now = time.time()
+            blocked_chats = set()
+            next_wake = None
+            progressed = False
+
+            for outbox_id, chat_id, method, payload, attempts, next_attempt_at in rows:
+                if chat_id in blocked_chats:
+                    continue
+                # 保证同一聊天的顺序：队首消息未发出前，后续消息不发送
+                blocked_chats.add(chat_id)
+
+                wait = max(next_attempt_at - now, self.limiter.delay_for(chat_id))
+                if wait > 0:
+                    next_wake = wait if next_wake is None else min(next_wake, wait)
+                    continue
+
+                self.limiter.acquire(chat_id)
+                outcome = self._deliver(outbox_id, chat_id, method, json.loads(payload), attempts)
+                stats[outcome] += 1
+                progressed = True
+                if outcome == "sent":
+                    # 同一聊天的下一条消息可以在下一轮发送
+                    blocked_chats.discard(chat_id)
+                now = time.time()
+
+            if progressed:
+                continue
+
+            sleep_for = next_wake or 0.05
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sleep_for = min(sleep_for, remaining)
+            time.sleep(sleep_for)
+
+        stats["pending"] = self.pending_count()
+        return stats
+
+    def _load_pending(self) -> List[tuple]:
+        with self._lock:
+            return self.conn.execute(
+                """
+                SELECT id, chat_id, method, payload, attempts, next_attempt_at
+                FROM telegram_outbox WHERE status = ? ORDER BY id
+                """,
+                (PENDING,),
+            ).fetchall()
+
+    def _deliver(
+        self, outbox_id: int, chat_id: str, method: str, payload: Dict[str, Any], attempts: int
+    ) -> str:
+        """发送一条消息并更新发件箱，返回 sent / retries / failed"""
+        url = f"{self.api_base}/bot{self.bot_token}/{method}"
+        attempts += 1
+
+        session = self.session
+        from requests import RequestException
+
+        started = time.perf_counter()
+        try:
+            response = session.post(url, json=payload, timeout=self.request_timeout)
+        except RequestException as e:
+            metrics.observe(
+                "telegram_request_seconds", time.perf_counter() - started, method=method, code="error"
+            )
+            return self._schedule_retry(outbox_id, attempts, self._backoff(attempts), str(e))
+        metrics.observe(
+            "telegram_request_seconds",
+            time.perf_counter() - started,
+            method=method,
+            code=str(response.status_code),
+        )
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+
+        if (response.status_code == 200 and body.get("ok", True)) or self._not_modified(body):
+            result = body.get("result")
+            message_id = result.get("message_id") if isinstance(result, dict) else payload.get("message_id")
+            with self._lock:
+                self.conn.execute(
+                    """
+                    UPDATE telegram_outbox
+                    SET status = ?, attempts = ?, message_id = ?, sent_at = ?, last_error = NULL
+                    WHERE id = ?
+                    """,
+                    (SENT, attempts, message_id, time.time(), outbox_id),
+                )
+                self.conn.commit()
+            return "sent"
+
+        error = body.get("description") or response.text[:200]
+
+        if response.status_code == 429:
+            retry_after = float((body.get("parameters") or {}).get("retry_after", 1))
+            self.limiter.hold(chat_id, retry_after)
+            # 429 不计入重试次数上限
+            return self._schedule_retry(outbox_id, attempts - 1, retry_after, error)
+
+        if response.status_code >= 500:
+            return self._schedule_retry(outbox_id, attempts, self._backoff(attempts), error)
+
+        # 其余 4xx（消息格式错误、聊天不存在等）重试也不会成功
+        self._mark_failed(outbox_id, attempts, f"HTTP {response.status_code}: {error}")
+        return "failed"
+
+    def _schedule_retry(self, outbox_id: int, attempts: int, delay: float, error: str) -> str:
+        if attempts >= self.max_attempts:
+            self._mark_failed(outbox_id, attempts, error)
+            return "failed"
+        with self._lock:
+            self.conn.execute(
+                """
+                UPDATE telegram_outbox SET attempts = ?, next_attempt_at = ?, last_error = ?
+                WHERE id = ?
+                """,
+                (attempts, time.time() + delay, error, outbox_id),
+            )
+            self.conn.commit()
+        return "retries"
+
+    def _mark_failed(self, outbox_id: int, attempts: int, error: str):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE telegram_outbox SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+                (FAILED, attempts, error, outbox_id),
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def _backoff(attempts: int) -> float:
+        """指数退避（1s, 2s, 4s ... 最多 60s）加随机抖动"""
+        return min(2 ** (attempts - 1), 60) * random.uniform(0.8, 1.2)
+
+    def purge_sent(self, older_than_days: int = 7) -> int:
+        """分批清理已发送 / 已失败的旧记录（待发送的记录保留）"""
+        with self._lock:
+            return storage.purge(
+                self.conn,
+                "telegram_outbox",
+                "status != ? AND created_at < ?",
+                (PENDING, time.time() - older_than_days * 86400),
+            )
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+        self.conn.close()
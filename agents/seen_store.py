@@ -0,0 +1,98 @@
+"""
+Seen Tweet Store - 已读推文去重存储
+批量查询 / 批量写入 seen_tweets，可选内存索引避免每批都访问 SQLite
+"""
+
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from agents import metrics, storage
+
+
+# SQLite 旧版本单条语句最多 999 个参数，按此分块
+_SQL_CHUNK_SIZE = 500
+
+
+class SeenTweetStore:
+    """
+    已读推文存储
+    - 批量 IN 查询 + executemany 写入，每批只有常数次 SQL 往返
+    - 可选内存索引（tweet_id → seen_at 时间戳），启动时加载，清理后与表同步
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        retention_days: int = 7,
+        use_memory_index: bool = True,
+    ):
+        self.conn = conn
+        self.retention_days = retention_days
+        self._index: Optional[Dict[str, float]] = None
+
+        if use_memory_index:
+            self.load_index()
+
+    @property
+    def index_size(self) -> int:
+        return len(self._index) if self._index is not None else 0
+
+    def load_index(self):
+        """从 seen_tweets 加载保留期内的全部 ID"""
+        rows = self.conn.execute(
+            "SELECT tweet_id, CAST(strftime('%s', seen_at) AS INTEGER) FROM seen_tweets"
+        )
+        self._index = {tweet_id: float(seen_at or 0) for tweet_id, seen_at in rows}
+
+    def filter_unseen(self, tweet_ids: Iterable[str]) -> List[str]:
+        """返回未出现过的 ID（保持输入顺序，批内重复只保留第一个）"""
+        ordered = list(dict.fromkeys(tweet_ids))
+        seen = self._lookup_seen(ordered)
+        return [tweet_id for tweet_id in ordered if tweet_id not in seen]
+
+    def _lookup_seen(self, tweet_ids: List[str]) -> Set[str]:
+        if self._index is not None:
+            return {tweet_id for tweet_id in tweet_ids if tweet_id in self._index}
+
+        seen: Set[str] = set()
+        for start in range(0, len(tweet_ids), _SQL_CHUNK_SIZE):
+            chunk = tweet_ids[start:start + _SQL_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            with metrics.timer("db_query_seconds", op="filter_unseen"):
+                rows = self.conn.execute(
+                    f"SELECT tweet_id FROM seen_tweets WHERE tweet_id IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            seen.update(row[0] for row in rows)
+        return seen
+
+    def mark_seen(self, rows: List[Tuple[str, str, str]]):
+        """
+        批量标记为已读
+
+        Args:
+            rows: (tweet_id, content, author) 列表
+        """
+        if not rows:
+            return
+
+        with metrics.timer("db_query_seconds", op="mark_seen"):
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen_tweets (tweet_id, content, author) VALUES (?, ?, ?)",
+                rows,
+            )
+            self.conn.commit()
+
+        if self._index is not None:
+            now = time.time()
+            for tweet_id, _, _ in rows:
+                self._index.setdefault(tweet_id, now)
+
+    def purge_expired(self):
+        """分批清理超过保留期的记录（每次最多删除有限行数），内存索引按数据库中剩余的记录重新加载"""
+        deleted = storage.purge_older_than(self.conn, "seen_tweets", "seen_at", self.retention_days)
+
+        # 达到单次删除上限时部分过期记录留到下一次清理，索引与表保持一致，不能只按时间淘汰
+        if self._index is not None and deleted:
+            self.load_index()
@@ -0,0 +1,250 @@
+"""
+Storage - 监控数据库（twitter_monitor.db）的连接、调优和 schema 迁移
+- WAL + 调优 pragma：读写互不阻塞，提交不再每次 fsync
+- 编号迁移：PRAGMA user_version 记录已应用的版本，启动时只执行新的迁移
+- 分批清理：按索引每次删除有限行数，数据库再大启动也不会卡在一次全表 DELETE 上
+"""
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, List, Sequence, Tuple, Union
+
+from agents import metrics
+
+
+# 调优 pragma（每个连接都要设置；journal_mode=WAL 会持久化到数据库文件）
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    # WAL 下 NORMAL 仍保证一致性，只是断电时可能丢失最后几次提交
+    ("synchronous", "NORMAL"),
+    ("temp_store", "MEMORY"),
+    # 负数单位为 KiB：16 MiB 页缓存
+    ("cache_size", "-16000"),
+    ("mmap_size", str(256 * 1024 * 1024)),
+    ("busy_timeout", "5000"),
+)
+
+# 清理默认每批 5000 行，每次最多 20 批，剩余部分留给下一次清理
+PURGE_BATCH_SIZE = 5000
+PURGE_MAX_BATCHES = 20
+
+
+Migration = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+def _create_archive(conn: sqlite3.Connection):
+    """
+    推文归档表、索引和 FTS5 外部内容表
+
+    优先使用 trigram 分词（SQLite 3.34+，中英文都能做子串匹配），否则退回 unicode61；
+    SQLite 未编译 FTS5 时只建普通表，检索全部走 LIKE
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tweet_archive (
+            tweet_id TEXT PRIMARY KEY,
+            author TEXT,
+            content TEXT,
+            url TEXT,
+            created_at INTEGER,
+            likes INTEGER DEFAULT 0,
+            reposts INTEGER DEFAULT 0,
+            replies INTEGER DEFAULT 0,
+            data TEXT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tweet_archive_created_at ON tweet_archive (created_at)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tweet_archive_author "
+        "ON tweet_archive (author COLLATE NOCASE, created_at)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tweet_archive_archived_at ON tweet_archive (archived_at)")
+
+    for tokenizer in ("trigram", "unicode61"):
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS tweet_archive_fts USING fts5("
+                "content, author, content='tweet_archive', content_rowid='rowid', "
+                f"tokenize='{tokenizer}')"
+            )
+            break
+        except sqlite3.OperationalError:
+            continue
+    else:
+        return
+
+    # 外部内容表靠触发器与归档表同步（清理时的 DELETE 也会同步删除索引）
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS tweet_archive_ai AFTER INSERT ON tweet_archive BEGIN
+            INSERT INTO tweet_archive_fts (rowid, content, author)
+            VALUES (new.rowid, new.content, new.author);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS tweet_archive_ad AFTER DELETE ON tweet_archive BEGIN
+            INSERT INTO tweet_archive_fts (tweet_archive_fts, rowid, content, author)
+            VALUES ('delete', old.rowid, old.content, old.author);
+        END
+    """)
+
+
+# 迁移按顺序编号，只能追加，不能修改已发布的迁移
+MIGRATIONS: List[Tuple[int, str, Migration]] = [
+    (1, "初始表结构", """
+        CREATE TABLE IF NOT EXISTS seen_tweets (
+            tweet_id TEXT PRIMARY KEY,
+            content TEXT,
+            author TEXT,
+            seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS push_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pushed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            tweet_count INTEGER,
+            summary TEXT
+        );
+        CREATE TABLE IF NOT EXISTS fetch_cursors (
+            source TEXT PRIMARY KEY,
+            high_water_id TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+    (2, "按时间清理 / 查询用的索引", """
+        CREATE INDEX IF NOT EXISTS idx_seen_tweets_seen_at ON seen_tweets (seen_at);
+        CREATE INDEX IF NOT EXISTS idx_push_history_pushed_at ON push_history (pushed_at);
+    """),
+    (3, "近似重复签名和运行指标", """
+        CREATE TABLE IF NOT EXISTS tweet_signatures (
+            tweet_id TEXT PRIMARY KEY,
+            signature BLOB NOT NULL,
+            seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_tweet_signatures_seen_at ON tweet_signatures (seen_at);
+        CREATE TABLE IF NOT EXISTS metrics (
+            run_id TEXT,
+            ts REAL,
+            name TEXT,
+            labels TEXT,
+            kind TEXT,
+            count INTEGER,
+            sum REAL,
+            min REAL,
+            max REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_metrics_name_ts ON metrics (name, ts);
+        CREATE INDEX IF NOT EXISTS idx_metrics_ts ON metrics (ts);
+    """),
+    (4, "推文归档和全文索引", _create_archive),
+    (5, "互动快照", """
+        CREATE TABLE IF NOT EXISTS engagement_snapshots (
+            tweet_id TEXT NOT NULL,
+            run_ts INTEGER NOT NULL,
+            likes INTEGER DEFAULT 0,
+            reposts INTEGER DEFAULT 0,
+            replies INTEGER DEFAULT 0,
+            views INTEGER DEFAULT 0,
+            PRIMARY KEY (tweet_id, run_ts)
+        );
+        CREATE INDEX IF NOT EXISTS idx_engagement_snapshots_run_ts ON engagement_snapshots (run_ts);
+    """),
+    (6, "工作流检查点", """
+        CREATE TABLE IF NOT EXISTS run_checkpoints (
+            run_id TEXT PRIMARY KEY,
+            node TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            state TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_run_checkpoints_updated_at ON run_checkpoints (updated_at);
+    """),
+]
+
+
+def connect(path: Union[str, Path], **kwargs) -> sqlite3.Connection:
+    """打开数据库并设置调优 pragma（kwargs 透传给 sqlite3.connect）"""
+    conn = sqlite3.connect(path, **kwargs)
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, migrations: Sequence[Tuple[int, str, Migration]] = MIGRATIONS) -> int:
+    """
+    执行尚未应用的迁移，每个迁移在单独的事务中完成并更新 user_version
+
+    旧版本创建的数据库 user_version 为 0，初始迁移全部使用 IF NOT EXISTS，可直接升级
+
+    Returns:
+        迁移后的版本号
+    """
+    version = schema_version(conn)
+    for number, description, migration in sorted(migrations, key=lambda m: m[0]):
+        if number <= version:
+            continue
+        started = time.perf_counter()
+        # executescript 会先提交未完成的事务，这里手动 BEGIN / COMMIT 保证迁移和版本号一起生效
+        conn.commit()
+        try:
+            conn.execute("BEGIN")
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in migration.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+            conn.execute(f"PRAGMA user_version={number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = number
+        print(f"  → 数据库迁移 #{number}: {description} ({time.perf_counter() - started:.2f}s)")
+    return version
+
+
+def purge(
+    conn: sqlite3.Connection,
+    table: str,
+    condition: str,
+    params: Sequence = (),
+    batch_size: int = PURGE_BATCH_SIZE,
+    max_batches: int = PURGE_MAX_BATCHES,
+) -> int:
+    """
+    分批删除满足 condition 的行（condition 应能用上索引）
+
+    每批单独提交，写锁只持有很短时间；达到 max_batches 后停止，剩余行留给下一次清理
+
+    Returns:
+        删除的行数
+    """
+    deleted = 0
+    with metrics.timer("db_query_seconds", op=f"purge_{table}"):
+        for _ in range(max_batches):
+            cursor = conn.execute(
+                f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT rowid FROM {table} WHERE {condition} LIMIT ?)",
+                (*params, batch_size),
+            )
+            conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+    if deleted:
+        metrics.incr("db_purged_rows", deleted, table=table)
+    return deleted
+
+
+def purge_older_than(conn: sqlite3.Connection, table: str, column: str, days: float, **kwargs) -> int:
+    """分批删除 column（CURRENT_TIMESTAMP 格式）早于 days 天前的行"""
+    return purge(conn, table, f"{column} < datetime('now', ?)", (f"-{days} days",), **kwargs)
+
+
+def optimize(conn: sqlite3.Connection):
+    """关闭前更新查询规划统计（只分析需要的表，开销很小）"""
+    conn.execute("PRAGMA optimize")
@@ -0,0 +1,293 @@
+"""
+Engagement Trending - 互动时间序列与升温排名
+每次抓到推文（无论是否已读）都记录一次互动快照（按推文 + 运行时间），
+由最近几次快照计算互动速度（每小时增量）和加速度，找出"正在起飞"而不只是"又老又大"的推文
+"""
+
+import math
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from agents import metrics, storage
+
+# numpy 导入约需 60ms，第一次计算时才由 _numpy() 导入，不拖慢启动；置为 None 则强制走纯 Python
+_NOT_LOADED = object()
+np: Any = _NOT_LOADED
+
+
+def _numpy():
+    """按需导入 numpy（可选依赖：未安装时逐条计算）"""
+    global np
+    if np is _NOT_LOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+# SQLite 旧版本单条语句最多 999 个参数，按此分块
+_SQL_CHUNK_SIZE = 500
+# 计算速度 / 加速度只需要每条推文最近 3 次快照
+_SNAPSHOT_WINDOW = 3
+# 两次快照间隔 / 推文年龄的下限（小时），避免除以接近 0 的时间差
+_MIN_HOURS = 0.25
+# 没有解析出发布时间的推文按 24 小时前发布估算平均速度
+_DEFAULT_AGE_HOURS = 24.0
+
+Trend = Dict[str, float]
+
+
+def weighted_engagement(likes: float, reposts: float, replies: float) -> float:
+    """与 PromptPacker 一致的加权互动数：转发和回复按 2 倍计"""
+    return likes + 2 * reposts + 2 * replies
+
+
+def compute_trends(
+    counts: Sequence[int],
+    times: Sequence[float],
+    values: Sequence[float],
+    posted_hours: Sequence[Optional[float]],
+    horizon_hours: float = 1.0,
+) -> Tuple[List[float], List[float], List[float]]:
+    """
+    由快照序列计算每条推文的速度 / 加速度
+
+    Args:
+        counts: 每条推文的快照数
+        times / values: 所有推文的快照时间（小时）和加权互动数，按推文拼接、每条推文内按时间升序
+        posted_hours: 每条推文的发布时间（小时），未知为 None
+        horizon_hours: 按当前速度和加速度外推的时长
+
+    速度取最近两次快照之间的增量；只有一次快照时取发布以来的平均速度。
+    加速度是最近一段速度与前一段（只有两次快照时为发布以来的平均速度）之差除以时间间隔
+
+    Returns:
+        (速度, 加速度, trend_rate)，trend_rate = max(0, 速度 + 加速度 × horizon)，即外推的每小时互动增量
+    """
+    if len(counts) and _numpy() is not None:
+        return _compute_trends_numpy(counts, times, values, posted_hours, horizon_hours)
+
+    velocities, accelerations, rates = [], [], []
+    end = 0
+    for count, posted in zip(counts, posted_hours):
+        end += count
+        t_last, e_last = times[end - 1], values[end - 1]
+        if count == 1:
+            velocity = e_last / _age(t_last, posted)
+            acceleration = 0.0
+        else:
+            t_prev, e_prev = times[end - 2], values[end - 2]
+            dt = max(t_last - t_prev, _MIN_HOURS)
+            velocity = (e_last - e_prev) / dt
+            if count >= 3:
+                t_first, e_first = times[end - 3], values[end - 3]
+                previous = (e_prev - e_first) / max(t_prev - t_first, _MIN_HOURS)
+            elif posted is not None:
+                previous = e_prev / _age(t_prev, posted)
+            else:
+                previous = velocity
+            acceleration = (velocity - previous) / dt
+        velocities.append(velocity)
+        accelerations.append(acceleration)
+        rates.append(max(0.0, velocity + acceleration * horizon_hours))
+    return velocities, accelerations, rates
+
+
+def _age(t: float, posted: Optional[float]) -> float:
+    return max(t - posted, _MIN_HOURS) if posted is not None else _DEFAULT_AGE_HOURS
+
+
+def _compute_trends_numpy(counts, times, values, posted_hours, horizon_hours):
+    """compute_trends 的向量化实现：按每条推文最后一个快照的下标整体取值计算"""
+    counts = np.asarray(counts, dtype=np.int64)
+    t = np.asarray(times, dtype=np.float64)
+    e = np.asarray(values, dtype=np.float64)
+    last = np.cumsum(counts) - 1
+    # 不存在的前序快照指向自身，计算结果随后被掩码覆盖
+    prev = np.where(counts >= 2, last - 1, last)
+    first = np.where(counts >= 3, last - 2, prev)
+
+    known = np.fromiter((p is not None for p in posted_hours), dtype=bool, count=len(counts))
+    posted = np.fromiter(
+        (p if p is not None else 0.0 for p in posted_hours), dtype=np.float64, count=len(counts)
+    )
+
+    def age(index):
+        return np.where(known, np.maximum(t[index] - posted, _MIN_HOURS), _DEFAULT_AGE_HOURS)
+
+    dt = np.maximum(t[last] - t[prev], _MIN_HOURS)
+    velocity = np.where(counts >= 2, (e[last] - e[prev]) / dt, e[last] / age(last))
+
+    earlier = (e[prev] - e[first]) / np.maximum(t[prev] - t[first], _MIN_HOURS)
+    baseline = np.where(known, e[prev] / age(prev), velocity)
+    previous = np.where(counts >= 3, earlier, baseline)
+    acceleration = np.where(counts >= 2, (velocity - previous) / dt, 0.0)
+    trend_rate = np.maximum(0.0, velocity + acceleration * horizon_hours)
+    return velocity.tolist(), acceleration.tolist(), trend_rate.tolist()
+
+
+def _trackable(tweets: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [tweet for tweet in tweets if str(tweet["id"]).isdigit()]
+
+
+class EngagementTracker:
+    """
+    互动快照存储和升温排名
+
+    - record(): 每批一次 executemany，同一运行内重复出现的推文覆盖为最新快照
+    - annotate(): 给推文加上 velocity / acceleration / trend_rate / trend_score（供 PromptPacker 排序）
+    - rising(): 之前运行见过、正在加速的推文（新推文之外的"升温"列表）
+
+    只跟踪带真实推文 ID 的推文：快照兜底的 ref_id 每次快照都会复用，跨运行对不上，
+    还会把不相关的推文拼成一条互动序列
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        retention_days: int = 7,
+        horizon_hours: float = 1.0,
+    ):
+        self.conn = conn
+        self.retention_days = retention_days
+        self.horizon_hours = horizon_hours
+
+    def record(self, tweets: Iterable[Dict[str, Any]], run_ts: int) -> int:
+        """记录一次快照（run_ts 为本次运行开始的 Unix 时间戳）"""
+        rows = []
+        for tweet in _trackable(tweets):
+            engagement = tweet.get("engagement", {})
+            rows.append((
+                str(tweet["id"]),
+                run_ts,
+                engagement.get("likes", 0),
+                engagement.get("reposts", 0),
+                engagement.get("replies", 0),
+                engagement.get("views", 0),
+            ))
+        if not rows:
+            return 0
+
+        with metrics.timer("db_query_seconds", op="engagement_snapshot"):
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO engagement_snapshots "
+                "(tweet_id, run_ts, likes, reposts, replies, views) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.commit()
+        return len(rows)
+
+    def history(self, tweet_ids: Iterable[str]) -> Dict[str, List[Tuple[int, float]]]:
+        """每条推文最近 3 次快照的 (run_ts, 加权互动数)，按时间升序"""
+        ordered = list(dict.fromkeys(str(tweet_id) for tweet_id in tweet_ids))
+        history: Dict[str, List[Tuple[int, float]]] = {}
+        for start in range(0, len(ordered), _SQL_CHUNK_SIZE):
+            chunk = ordered[start:start + _SQL_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            with metrics.timer("db_query_seconds", op="engagement_history"):
+                rows = self.conn.execute(
+                    f"""
+                    SELECT tweet_id, run_ts, likes, reposts, replies FROM (
+                        SELECT *, ROW_NUMBER() OVER (
+                            PARTITION BY tweet_id ORDER BY run_ts DESC
+                        ) AS recent
+                        FROM engagement_snapshots WHERE tweet_id IN ({placeholders})
+                    )
+                    WHERE recent <= {_SNAPSHOT_WINDOW}
+                    ORDER BY tweet_id, run_ts
+                    """,
+                    chunk,
+                ).fetchall()
+            for tweet_id, run_ts, likes, reposts, replies in rows:
+                history.setdefault(tweet_id, []).append(
+                    (run_ts, weighted_engagement(likes, reposts, replies))
+                )
+        return history
+
+    def trends(self, tweets: List[Dict[str, Any]]) -> Dict[str, Trend]:
+        """
+        按快照历史计算推文的速度 / 加速度（没有快照的推文不出现在结果中）
+
+        Returns:
+            tweet_id → {velocity, acceleration, trend_rate, snapshots}
+        """
+        tweets = _trackable(tweets)
+        history = self.history(str(t["id"]) for t in tweets)
+        posted = {str(t["id"]): t.get("timestamp") or None for t in tweets}
+        ids = [tweet_id for tweet_id in history if tweet_id in posted]
+        counts = [len(history[i]) for i in ids]
+        times = [run_ts / 3600 for i in ids for run_ts, _ in history[i]]
+        values = [value for i in ids for _, value in history[i]]
+        velocity, acceleration, rate = compute_trends(
+            counts,
+            times,
+            values,
+            [posted[i] / 3600 if posted[i] else None for i in ids],
+            self.horizon_hours,
+        )
+        return {
+            tweet_id: {"velocity": v, "acceleration": a, "trend_rate": r, "snapshots": n}
+            for tweet_id, v, a, r, n in zip(ids, velocity, acceleration, rate, counts)
+        }
+
+    def annotate(self, tweets: List[Dict[str, Any]]):
+        """给推文加上趋势字段（原地修改）"""
+        if not tweets:
+            return
+        trends = self.trends(tweets)
+        for tweet in tweets:
+            trend = trends.get(str(tweet["id"]))
+            if trend is not None:
+                tweet.update(
+                    velocity=round(trend["velocity"], 2),
+                    acceleration=round(trend["acceleration"], 2),
+                    trend_rate=round(trend["trend_rate"], 2),
+                    trend_score=round(math.log1p(trend["trend_rate"]), 3),
+                )
+
+    def rising(
+        self,
+        tweets: List[Dict[str, Any]],
+        exclude: Iterable[str] = (),
+        top: int = 5,
+        min_rate: float = 10.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        之前运行已见过、本次仍在加速的推文
+
+        只考虑至少有两次快照（跨运行）且加速度为正、外推增量不低于 min_rate / 小时的推文，
+        按 trend_rate 从高到低取前 top 条
+
+        Returns:
+            推文副本（带趋势字段）
+        """
+        excluded = set(exclude)
+        candidates = {str(t["id"]): t for t in tweets if str(t["id"]) not in excluded}
+        if not candidates or top <= 0:
+            return []
+
+        ranked = []
+        for tweet_id, trend in self.trends(list(candidates.values())).items():
+            if trend["snapshots"] < 2 or trend["acceleration"] <= 0 or trend["trend_rate"] < min_rate:
+                continue
+            ranked.append((trend["trend_rate"], tweet_id, trend))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+
+        rising = []
+        for rate, tweet_id, trend in ranked[:top]:
+            rising.append({
+                **candidates[tweet_id],
+                "velocity": round(trend["velocity"], 2),
+                "acceleration": round(trend["acceleration"], 2),
+                "trend_rate": round(rate, 2),
+                "trend_score": round(math.log1p(rate), 3),
+            })
+        metrics.observe("rising_tweets", len(rising))
+        return rising
+
+    def purge_expired(self) -> int:
+        cutoff = int(time.time()) - self.retention_days * 86400
+        return storage.purge(self.conn, "engagement_snapshots", "run_ts < ?", (cutoff,))
@@ -0,0 +1,4 @@
+"""
+Benchmarks - 性能基准脚本
+在项目根目录运行: python3 -m benchmarks.<脚本名>
+"""
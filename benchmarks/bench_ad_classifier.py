@@ -0,0 +1,91 @@
+"""
+广告分类器基准：校验标注语料，并对比旧版逐关键词子串扫描的吞吐
+
+用法: python3 -m benchmarks.bench_ad_classifier [--tweets 50000]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from agents.ad_classifier import AdClassifier
+
+
+CORPUS_PATH = Path(__file__).parent / "fixtures" / "ad_corpus.jsonl"
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def legacy_is_ad(tweet: dict) -> bool:
+    """旧版 TwitterMonitorGraph._is_ad：每次调用重建列表并逐个子串扫描"""
+    content = tweet.get("content", "").lower()
+    author = tweet.get("author", "").lower()
+    engagement = tweet.get("engagement", {})
+    ad_keywords = [
+        "promoted", "ad", "sponsored", "推广", "广告", "赞助", "点击链接", "立即购买",
+        "限时优惠", "免费领取", "扫码", "加微信", "加vx", "咨询微信", "详情咨询",
+        "私信了解", "点击下方", "戳链接", "#sponsored",
+    ]
+    for keyword in ad_keywords:
+        if keyword in content:
+            return True
+    for account in ["promoted", "ad", "sponsor"]:
+        if account in author:
+            return True
+    views = engagement.get("views", 0)
+    if views > 1000 and engagement.get("likes", 0) < 5 and engagement.get("replies", 0) < 2:
+        return True
+    return False
+
+
+def check_corpus(classifier: AdClassifier, corpus) -> int:
+    failures = 0
+    legacy_false_positives = 0
+    for item in corpus:
+        reason = classifier.classify(item)
+        if reason != item["expected"]:
+            failures += 1
+            print(f"  ✗ @{item['author']}: {item['content'][:40]!r} → {reason}, 期望 {item['expected']}")
+        if item["expected"] is None and legacy_is_ad(item):
+            legacy_false_positives += 1
+    print(
+        f"语料校验: {len(corpus) - failures}/{len(corpus)} 通过 "
+        f"(旧版误杀正常推文 {legacy_false_positives} 条)"
+    )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="广告分类器基准")
+    parser.add_argument("--tweets", type=int, default=50_000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    classifier = AdClassifier.from_file()
+    failures = check_corpus(classifier, corpus)
+
+    batch = (corpus * (args.tweets // len(corpus) + 1))[: args.tweets]
+
+    start = time.perf_counter()
+    for tweet in batch:
+        legacy_is_ad(tweet)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    classifier.classify_batch(batch)
+    compiled_s = time.perf_counter() - start
+
+    print(f"\n{len(batch)} 条推文:")
+    print(f"  旧版关键词循环: {legacy_s * 1000:8.1f} ms ({legacy_s / len(batch) * 1e6:.2f} µs/条)")
+    print(f"  AdClassifier:   {compiled_s * 1000:8.1f} ms ({compiled_s / len(batch) * 1e6:.2f} µs/条)")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+推文归档基准：批量写入吞吐，以及关键词 / 作者 / 时间范围查询在 FTS5 + 索引与全表 LIKE 扫描下的延迟
+
+预置 N 条推文（发布时间均匀分布在最近 180 天，5000 个作者，关键词按固定比例出现），
+每批 100 条写入（与过滤阶段一致），再对每类查询取多次运行的中位数
+用法: python3 -m benchmarks.bench_archive [--rows 100000 500000]
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from agents import storage
+from agents.archive import TweetArchive
+
+
+DAY = 86400
+# 查询关键词及其出现比例：罕见（0.1%）、常见（5%）、中文（各 3%；两字词走 LIKE）
+KEYWORDS = {"Blackwell": 0.001, "reasoning": 0.05, "机器人": 0.03, "开源": 0.03, "模型": 0.03}
+
+
+def make_tweets(rows: int, now: int, seed: int = 11):
+    """正文从 2 万词的 Zipf 分布中抽取，再按 KEYWORDS 的比例插入查询关键词"""
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+        for _ in range(20000)
+    ]
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    for i in range(rows):
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(12, 30))
+        for keyword, ratio in KEYWORDS.items():
+            if rng.random() < ratio:
+                words.insert(rng.randint(0, len(words)), keyword)
+        author = f"user{rng.randrange(5000)}"
+        yield {
+            "id": str(10**15 + i),
+            "author": author,
+            "content": " ".join(words),
+            "timestamp": now - rng.randrange(180 * DAY),
+            "engagement": {"likes": rng.randrange(1000), "reposts": rng.randrange(100), "replies": 0},
+            "url": f"https://x.com/{author}/status/{10**15 + i}",
+        }
+
+
+def like_scan(conn, query: str = "", author: str = "", since: int = 0, until: int = 2**62, limit: int = 20):
+    """对照组：无 FTS、无作者 / 时间索引时的全表扫描"""
+    conditions, params = ["+created_at >= ?", "+created_at < ?"], [since, until]
+    for term in query.split():
+        conditions.append("content LIKE ?")
+        params.append(f"%{term}%")
+    if author:
+        conditions.append("+author = ? COLLATE NOCASE")
+        params.append(author)
+    return conn.execute(
+        f"SELECT data FROM tweet_archive NOT INDEXED WHERE {' AND '.join(conditions)} "
+        "ORDER BY created_at DESC LIMIT ?",
+        (*params, limit),
+    ).fetchall()
+
+
+def median_ms(fn, rounds: int = 7) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="推文归档写入 / 查询基准")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    queries = {
+        "罕见关键词": dict(query="Blackwell"),
+        "常见关键词": dict(query="reasoning"),
+        "中文关键词": dict(query="机器人"),
+        "两个中文双字词": dict(query="开源 模型"),
+        "作者": dict(author="user42"),
+        "最近 7 天": dict(since=now - 7 * DAY),
+        "关键词 + 30 天": dict(query="reasoning", since=now - 30 * DAY),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            conn = storage.connect(Path(tmp) / f"archive_{rows}.db")
+            storage.migrate(conn)
+            archive = TweetArchive(conn)
+
+            # 只统计写入耗时，不含生成推文
+            tweets = list(make_tweets(rows, now))
+            started = time.perf_counter()
+            for start in range(0, rows, args.batch):
+                archive.add(tweets[start:start + args.batch])
+            elapsed = time.perf_counter() - started
+            size_mb = sum(f.stat().st_size for f in Path(tmp).glob(f"archive_{rows}.db*")) / 2**20
+            print(
+                f"\n{rows} 条推文（分词: {archive.tokenizer}）：写入 {rows / elapsed:,.0f} 条/秒，"
+                f"每批 {elapsed / (rows / args.batch) * 1000:.2f}ms，数据库 {size_mb:.0f} MB"
+            )
+            print(f"{'查询':<14}{'命中':>8}{'FTS5 + 索引 (ms)':>20}{'全表 LIKE (ms)':>18}")
+            print("-" * 62)
+            for name, kwargs in queries.items():
+                hits = len(archive.search(limit=20, **kwargs))
+                indexed = median_ms(lambda: archive.search(limit=20, **kwargs))
+                scanned = median_ms(lambda: like_scan(conn, **kwargs), rounds=3)
+                print(f"{name:<14}{hits:>8}{indexed:>20.2f}{scanned:>18.2f}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
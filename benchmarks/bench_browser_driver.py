@@ -0,0 +1,68 @@
+"""
+浏览器驱动基准：对比 agent-browser 子进程与持久 CDP 会话的单条命令延迟
+
+需要已启动的 Chrome（CDP 模式），例如先运行 ./login.sh 或 python3 graph.py 启动过一次
+用法: python3 -m benchmarks.bench_browser_driver [--rounds 10]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from agents.fetch_agent import FetchAgent
+
+
+COMMANDS = [
+    ("eval", ["eval", "--json", "document.querySelectorAll('article').length"]),
+    ("scroll", ["scroll", "down", "10"]),
+    ("wait", ["wait", "0"]),
+    ("snapshot", ["snapshot", "--json"]),
+]
+
+
+def bench_driver(run, rounds: int) -> dict:
+    results = {}
+    for label, args in COMMANDS:
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            success, output = run(*args)
+            samples.append((time.perf_counter() - start) * 1000)
+            if not success:
+                print(f"  ⚠️ {label} 失败: {output[:120]}")
+                break
+        results[label] = samples
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="浏览器驱动单条命令延迟基准")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--cdp-port", type=int, default=int(os.getenv("CDP_PORT", "9222")))
+    args = parser.parse_args()
+
+    subprocess_agent = FetchAgent(cdp_port=args.cdp_port, browser_driver="agent-browser")
+    cdp_agent = FetchAgent(cdp_port=args.cdp_port, browser_driver="cdp")
+
+    drivers = {
+        "agent-browser": bench_driver(subprocess_agent._run_agent_browser, args.rounds),
+        "cdp": bench_driver(cdp_agent._run_browser, args.rounds),
+    }
+    cdp_agent.close()
+
+    print(f"\n{'命令':<10}{'驱动':<16}{'p50 (ms)':>10}{'mean (ms)':>12}{'max (ms)':>10}")
+    print("-" * 58)
+    for label, _ in COMMANDS:
+        for driver, results in drivers.items():
+            samples = results.get(label) or [0.0]
+            print(
+                f"{label:<10}{driver:<16}"
+                f"{statistics.median(samples):>10.1f}"
+                f"{statistics.mean(samples):>12.1f}"
+                f"{max(samples):>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
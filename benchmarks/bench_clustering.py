@@ -0,0 +1,133 @@
+"""
+话题聚类基准：同样的 token 预算下，聚类前后 prompt 覆盖的不同话题数，以及聚类耗时（numpy / 纯 Python）
+
+合成时间线：若干热点话题，每个话题由 2-10 条不同作者的转述组成（改写约两成标题用词并附上简短评论），
+另有一批互不相关的独立推文；互动数服从长尾分布
+用法: python3 -m benchmarks.bench_clustering [--tweets 100 300 600] [--budget 2000]
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+
+from agents import clustering
+from agents.analyse_agent.packer import PromptPacker
+from agents.clustering import TopicClusterer
+
+
+def make_vocabulary(rng: random.Random, size: int = 3000):
+    return ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+
+def filler(rng: random.Random, vocabulary, count: int) -> str:
+    """约三成是各推文共用的高频词（前 50 个），其余从整个词表随机抽取"""
+    return " ".join(
+        rng.choice(vocabulary[:50]) if rng.random() < 0.3 else rng.choice(vocabulary)
+        for _ in range(count)
+    )
+
+
+def topic_phrase(rng: random.Random) -> str:
+    name = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6)).capitalize()
+    version = rng.randint(2, 9)
+    noun = rng.choice(["model", "chip", "robot", "browser", "protocol", "dataset"])
+    return f"{name} {version} {noun}"
+
+
+def make_timeline(size: int, seed: int = 7):
+    """
+    返回 (推文列表, 每条推文的话题编号)，独立推文的话题编号为负数
+
+    热点话题的转述越多、互动也越高（热度系数与话题规模成正比），与真实时间线一致
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    tweets, labels = [], []
+    topic = 0
+    while len(tweets) < size:
+        if rng.random() < 0.5:
+            # 同一新闻的不同转述：标题里约两成的词被换掉，再加几个词的评论
+            headline = f"{topic_phrase(rng)} {filler(rng, vocabulary, 12)}".split()
+            heat = rng.randint(2, 10)
+            for _ in range(heat):
+                words = [
+                    word if rng.random() > 0.2 else rng.choice(vocabulary)
+                    for word in headline
+                ] + filler(rng, vocabulary, 4).split()
+                tweets.append((" ".join(words), heat))
+                labels.append(topic)
+            topic += 1
+        else:
+            tweets.append((f"{topic_phrase(rng)} {filler(rng, vocabulary, 14)}", 1))
+            labels.append(-len(tweets))
+
+    tweets, labels = tweets[:size], labels[:size]
+    return [
+        {
+            "id": str(i),
+            "author": f"user{i}",
+            "content": text,
+            "engagement": {"likes": int(rng.paretovariate(1.2) * 10 * heat)},
+        }
+        for i, (text, heat) in enumerate(tweets)
+    ], labels
+
+
+def covered(tweets, labels):
+    return len({labels[int(t["id"])] for t in tweets})
+
+
+def timed_cluster(tweets, use_numpy: bool):
+    saved = clustering.np
+    if not use_numpy:
+        clustering.np = None
+    try:
+        started = time.perf_counter()
+        representatives = TopicClusterer().cluster(tweets)
+        return representatives, time.perf_counter() - started
+    finally:
+        clustering.np = saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="话题聚类基准")
+    parser.add_argument("--tweets", type=int, nargs="+", default=[100, 300, 600])
+    parser.add_argument("--budget", type=int, default=2000)
+    args = parser.parse_args()
+
+    packer = PromptPacker(budget=args.budget)
+    print(
+        f"{'推文':>6}{'话题':>6}{'簇':>6}{'混簇':>6}{'全量 tokens':>16}"
+        f"{'预算内覆盖话题':>18}{'预算内代表推文':>18}{'numpy (ms)':>12}{'纯 Python (ms)':>16}"
+    )
+    print("-" * 110)
+    for size in args.tweets:
+        tweets, labels = make_timeline(size)
+        representatives, numpy_seconds = timed_cluster(tweets, use_numpy=clustering._numpy() is not None)
+        _, python_seconds = timed_cluster(tweets, use_numpy=False)
+
+        # 混簇：代表与某个成员话题不同（按代表下标回查整簇的话题）
+        assignment = TopicClusterer().assign(tweets)
+        topics_per_cluster = {}
+        for i, leader in enumerate(assignment):
+            topics_per_cluster.setdefault(leader, Counter())[labels[i]] += 1
+        mixed = sum(1 for counter in topics_per_cluster.values() if len(counter) > 1)
+
+        plain, _ = packer.select(tweets)
+        packed, _ = packer.select(representatives)
+        plain_tokens = sum(tokens for _, tokens in packer.prepare(tweets))
+        packed_tokens = sum(tokens for _, tokens in packer.prepare(representatives))
+        represented = sum(t["cluster_size"] for t in packed)
+        numpy_ms = f"{numpy_seconds * 1000:.1f}" if clustering._numpy() is not None else "-"
+        print(
+            f"{size:>6}{len(set(labels)):>6}{len(representatives):>6}{mixed:>6}"
+            f"{f'{plain_tokens} → {packed_tokens}':>16}"
+            f"{f'{covered(plain, labels)} → {covered(packed, labels)}':>18}"
+            f"{f'{len(plain)} → {represented}':>18}"
+            f"{numpy_ms:>12}{python_seconds * 1000:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
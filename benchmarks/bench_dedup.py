@@ -0,0 +1,105 @@
+"""
+近似重复基准：MinHash + LSH 折叠的耗时、召回 / 误判，以及送入 LLM 的 prompt 缩减
+
+从中英文词表随机生成一批不同的推文，再为其中一部分生成转发 / 加前缀 / 改链接的近似副本，
+在预置 H 条历史签名的索引上测量折叠一批推文的耗时
+用法: python3 -m benchmarks.bench_dedup [--batch 200] [--dup-rate 0.4] [--history 10000]
+"""
+
+import argparse
+import random
+import time
+
+from agents.analyse_agent import AnalyseAgent
+from agents.dedup import NearDuplicateIndex
+
+
+WORDS = (
+    "model release launch open source agent reasoning context window price cut api gpu inference "
+    "training chip earnings revenue guidance rate decision inflation market rally crash token "
+    "benchmark paper dataset robot rocket orbit battery vehicle autopilot chatbot search video "
+    "image audio latency throughput cluster datacenter funding startup acquisition lawsuit policy"
+).split() + list("模型发布推理训练芯片财报利率市场开源代理价格数据机器人火箭电池自动驾驶搜索视频图像")
+PREFIXES = ["RT @{author}: ", "BREAKING: ", "【快讯】", "Wow! ", "🔥 ", ""]
+
+
+def make_tweet(rng: random.Random, tweet_id: int) -> dict:
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 30)))
+    return {
+        "id": str(tweet_id),
+        "author": f"user{tweet_id}",
+        "content": f"{text} https://t.co/{rng.getrandbits(32):x}",
+        "engagement": {"likes": rng.randint(0, 500), "reposts": 0, "replies": 0, "views": 0},
+    }
+
+
+def make_copy(rng: random.Random, original: dict, tweet_id: int) -> dict:
+    body = original["content"].rsplit(" https://", 1)[0]
+    prefix = rng.choice(PREFIXES).format(author=original["author"])
+    return {
+        "id": str(tweet_id),
+        "author": f"user{tweet_id}",
+        "content": f"{prefix}{body} https://t.co/{rng.getrandbits(32):x}",
+        "engagement": {"likes": rng.randint(0, 50), "reposts": 0, "replies": 0, "views": 0},
+        "copy_of": original["id"],
+    }
+
+
+def make_batch(rng: random.Random, size: int, dup_rate: float, start_id: int):
+    originals = [make_tweet(rng, start_id + i) for i in range(int(size * (1 - dup_rate)))]
+    copies = [
+        make_copy(rng, rng.choice(originals), start_id + len(originals) + i)
+        for i in range(size - len(originals))
+    ]
+    batch = originals + copies
+    rng.shuffle(batch)
+    return batch, len(originals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似重复折叠基准")
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--dup-rate", type=float, default=0.4, help="批内近似副本比例")
+    parser.add_argument("--history", type=int, default=10000, help="预置历史签名数")
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = NearDuplicateIndex(threshold=args.threshold)
+    started = time.perf_counter()
+    index.collapse([make_tweet(rng, 10**9 + i) for i in range(args.history)])
+    index.new_run()
+    print(f"预置历史签名 {index.size} 条，耗时 {time.perf_counter() - started:.2f}s")
+
+    agent = AnalyseAgent.__new__(AnalyseAgent)
+    timings, missed, merged_distinct = [], 0, 0
+    before_chars = after_chars = 0
+    for round_ in range(args.rounds):
+        batch, distinct = make_batch(rng, args.batch, args.dup_rate, round_ * args.batch)
+        before_chars += len(agent._format_tweets(batch))
+
+        started = time.perf_counter()
+        kept, _ = index.collapse(batch)
+        timings.append(time.perf_counter() - started)
+        index.new_run()
+
+        after_chars += len(agent._format_tweets(kept))
+        # 代表推文可能是互动更高的副本，按原创分组统计：
+        # 漏折叠 = 同一组保留了多条；误折叠 = 整组消失（被并入了另一条不同的原创）
+        groups = [t.get("copy_of", t["id"]) for t in kept]
+        missed += len(groups) - len(set(groups))
+        merged_distinct += distinct - len(set(groups))
+
+    copies = int(args.batch * args.dup_rate) * args.rounds
+    per_tweet = sum(timings) / (args.batch * args.rounds) * 1000
+    print(f"\n{'批大小':<8}{'副本':>8}{'漏折叠':>8}{'误折叠':>8}{'每条耗时 (ms)':>16}{'prompt 字符':>20}")
+    print("-" * 70)
+    print(
+        f"{args.batch:<8}{copies:>8}{missed:>8}{merged_distinct:>8}{per_tweet:>16.2f}"
+        f"{before_chars:>10} → {after_chars:<8}"
+    )
+
+
+if __name__ == "__main__":
+    main()
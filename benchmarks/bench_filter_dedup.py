@@ -0,0 +1,108 @@
+"""
+去重基准：逐条 SELECT/INSERT 与批量查询 / 内存索引的对比
+
+在临时数据库中预置 N 条已读记录，模拟一次补抓（一半新推文、一半已读）
+用法: python3 -m benchmarks.bench_filter_dedup [--rows 100000 500000] [--batch 50 500]
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from agents.seen_store import SeenTweetStore
+
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS seen_tweets (
+        tweet_id TEXT PRIMARY KEY,
+        content TEXT,
+        author TEXT,
+        seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def build_db(path: Path, rows: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.executemany(
+        "INSERT INTO seen_tweets (tweet_id, content, author) VALUES (?, ?, ?)",
+        ((str(10**12 + i), "x" * 80, f"user{i % 5000}") for i in range(rows)),
+    )
+    conn.commit()
+    return conn
+
+
+def make_batch(rows: int, batch: int, offset: int):
+    """一半命中已读记录，一半是新 ID"""
+    half = batch // 2
+    seen = [str(10**12 + (i * 7919) % rows) for i in range(half)]
+    fresh = [str(2 * 10**12 + offset + i) for i in range(batch - half)]
+    return [(tweet_id, "content", "author") for tweet_id in seen + fresh]
+
+
+def legacy_filter(conn: sqlite3.Connection, batch) -> int:
+    new_count = 0
+    for tweet_id, content, author in batch:
+        cursor = conn.execute("SELECT 1 FROM seen_tweets WHERE tweet_id = ?", (tweet_id,))
+        if cursor.fetchone() is None:
+            new_count += 1
+            conn.execute(
+                "INSERT OR IGNORE INTO seen_tweets (tweet_id, content, author) VALUES (?, ?, ?)",
+                (tweet_id, content, author),
+            )
+    conn.commit()
+    return new_count
+
+
+def store_filter(store: SeenTweetStore, batch) -> int:
+    rows = {row[0]: row for row in batch}
+    unseen = store.filter_unseen(rows.keys())
+    store.mark_seen([rows[tweet_id] for tweet_id in unseen])
+    return len(unseen)
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="seen_tweets 去重基准")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--batch", type=int, nargs="+", default=[50, 500])
+    args = parser.parse_args()
+
+    print(f"{'表行数':>10}{'批大小':>8}{'逐条 (ms)':>12}{'批量 SQL (ms)':>15}{'内存索引 (ms)':>15}{'加载索引 (ms)':>15}")
+    print("-" * 75)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            conn = build_db(Path(tmp) / f"bench_{rows}.db", rows)
+            sql_store = SeenTweetStore(conn, use_memory_index=False)
+
+            start = time.perf_counter()
+            mem_store = SeenTweetStore(conn, use_memory_index=True)
+            load_ms = (time.perf_counter() - start) * 1000
+
+            for i, batch_size in enumerate(args.batch):
+                offset = i * 3 * batch_size
+                legacy_ms = timed(legacy_filter, conn, make_batch(rows, batch_size, offset))
+                sql_ms = timed(
+                    store_filter, sql_store, make_batch(rows, batch_size, offset + batch_size)
+                )
+                mem_ms = timed(
+                    store_filter, mem_store, make_batch(rows, batch_size, offset + 2 * batch_size)
+                )
+                print(
+                    f"{rows:>10}{batch_size:>8}{legacy_ms:>12.2f}{sql_ms:>15.2f}"
+                    f"{mem_ms:>15.2f}{load_ms:>15.1f}"
+                )
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+LLM 故障切换基准：单 provider 与 provider 调用链（熔断 / 对冲）的成功率和延迟对比
+
+在本地启动两个模拟 OpenAI 接口：主 provider 注入错误或长尾延迟，备选 provider 稳定，
+按顺序发出 N 次请求，统计成功率和 p50 / p90 / p99 延迟
+用法: python3 -m benchmarks.bench_llm_failover [--requests 100] [--error-rate 0.3] [--tail-rate 0.1]
+"""
+
+import argparse
+import os
+import time
+
+from agents.llm_factory import SimpleLLM
+from benchmarks.fakes import FakeOpenAI
+
+
+def run(llm: SimpleLLM, requests: int) -> dict:
+    latencies, failures = [], 0
+    for i in range(requests):
+        start = time.perf_counter()
+        try:
+            llm.invoke(f"prompt {i}", max_tokens=100)
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    def pct(q: float) -> float:
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000
+
+    return {
+        "ok": requests - failures,
+        "p50": pct(0.5),
+        "p90": pct(0.9),
+        "p99": pct(0.99),
+        "total": sum(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 故障切换 / 对冲请求基准")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.3, help="主 provider 返回 503 的比例")
+    parser.add_argument("--tail-rate", type=float, default=0.1, help="主 provider 出现长尾延迟的比例")
+    parser.add_argument("--base-ms", type=float, default=20, help="正常响应延迟（毫秒）")
+    parser.add_argument("--tail-ms", type=float, default=1000, help="长尾响应延迟（毫秒）")
+    args = parser.parse_args()
+
+    base, tail = args.base_ms / 1000, args.tail_ms / 1000
+
+    def long_tail(rng) -> float:
+        return tail if rng.random() < args.tail_rate else base
+
+    scenarios = [
+        ("主 provider 间歇故障", dict(error_rate=args.error_rate, delay=base)),
+        ("主 provider 长尾延迟", dict(delay=long_tail)),
+    ]
+
+    os.environ.update(LOCAL_API_KEY="sk-bench", OPENAI_API_KEY="sk-bench")
+    for title, primary_kwargs in scenarios:
+        print(f"\n{title} ({args.requests} 次请求)")
+        print(f"{'实现':<24}{'成功':>6}{'p50 (ms)':>10}{'p90 (ms)':>10}{'p99 (ms)':>10}{'总耗时 (s)':>12}")
+        print("-" * 72)
+
+        for name, chain, hedge in (
+            ("单 provider", ["local"], False),
+            ("调用链", ["local", "openai"], False),
+            ("调用链 + 对冲", ["local", "openai"], True),
+        ):
+            with FakeOpenAI(**primary_kwargs) as primary, FakeOpenAI(delay=base * 2) as backup:
+                os.environ["LOCAL_BASE_URL"] = f"{primary.base_url}/v1"
+                os.environ["OPENAI_BASE_URL"] = f"{backup.base_url}/v1"
+                # 熔断冷却比一次基准短，让主 provider 能恢复并参与 p90 统计
+                os.environ["LLM_BREAKER_COOLDOWN"] = "1"
+                llm = SimpleLLM(chain=chain, hedge=hedge)
+                stats = run(llm, args.requests)
+                llm.close()
+            print(
+                f"{name:<24}{stats['ok']:>6}{stats['p50']:>10.1f}{stats['p90']:>10.1f}"
+                f"{stats['p99']:>10.1f}{stats['total']:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
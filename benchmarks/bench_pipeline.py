@@ -0,0 +1,65 @@
+"""
+流水线基准：抓取 → 过滤 → 分析 顺序执行与流水线执行（PIPELINE=true）的端到端耗时
+
+回放录制的抓取结果（每次快照前模拟页面渲染等待），LLM 为有固定延迟的模拟接口，
+两种模式使用相同的分块大小（map-reduce），对比整次运行耗时和单独抓取的耗时
+用法: python3 -m benchmarks.bench_pipeline [--snapshot-delay 1.0] [--llm-delay 1.5] [--chunk-size 8]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks.replay import offline_pipeline, reset_state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抓取 / 分析流水线基准")
+    parser.add_argument("--snapshot-delay", type=float, default=1.0, help="每次快照前的模拟等待（秒）")
+    parser.add_argument("--llm-delay", type=float, default=1.5, help="模拟 LLM 每次请求耗时（秒）")
+    parser.add_argument("--chunk-size", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.update(ANALYSE_MODE="chunked", ANALYSE_CHUNK_SIZE=str(args.chunk_size))
+    with offline_pipeline() as (graph, llm, telegram):
+        graph.fetch_agent.snapshot_delay = args.snapshot_delay
+        llm.delay = args.llm_delay
+
+        rows = []
+        for pipeline in (False, True):
+            graph.config["pipeline"] = pipeline
+            graph.graph = graph._build_graph()
+            samples = []
+            for _ in range(args.rounds):
+                reset_state(graph)
+                telegram.reset()
+                llm.requests.clear()
+                start = time.perf_counter()
+                result = graph.run()
+                elapsed = time.perf_counter() - start
+                if result["status"] != "success" or len(telegram.messages) != 1:
+                    raise RuntimeError(f"回放失败: {result.get('error') or result['status']}")
+                samples.append((elapsed, len(llm.requests)))
+            rows.append((pipeline, samples))
+
+        reset_state(graph)
+        start = time.perf_counter()
+        graph.fetch_agent.execute()
+        fetch_time = time.perf_counter() - start
+
+    sequential = statistics.median(s[0] for s in rows[0][1])
+    analyse_time = sequential - fetch_time
+    print(f"\n单独抓取 {fetch_time:.2f}s, 抓取后的过滤 + 分析 + 推送 {analyse_time:.2f}s")
+    print(f"\n{'模式':<12}{'端到端 (s)':>12}{'LLM 请求':>10}")
+    print("-" * 34)
+    for pipeline, samples in rows:
+        print(
+            f"{'流水线' if pipeline else '顺序':<12}"
+            f"{statistics.median(s[0] for s in samples):>12.2f}{samples[-1][1]:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Prompt 打包基准：按条数截取（旧行为）与按 token 预算挑选的 prompt 大小对比
+
+生成 N 条带链接 / 媒体占位符、长度不一的推文，对比两种方式送入 LLM 的推文部分 token 数
+和打包耗时；N 变大时旧方式仍取前 MAX_TWEETS_TO_ANALYZE 条全文，新方式始终不超过预算
+用法: python3 -m benchmarks.bench_prompt_packing [--sizes 20 100 500] [--budget 4000]
+"""
+
+import argparse
+import random
+import time
+
+from agents.analyse_agent.packer import PromptPacker, _tiktoken_encoder, count_tokens
+
+
+WORDS = (
+    "model release launch open source agent reasoning context window price api gpu inference "
+    "training chip earnings revenue rate market rally token benchmark paper dataset robot rocket"
+).split()
+HANZI = "模型发布推理训练芯片财报利率市场开源代理价格数据机器人火箭电池自动驾驶搜索视频图像"
+MARKERS = ["", " Image", " GIF", " Show more", " Image Image"]
+
+
+def make_tweets(rng: random.Random, count: int, now: float) -> list:
+    tweets = []
+    for i in range(count):
+        if rng.random() < 0.5:
+            body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 80)))
+        else:
+            body = "".join(rng.choice(HANZI) for _ in range(rng.randint(20, 200)))
+        links = " ".join(f"https://t.co/{rng.getrandbits(40):x}" for _ in range(rng.randint(0, 2)))
+        tweets.append({
+            "id": str(i),
+            "author": f"user{i}",
+            "content": f"{body} {links}{rng.choice(MARKERS)}"[:500],
+            "timestamp": int(now - rng.uniform(0, 12) * 3600),
+            "engagement": {"likes": int(rng.paretovariate(1.2)), "reposts": 0, "replies": 0},
+        })
+    tweets.sort(key=lambda t: t["timestamp"], reverse=True)
+    return tweets
+
+
+def format_tweets(tweets: list) -> str:
+    return "\n\n---\n\n".join(f"@{t['author']}:\n{t['content']}" for t in tweets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按 token 预算打包 prompt 基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 500])
+    parser.add_argument("--budget", type=int, default=4000)
+    parser.add_argument("--max-tweets", type=int, default=20)
+    args = parser.parse_args()
+
+    counter = "tiktoken cl100k_base" if _tiktoken_encoder() is not None else "经验公式"
+    print(f"token 计数: {counter}，预算 {args.budget}，旧方式取前 {args.max_tweets} 条")
+
+    rng = random.Random(7)
+    now = time.time()
+    packer = PromptPacker(budget=args.budget)
+
+    print(f"\n{'推文数':<8}{'旧: 条数':>10}{'旧: tokens':>12}{'新: 条数':>10}{'新: tokens':>12}{'打包耗时 (ms)':>16}")
+    print("-" * 68)
+    for size in args.sizes:
+        tweets = make_tweets(rng, size, now)
+        legacy = tweets[:args.max_tweets]
+        legacy_tokens = count_tokens(format_tweets(legacy))
+
+        started = time.perf_counter()
+        selected, _ = packer.select(tweets, max_count=args.max_tweets, now=now)
+        elapsed = (time.perf_counter() - started) * 1000
+        packed_tokens = count_tokens(format_tweets(selected))
+
+        print(
+            f"{size:<8}{len(legacy):>10}{legacy_tokens:>12}"
+            f"{len(selected):>10}{packed_tokens:>12}{elapsed:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+快照解析基准：旧版逐 article 全文 re.search 与单次扫描索引解析的对比
+
+以 fixtures/snapshot_home.json（录制的首页快照）为模板，扩展到 50 / 500 / 5000 个 article
+用法: python3 -m benchmarks.bench_snapshot_parser [--sizes 50 500 5000]
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+from agents.fetch_agent.parser import parse_snapshot
+
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "snapshot_home.json"
+
+_REF_RE = re.compile(r"\[ref=(e\d+)\]")
+_STATUS_RE = re.compile(r"/status/(\d+)")
+
+
+def scale_snapshot(template: dict, articles: int) -> dict:
+    """复制模板快照中的 article，重新编号 ref、作者和 status ID"""
+    lines = template["data"]["snapshot"].split("\n")
+    refs = template["data"]["refs"]
+
+    header, blocks, current = [], [], None
+    for line in lines:
+        if line.lstrip().startswith("- article"):
+            current = [line]
+            blocks.append(current)
+        elif current is not None:
+            current.append(line)
+        else:
+            header.append(line)
+
+    out_lines, out_refs = list(header), {}
+    for ref in _REF_RE.findall("\n".join(header)):
+        out_refs[ref] = refs[ref]
+
+    next_ref = len(out_refs) + 1
+    for i in range(articles):
+        block = blocks[i % len(blocks)]
+        copy = i // len(blocks)
+        author = re.search(r"@(\w+)", refs[_REF_RE.search(block[0]).group(1)]["name"]).group(1)
+        new_author = f"{author}{copy}"
+
+        ref_map = {}
+        for ref in _REF_RE.findall("\n".join(block)):
+            ref_map[ref] = f"e{next_ref}"
+            next_ref += 1
+
+        for line in block:
+            line = _REF_RE.sub(lambda m: f"[ref={ref_map[m.group(1)]}]", line)
+            line = line.replace(f"@{author} ", f"@{new_author} ").replace(f"/{author}", f"/{new_author}")
+            line = _STATUS_RE.sub(lambda m: f"/status/{int(m.group(1)) + copy * 100}", line)
+            out_lines.append(line)
+
+        for old, new in ref_map.items():
+            data = dict(refs[old])
+            data["name"] = data["name"].replace(f"@{author} ", f"@{new_author} ")
+            out_refs[new] = data
+
+    return {"success": True, "data": {"snapshot": "\n".join(out_lines), "refs": out_refs}}
+
+
+def legacy_extract(snapshot: dict) -> list:
+    """旧版 FetchAgent._extract_tweets 的核心路径：每个 article 对全文执行一次 re.search"""
+    tweets = []
+    refs = snapshot.get("data", {}).get("refs", {})
+    snapshot_text = snapshot.get("data", {}).get("snapshot", "")
+    for ref_id, ref_data in refs.items():
+        if ref_data.get("role") != "article":
+            continue
+        name = ref_data.get("name", "")
+        author_match = re.search(r"@(\w+)", name)
+        if not author_match:
+            continue
+        author = author_match.group(1)
+        time_str = "unknown"
+        for pattern in [
+            r"(\d+)\s+hours?\s+ago",
+            r"(\d+)h\b",
+            r"(\d+)\s+minutes?\s+ago",
+            r"(\d+)m\b",
+            r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d+",
+        ]:
+            match = re.search(pattern, name)
+            if match:
+                time_str = match.group(0)
+                break
+        for pattern in [r"(\d+)\s+repl(?:y|ies)", r"(\d+)\s+repost", r"(\d+)\s+like", r"(\d+)\s+views"]:
+            re.search(pattern, name)
+        match = re.search(rf"/url: /{author}/status/(\d+)", snapshot_text)
+        url = f"https://x.com/{author}/status/{match.group(1)}" if match else f"https://x.com/{author}"
+        content = re.sub(r"Verified account", "", name)
+        content = re.sub(r"^[^@]+@\w+\s+", "", content).replace(time_str, "")
+        tweets.append({"id": ref_id, "author": author, "url": url, "content": content})
+    return tweets
+
+
+def timed(fn, *args, rounds: int = 3) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="快照解析基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    with open(FIXTURE_PATH, encoding="utf-8") as f:
+        template = json.load(f)
+
+    print(f"{'articles':>10}{'快照大小':>12}{'旧版 (ms)':>12}{'单次扫描 (ms)':>16}{'加速比':>8}")
+    print("-" * 58)
+    for size in args.sizes:
+        snapshot = scale_snapshot(template, size)
+        snapshot_kb = len(snapshot["data"]["snapshot"].encode()) / 1024
+        legacy_ms = timed(legacy_extract, snapshot, rounds=1 if size > 1000 else 3)
+        parser_ms = timed(parse_snapshot, snapshot)
+        print(
+            f"{size:>10}{snapshot_kb:>10.0f}KB{legacy_ms:>12.1f}{parser_ms:>16.1f}"
+            f"{legacy_ms / parser_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+冷启动基准：`-X importtime` 导入耗时分解，以及从进程启动到第一次浏览器调用的耗时（LangGraph / lean 两种执行方式）
+
+每轮在新的子进程中执行 graph.main()：离线配置（不启动 Chrome、不调用 LLM / Telegram），
+FetchAgent.ensure_browser 被替换为记录时间后立即退出，测到的是 cron 每次运行在真正开始抓取前付出的固定开销。
+--save 把结果追加到 startup_history.jsonl（每个版本发布前跑一次），之后不带参数运行会同时打印历史记录
+用法: python3 -m benchmarks.bench_startup [--rounds 5] [--save]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+ROOT = Path(__file__).resolve().parent.parent
+HISTORY = Path(__file__).parent / "startup_history.jsonl"
+
+# 子进程：第一次浏览器调用时打印时间戳并立即退出
+FIRST_CALL_SCRIPT = """
+import os, sys, time
+from agents.fetch_agent import FetchAgent
+
+def first_browser_call(self):
+    print(f"FIRST_BROWSER_CALL {time.time()}", flush=True)
+    os._exit(0)
+
+FetchAgent.ensure_browser = first_browser_call
+import graph
+sys.argv = ["graph.py", *sys.argv[1:]]
+graph.main()
+"""
+
+MODES = {"langgraph": [], "lean": ["--lean"]}
+
+
+def offline_env(data_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        DATA_DIR=data_dir,
+        METRICS_TEXTFILE=str(Path(data_dir) / "metrics.prom"),
+        LLM_PROVIDER="local",
+        LLM_PROVIDER_CHAIN="",
+        LOCAL_API_KEY="sk-offline",
+        TELEGRAM_BOT_TOKEN="000000:offline",
+        TELEGRAM_CHAT_ID="1",
+        FETCH_SOURCES="home",
+        PIPELINE="false",
+        RECORD_DIR="",
+        LEAN_RUNNER="false",
+    )
+    return env
+
+
+def time_to_first_call(args: List[str], env: Dict[str, str]) -> float:
+    """从启动子进程到第一次浏览器调用的耗时（秒）"""
+    started = time.time()
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_CALL_SCRIPT, *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("FIRST_BROWSER_CALL "):
+            return float(line.split()[1]) - started
+    raise RuntimeError(f"没有到达浏览器调用:\n{result.stdout[-2000:]}\n{result.stderr[-2000:]}")
+
+
+def time_command(code: str, env: Dict[str, str]) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def import_breakdown(args: List[str], env: Dict[str, str]) -> Tuple[float, Counter]:
+    """
+    -X importtime 下运行到第一次浏览器调用，按顶层包汇总各模块自身的导入耗时
+
+    Returns:
+        (导入总耗时 ms, 顶层包 → ms)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", FIRST_CALL_SCRIPT, *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    packages: Counter = Counter()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1000
+    return sum(packages.values()), packages
+
+
+def git_revision() -> str:
+    result = subprocess.run(
+        ["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True
+    )
+    return result.stdout.strip() or "unknown"
+
+
+def print_history():
+    if not HISTORY.exists():
+        return
+    entries = [json.loads(line) for line in HISTORY.read_text(encoding="utf-8").splitlines() if line]
+    print(f"\n历史记录（{HISTORY.name}）")
+    print(f"{'日期':<12}{'版本':<22}{'导入 (ms)':>12}{'LangGraph (ms)':>16}{'lean (ms)':>12}")
+    print("-" * 74)
+    for entry in entries:
+        # 引入 lean 之前的版本没有 lean 一列
+        first_call = {
+            mode: f"{entry['first_browser_call_ms'][mode]:.0f}"
+            if mode in entry["first_browser_call_ms"] else "-"
+            for mode in MODES
+        }
+        print(
+            f"{entry['date']:<12}{entry['revision']:<22}{entry['import_ms']:>12.0f}"
+            f"{first_call['langgraph']:>16}{first_call['lean']:>12}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动基准")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="导入耗时分解显示的包数")
+    parser.add_argument("--save", action="store_true", help=f"把结果追加到 {HISTORY.name}")
+    args = parser.parse_args()
+    if args.save and git_revision().endswith("-dirty"):
+        # 基线必须能从已提交的版本复现
+        parser.error("--save 需要在没有未提交修改的工作区中运行")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = offline_env(tmp)
+        # 预热：创建数据库、执行迁移、生成 .pyc，之后每轮都是"已部署"状态下的冷启动
+        time_to_first_call(MODES["lean"], env)
+
+        interpreter = statistics.median(time_command("pass", env) for _ in range(args.rounds))
+        imports = statistics.median(time_command("import graph", env) for _ in range(args.rounds))
+        first_call = {
+            mode: statistics.median(time_to_first_call(flags, env) for _ in range(args.rounds))
+            for mode, flags in MODES.items()
+        }
+        breakdown = {mode: import_breakdown(flags, env) for mode, flags in MODES.items()}
+
+    print(f"中位数（{args.rounds} 轮，每轮一个新进程）")
+    print(f"  空解释器启动:          {interpreter * 1000:>8.0f} ms")
+    print(f"  python -c 'import graph': {imports * 1000:>5.0f} ms")
+    for mode, seconds in first_call.items():
+        print(f"  到第一次浏览器调用 ({mode}): {seconds * 1000:>5.0f} ms")
+
+    for mode, (total, packages) in breakdown.items():
+        print(f"\n-X importtime 到第一次浏览器调用（{mode}，共 {total:.0f} ms）")
+        print(f"{'包':<28}{'ms':>10}{'占比':>8}")
+        print("-" * 46)
+        for name, ms in packages.most_common(args.top):
+            print(f"{name:<28}{ms:>10.1f}{ms / total:>8.0%}")
+
+    if args.save:
+        entry = {
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "interpreter_ms": round(interpreter * 1000, 1),
+            "import_ms": round(imports * 1000, 1),
+            "first_browser_call_ms": {mode: round(s * 1000, 1) for mode, s in first_call.items()},
+            "top_imports_ms": {
+                name: round(ms, 1) for name, ms in breakdown["langgraph"][1].most_common(args.top)
+            },
+        }
+        with open(HISTORY, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print_history()
+
+
+if __name__ == "__main__":
+    main()
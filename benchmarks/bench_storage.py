@@ -0,0 +1,112 @@
+"""
+监控数据库基准：旧的默认连接 + 全表 DELETE 与 storage 模块（WAL、索引、分批清理）的对比
+
+预置 N 条已读记录（seen_at 均匀分布在最近 retention + 1 天内，约 1/8 已过期），
+分别测量三次连续启动（建表 / 迁移 + 清理）的耗时，以及启动后过滤一批推文（IN 查询 + 批量写入）的延迟
+用法: python3 -m benchmarks.bench_storage [--rows 100000 1000000] [--batch 500]
+"""
+
+import argparse
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from agents import storage
+from agents.seen_store import SeenTweetStore
+
+
+RETENTION_DAYS = 7
+
+
+def build_db(path: Path, rows: int):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE seen_tweets (tweet_id TEXT PRIMARY KEY, content TEXT, author TEXT, "
+        "seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    span = (RETENTION_DAYS + 1) * 86400
+    conn.executemany(
+        "INSERT INTO seen_tweets (tweet_id, content, author, seen_at) "
+        "VALUES (?, ?, ?, datetime('now', ?))",
+        (
+            (str(10**12 + i), "x" * 80, f"user{i % 5000}", f"-{span * i // rows} seconds")
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_startup(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS seen_tweets (tweet_id TEXT PRIMARY KEY, content TEXT, "
+        "author TEXT, seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.commit()
+    conn.execute(f"DELETE FROM seen_tweets WHERE seen_at < datetime('now', '-{RETENTION_DAYS} days')")
+    conn.commit()
+    return conn
+
+
+def tuned_startup(path: Path) -> sqlite3.Connection:
+    conn = storage.connect(path, check_same_thread=False)
+    storage.migrate(conn)
+    storage.purge_older_than(conn, "seen_tweets", "seen_at", RETENTION_DAYS)
+    return conn
+
+
+def filter_latency(conn: sqlite3.Connection, rows: int, batch: int, rounds: int = 20) -> float:
+    """一半已读、一半新推文，返回每批 p50 毫秒"""
+    store = SeenTweetStore(conn, retention_days=RETENTION_DAYS, use_memory_index=False)
+    timings = []
+    for r in range(rounds):
+        ids = [str(10**12 + rows - 1 - (r * batch + i)) for i in range(batch // 2)]
+        ids += [str(10**13 + r * batch + i) for i in range(batch - batch // 2)]
+        started = time.perf_counter()
+        unseen = store.filter_unseen(ids)
+        store.mark_seen([(tweet_id, "x" * 80, "user") for tweet_id in unseen])
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="监控数据库启动 / 过滤延迟基准")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    # 启动 1 的 storage 实现包含一次性迁移（建索引）；旧实现每次启动都全表扫描清理
+    print(f"{'行数':<10}{'实现':<10}{'启动 1 (s)':>12}{'启动 2 (s)':>12}{'启动 3 (s)':>12}{'过滤一批 p50 (ms)':>20}")
+    print("-" * 78)
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            base = Path(tmp) / f"base_{rows}.db"
+            build_db(base, rows)
+
+            for name, startup in (("旧实现", legacy_startup), ("storage", tuned_startup)):
+                path = Path(tmp) / f"{name}_{rows}.db"
+                shutil.copy(base, path)
+
+                startups = []
+                for _ in range(3):
+                    started = time.perf_counter()
+                    conn = startup(path)
+                    startups.append(time.perf_counter() - started)
+                    conn.close()
+
+                conn = startup(path)
+                latency = filter_latency(conn, rows, args.batch)
+                conn.close()
+                print(
+                    f"{rows:<10}{name:<10}"
+                    + "".join(f"{seconds:>12.3f}" for seconds in startups)
+                    + f"{latency:>20.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
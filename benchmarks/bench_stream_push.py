@@ -0,0 +1,65 @@
+"""
+流式推送基准：整条工作流在 STREAM_PUSH 关闭 / 开启时，读者看到第一条内容和完整摘要的时间
+
+回放录制的抓取结果，模拟 LLM 以固定间隔逐块输出摘要，统计模拟 Telegram 服务收到
+第一条消息、每次编辑和最终内容的时间（相对 graph.run() 开始）
+用法: python3 -m benchmarks.bench_stream_push [--token-delay 0.2] [--edit-interval 1.5] [--rounds 3]
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.replay import offline_pipeline, reset_state
+
+
+def run_once(graph, llm, telegram) -> dict:
+    reset_state(graph)
+    telegram.reset()
+    start = time.perf_counter()
+    result = graph.run()
+    if result["status"] != "success":
+        raise RuntimeError(f"回放失败: {result.get('error') or result['status']}")
+
+    times = [t - start for t, _, _ in telegram.calls]
+    final = telegram.texts[max(telegram.texts)]
+    assert llm.completion.splitlines()[-1].lstrip("- ") in final, "最终消息缺少完整摘要"
+    return {
+        "first": times[0],
+        "complete": times[-1],
+        "edits": sum(method == "editMessageText" for _, method, _ in telegram.calls),
+        "messages": len(telegram.messages),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式推送首条内容延迟基准")
+    parser.add_argument("--token-delay", type=float, default=0.2, help="模拟 LLM 每块输出间隔（秒）")
+    parser.add_argument("--edit-interval", type=float, default=1.5)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with offline_pipeline() as (graph, llm, telegram):
+        llm.token_delay = args.token_delay
+        graph.push_agent.edit_interval = args.edit_interval
+
+        rows = []
+        for streaming in (False, True):
+            graph.config["stream_push"] = streaming
+            samples = [run_once(graph, llm, telegram) for _ in range(args.rounds)]
+            rows.append((streaming, samples))
+
+    print(f"\n{'模式':<12}{'首条内容 (s)':>14}{'完整摘要 (s)':>14}{'编辑次数':>10}{'消息数':>8}")
+    print("-" * 58)
+    for streaming, samples in rows:
+        print(
+            f"{'流式' if streaming else '一次性':<12}"
+            f"{statistics.median(s['first'] for s in samples):>14.2f}"
+            f"{statistics.median(s['complete'] for s in samples):>14.2f}"
+            f"{statistics.median(s['edits'] for s in samples):>10.0f}"
+            f"{samples[-1]['messages']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
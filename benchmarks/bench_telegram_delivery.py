@@ -0,0 +1,94 @@
+"""
+Telegram 投递基准：逐条 requests.post 与连接池 + 发件箱投递的吞吐对比
+
+在本地启动一个模拟 Bot API 的 HTTP 服务（可注入 429 / 5xx），突发投递 N 条消息，
+并核对服务端实际收到的消息是否恰好每条一次
+用法: python3 -m benchmarks.bench_telegram_delivery [--messages 200] [--chats 5] [--error-rate 0.05]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+from agents.push_agent.delivery import TelegramDelivery
+from benchmarks.fakes import StubBotAPI
+
+
+def legacy_send(base_url: str, messages) -> int:
+    """旧实现：每条消息一个新连接，非 200 直接放弃"""
+    delivered = 0
+    for chat_id, text in messages:
+        response = requests.post(
+            f"{base_url}/botTOKEN/sendMessage",
+            json={"chat_id": chat_id, "text": text, "parse_mode": "HTML"},
+            timeout=30,
+        )
+        delivered += response.status_code == 200
+    return delivered
+
+
+def delivery_send(base_url: str, messages, db_path: Path, global_rate: float) -> dict:
+    delivery = TelegramDelivery(
+        "TOKEN",
+        str(db_path),
+        api_base=base_url,
+        per_chat_interval=0,
+        global_rate=global_rate,
+        max_attempts=10,
+    )
+    # 模拟退避时不必真的等待 1s+
+    delivery._backoff = lambda attempts: 0.05 * attempts
+    for chat_id, text in messages:
+        delivery.enqueue(chat_id, text)
+    stats = delivery.flush(timeout=120)
+    delivery.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telegram 投递吞吐基准")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--chats", type=int, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument(
+        "--global-rate", type=float, default=0, help="全局速率上限（条/秒，0 表示不限，仅测吞吐）"
+    )
+    args = parser.parse_args()
+
+    messages = [(str(1000 + i % args.chats), f"message {i}") for i in range(args.messages)]
+    server = StubBotAPI(error_rate=args.error_rate).start()
+
+    print(f"{'实现':<20}{'耗时 (s)':>10}{'条/秒':>10}{'送达':>8}{'重复':>8}{'连接数':>8}")
+    print("-" * 64)
+
+    start = time.perf_counter()
+    legacy_send(server.base_url, messages)
+    elapsed = time.perf_counter() - start
+    delivered = len(server.received)
+    duplicates = sum(server.received.values()) - delivered
+    print(
+        f"{'requests.post':<20}{elapsed:>10.2f}{args.messages / elapsed:>10.0f}"
+        f"{delivered:>8}{duplicates:>8}{server.connections:>8}"
+    )
+
+    server.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        stats = delivery_send(server.base_url, messages, Path(tmp) / "outbox.db", args.global_rate)
+        elapsed = time.perf_counter() - start
+    delivered = len(server.received)
+    duplicates = sum(server.received.values()) - delivered
+    print(
+        f"{'TelegramDelivery':<20}{elapsed:>10.2f}{args.messages / elapsed:>10.0f}"
+        f"{delivered:>8}{duplicates:>8}{server.connections:>8}"
+    )
+    print(f"\n发件箱统计: {stats}")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
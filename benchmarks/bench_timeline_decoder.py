@@ -0,0 +1,67 @@
+"""
+时间线解码基准：离线解码录制的 HomeTimeline GraphQL 响应，并与快照解析的耗时对比
+
+用法: python3 -m benchmarks.bench_timeline_decoder [--pages 200]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from agents.fetch_agent.parser import parse_snapshot
+from agents.fetch_agent.timeline import decode_timeline_response
+from benchmarks.bench_snapshot_parser import scale_snapshot
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# 录制响应中应解码出的推文（推广条目被跳过，转推展开为原推文）
+EXPECTED_IDS = [
+    "1881000000000000001",
+    "1881000000000000002",
+    "1881000000000000003",
+    "1881000000000000006",
+    "1881000000000000007",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="时间线响应解码基准")
+    parser.add_argument("--pages", type=int, default=200, help="重复解码的响应页数")
+    args = parser.parse_args()
+
+    with open(FIXTURES / "home_timeline_response.json", encoding="utf-8") as f:
+        payload = json.load(f)
+    with open(FIXTURES / "snapshot_home.json", encoding="utf-8") as f:
+        snapshot_template = json.load(f)
+
+    tweets = decode_timeline_response(payload)
+    for tweet in tweets:
+        print(f"  {tweet['id']} @{tweet['author']:<10} {tweet['time']:>7}  {tweet['content'][:50]}")
+
+    ids = [tweet["id"] for tweet in tweets]
+    if ids != EXPECTED_IDS:
+        print(f"✗ 解码结果不符: {ids}")
+        sys.exit(1)
+    print(f"✓ 录制响应解码正确 ({len(tweets)} 条)\n")
+
+    start = time.perf_counter()
+    for _ in range(args.pages):
+        decode_timeline_response(payload)
+    decode_s = time.perf_counter() - start
+    decoded = len(tweets) * args.pages
+
+    snapshot = scale_snapshot(snapshot_template, decoded)
+    start = time.perf_counter()
+    parse_snapshot(snapshot)
+    parse_s = time.perf_counter() - start
+
+    print(f"{decoded} 条推文:")
+    print(f"  时间线 JSON 解码: {decode_s * 1000:8.1f} ms")
+    print(f"  无障碍快照解析:   {parse_s * 1000:8.1f} ms (不含快照序列化传输)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+互动趋势基准：速度 / 加速度计算（numpy 向量化 vs 纯 Python）、快照写入与升温查询延迟、排名效果
+
+排名效果：时间线中混有"又老又大"的推文（互动多、增长放缓）和少量"正在起飞"的推文（互动少、加速增长），
+分别按累计互动和按 trend_rate 取前 10，统计其中起飞推文的占比
+用法: python3 -m benchmarks.bench_trending [--tweets 1000 10000 100000] [--runs 20]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from agents import storage, trending
+from agents.trending import EngagementTracker, compute_trends
+
+
+HOUR = 3600
+
+
+def make_series(count: int, runs: int, seed: int = 5):
+    """
+    每条推文在最近 runs 次运行（间隔 1 小时）中的 (快照时间, 加权互动数)
+
+    Returns:
+        (groups, posted_hours, 是否起飞)
+    """
+    rng = random.Random(seed)
+    groups, posted, takeoff = [], [], []
+    for i in range(count):
+        age = rng.uniform(runs, runs + 72)
+        rising = rng.random() < 0.02
+        if rising:
+            # 起飞：前期几乎没有互动，最近几小时指数增长
+            base = rng.uniform(5, 50)
+            rates = [rng.uniform(1, 5) * 1.8 ** max(0, k - runs + 5) for k in range(runs)]
+        else:
+            # 又老又大：累计互动多，增速逐渐衰减
+            base = rng.paretovariate(1.1) * 200
+            rates = [rng.uniform(20, 200) * 0.85 ** k for k in range(runs)]
+        value, points = base, []
+        for k in range(runs):
+            value += rates[k]
+            points.append((k, value))
+        groups.append(points)
+        posted.append(runs - age)
+        takeoff.append(rising)
+    return groups, posted, takeoff
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="互动趋势基准")
+    parser.add_argument("--tweets", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--fetch", type=int, default=300, help="每次运行抓到的推文数（升温查询）")
+    args = parser.parse_args()
+
+    print("速度 / 加速度计算")
+    print(f"{'推文':>8}{'numpy (ms)':>14}{'纯 Python (ms)':>18}{'前 10 起飞(累计)':>20}{'前 10 起飞(趋势)':>20}")
+    print("-" * 80)
+    for count in args.tweets:
+        groups, posted, takeoff = make_series(count, args.runs)
+        # 与数据库查询一致：每条推文只取最近 3 次快照，拼成一维
+        windows = [g[-3:] for g in groups]
+        inputs = (
+            [len(w) for w in windows],
+            [t for w in windows for t, _ in w],
+            [e for w in windows for _, e in w],
+            posted,
+        )
+        numpy_ms = "-"
+        if trending._numpy() is not None:
+            numpy_ms = f"{timed(lambda: compute_trends(*inputs)) * 1000:.1f}"
+        saved, trending.np = trending.np, None
+        try:
+            python_ms = timed(lambda: compute_trends(*inputs)) * 1000
+        finally:
+            trending.np = saved
+
+        _, _, rates = compute_trends(*inputs)
+        by_total = sorted(range(count), key=lambda i: groups[i][-1][1], reverse=True)[:10]
+        by_trend = sorted(range(count), key=lambda i: rates[i], reverse=True)[:10]
+        print(
+            f"{count:>8}{numpy_ms:>14}{python_ms:>18.1f}"
+            f"{sum(takeoff[i] for i in by_total):>20}{sum(takeoff[i] for i in by_trend):>20}"
+        )
+
+    # 数据库：fetch 条推文 × runs 次运行之外，再预置大量其他推文的历史快照
+    print(f"\n快照表（每次运行 {args.fetch} 条推文）")
+    print(f"{'快照行数':>10}{'写入一次 (ms)':>16}{'升温查询 (ms)':>16}")
+    print("-" * 42)
+    now = int(time.time())
+    with tempfile.TemporaryDirectory() as tmp:
+        for background in (0, 1_000_000):
+            conn = storage.connect(Path(tmp) / f"snapshots_{background}.db")
+            storage.migrate(conn)
+            conn.executemany(
+                "INSERT INTO engagement_snapshots (tweet_id, run_ts, likes) VALUES (?, ?, ?)",
+                ((f"bg{i // args.runs}", now - (i % args.runs) * HOUR, i) for i in range(background)),
+            )
+            conn.commit()
+            tracker = EngagementTracker(conn)
+
+            groups, posted, _ = make_series(args.fetch, args.runs)
+            tweets = [
+                {"id": str(i), "timestamp": int(now + (p - args.runs) * HOUR), "engagement": {}}
+                for i, p in enumerate(posted)
+            ]
+            record_ms = 0.0
+            for k in range(args.runs):
+                for tweet, points in zip(tweets, groups):
+                    tweet["engagement"] = {"likes": int(points[k][1])}
+                record_ms = timed(lambda: tracker.record(tweets, now + (k - args.runs) * HOUR)) * 1000
+            rising_ms = timed(lambda: tracker.rising(tweets)) * 1000
+            rows = conn.execute("SELECT COUNT(*) FROM engagement_snapshots").fetchone()[0]
+            print(f"{rows:>10}{record_ms:>16.2f}{rising_ms:>16.2f}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+本地模拟服务：OpenAI 兼容接口和 Telegram Bot API
+
+都监听 127.0.0.1 的随机端口，在后台线程中运行，用于无网络环境下的基准和回放
+用法:
+    with FakeOpenAI() as llm, StubBotAPI() as telegram:
+        os.environ["LOCAL_BASE_URL"] = llm.base_url + "/v1"
+        os.environ["TELEGRAM_API_BASE"] = telegram.base_url
+"""
+
+import json
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+DEFAULT_COMPLETION = """## 🔥 热点话题
+- **AI Agent**: 多位开发者讨论 LangGraph 工作流的落地经验
+- **开源模型**: 新模型发布，推理成本继续下降
+
+## 💡 值得关注的观点
+- 评测数据集需要覆盖真实业务场景
+
+## 📊 潜在机会信号
+- 浏览器自动化与 LLM 结合的工具链需求增长
+
+## 🎯 行动建议
+- 跟进 Agent 可观测性相关项目"""
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # 头部和正文分两次写出，关闭 Nagle 避免 keep-alive 连接上的 40ms 延迟确认
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+    def _send_json(self, status: int, reply: Any):
+        data = json.dumps(reply, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ========== OpenAI 兼容接口 ==========
+
+class FakeOpenAI(_FakeServer):
+    """
+    模拟 /v1/chat/completions，返回固定摘要，并记录收到的请求
+
+    Args:
+        completion: 返回的摘要文本
+        delay: 每个请求的响应延迟（秒）；也可以是 callable(rng) -> 秒，用于模拟长尾延迟
+        error_rate: 按比例返回 503
+        token_delay: 每 8 个字符的生成时间（秒）；流式请求（stream=true）按此间隔逐块返回
+    """
+
+    def __init__(
+        self,
+        completion: str = DEFAULT_COMPLETION,
+        delay=0.0,
+        error_rate: float = 0.0,
+        token_delay: float = 0.0,
+    ):
+        super().__init__(_OpenAIHandler)
+        self.completion = completion
+        self.delay = delay
+        self.error_rate = error_rate
+        self.token_delay = token_delay
+        self.requests: List[Dict[str, Any]] = []
+        self.errors = 0
+        self.rng = random.Random(42)
+
+
+class _OpenAIHandler(_JSONHandler):
+    def do_POST(self):
+        body = self._read_json()
+        server = self.server
+        with server.lock:
+            server.requests.append(body)
+            delay = server.delay(server.rng) if callable(server.delay) else server.delay
+            failed = server.rng.random() < server.error_rate
+            server.errors += failed
+
+        if not self.path.endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return self._send_json(503, {"error": {"message": "Service Unavailable", "type": "overloaded"}})
+
+        prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(server.completion) // 4,
+            "total_tokens": (prompt_chars + len(server.completion)) // 4,
+        }
+        if body.get("stream"):
+            return self._send_stream(body, usage)
+        if server.token_delay:
+            # 非流式请求同样要等整段生成完
+            time.sleep(server.token_delay * -(-len(server.completion) // 8))
+
+        self._send_json(200, {
+            "id": f"chatcmpl-{len(server.requests)}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": server.completion},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _send_stream(self, body: Dict[str, Any], usage: Dict[str, int]):
+        """按 8 个字符一块以 SSE 返回，最后一块带 usage"""
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta: Dict[str, Any], finish=None, extra=None):
+            chunk = {
+                "id": f"chatcmpl-{len(server.requests)}",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                **(extra or {}),
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            self.wfile.flush()
+
+        text = server.completion
+        event({"role": "assistant", "content": ""})
+        for i in range(0, len(text), 8):
+            if server.token_delay:
+                time.sleep(server.token_delay)
+            event({"content": text[i:i + 8]})
+        event({}, finish="stop", extra={"usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+# ========== Telegram Bot API ==========
+
+class StubBotAPI(_FakeServer):
+    """
+    模拟 sendMessage / editMessageText：按比例返回 429（带 retry_after）或 502
+
+    - failures: 预设的错误状态码（429 / 502），接下来的请求依次返回，用完后按 error_rate 随机
+    - messages: 成功发送的消息（sendMessage 请求体）
+    - texts: 每条消息当前显示的文本（按 message_id，编辑后更新）
+    - calls: 所有成功调用 (time.perf_counter(), method, 请求体)
+    """
+
+    def __init__(self, error_rate: float = 0.0, retry_after: float = 0.2):
+        super().__init__(_BotAPIHandler)
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.failures: List[int] = []
+        self.received = Counter()
+        self.messages: List[Dict[str, Any]] = []
+        self.texts: Dict[int, str] = {}
+        self.calls: List[tuple] = []
+        self.rng = random.Random(42)
+
+    def reset(self):
+        with self.lock:
+            self.received.clear()
+            self.messages.clear()
+            self.texts.clear()
+            self.calls.clear()
+            self.connections = 0
+
+
+class _BotAPIHandler(_JSONHandler):
+    def do_POST(self):
+        body = self._read_json()
+        server = self.server
+
+        with server.lock:
+            forced = server.failures.pop(0) if server.failures else None
+            roll = server.rng.random() if forced is None else 1.0
+            if forced == 429 or roll < server.error_rate / 2:
+                status, reply = 429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests",
+                    "parameters": {"retry_after": server.retry_after},
+                }
+            elif forced is not None or roll < server.error_rate:
+                status, reply = 502, {"ok": False, "description": "Bad Gateway"}
+            elif self.path.endswith("/editMessageText"):
+                message_id = body.get("message_id")
+                if message_id not in server.texts:
+                    status, reply = 400, {"ok": False, "description": "Bad Request: message to edit not found"}
+                elif server.texts[message_id] == body.get("text"):
+                    status, reply = 400, {
+                        "ok": False,
+                        "description": "Bad Request: message is not modified",
+                    }
+                else:
+                    server.texts[message_id] = body.get("text", "")
+                    server.calls.append((time.perf_counter(), "editMessageText", body))
+                    status, reply = 200, {"ok": True, "result": {"message_id": message_id}}
+            else:
+                server.received[body.get("text", "")] += 1
+                server.messages.append(body)
+                message_id = len(server.messages)
+                server.texts[message_id] = body.get("text", "")
+                server.calls.append((time.perf_counter(), "sendMessage", body))
+                status, reply = 200, {"ok": True, "result": {"message_id": message_id}}
+
+        self._send_json(status, reply)
@@ -0,0 +1,214 @@
+"""
+离线回放：用 RECORD_DIR / --record 录制的浏览器输出驱动 FetchAgent 和整条工作流
+
+录制文件格式（JSONL）:
+    {"type": "meta", "url": ..., "tab": ..., "fetch_mode": ..., ...}
+    {"type": "call", "args": ["snapshot", "--json"], "success": true, "output": "...", "elapsed_ms": ...}
+
+用法: python3 -m benchmarks.replay [recording.jsonl]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from agents.fetch_agent import FetchAgent
+from benchmarks.fakes import FakeOpenAI, StubBotAPI
+
+
+FIXTURE_RECORDING = Path(__file__).parent / "fixtures" / "recording_home.jsonl"
+
+_EMPTY_RESULT = json.dumps({"success": True, "data": {}})
+
+
+def load_recording(path: Path) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """读取录制文件，返回 (元数据, 调用列表)"""
+    meta: Dict[str, Any] = {}
+    calls: List[Dict[str, Any]] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("type") == "meta":
+                meta = entry
+            else:
+                calls.append(entry)
+    return meta, calls
+
+
+def recorded_snapshots(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """录制中所有成功的快照（已解析为 dict）"""
+    return [
+        json.loads(call["output"])
+        for call in calls
+        if call["args"][0] == "snapshot" and call["success"]
+    ]
+
+
+class ReplayFetchAgent(FetchAgent):
+    """
+    按录制顺序返回 snapshot / eval 输出的 FetchAgent
+
+    open / reload / scroll / wait 直接返回成功；某类调用用完后，
+    snapshot 重复最后一次输出，eval 返回空结果。snapshot_delay 模拟每次快照前等待页面渲染的耗时
+    """
+
+    def __init__(self, recording: Path, snapshot_delay: float = 0.0, **kwargs: Any):
+        kwargs.setdefault("browser_driver", "agent-browser")
+        super().__init__(name="ReplayFetchAgent", **kwargs)
+        self.recording = Path(recording)
+        self.snapshot_delay = snapshot_delay
+        self.meta, self.calls = load_recording(self.recording)
+        # 回放时不再录制
+        self.record_dir = None
+        self.rewind()
+
+    def rewind(self):
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {"snapshot": deque(), "eval": deque()}
+        for call in self.calls:
+            self._queues.setdefault(call["args"][0], deque()).append(call)
+        self._last: Dict[str, Tuple[bool, str]] = {}
+
+    def execute(self, url: str = None, tab: str = None, on_batch=None) -> Dict[str, Any]:
+        self.rewind()
+        return super().execute(url or self.meta.get("url", "https://x.com/home"), tab, on_batch)
+
+    def ensure_browser(self) -> Optional[str]:
+        return None
+
+    def _open_or_reload(self, url: str) -> Optional[str]:
+        return None
+
+    def _dispatch_browser(self, *args) -> Tuple[bool, str]:
+        command = args[0] if args else ""
+        queue = self._queues.get(command)
+        if queue is None:
+            return True, _EMPTY_RESULT
+        if command == "snapshot" and self.snapshot_delay:
+            time.sleep(self.snapshot_delay)
+        if queue:
+            call = queue.popleft()
+            self._last[command] = (call["success"], call["output"])
+            return call["success"], call["output"]
+        if command == "snapshot" and command in self._last:
+            return self._last[command]
+        return True, json.dumps({"success": True, "data": {"result": None}})
+
+
+@contextmanager
+def offline_pipeline(
+    recording: Path = FIXTURE_RECORDING,
+    data_dir: Optional[str] = None,
+) -> Iterator[Tuple[Any, FakeOpenAI, StubBotAPI]]:
+    """
+    构建一个完全离线的 TwitterMonitorGraph
+
+    - fetch: ReplayFetchAgent 回放录制文件
+    - analyse: 指向本地 FakeOpenAI（provider=local）
+    - push: 指向本地 StubBotAPI，不限速
+
+    Yields:
+        (graph, fake_openai, fake_telegram)
+    """
+    overrides = {
+        "LLM_PROVIDER": "local",
+        "LOCAL_API_KEY": "sk-offline",
+        "LOCAL_MODEL": "fake-model",
+        "TELEGRAM_BOT_TOKEN": "000000:offline",
+        "TELEGRAM_CHAT_ID": "1",
+        "TELEGRAM_PER_CHAT_INTERVAL": "0",
+        "TELEGRAM_GLOBAL_RATE": "0",
+        "LLM_CACHE": "false",
+        "FETCH_SOURCES": "home",
+        "RECORD_DIR": "",
+        # 录制中同一条推文被多个账号转发，默认不折叠 / 聚类，保持各基准的推文数和 prompt 可比
+        "NEAR_DUP": "false",
+        "TOPIC_CLUSTERING": "false",
+    }
+
+    with tempfile.TemporaryDirectory() as tmp, FakeOpenAI() as llm, StubBotAPI() as telegram:
+        overrides.update(
+            DATA_DIR=data_dir or tmp,
+            LOCAL_BASE_URL=f"{llm.base_url}/v1",
+            TELEGRAM_API_BASE=telegram.base_url,
+            METRICS_TEXTFILE=str(Path(data_dir or tmp) / "metrics.prom"),
+        )
+        saved = {key: os.environ.get(key) for key in overrides}
+        os.environ.update(overrides)
+        try:
+            from graph import TwitterMonitorGraph
+
+            graph = TwitterMonitorGraph()
+            graph.fetch_agent = ReplayFetchAgent(
+                recording,
+                data_dir=overrides["DATA_DIR"],
+                scroll_count=graph.config["scroll_count"],
+                max_scroll_count=graph.config["max_scroll_count"],
+                seen_filter=graph._unseen_tweets if graph.config["adaptive_scroll"] else None,
+            )
+            try:
+                yield graph, llm, telegram
+            finally:
+                if graph.db_conn:
+                    graph.db_conn.close()
+                graph.push_agent.close()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+
+def reset_state(graph: Any):
+    """清空已读记录、近似重复签名、归档、互动快照、检查点和发件箱，使下一次回放重新产生新推文和推送"""
+    graph.db_conn.execute("DELETE FROM seen_tweets")
+    if graph.near_dup is not None:
+        graph.db_conn.execute("DELETE FROM tweet_signatures")
+    if graph.archive is not None:
+        graph.db_conn.execute("DELETE FROM tweet_archive")
+    if graph.engagement is not None:
+        graph.db_conn.execute("DELETE FROM engagement_snapshots")
+    if graph.checkpoints is not None:
+        graph.db_conn.execute("DELETE FROM run_checkpoints")
+    graph.db_conn.commit()
+    if graph.seen_store._index is not None:
+        graph.seen_store.load_index()
+    if graph.near_dup is not None:
+        graph.near_dup.discard()
+    delivery = graph.push_agent.delivery
+    with delivery._lock:
+        delivery.conn.execute("DELETE FROM telegram_outbox")
+        delivery.conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线回放整条工作流")
+    parser.add_argument("recording", nargs="?", default=str(FIXTURE_RECORDING))
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with offline_pipeline(Path(args.recording)) as (graph, llm, telegram):
+        samples = []
+        for _ in range(args.rounds):
+            reset_state(graph)
+            start = time.perf_counter()
+            result = graph.run()
+            samples.append((time.perf_counter() - start) * 1000)
+            if result["status"] != "success":
+                print(f"⚠️ 回放失败: {result.get('error') or result['status']}")
+                break
+
+        print(f"\n回放 {len(samples)} 轮: 最快 {min(samples):.1f}ms, 最慢 {max(samples):.1f}ms")
+        print(f"LLM 请求 {len(llm.requests)} 次, Telegram 消息 {len(telegram.messages)} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+广告分类器测试：标注语料逐条校验（两种匹配后端），英文规则按整词匹配，账号规则按用户名分段匹配
+用法: python3 -m pytest benchmarks/test_ad_classifier.py
+"""
+
+import sys
+
+import pytest
+
+from agents.ad_classifier import AdClassifier
+from benchmarks.bench_ad_classifier import load_corpus
+
+
+@pytest.fixture(params=["ahocorasick", "regex"])
+def classifier(request, monkeypatch):
+    if request.param == "ahocorasick":
+        pytest.importorskip("ahocorasick")
+    else:
+        # 未安装 pyahocorasick 时的单个交替正则
+        monkeypatch.setitem(sys.modules, "ahocorasick", None)
+    return AdClassifier.from_file()
+
+
+def tweet(content="Just thoughts on distributed systems", author="writer", **engagement):
+    return {"content": content, "author": author, "engagement": engagement}
+
+
+@pytest.mark.parametrize("item", load_corpus(), ids=lambda item: item["author"])
+def test_labelled_corpus(classifier, item):
+    assert classifier.classify(item) == item["expected"]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "I read the paper yesterday",
+        "We had a bad day on the markets",
+        "Adobe ships a new model",
+        "Loading... ready to launch",
+        "adaptive rendering on the roadmap",
+    ],
+)
+def test_ascii_keywords_need_word_boundaries(classifier, content):
+    assert classifier.classify(tweet(content)) is None
+
+
+def test_keyword_boundaries_and_cjk(classifier):
+    assert classifier.classify(tweet("This is an AD.")) == "keyword:ad"
+    assert classifier.classify(tweet("#ad new drop")) == "keyword:ad"
+    # 中文规则没有词边界
+    assert classifier.classify(tweet("新品限时优惠中")) == "keyword:限时优惠"
+
+
+@pytest.mark.parametrize(
+    "author, expected",
+    [
+        ("xyz_ads_official", "account:ads"),
+        ("nike_ad", "account:ad"),
+        ("ad_2024", "account:ad"),
+        ("sponsorship_team", "account:sponsorship"),
+        ("adam", None),
+        ("brad", None),
+        ("acmeads", None),
+    ],
+)
+def test_account_rules_match_handle_segments(classifier, author, expected):
+    assert classifier.classify(tweet(author=author)) == expected
@@ -0,0 +1,129 @@
+"""
+推文归档测试：批量写入、FTS5 关键词 / 作者 / 时间范围检索、清理时同步索引、工作流归档和 search 子命令
+用法: python3 -m pytest benchmarks/test_archive.py
+"""
+
+import sys
+
+import pytest
+
+import graph as graph_module
+from agents import storage
+from agents.archive import TweetArchive
+from benchmarks.replay import offline_pipeline, reset_state
+
+
+DAY = 86400
+NOW = 1_760_000_000
+
+TWEETS = [
+    ("1", "OpenAI", "GPT-5 is rolling out to all ChatGPT users today", NOW - 1 * DAY, 900),
+    ("2", "nvidia", "英伟达发布新一代 Blackwell GPU，推理性能提升 30 倍", NOW - 2 * DAY, 300),
+    ("3", "karpathy", "New video on tokenizers and why GPT models struggle with spelling", NOW - 40 * DAY, 500),
+    ("4", "openai", "Sora is now available in Europe", NOW - 90 * DAY, 200),
+    ("5", "fed_watch", "美联储维持利率不变，AI 股票上涨", NOW - 3 * DAY, 50),
+]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    conn = storage.connect(tmp_path / "monitor.db")
+    storage.migrate(conn)
+    archive = TweetArchive(conn)
+    archive.add([
+        {
+            "id": tweet_id,
+            "author": author,
+            "content": content,
+            "timestamp": timestamp,
+            "engagement": {"likes": likes, "reposts": 1, "replies": 2},
+            "url": f"https://x.com/{author}/status/{tweet_id}",
+        }
+        for tweet_id, author, content, timestamp, likes in TWEETS
+    ])
+    return archive
+
+
+def ids(tweets):
+    return [t["id"] for t in tweets]
+
+
+def test_add_is_idempotent(archive):
+    assert archive.add([{"id": "1", "content": "again"}, {"id": "6", "content": "new"}]) == 1
+    assert archive.conn.execute("SELECT COUNT(*) FROM tweet_archive").fetchone()[0] == 6
+
+
+def test_snapshot_ref_ids_do_not_collide(archive):
+    # 快照兜底的 ref_id 在不同运行中指向不同推文
+    first = {"id": "e12", "author": "alice", "content": "first tweet behind ref e12"}
+    later = {"id": "e12", "author": "bob", "content": "a different tweet reusing ref e12"}
+    assert archive.add([first]) == 1
+    assert archive.add([later]) == 1
+    # 同一条推文再次归档仍然忽略
+    assert archive.add([dict(first)]) == 0
+    assert {t["author"] for t in archive.search(author="bob")} == {"bob"}
+
+
+def test_keyword_search(archive):
+    if archive.tokenizer != "trigram":
+        pytest.skip("SQLite 不支持 trigram 分词")
+    # 全部关键词命中，不区分大小写，按发布时间倒序
+    assert ids(archive.search("gpt")) == ["1", "3"]
+    assert ids(archive.search("GPT spelling")) == ["3"]
+    assert ids(archive.search("Blackwell 推理性能")) == ["2"]
+    # 少于 3 个字符的词退回 LIKE
+    assert ids(archive.search("AI 股票")) == ["5"]
+    assert archive.search("nothing-matches") == []
+
+
+def test_author_and_date_range(archive):
+    assert ids(archive.search(author="@OPENAI")) == ["1", "4"]
+    assert ids(archive.search(since=NOW - 30 * DAY)) == ["1", "2", "5"]
+    assert ids(archive.search(since=NOW - 100 * DAY, until=NOW - 30 * DAY)) == ["3", "4"]
+    assert ids(archive.search("gpt", since=NOW - 30 * DAY)) == ["1"]
+    assert ids(archive.search(limit=2)) == ["1", "2"]
+
+
+def test_returns_full_tweet(archive):
+    tweet = archive.search(author="nvidia")[0]
+    assert tweet["url"] == "https://x.com/nvidia/status/2"
+    assert tweet["engagement"] == {"likes": 300, "reposts": 1, "replies": 2}
+    assert tweet["timestamp"] == NOW - 2 * DAY
+
+
+def test_author_search_uses_index(archive):
+    plan = " ".join(
+        row[-1]
+        for row in archive.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT data FROM tweet_archive "
+            "WHERE author = ? COLLATE NOCASE ORDER BY created_at DESC",
+            ("openai",),
+        )
+    )
+    assert "idx_tweet_archive_author" in plan
+
+
+def test_purge_keeps_index_in_sync(archive):
+    archive.conn.execute("UPDATE tweet_archive SET archived_at = datetime('now', '-400 days') WHERE tweet_id = '1'")
+    archive.conn.commit()
+    archive.retention_days = 365
+
+    assert archive.purge_expired() == 1
+    assert ids(archive.search("gpt")) == ["3"]
+    archive.conn.execute("INSERT INTO tweet_archive_fts (tweet_archive_fts) VALUES ('integrity-check')")
+
+
+def test_filter_stage_archives_and_search_command(tmp_path, monkeypatch, capsys):
+    with offline_pipeline(data_dir=str(tmp_path)) as (graph, _, _):
+        reset_state(graph)
+        graph.run()
+        archived = graph.db_conn.execute("SELECT COUNT(*) FROM tweet_archive").fetchone()[0]
+        assert archived == 24
+
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(sys, "argv", ["graph.py", "search", "--limit", "3"])
+    capsys.readouterr()
+    graph_module.main()
+    output = capsys.readouterr().out
+    assert output.count("/status/") == 3
+    assert "共 3 条" in output
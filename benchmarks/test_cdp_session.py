@@ -0,0 +1,111 @@
+"""
+CDP 会话测试：用预设的 CDP 响应代替浏览器，验证命令输出与 agent-browser --json 的结构一致
+用法: python3 -m pytest benchmarks/test_cdp_session.py
+"""
+
+import json
+
+import pytest
+
+from agents.fetch_agent.cdp_client import CDPSession
+from agents.fetch_agent.parser import parse_snapshot
+
+
+ARTICLE = (
+    "Elon Musk @elonmusk 2h Starship flight 12 is go for launch next week "
+    "63 replies, 120 reposts, 1058 likes, 313816 views"
+)
+
+
+def ax(node_id, role, name="", children=(), url=None, ignored=False):
+    node = {
+        "nodeId": node_id,
+        "role": {"value": role},
+        "name": {"value": name},
+        "childIds": list(children),
+        "ignored": ignored,
+    }
+    if url:
+        node["properties"] = [{"name": "url", "value": {"value": url}}]
+    return node
+
+
+AX_TREE = [
+    ax("1", "RootWebArea", "Home / X", ["2"]),
+    ax("2", "main", "", ["3"]),
+    ax("3", "region", "Home timeline", ["4"]),
+    ax("4", "article", ARTICLE, ["5", "7", "9", "10"]),
+    ax("5", "link", "Elon Musk", ["6"], url="https://x.com/elonmusk"),
+    ax("6", "StaticText", "Elon Musk"),
+    ax("7", "link", "2h", ["8"], url="https://x.com/elonmusk/status/1880000000000000000"),
+    ax("8", "StaticText", "2h"),
+    ax("9", "generic", "", ignored=True),
+    ax("10", "button", "63 replies, 120 reposts, 1058 likes, 313816 views"),
+]
+
+
+class FakeWebSocket:
+    connected = True
+
+    def close(self):
+        self.connected = False
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = CDPSession()
+    session.ws = FakeWebSocket()
+    sent = []
+
+    def send(method, params=None, timeout=None):
+        sent.append((method, params))
+        if method == "Accessibility.getFullAXTree":
+            return {"nodes": AX_TREE}
+        if method == "Runtime.evaluate":
+            return {"result": {"type": "object", "value": {"ready": True}}}
+        return {}
+
+    monkeypatch.setattr(session, "send", send)
+    session.sent = sent
+    return session
+
+
+def test_snapshot_matches_agent_browser_json(session):
+    success, output = session.run("snapshot", "--json")
+    assert success
+
+    snapshot = json.loads(output)
+    assert snapshot["success"] is True
+    assert set(snapshot["data"]) == {"snapshot", "refs"}
+    assert snapshot["data"]["snapshot"].splitlines() == [
+        "- main [ref=e1]",
+        '  - region "Home timeline" [ref=e2]',
+        f'    - article "{ARTICLE}" [ref=e3]',
+        '      - link "Elon Musk" [ref=e4]',
+        "        - /url: /elonmusk",
+        '      - link "2h" [ref=e5]',
+        "        - /url: /elonmusk/status/1880000000000000000",
+        '      - button "63 replies, 120 reposts, 1058 likes, 313816 views" [ref=e6]',
+    ]
+    assert snapshot["data"]["refs"]["e3"] == {"role": "article", "name": ARTICLE}
+
+    # 与 agent-browser 快照走同一个解析器
+    tweets, _ = parse_snapshot(snapshot)
+    assert [(t["id"], t["author"]) for t in tweets] == [("1880000000000000000", "elonmusk")]
+    assert tweets[0]["engagement"]["likes"] == 1058
+
+
+def test_plain_snapshot_and_other_commands(session):
+    success, text = session.run("snapshot")
+    assert success and text.startswith("- main [ref=e1]")
+
+    assert session.run("eval", "--json", "window.__ready") == (
+        True, json.dumps({"success": True, "data": {"result": {"ready": True}}})
+    )
+    assert session.run("scroll", "down", "1200") == (True, json.dumps({"success": True, "data": {}}))
+    assert session.sent[-1] == (
+        "Runtime.evaluate",
+        {"expression": "window.scrollBy(0, 1200)", "returnByValue": True, "awaitPromise": False},
+    )
+    assert session.run("hover", "e3") == (False, "不支持的命令: hover")
+    assert session.run() == (False, "缺少命令")
@@ -0,0 +1,123 @@
+"""
+检查点测试：推送失败的运行保持推文未读并可恢复，恢复时不重新抓取和调用 LLM、不重复发送消息；分析失败时流式消息改为失败提示，恢复后继续编辑它
+用法: python3 -m pytest benchmarks/test_checkpoint.py
+"""
+
+import pytest
+
+from agents.checkpoint import DONE
+from agents.dedup import NearDuplicateIndex
+from benchmarks.replay import offline_pipeline, reset_state
+
+
+def seen_count(graph) -> int:
+    return graph.db_conn.execute("SELECT COUNT(*) FROM seen_tweets").fetchone()[0]
+
+
+@pytest.mark.parametrize("lean", [False, True])
+def test_push_failure_resumes_without_refetch(lean):
+    with offline_pipeline() as (graph, llm, telegram):
+        graph.config["lean"] = lean
+        reset_state(graph)
+        graph.push_agent.delivery.max_attempts = 1
+        telegram.error_rate = 1.0
+
+        failed = graph.run()
+        assert failed["status"] == "push_failed"
+        # 推送失败：推文保持未读，检查点停在 analyse 之后
+        assert seen_count(graph) == 0
+        checkpoint = graph.checkpoints.load()
+        assert (checkpoint.run_id, checkpoint.node, checkpoint.status) == (failed["run_id"], "analyse", "push_failed")
+        assert checkpoint.resumable
+
+        telegram.error_rate = 0.0
+        requests = len(llm.requests)
+        fetches = []
+        graph.fetch_agent.execute = lambda *args, **kwargs: fetches.append(args)
+
+        resumed = graph.resume()
+        assert resumed["status"] == "success"
+        assert resumed["run_id"] == failed["run_id"]
+        assert (fetches, len(llm.requests)) == ([], requests)
+        # 重试的是发件箱中的原消息
+        assert len(telegram.messages) == 1
+        assert graph.push_agent.delivery.conn.execute("SELECT COUNT(*) FROM telegram_outbox").fetchone()[0] == 1
+        assert seen_count(graph) == resumed["tweet_count"] == failed["tweet_count"]
+        assert graph.checkpoints.load().status == DONE
+        # 已完成的运行不再恢复
+        assert graph.resume(failed["run_id"]) is None
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_cursors_advance_only_after_push(pipeline):
+    with offline_pipeline() as (graph, _, telegram):
+        graph.config["pipeline"] = pipeline
+        reset_state(graph)
+        graph.push_agent.delivery.max_attempts = 1
+        telegram.error_rate = 1.0
+        # 模拟多来源抓取返回的新高水位
+        fetch = graph._fetch
+        graph._fetch = lambda on_batch=None: {**fetch(on_batch), "cursors": {"home": "1881000000000000009"}}
+
+        assert graph.run()["status"] == "push_failed"
+        assert graph._load_cursors() == {}
+
+        telegram.error_rate = 0.0
+        assert graph.resume()["status"] == "success"
+        assert graph._load_cursors() == {"home": "1881000000000000009"}
+
+
+def test_runs_without_new_tweets_finish_done():
+    with offline_pipeline() as (graph, llm, _):
+        reset_state(graph)
+        assert graph.run()["status"] == "success"
+        result = graph.run()
+
+        assert result["tweet_count"] == 0
+        checkpoint = graph.checkpoints.load()
+        assert (checkpoint.run_id, checkpoint.node, checkpoint.status) == (result["run_id"], "filter", DONE)
+        assert graph.resume() is None
+
+
+def test_near_duplicate_signatures_saved_only_after_push():
+    with offline_pipeline() as (graph, _, telegram):
+        graph.near_dup = NearDuplicateIndex(graph.db_conn)
+        reset_state(graph)
+        graph.push_agent.delivery.max_attempts = 1
+        telegram.error_rate = 1.0
+
+        assert graph.run()["status"] == "push_failed"
+        assert graph.near_dup.size == 0
+        assert graph.db_conn.execute("SELECT COUNT(*) FROM tweet_signatures").fetchone()[0] == 0
+
+        telegram.error_rate = 0.0
+        assert graph.resume()["status"] == "success"
+        saved = graph.db_conn.execute("SELECT COUNT(*) FROM tweet_signatures").fetchone()[0]
+        assert saved == seen_count(graph) > 0
+
+
+@pytest.mark.parametrize("lean", [False, True])
+def test_stream_placeholder_edited_on_analysis_failure_and_reused_on_resume(lean):
+    with offline_pipeline() as (graph, _, telegram):
+        graph.config["lean"] = lean
+        graph.config["stream_push"] = True
+        graph.push_agent.edit_interval = 0
+        reset_state(graph)
+        execute = graph.analyse_agent.execute
+        graph.analyse_agent.execute = lambda tweets, on_delta=None: {"status": "error", "error": "LLM 不可用"}
+
+        failed = graph.run()
+        assert failed["status"] == "error"
+        # "生成中"的消息被改为失败提示，而不是留在聊天中
+        assert len(telegram.messages) == 1
+        message_id = graph.checkpoints.load().state["message_id"]
+        assert "⚠️ 摘要生成失败" in telegram.texts[message_id]
+        assert "⏳ 生成中" not in telegram.texts[message_id]
+
+        graph.analyse_agent.execute = execute
+        resumed = graph.resume()
+        assert resumed["status"] == "success"
+        # 恢复运行编辑同一条消息，不再发送第二条
+        assert len(telegram.messages) == 1
+        assert "⚠️ 摘要生成失败" not in telegram.texts[message_id]
+        assert "⏳ 生成中" not in telegram.texts[message_id]
@@ -0,0 +1,89 @@
+"""
+话题聚类测试：TF-IDF 相似度、代表推文选择、numpy / 纯 Python 结果一致、工作流中的 cluster 节点
+用法: python3 -m pytest benchmarks/test_clustering.py
+"""
+
+import pytest
+
+from agents import clustering
+from agents.clustering import TopicClusterer
+from benchmarks.replay import offline_pipeline, reset_state
+
+
+TWEETS = [
+    ("openai", "OpenAI just released GPT-5 with a 1M token context window and much better reasoning.", 900),
+    ("fan", "GPT-5 is out! OpenAI says it has a 1M token context window and better reasoning", 10),
+    ("tester", "Hands-on with GPT-5: the 1M token context is real, reasoning feels much stronger", 30),
+    ("business", "Markets close higher as tech stocks rally on earnings", 200),
+    ("trader", "Tech stocks rally, markets close higher after strong earnings from big tech", 5),
+    ("nvidia_cn", "英伟达发布新一代 Blackwell GPU，推理性能提升 30 倍", 300),
+    ("hw", "Blackwell 来了：英伟达新 GPU 推理性能号称提升 30 倍，功耗大幅下降", 20),
+    ("karpathy", "New video: building a tokenizer from scratch, 2 hours long", 500),
+    ("elon", "Starship flight 12 is go for launch next week", 800),
+    ("fed_watch", "美联储维持利率不变，暗示年内降息两次", 50),
+]
+
+
+def make_tweets():
+    return [
+        {"id": str(i), "author": author, "content": content, "engagement": {"likes": likes}}
+        for i, (author, content, likes) in enumerate(TWEETS)
+    ]
+
+
+def topics(representatives):
+    return {t["author"]: t["cluster_size"] for t in representatives}
+
+
+def test_groups_same_topic_in_both_languages():
+    representatives = TopicClusterer().cluster(make_tweets())
+
+    assert topics(representatives) == {
+        "openai": 3,
+        "business": 2,
+        "nvidia_cn": 2,
+        "karpathy": 1,
+        "elon": 1,
+        "fed_watch": 1,
+    }
+    openai = representatives[0]
+    assert sorted(openai["cluster_authors"]) == ["fan", "tester"]
+
+
+def test_representatives_keep_input_order():
+    representatives = TopicClusterer().cluster(make_tweets())
+    ids = [int(t["id"]) for t in representatives]
+    assert ids == sorted(ids)
+
+
+def test_pure_python_matches_numpy(monkeypatch):
+    pytest.importorskip("numpy")
+    with_numpy = TopicClusterer().assign(make_tweets())
+    monkeypatch.setattr(clustering, "np", None)
+    assert TopicClusterer().assign(make_tweets()) == with_numpy
+
+
+def test_small_inputs():
+    clusterer = TopicClusterer()
+    assert clusterer.cluster([]) == []
+    single = clusterer.cluster(make_tweets()[:1])
+    assert single[0]["cluster_size"] == 1
+    # 归一化后为空的推文各自成簇
+    empty = clusterer.cluster([{"id": "1", "content": "🔥🔥"}, {"id": "2", "content": "!!!"}])
+    assert [t["cluster_size"] for t in empty] == [1, 1]
+
+
+def test_cluster_node_in_workflow():
+    with offline_pipeline() as (graph, llm, telegram):
+        graph.config["topic_clustering"] = True
+        graph.graph = graph._build_graph()
+        reset_state(graph)
+
+        result = graph.run()
+
+        assert result["status"] == "success"
+        # 推文总数不变，但 LLM 只看到每个话题的代表推文
+        assert result["tweet_count"] == 24
+        prompt = llm.requests[0]["messages"][-1]["content"]
+        assert prompt.count("同一话题共") == 5
+        assert len(telegram.messages) == 1
@@ -0,0 +1,166 @@
+"""
+常驻模式测试：间隔 / 抖动调度、停止信号唤醒、第一次信号优雅退出与第二次信号强制中断、每小时清理，以及推送失败的运行只恢复一次
+用法: python3 -m pytest benchmarks/test_daemon.py
+"""
+
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from benchmarks.replay import offline_pipeline
+from graph import _install_signal_handlers
+
+
+class RecordingEvent(threading.Event):
+    """记录每次等待的时长并立即返回，stop_after 轮之后自动 set"""
+
+    def __init__(self, stop_after: int):
+        super().__init__()
+        self.stop_after = stop_after
+        self.delays = []
+
+    def wait(self, timeout=None):
+        self.delays.append(timeout)
+        if len(self.delays) >= self.stop_after:
+            self.set()
+        return self.is_set()
+
+
+@pytest.fixture
+def graph():
+    with offline_pipeline() as (graph, _, _):
+        graph.runs, graph.resumes, graph.purges = [], [], 0
+        graph.results = []
+
+        def run():
+            graph.runs.append(len(graph.runs) + 1)
+            if graph.results:
+                return graph.results.pop(0)
+            return {"status": "success", "run_id": f"run-{len(graph.runs)}"}
+
+        def resume(run_id=None):
+            graph.resumes.append(run_id)
+            return {"status": "push_failed", "run_id": run_id}
+
+        def purge():
+            graph.purges += 1
+            graph._last_purge = time.monotonic()
+
+        graph.run, graph.resume, graph._purge_expired = run, resume, purge
+        yield graph
+
+
+@pytest.fixture
+def restore_signals():
+    saved = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+    yield
+    for sig, handler in saved.items():
+        signal.signal(sig, handler)
+
+
+def test_cycles_follow_interval_and_jitter(graph):
+    stop = RecordingEvent(stop_after=3)
+    graph.run_daemon(interval=0, jitter=0, stop_event=stop)
+    assert graph.runs == [1, 2, 3]
+    assert stop.delays == [0, 0, 0]
+
+    stop = RecordingEvent(stop_after=50)
+    graph.run_daemon(interval=10, jitter=2, stop_event=stop)
+    assert all(8 <= delay <= 12 for delay in stop.delays)
+    assert len(set(stop.delays)) > 1
+
+    # 抖动大于间隔时不会出现负的等待
+    stop = RecordingEvent(stop_after=50)
+    graph.run_daemon(interval=1, jitter=5, stop_event=stop)
+    assert min(stop.delays) >= 0
+
+
+def test_stop_event_wakes_the_sleep(graph):
+    stop = threading.Event()
+    threading.Timer(0.2, stop.set).start()
+
+    started = time.monotonic()
+    graph.run_daemon(interval=60, stop_event=stop)
+
+    assert time.monotonic() - started < 5
+    assert graph.runs == [1]
+
+
+def test_first_signal_finishes_cycle_second_interrupts(graph, restore_signals):
+    stop = threading.Event()
+    _install_signal_handlers(stop)
+
+    def run():
+        graph.runs.append(len(graph.runs) + 1)
+        os.kill(os.getpid(), signal.SIGTERM)
+        # 收到第一次信号后当前轮继续执行完
+        time.sleep(0.05)
+        graph.runs.append("finished")
+        return {"status": "success", "run_id": "run-1"}
+
+    graph.run = run
+    graph.run_daemon(interval=60, stop_event=stop)
+    assert graph.runs == [1, "finished"]
+    assert stop.is_set()
+
+    with pytest.raises(KeyboardInterrupt):
+        os.kill(os.getpid(), signal.SIGINT)
+        time.sleep(1)
+
+
+def test_push_failed_run_resumed_exactly_once(graph):
+    graph.results = [
+        {"status": "push_failed", "run_id": "run-1"},
+        {"status": "success", "run_id": "run-2"},
+    ]
+
+    graph.run_daemon(interval=0, stop_event=RecordingEvent(stop_after=3))
+
+    # 第 1 轮推送失败，第 2 轮只恢复一次（仍失败），第 3 轮重新抓取
+    assert graph.resumes == ["run-1"]
+    assert graph.runs == [1, 2]
+
+
+def test_finished_run_falls_back_to_fresh_run(graph):
+    graph.results = [{"status": "push_failed", "run_id": "run-1"}]
+    graph.resume = lambda run_id=None: graph.resumes.append(run_id)
+
+    graph.run_daemon(interval=0, stop_event=RecordingEvent(stop_after=2))
+
+    # 检查点已完成（resume 返回 None）：同一轮改为正常执行
+    assert graph.resumes == ["run-1"]
+    assert graph.runs == [1, 2]
+
+
+def test_exceptions_do_not_stop_the_loop(graph):
+    def run():
+        graph.runs.append(len(graph.runs) + 1)
+        raise RuntimeError("CDP 连接断开")
+
+    graph.run = run
+    graph.run_daemon(interval=0, stop_event=RecordingEvent(stop_after=3))
+    assert graph.runs == [1, 2, 3]
+
+
+def test_purges_at_most_hourly(graph, monkeypatch):
+    graph._last_purge = 0.0
+    clock = [time.monotonic()]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+
+    stop = RecordingEvent(stop_after=4)
+    original_wait = stop.wait
+
+    def wait(timeout=None):
+        # 每轮之间经过 30 分钟
+        clock[0] += 1800
+        return original_wait(timeout)
+
+    stop.wait = wait
+    graph.run_daemon(interval=0, stop_event=stop)
+
+    # 第 1 轮清理，之后每经过一小时以上再清理一次
+    assert graph.runs == [1, 2, 3, 4]
+    assert graph.purges == 2
@@ -0,0 +1,109 @@
+"""
+近似重复检测测试：归一化、批内折叠、跨批次计数、历史签名持久化
+用法: python3 -m pytest benchmarks/test_dedup.py
+"""
+
+import sqlite3
+
+from agents import storage
+from agents.dedup import NearDuplicateIndex, minhash, normalize, shingles, similarity
+
+
+NEWS = "OpenAI just released GPT-5 with a 1M token context window and much better reasoning."
+
+
+def tweet(tweet_id: int, content: str, author: str = "user", likes: int = 0) -> dict:
+    return {
+        "id": str(tweet_id),
+        "content": content,
+        "author": author,
+        "engagement": {"likes": likes, "reposts": 0, "replies": 0, "views": 0},
+    }
+
+
+def sig(text: str):
+    return minhash(shingles(normalize(text)))
+
+
+def test_normalize_strips_noise():
+    assert normalize(f"RT @openai: {NEWS} https://t.co/abc") == normalize(NEWS)
+    assert normalize("英伟达发布 Blackwell，性能提升 30 倍") == normalize("英伟达发布Blackwell 性能提升30倍!")
+
+
+def test_similarity_separates_reposts_from_related_news():
+    assert similarity(sig(NEWS), sig(f"BREAKING: {NEWS} 🔥")) >= 0.7
+    other = "Anthropic just released Claude with a 200k token context window and better coding."
+    assert similarity(sig(NEWS), sig(other)) < 0.7
+
+
+def test_collapse_keeps_most_engaged():
+    index = NearDuplicateIndex()
+    tweets = [
+        tweet(1, f"RT @openai: {NEWS}", "fan", likes=1),
+        tweet(2, NEWS, "openai", likes=500),
+        tweet(3, "Markets close higher as tech stocks rally on earnings", "business"),
+        tweet(4, f"Wow! {NEWS}", "other", likes=3),
+    ]
+
+    kept, collapsed = index.collapse(tweets)
+
+    assert [t["id"] for t in kept] == ["2", "3"]
+    assert collapsed == 2
+    assert kept[0]["duplicate_count"] == 2
+    assert sorted(kept[0]["duplicate_authors"]) == ["fan", "other"]
+    assert kept[1]["duplicate_count"] == 0
+
+
+def test_short_tweets_not_collapsed():
+    index = NearDuplicateIndex()
+    kept, collapsed = index.collapse([tweet(1, "gm"), tweet(2, "gm"), tweet(3, "GM!")])
+    assert len(kept) == 3 and collapsed == 0
+
+
+def test_later_batch_counts_towards_representative():
+    index = NearDuplicateIndex()
+    first, _ = index.collapse([tweet(1, NEWS, "openai")])
+
+    kept, collapsed = index.collapse([tweet(2, f"{NEWS} https://t.co/x", "fan")])
+
+    assert kept == [] and collapsed == 1
+    assert first[0]["duplicate_count"] == 1
+
+
+def test_history_persisted_and_dropped():
+    conn = sqlite3.connect(":memory:")
+    storage.migrate(conn)
+    index = NearDuplicateIndex(conn)
+    index.collapse([tweet(1, NEWS, "openai")])
+    # 签名在 save() 之前不写入数据库
+    assert NearDuplicateIndex(conn).size == 0
+    index.save()
+
+    # 新进程：只从数据库加载历史签名
+    restored = NearDuplicateIndex(conn)
+    kept, collapsed = restored.collapse([tweet(2, f"Wow! {NEWS}", "fan")])
+
+    assert restored.size == 2
+    assert kept == [] and collapsed == 1
+
+
+def test_new_run_turns_representatives_into_history():
+    index = NearDuplicateIndex()
+    first, _ = index.collapse([tweet(1, NEWS, "openai")])
+    index.new_run()
+
+    index.collapse([tweet(2, f"Wow! {NEWS}", "fan")])
+
+    assert first[0]["duplicate_count"] == 0
+
+
+def test_discard_drops_unsaved_signatures():
+    conn = sqlite3.connect(":memory:")
+    storage.migrate(conn)
+    index = NearDuplicateIndex(conn)
+    index.collapse([tweet(1, NEWS, "openai")])
+    index.discard()
+
+    # 未推送的推文下次运行不算历史重复
+    kept, collapsed = index.collapse([tweet(1, NEWS, "openai")])
+    assert len(kept) == 1 and collapsed == 0
@@ -0,0 +1,121 @@
+"""
+抓取测试：回放录制的浏览器输出，验证滚动次数上限和停止原因，以及就绪等待（CDP 启动退避、页面与新 article 的 eval 等待）
+用法: python3 -m pytest benchmarks/test_fetch_agent.py
+"""
+
+import json
+import time
+import urllib.request
+
+import pytest
+
+from agents.fetch_agent import FetchAgent
+from benchmarks.replay import FIXTURE_RECORDING, ReplayFetchAgent
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+def test_zero_scroll_count_reads_first_screen(tmp_path, adaptive):
+    agent = ReplayFetchAgent(
+        FIXTURE_RECORDING,
+        data_dir=str(tmp_path),
+        scroll_count=0,
+        seen_filter=(lambda tweets: tweets) if adaptive else None,
+    )
+    # 构造参数为 0 时回退到 MAX_SCROLL_COUNT，直接设置上限
+    agent.max_scroll_count = 0
+
+    result = agent.execute()
+
+    assert result["status"] == "success"
+    assert result["data"]["scrolls"] == 1
+    assert result["data"]["tweets"]
+
+
+def eval_result(result) -> str:
+    return json.dumps({"success": True, "data": {"result": result}})
+
+
+@pytest.fixture
+def agent(tmp_path):
+    agent = FetchAgent(data_dir=str(tmp_path), browser_driver="agent-browser")
+    agent.evals = []
+    agent.results = []
+
+    def run_browser(*args):
+        assert args[:2] == ("eval", "--json")
+        agent.evals.append(args[2])
+        return agent.results.pop(0) if agent.results else (False, "eval failed")
+
+    agent._run_browser = run_browser
+    return agent
+
+
+def test_wait_for_cdp_backs_off_until_ready(agent, monkeypatch):
+    attempts, sleeps = [], []
+
+    def urlopen(url, timeout=None):
+        attempts.append(url)
+        if len(attempts) < 6:
+            raise ConnectionRefusedError
+        return None
+
+    monkeypatch.setattr(urllib.request, "urlopen", urlopen)
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+
+    assert agent._wait_for_cdp(timeout=60)
+    assert attempts[0] == f"http://localhost:{agent.cdp_port}/json/version"
+    # 指数退避，单次最多 1 秒
+    assert sleeps == [0.1, 0.2, 0.4, 0.8, 1.0]
+
+
+def test_wait_for_cdp_gives_up_at_deadline(agent, monkeypatch):
+    def urlopen(url, timeout=None):
+        raise ConnectionRefusedError
+
+    monkeypatch.setattr(urllib.request, "urlopen", urlopen)
+    started = time.monotonic()
+    assert not agent._wait_for_cdp(timeout=0.3)
+    assert 0.3 <= time.monotonic() - started < 1.0
+
+
+def test_page_ready_uses_timeline_or_login_state(agent):
+    agent.results = [
+        (True, eval_result({"ready": True, "state": "timeline", "waited": 420})),
+        (True, eval_result({"ready": True, "state": "login", "waited": 80})),
+        (True, eval_result({"ready": False, "waited": 15000})),
+    ]
+
+    assert agent._wait_for_page_ready(timeout=15)
+    assert "> 15000" in agent.evals[0]
+    assert agent._wait_for_page_ready(timeout=2.5)
+    assert "> 2500" in agent.evals[1]
+    assert not agent._wait_for_page_ready(timeout=15)
+    # eval 失败时不阻塞，交给登录验证
+    assert not agent._wait_for_page_ready(timeout=15)
+
+
+def test_wait_for_new_articles(agent):
+    agent.results = [
+        (True, eval_result({"ready": True, "waited": 600})),
+        (True, eval_result({"ready": False, "waited": 3000})),
+        (True, "not json"),
+    ]
+
+    assert agent._wait_for_new_articles(timeout_ms=3000)
+    assert "var timeoutMs = 3000;" in agent.evals[0]
+    assert not agent._wait_for_new_articles(timeout_ms=3000)
+    assert not agent._wait_for_new_articles(timeout_ms=3000)
+
+
+def test_replay_reports_wait_stats(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    agent = ReplayFetchAgent(FIXTURE_RECORDING, data_dir=str(tmp_path))
+
+    result = agent.execute()
+
+    assert result["status"] == "success"
+    assert set(agent.wait_stats) == {"chrome_startup", "page_ready", "scroll"}
+    assert result["data"]["wait_seconds"] == round(sum(agent.wait_stats.values()), 2)
+    # 不再有固定 sleep
+    assert sleeps == []
@@ -0,0 +1,148 @@
+"""
+LLM 缓存测试：TTL 过期、按最近命中淘汰、命中统计、故障切换后的回答不写入缓存，以及 LLM_CACHE=false 时绕过缓存
+用法: python3 -m pytest benchmarks/test_llm_cache.py
+"""
+
+import time
+
+import pytest
+
+from agents.analyse_agent import AnalyseAgent
+from agents.llm_cache import LLMCache
+from benchmarks.fakes import FakeOpenAI
+
+
+TWEETS = [{"id": "1880000000000000000", "author": "elonmusk", "content": "Starship flight 12 is go for launch"}]
+
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    with FakeOpenAI(completion="summary") as server:
+        monkeypatch.setenv("DATA_DIR", str(tmp_path))
+        monkeypatch.setenv("LLM_PROVIDER", "local")
+        monkeypatch.delenv("LLM_PROVIDER_CHAIN", raising=False)
+        monkeypatch.setenv("LOCAL_BASE_URL", f"{server.base_url}/v1")
+        monkeypatch.setenv("LOCAL_API_KEY", "sk-test")
+        monkeypatch.setenv("LOCAL_MODEL", "fake-model")
+        yield server
+
+
+def test_key_covers_request_parameters():
+    key = LLMCache.make_key("local", "m", "system", "prompt", 0.3, 2000)
+    assert key == LLMCache.make_key("local", "m", "system", "prompt", 0.30001, 2000)
+    assert LLMCache.make_key("local", "m", None, "prompt", 0.3, 2000) == LLMCache.make_key(
+        "local", "m", "", "prompt", 0.3, 2000
+    )
+    assert key != LLMCache.make_key("local", "m", "other", "prompt", 0.3, 2000)
+    assert key != LLMCache.make_key("local", "m", "system", "prompt", 0.3, 1000)
+    assert key != LLMCache.make_key("local", "m", "system", "prompt", 0.7, 2000)
+    assert key != LLMCache.make_key("openai", "m", "system", "prompt", 0.3, 2000)
+
+
+def test_ttl_expiry(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.db"), ttl_seconds=3600)
+    cache.put("k", "local", "m", "response")
+
+    clock.now += 3599
+    assert cache.get("k") == "response"
+    clock.now += 2
+    assert cache.get("k") is None
+
+    # 下一次写入时清理过期条目
+    cache.put("other", "local", "m", "fresh")
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+    cache.close()
+
+
+def test_evicts_least_recently_hit(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.put("a", "local", "m", "A")
+    clock.now += 1
+    cache.put("b", "local", "m", "B")
+    clock.now += 1
+    assert cache.get("a") == "A"
+    clock.now += 1
+    cache.put("c", "local", "m", "C")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.stats()["entries"] == 2
+    cache.close()
+
+
+def test_stats_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = LLMCache(path)
+    cache.put("k", "local", "m", "response")
+    cache.get("k")
+    cache.get("missing")
+    cache.close()
+
+    cache = LLMCache(path)
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+    cache.close()
+
+
+def test_analyse_agent_reuses_cached_response(llm, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE", "true")
+    agent = AnalyseAgent()
+
+    first = agent.execute(TWEETS)
+    second = agent.execute(TWEETS)
+
+    assert (first["data"]["cached"], second["data"]["cached"]) == (False, True)
+    assert second["data"]["summary"] == first["data"]["summary"] == "summary"
+    assert len(llm.requests) == 1
+    assert agent.cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_llm_cache_false_bypasses_cache(llm, monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE", "false")
+    agent = AnalyseAgent()
+
+    assert agent.cache is None
+    assert not agent.execute(TWEETS)["data"]["cached"]
+    assert not agent.execute(TWEETS)["data"]["cached"]
+    assert len(llm.requests) == 2
+    assert not (tmp_path / "llm_cache.db").exists()
+
+
+def test_failover_answers_are_not_cached(llm, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE", "true")
+    monkeypatch.setenv("LLM_PROVIDER_CHAIN", "local,openai")
+    llm.error_rate = 1.0
+    with FakeOpenAI(completion="fallback summary") as fallback:
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{fallback.base_url}/v1")
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        monkeypatch.setenv("OPENAI_MODEL", "fallback-model")
+        agent = AnalyseAgent()
+
+        first = agent.execute(TWEETS)
+        assert (first["data"]["summary"], first["data"]["provider"]) == ("fallback summary", "openai")
+        assert agent.cache.stats()["entries"] == 0
+
+        # 首选 provider 恢复后由它回答并写入缓存，备选的回答不会被当作首选的结果返回
+        llm.error_rate = 0.0
+        second = agent.execute(TWEETS)
+        third = agent.execute(TWEETS)
+
+    assert (second["data"]["summary"], second["data"]["cached"]) == ("summary", False)
+    assert (third["data"]["summary"], third["data"]["cached"]) == ("summary", True)
+    row = agent.cache.conn.execute("SELECT provider, model FROM llm_cache").fetchone()
+    assert row == ("local", "fake-model")
+    assert len(fallback.requests) == 1
@@ -0,0 +1,184 @@
+"""
+Provider 调用链测试：本地模拟 OpenAI 接口注入错误 / 延迟，验证故障切换、熔断和对冲请求
+用法: python3 -m pytest benchmarks/test_llm_failover.py
+"""
+
+import time
+
+import pytest
+
+from agents.llm_factory import LLMFactory, SimpleLLM
+from agents.llm_health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ProviderHealth
+from benchmarks.fakes import FakeOpenAI
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """启动主 / 备两个模拟接口，分别配置为 local 和 openai"""
+    servers = {}
+
+    def start(name: str, **kwargs) -> FakeOpenAI:
+        server = FakeOpenAI(completion=f"answer from {name}", **kwargs).start()
+        prefix = name.upper()
+        monkeypatch.setenv(f"{prefix}_BASE_URL", f"{server.base_url}/v1")
+        monkeypatch.setenv(f"{prefix}_API_KEY", "sk-test")
+        monkeypatch.setenv(f"{prefix}_MODEL", f"{name}-model")
+        servers[name] = server
+        return server
+
+    monkeypatch.setenv("LLM_BREAKER_COOLDOWN", "60")
+    yield start
+    for server in servers.values():
+        server.stop()
+
+
+def test_chain_from_env(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER_CHAIN", "ark, openai,ark,unknown")
+    assert LLMFactory.get_chain() == ["ark", "openai", "local"]
+    assert LLMFactory.get_chain("openai") == ["openai", "ark", "local"]
+
+    monkeypatch.delenv("LLM_PROVIDER_CHAIN")
+    monkeypatch.setenv("LLM_PROVIDER", "ollama")
+    assert LLMFactory.get_chain() == ["ollama"]
+
+
+def test_failover_on_error(providers):
+    primary = providers("local", error_rate=1.0)
+    providers("openai")
+    llm = SimpleLLM(chain=["local", "openai"], hedge=False)
+
+    assert llm.invoke("hello") == "answer from openai"
+    assert llm.last_provider == "openai"
+    assert llm.last_model == "openai-model"
+    # 有备选 provider 时不在 SDK 内重试
+    assert len(primary.requests) == 1
+
+
+def test_failover_on_timeout(providers, monkeypatch):
+    monkeypatch.setenv("LOCAL_TIMEOUT", "0.2")
+    providers("local", delay=2.0)
+    providers("openai")
+    llm = SimpleLLM(chain=["local", "openai"], hedge=False)
+
+    started = time.perf_counter()
+    assert llm.invoke("hello") == "answer from openai"
+    assert time.perf_counter() - started < 1.5
+
+
+def test_all_providers_fail(providers):
+    providers("local", error_rate=1.0)
+    providers("openai", error_rate=1.0)
+    llm = SimpleLLM(chain=["local", "openai"], hedge=False)
+
+    with pytest.raises(Exception):
+        llm.invoke("hello")
+
+
+def test_breaker_skips_failing_provider(providers, monkeypatch):
+    monkeypatch.setenv("LLM_BREAKER_MIN_CALLS", "2")
+    primary = providers("local", error_rate=1.0)
+    providers("openai")
+    llm = SimpleLLM(chain=["local", "openai"], hedge=False)
+
+    for _ in range(5):
+        assert llm.invoke("hello") == "answer from openai"
+
+    # 两次失败后熔断，之后不再请求主 provider
+    assert len(primary.requests) == 2
+    assert llm.health.breaker("local").state == OPEN
+
+
+def test_open_breakers_still_tried_as_last_resort(providers):
+    primary = providers("local", error_rate=1.0)
+    providers("openai")
+    llm = SimpleLLM(chain=["local", "openai"], hedge=False)
+    llm.health = ProviderHealth(min_calls=1, cooldown=60)
+    llm.health.record("local", 1.0, False)
+    llm.health.record("openai", 1.0, False)
+
+    # 两个都熔断：仍按顺序尝试，而不是直接失败
+    assert llm.invoke("hello") == "answer from openai"
+    assert len(primary.requests) == 1
+
+
+def test_hedge_wins_over_slow_primary(providers, monkeypatch):
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "0.1")
+    providers("local", delay=1.5)
+    backup = providers("openai")
+    llm = SimpleLLM(chain=["local", "openai"], hedge=True)
+
+    started = time.perf_counter()
+    assert llm.invoke("hello") == "answer from openai"
+    assert time.perf_counter() - started < 1.0
+    assert len(backup.requests) == 1
+
+
+def test_hedge_not_fired_when_primary_fast(providers, monkeypatch):
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "1")
+    providers("local", delay=0.01)
+    backup = providers("openai")
+    llm = SimpleLLM(chain=["local", "openai"], hedge=True)
+
+    for _ in range(3):
+        assert llm.invoke("hello") == "answer from local"
+    assert backup.requests == []
+
+
+def test_breaker_half_open_probe():
+    breaker = CircuitBreaker("local", min_calls=2, failure_rate=0.5, cooldown=0.05)
+    breaker.record(1.0, False)
+    breaker.record(1.0, False)
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # 探测期间只放行一个请求
+    assert not breaker.allow()
+
+    breaker.record(0.5, True)
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_breaker_counts_slow_calls():
+    breaker = CircuitBreaker("local", min_calls=3, failure_rate=0.6, slow_seconds=1.0)
+    for latency in (2.0, 0.1, 2.5):
+        breaker.record(latency, True)
+    assert breaker.state == OPEN
+
+
+def test_health_persisted(tmp_path):
+    path = tmp_path / "llm_health.db"
+    health = ProviderHealth(str(path), min_calls=2, cooldown=60)
+    for latency in (0.1, 0.2, 0.3, 0.4, 0.5):
+        health.record("openai", latency, True)
+    health.record("local", 1.0, False)
+    health.record("local", 1.0, False)
+    health.close()
+
+    restored = ProviderHealth(str(path), min_calls=2, cooldown=60)
+    assert restored.p90("openai") == 0.5
+    assert not restored.allow("local")
+
+
+def test_stream_deltas(providers):
+    server = providers("local")
+    llm = SimpleLLM(chain=["local"], hedge=False)
+    deltas = []
+
+    content = llm.invoke("hello", on_delta=deltas.append)
+
+    assert content == server.completion
+    assert len(deltas) > 1 and deltas[-1] == content
+    assert all(later.startswith(earlier) for earlier, later in zip(deltas, deltas[1:]))
+    assert server.requests[0]["stream"] is True
+
+
+def test_stream_failover(providers):
+    providers("local", error_rate=1.0)
+    providers("openai")
+    llm = SimpleLLM(chain=["local", "openai"], hedge=False)
+    deltas = []
+
+    assert llm.invoke("hello", on_delta=deltas.append) == "answer from openai"
+    assert deltas[-1] == "answer from openai"
@@ -0,0 +1,112 @@
+"""
+运行指标测试：按运行汇总、Prometheus textfile 输出格式，以及 --metrics-report 的 p50 / p95 汇总
+用法: python3 -m pytest benchmarks/test_metrics.py
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from agents import metrics, storage
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    storage.migrate(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(autouse=True)
+def no_current_run():
+    metrics.end_run()
+    yield
+    metrics.end_run()
+
+
+def test_records_only_inside_a_run():
+    metrics.incr("llm_calls", provider="local")
+    with metrics.timer("node_seconds", node="fetch"):
+        pass
+    assert metrics.current() is None
+
+    recorder = metrics.start_run("run-1")
+    metrics.observe("node_seconds", 2.0, node="fetch")
+    metrics.observe("node_seconds", 0.5, node="fetch")
+    metrics.incr("llm_calls", provider="local")
+    metrics.incr("llm_calls", 2, provider="local")
+
+    assert metrics.end_run() is recorder
+    assert recorder.rows() == [
+        ("llm_calls", '{"provider": "local"}', "counter", 1, 3, 3, 3),
+        ("node_seconds", '{"node": "fetch"}', "summary", 2, 2.5, 0.5, 2.0),
+    ]
+
+
+def test_write_textfile(tmp_path):
+    rows = [
+        ("llm_calls", '{"provider": "local"}', "counter", 1, 3, 3, 3),
+        ("node_seconds", '{"node": "fetch"}', "summary", 2, 2.5, 0.5, 2.0),
+        ("node_seconds", '{"node": "push"}', "summary", 1, 0.25, 0.25, 0.25),
+        ("snapshot_bytes", '{"source": "say \\"hi\\"\\n"}', "counter", 1, 1024, 1024, 1024),
+    ]
+    path = tmp_path / "textfile" / "twitter_monitor.prom"
+
+    metrics.write_textfile(str(path), rows, "run-1", 1700000000.4)
+
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        "# TYPE twitter_monitor_llm_calls_total gauge",
+        'twitter_monitor_llm_calls_total{provider="local"} 3',
+        "# TYPE twitter_monitor_node_seconds_count gauge",
+        'twitter_monitor_node_seconds_count{node="fetch"} 2',
+        "# TYPE twitter_monitor_node_seconds_sum gauge",
+        'twitter_monitor_node_seconds_sum{node="fetch"} 2.5',
+        "# TYPE twitter_monitor_node_seconds_max gauge",
+        'twitter_monitor_node_seconds_max{node="fetch"} 2',
+        'twitter_monitor_node_seconds_count{node="push"} 1',
+        'twitter_monitor_node_seconds_sum{node="push"} 0.25',
+        'twitter_monitor_node_seconds_max{node="push"} 0.25',
+        "# TYPE twitter_monitor_snapshot_bytes_total gauge",
+        'twitter_monitor_snapshot_bytes_total{source="say \\"hi\\"\\n"} 1024',
+        "# TYPE twitter_monitor_last_run_timestamp_seconds gauge",
+        'twitter_monitor_last_run_timestamp_seconds{run_id="run-1"} 1700000000',
+    ]
+    # 原子替换，不留临时文件
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+def test_flush_and_report(conn, tmp_path):
+    for i, seconds in enumerate([1.0, 2.0, 3.0, 4.0, 10.0]):
+        metrics.start_run(f"run-{i}")
+        metrics.observe("node_seconds", seconds / 2, node="fetch")
+        metrics.observe("node_seconds", seconds / 2, node="fetch")
+        metrics.incr("llm_calls", provider="local")
+        metrics.end_run().flush(conn, textfile=str(tmp_path / "metrics.prom"))
+
+    # 超出时间窗口的运行不计入
+    conn.execute("UPDATE metrics SET ts = ts - 30 * 86400 WHERE run_id = 'run-0'")
+
+    assert metrics.report(conn, days=7) == [
+        {"name": "llm_calls", "labels": {"provider": "local"}, "kind": "counter",
+         "runs": 4, "p50": 1, "p95": 1, "max": 1},
+        {"name": "node_seconds", "labels": {"node": "fetch"}, "kind": "summary",
+         "runs": 4, "p50": 4.0, "p95": 10.0, "max": 10.0},
+    ]
+    assert [r["name"] for r in metrics.report(conn, days=7, name_prefix="node_")] == ["node_seconds"]
+    assert 'run_id="run-4"' in (tmp_path / "metrics.prom").read_text(encoding="utf-8")
+
+
+def test_purge(conn):
+    metrics.start_run("old")
+    metrics.incr("llm_calls")
+    metrics.end_run().flush(conn)
+    conn.execute("UPDATE metrics SET ts = ?", (time.time() - 40 * 86400,))
+    metrics.start_run("new")
+    metrics.incr("llm_calls")
+    metrics.end_run().flush(conn)
+
+    metrics.purge(conn, retention_days=30)
+
+    assert [row[0] for row in conn.execute("SELECT run_id FROM metrics")] == ["new"]
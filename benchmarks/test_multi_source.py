@@ -0,0 +1,115 @@
+"""
+多来源抓取测试：FETCH_SOURCES 解析、各来源结果合并去重，以及高水位只随真实推文 ID 前进
+用法: python3 -m pytest benchmarks/test_multi_source.py
+"""
+
+import pytest
+
+from agents.fetch_agent.multi_source import MultiSourceFetchAgent, parse_sources
+
+
+def tweet(tweet_id, author="alice", content="hello world", timestamp=0):
+    return {"id": tweet_id, "author": author, "content": content, "timestamp": timestamp}
+
+
+def ok(*tweets, scrolls=2, stop_reason="high_water_mark"):
+    return {
+        "status": "success",
+        "data": {"tweets": list(tweets), "count": len(tweets), "scrolls": scrolls, "stop_reason": stop_reason},
+        "elapsed": 1.0,
+    }
+
+
+def failed(error="Chrome 启动失败"):
+    return {"status": "error", "error": error, "elapsed": 0.5}
+
+
+@pytest.fixture
+def agent(tmp_path):
+    sources = parse_sources("home,following,list:123")
+    return MultiSourceFetchAgent(sources, data_dir=str(tmp_path), browser_driver="agent-browser")
+
+
+def test_parse_sources():
+    sources = parse_sources(" home, following ,list:123, user:@jack, search:ai agents, home, HOME ,")
+
+    assert [s["name"] for s in sources] == ["home", "following", "list:123", "user:jack", "search:ai agents"]
+    assert [s["chronological"] for s in sources] == [False, True, True, True, True]
+    assert sources[1]["url"] == "https://x.com/home" and sources[1]["tab"] == "Following"
+    assert sources[2]["url"] == "https://x.com/i/lists/123"
+    assert sources[3]["url"] == "https://x.com/jack"
+    assert sources[4]["url"] == "https://x.com/search?q=ai%20agents&src=typed_query&f=live"
+    assert parse_sources("") == []
+
+
+@pytest.mark.parametrize("spec", ["list", "user:", "bookmarks"])
+def test_parse_sources_rejects_unknown(spec):
+    with pytest.raises(ValueError):
+        parse_sources(spec)
+
+
+def test_merge_dedupes_and_advances_cursors(agent):
+    results = {
+        "home": ok(tweet("1880000000000000005", timestamp=5), tweet("e3", "bob", "from a snapshot", timestamp=9)),
+        "following": ok(tweet("1880000000000000005", timestamp=5), tweet("1880000000000000007", timestamp=7)),
+        "list:123": ok(tweet("1870000000000000000", timestamp=1)),
+    }
+    cursors = {"following": "1880000000000000001", "list:123": "1879000000000000000"}
+
+    result = agent._merge(results, cursors, elapsed=1.5)
+
+    assert result["status"] == "success"
+    data = result["data"]
+    assert [(t["id"], t["source"]) for t in data["tweets"]] == [
+        ("e3", "home"),
+        ("1880000000000000007", "following"),
+        ("1880000000000000005", "home"),
+        ("1870000000000000000", "list:123"),
+    ]
+    # ref_id 不参与高水位；比旧高水位小的 ID 不会让高水位后退
+    assert data["cursors"] == {
+        "home": "1880000000000000005",
+        "following": "1880000000000000007",
+        "list:123": "1879000000000000000",
+    }
+    assert data["scrolls"] == 6
+    # 调用方传入的高水位不被修改
+    assert cursors == {"following": "1880000000000000001", "list:123": "1879000000000000000"}
+
+
+def test_failed_source_keeps_its_cursor(agent):
+    results = {
+        "home": ok(tweet("e1")),
+        "following": failed(),
+        "list:123": ok(),
+    }
+    cursors = {"following": "1880000000000000001"}
+
+    data = agent._merge(results, cursors, elapsed=1.0)["data"]
+
+    assert data["cursors"] == {"following": "1880000000000000001"}
+    assert data["sources"]["following"]["error"] == "Chrome 启动失败"
+    assert data["stop_reason"] == "home:high_water_mark, following:error, list:123:high_water_mark"
+
+
+def test_all_sources_failed(agent):
+    result = agent._merge({name: failed() for name in ("home", "following", "list:123")}, {}, elapsed=1.0)
+
+    assert result["status"] == "error"
+    assert set(result["data"]["sources"]) == {"home", "following", "list:123"}
+
+
+def test_seen_filter_per_source(agent):
+    agent.seen_filter = lambda tweets: [t for t in tweets if t["id"] != "1880000000000000003"]
+    home, following, _ = agent.sources
+    batch = [tweet("1880000000000000003"), tweet("1880000000000000009"), tweet("e4")]
+
+    # 推荐流使用全局已读记录
+    assert [t["id"] for t in agent._seen_filter_for(home, "1880000000000000005")(batch)] == [
+        "1880000000000000009", "e4",
+    ]
+    # 时间倒序的来源比较高水位，首次抓取没有高水位时不提前停止
+    assert [t["id"] for t in agent._seen_filter_for(following, "1880000000000000005")(batch)] == [
+        "1880000000000000009",
+    ]
+    assert agent._seen_filter_for(following, None) is None
@@ -0,0 +1,81 @@
+"""
+Prompt 打包测试：样板文本清理、token 预算内的挑选和切块
+用法: python3 -m pytest benchmarks/test_packer.py
+"""
+
+import time
+
+from agents.analyse_agent.packer import PromptPacker, clean_text, count_tokens, truncate_tokens
+
+
+NOW = time.time()
+
+
+def tweet(tweet_id: int, content: str, likes: int = 0, age_hours: float = 0) -> dict:
+    return {
+        "id": str(tweet_id),
+        "author": f"user{tweet_id}",
+        "content": content,
+        "timestamp": int(NOW - age_hours * 3600),
+        "engagement": {"likes": likes, "reposts": 0, "replies": 0, "views": 0},
+    }
+
+
+def test_clean_text_strips_boilerplate():
+    assert clean_text("大模型的下一个阶段是推理能力与成本的平衡。Image") == "大模型的下一个阶段是推理能力与成本的平衡。"
+    assert clean_text("New paper  https://t.co/abc\n\nImage GIF") == "New paper"
+    # 句中的普通单词不当作占位符
+    assert clean_text("Image generation keeps improving") == "Image generation keeps improving"
+
+
+def test_truncate_tokens():
+    text = "distributed consensus " * 200
+    truncated = truncate_tokens(text, 50)
+    assert truncated.endswith("…")
+    assert count_tokens(truncated[:-1]) <= 50
+    assert truncate_tokens("short", 50) == "short"
+
+
+def test_select_prefers_engagement_and_recency():
+    packer = PromptPacker(budget=10_000)
+    tweets = [
+        tweet(1, "old but popular launch announcement", likes=1000, age_hours=48),
+        tweet(2, "fresh and popular launch announcement", likes=1000),
+        tweet(3, "fresh but nobody cares about this one", likes=0),
+    ]
+
+    selected, _ = packer.select(tweets, max_count=1, now=NOW)
+
+    assert [t["id"] for t in selected] == ["2"]
+
+
+def test_select_respects_budget_and_keeps_order():
+    packer = PromptPacker(budget=120, tweet_max_tokens=60)
+    tweets = [tweet(i, f"tweet number {i} " * 10, likes=i) for i in range(20)]
+
+    selected, used = packer.select(tweets, now=NOW)
+
+    assert 0 < len(selected) < len(tweets)
+    assert used <= 120
+    # 预算内保留互动最高的推文，并保持输入顺序
+    ids = [int(t["id"]) for t in selected]
+    assert ids == list(range(20 - len(ids), 20))
+
+
+def test_split_chunks_by_count_and_budget():
+    packer = PromptPacker(budget=100, tweet_max_tokens=40)
+    tweets = [tweet(i, "word " * 30) for i in range(12)]
+
+    chunks = packer.split(tweets, max_count=8)
+
+    assert sum(len(c) for c in chunks) == 12
+    for chunk in chunks:
+        assert len(chunk) <= 8
+        assert sum(t for _, t in packer.prepare(chunk)) <= 100
+
+
+def test_select_does_not_mutate_input():
+    packer = PromptPacker()
+    original = tweet(1, "see https://t.co/xyz Image")
+    packer.select([original])
+    assert original["content"] == "see https://t.co/xyz Image"
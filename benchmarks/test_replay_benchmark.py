@@ -0,0 +1,189 @@
+"""
+离线回放基准（pytest-benchmark）
+
+回放 fixtures/recording_home.jsonl 中录制的快照，逐段测量解析 / 过滤 / 构建 prompt / 格式化消息，
+以及接本地模拟 LLM 和 Telegram 的完整工作流；同时断言输出，解析或流水线回归时直接失败
+用法: python3 -m pytest benchmarks/test_replay_benchmark.py --benchmark-only
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from agents.dedup import NearDuplicateIndex  # noqa: E402
+from benchmarks.replay import (  # noqa: E402
+    FIXTURE_RECORDING,
+    ReplayFetchAgent,
+    load_recording,
+    offline_pipeline,
+    recorded_snapshots,
+    reset_state,
+)
+
+
+# 录制文件中最后一次快照包含的推文数（全部带真实 status ID）
+EXPECTED_TWEETS = 24
+# 其中不同内容的推文数（其余是其他账号的转发）
+EXPECTED_DISTINCT = 5
+
+
+@pytest.fixture(scope="module")
+def snapshots():
+    _, calls = load_recording(FIXTURE_RECORDING)
+    return recorded_snapshots(calls)
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    with offline_pipeline() as env:
+        yield env
+
+
+@pytest.fixture(scope="module")
+def tweets(pipeline):
+    graph, _, _ = pipeline
+    return graph.fetch_agent._extract_tweets(recorded_snapshots(graph.fetch_agent.calls)[-1])
+
+
+def test_extract_tweets(benchmark, snapshots):
+    agent = ReplayFetchAgent(FIXTURE_RECORDING)
+
+    def parse_all():
+        return [agent._extract_tweets(snapshot) for snapshot in snapshots]
+
+    batches = benchmark(parse_all)
+
+    assert len(batches[-1]) == EXPECTED_TWEETS
+    assert all(str(t["id"]).isdigit() for t in batches[-1])
+    assert all(t["url"].startswith("https://x.com/") for t in batches[-1])
+
+
+def test_replay_fetch(benchmark):
+    agent = ReplayFetchAgent(FIXTURE_RECORDING, scroll_count=4)
+
+    result = benchmark(agent.execute)
+
+    assert result["status"] == "success"
+    assert result["data"]["count"] == EXPECTED_TWEETS
+
+
+def test_filter_node(benchmark, pipeline, tweets):
+    graph, _, _ = pipeline
+
+    def run():
+        reset_state(graph)
+        return graph._filter_node({"tweets": tweets})
+
+    result = benchmark(run)
+
+    assert result["tweet_count"] == len(result["new_tweets"])
+    assert 0 < result["tweet_count"] <= EXPECTED_TWEETS
+
+
+def test_build_prompt(benchmark, pipeline, tweets):
+    graph, _, _ = pipeline
+    prompt = benchmark(graph.analyse_agent._build_prompt, tweets)
+
+    assert "【推文内容】" in prompt
+    assert f"@{tweets[0]['author']}" in prompt
+
+
+def test_format_message(benchmark, pipeline, tweets):
+    graph, llm, _ = pipeline
+    message = benchmark(
+        graph.push_agent._format_message, llm.completion, len(tweets), "local", "fake-model", tweets
+    )
+
+    assert "<b>AI 分析摘要</b>" in message
+    assert tweets[0]["url"] in message
+    assert "**" not in message
+
+
+def test_full_pipeline(benchmark, pipeline):
+    graph, llm, telegram = pipeline
+
+    def setup():
+        reset_state(graph)
+        telegram.reset()
+        llm.requests.clear()
+
+    result = benchmark.pedantic(graph.run, setup=setup, rounds=5)
+
+    assert result["status"] == "success"
+    assert result["tweet_count"] == EXPECTED_TWEETS
+    assert llm.requests, "没有调用模拟 LLM"
+    assert len(telegram.messages) == 1
+    assert "Twitter/X 热点速递" in telegram.messages[0]["text"]
+
+
+def test_streaming_pipeline(benchmark, pipeline):
+    graph, llm, telegram = pipeline
+    llm.token_delay = 0.01
+    graph.push_agent.edit_interval = 0.1
+    graph.config["stream_push"] = True
+
+    def setup():
+        reset_state(graph)
+        telegram.reset()
+
+    try:
+        result = benchmark.pedantic(graph.run, setup=setup, rounds=3)
+    finally:
+        llm.token_delay = 0
+        graph.config["stream_push"] = False
+
+    assert result["status"] == "success"
+    # 推文列表只发送一次，之后编辑同一条消息，最终内容包含完整摘要
+    assert len(telegram.messages) == 1
+    assert "⏳ 生成中" in telegram.messages[0]["text"]
+    methods = [method for _, method, _ in telegram.calls]
+    assert methods[0] == "sendMessage" and methods.count("editMessageText") >= 2
+    final = telegram.texts[1]
+    assert "⏳ 生成中" not in final
+    assert "Agent 可观测性" in final
+
+
+def test_pipeline_mode(benchmark, pipeline, monkeypatch):
+    graph, llm, telegram = pipeline
+    monkeypatch.setenv("ANALYSE_CHUNK_SIZE", "8")
+    graph.config["pipeline"] = True
+    graph.graph = graph._build_graph()
+
+    def setup():
+        reset_state(graph)
+        telegram.reset()
+        llm.requests.clear()
+
+    try:
+        result = benchmark.pedantic(graph.run, setup=setup, rounds=3)
+    finally:
+        graph.config["pipeline"] = False
+        graph.graph = graph._build_graph()
+
+    assert result["status"] == "success"
+    assert result["tweet_count"] == EXPECTED_TWEETS
+    # 3 块 map（抓取期间提交）+ 1 次 reduce
+    assert len(llm.requests) == 4
+    assert len(telegram.messages) == 1
+    assert "Twitter/X 热点速递" in telegram.messages[0]["text"]
+
+
+def test_near_duplicate_pipeline(benchmark, pipeline):
+    graph, llm, telegram = pipeline
+    graph.near_dup = NearDuplicateIndex(graph.db_conn)
+
+    def setup():
+        reset_state(graph)
+        telegram.reset()
+        llm.requests.clear()
+
+    try:
+        result = benchmark.pedantic(graph.run, setup=setup, rounds=3)
+    finally:
+        graph.near_dup = None
+
+    assert result["status"] == "success"
+    assert result["tweet_count"] == EXPECTED_DISTINCT
+    prompt = llm.requests[0]["messages"][-1]["content"]
+    assert prompt.count("条相似推文") == EXPECTED_DISTINCT
+    assert "条相似" in telegram.messages[0]["text"]
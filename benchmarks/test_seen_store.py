@@ -0,0 +1,140 @@
+"""
+已读推文存储测试：分块 IN 查询、批内重复 ID、executemany 批量写入，以及清理后内存索引与表保持一致
+用法: python3 -m pytest benchmarks/test_seen_store.py
+"""
+
+import functools
+
+import pytest
+
+from agents import storage
+from agents.seen_store import _SQL_CHUNK_SIZE, SeenTweetStore
+
+
+class RecordingConnection:
+    """记录 execute / executemany 调用的连接代理"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.calls = []
+
+    def execute(self, sql, params=()):
+        self.calls.append(("execute", " ".join(sql.split())))
+        return self.conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        self.calls.append(("executemany", " ".join(sql.split())))
+        return self.conn.executemany(sql, rows)
+
+    def commit(self):
+        self.conn.commit()
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = storage.connect(tmp_path / "monitor.db")
+    storage.migrate(conn)
+    yield conn
+    conn.close()
+
+
+def rows(ids):
+    return [(tweet_id, f"content {tweet_id}", "alice") for tweet_id in ids]
+
+
+def age(conn, ids, days):
+    conn.executemany(
+        "UPDATE seen_tweets SET seen_at = datetime('now', ?) WHERE tweet_id = ?",
+        [(f"-{days} days", tweet_id) for tweet_id in ids],
+    )
+    conn.commit()
+
+
+@pytest.mark.parametrize("memory", [False, True])
+def test_filter_unseen_across_chunk_boundary(conn, memory):
+    ids = [str(1880000000000000000 + i) for i in range(_SQL_CHUNK_SIZE * 2 + 3)]
+    store = SeenTweetStore(conn, use_memory_index=memory)
+    # 已读的 ID 分布在第一块末尾、第二块开头和最后一块
+    seen = {ids[_SQL_CHUNK_SIZE - 1], ids[_SQL_CHUNK_SIZE], ids[-1]}
+    store.mark_seen(rows(sorted(seen)))
+
+    recording = RecordingConnection(conn)
+    store.conn = recording
+    unseen = store.filter_unseen(ids)
+
+    assert unseen == [tweet_id for tweet_id in ids if tweet_id not in seen]
+    queries = [sql for kind, sql in recording.calls if "IN (" in sql]
+    assert len(queries) == (0 if memory else 3)
+
+
+@pytest.mark.parametrize("memory", [False, True])
+def test_in_batch_duplicates_keep_first(conn, memory):
+    store = SeenTweetStore(conn, use_memory_index=memory)
+    store.mark_seen(rows(["2"]))
+
+    assert store.filter_unseen(["3", "1", "3", "2", "1", "4"]) == ["3", "1", "4"]
+    assert store.filter_unseen([]) == []
+
+
+def test_mark_seen_uses_one_executemany(conn):
+    store = SeenTweetStore(conn, use_memory_index=True)
+    recording = RecordingConnection(conn)
+    store.conn = recording
+
+    store.mark_seen(rows(["1", "2", "3"]))
+    # 重复标记被忽略，不覆盖首次的记录
+    store.mark_seen([("1", "changed", "bob")])
+    store.mark_seen([])
+
+    assert recording.calls == [
+        ("executemany", "INSERT OR IGNORE INTO seen_tweets (tweet_id, content, author) VALUES (?, ?, ?)"),
+    ] * 2
+    assert conn.execute("SELECT content FROM seen_tweets WHERE tweet_id = '1'").fetchone()[0] == "content 1"
+    assert store.index_size == 3
+
+
+def test_memory_index_loads_existing_rows(conn):
+    SeenTweetStore(conn, use_memory_index=False).mark_seen(rows(["1", "2"]))
+
+    assert SeenTweetStore(conn, use_memory_index=False).index_size == 0
+    store = SeenTweetStore(conn, use_memory_index=True)
+    assert store.index_size == 2
+    assert store.filter_unseen(["1", "2", "3"]) == ["3"]
+
+
+def test_memory_index_in_sync_after_purge(conn):
+    store = SeenTweetStore(conn, retention_days=7, use_memory_index=True)
+    store.mark_seen(rows(["old-1", "old-2", "recent"]))
+    age(conn, ["old-1", "old-2"], days=8)
+
+    store.purge_expired()
+
+    assert store.index_size == 1
+    assert store.filter_unseen(["old-1", "old-2", "recent"]) == ["old-1", "old-2"]
+    sql = SeenTweetStore(conn, use_memory_index=False)
+    assert sql.filter_unseen(["old-1", "old-2", "recent"]) == ["old-1", "old-2"]
+
+
+def test_memory_index_keeps_rows_left_by_capped_purge(conn, monkeypatch):
+    # 单次清理只删除 2 行，剩余过期记录留到下一次
+    monkeypatch.setattr(
+        storage, "purge_older_than",
+        functools.partial(storage.purge_older_than, batch_size=2, max_batches=1),
+    )
+    ids = [str(i) for i in range(5)]
+    store = SeenTweetStore(conn, retention_days=7, use_memory_index=True)
+    store.mark_seen(rows(ids))
+    age(conn, ids, days=8)
+
+    store.purge_expired()
+
+    remaining = conn.execute("SELECT COUNT(*) FROM seen_tweets").fetchone()[0]
+    assert remaining == store.index_size == 3
+    # 内存索引与 SQL 查询的判断一致
+    sql = SeenTweetStore(conn, use_memory_index=False)
+    assert store.filter_unseen(ids) == sql.filter_unseen(ids)
+
+    store.purge_expired()
+    store.purge_expired()
+    assert store.index_size == 0
+    assert store.filter_unseen(ids) == ids
@@ -0,0 +1,100 @@
+"""
+快照解析测试：article 内命中作者 status 链接时使用真实推文 ID，否则以 ref_id 兜底
+用法: python3 -m pytest benchmarks/test_snapshot_parser.py
+"""
+
+import json
+from datetime import datetime
+
+from agents.fetch_agent.parser import parse_snapshot
+from benchmarks.bench_timeline_decoder import FIXTURES
+
+
+NOW = datetime(2026, 1, 15, 12, 0, 0)
+
+QUOTING = "Sam Altman @sama 1h quoting this one, worth a read 3 replies, 5 reposts, 40 likes"
+LINKLESS = "Sam Altman @sama 3h another post without any status link in the snapshot"
+LONELY = "Andrej Karpathy @karpathy 5h a post from an author with no links at all"
+
+SNAPSHOT = "\n".join([
+    f'- article "{QUOTING}" [ref=e1]:',
+    '  - link "Quoted" [ref=e2]:',
+    "    - /url: /elonmusk/status/1880000000000000000",
+    f'- article "{LINKLESS}" [ref=e3]:',
+    '  - link "Sam Altman" [ref=e4]:',
+    "    - /url: /sama",
+    f'- article "{LONELY}" [ref=e5]:',
+    '- article "Sam Altman @sama 30m the one that carries the status link" [ref=e6]:',
+    '  - link "30m" [ref=e7]:',
+    "    - /url: /sama/status/1880000000000000042",
+    '- article "short" [ref=e8]:',
+    '- article "Who to follow carousel @someone suggestions" [ref=e9]:',
+    '- article "An article without any handle in its accessible name" [ref=e10]:',
+])
+
+REFS = {
+    "e1": {"role": "article", "name": QUOTING},
+    "e2": {"role": "link", "name": "Quoted"},
+    "e3": {"role": "article", "name": LINKLESS},
+    "e4": {"role": "link", "name": "Sam Altman"},
+    "e5": {"role": "article", "name": LONELY},
+    "e6": {"role": "article", "name": "Sam Altman @sama 30m the one that carries the status link"},
+    "e7": {"role": "link", "name": "30m"},
+    "e8": {"role": "article", "name": "short"},
+    "e9": {"role": "article", "name": "Who to follow carousel @someone suggestions"},
+    "e10": {"role": "article", "name": "An article without any handle in its accessible name"},
+}
+
+
+def parse():
+    tweets, skipped = parse_snapshot({"success": True, "data": {"snapshot": SNAPSHOT, "refs": REFS}}, now=NOW)
+    return {t["content"].split()[0]: t for t in tweets}, [t["id"] for t in tweets], skipped
+
+
+def test_fixture_articles_use_real_status_ids():
+    with open(FIXTURES / "snapshot_home.json", encoding="utf-8") as f:
+        tweets, skipped = parse_snapshot(json.load(f), now=NOW)
+
+    assert {(t["id"], t["author"]) for t in tweets} == {
+        ("1880000000000000000", "elonmusk"),
+        ("1880000000000000007", "kaifulee"),
+        ("1880000000000000014", "karpathy"),
+        ("1880000000000000021", "business"),
+        ("1880000000000000028", "someuser"),
+    }
+    for tweet in tweets:
+        assert tweet["url"] == f"https://x.com/{tweet['author']}/status/{tweet['id']}"
+    assert sum(skipped.values()) == 0
+
+
+def test_exact_match_inside_article():
+    by_word, _, _ = parse()
+
+    tweet = by_word["the"]
+    assert (tweet["id"], tweet["author"]) == ("1880000000000000042", "sama")
+    assert tweet["url"] == "https://x.com/sama/status/1880000000000000042"
+
+
+def test_ref_id_fallback_without_own_status_link():
+    by_word, _, _ = parse()
+
+    # 引用推文的 status 属于其他作者，不能当作本推文 ID
+    quoting = by_word["quoting"]
+    assert quoting["id"] == "e1"
+    assert quoting["engagement"]["likes"] == 40
+
+    # 本 article 没有 status 链接：ID 用 ref_id，链接沿用该作者在快照中的第一个 status
+    linkless = by_word["another"]
+    assert linkless["id"] == "e3"
+    assert linkless["url"] == "https://x.com/sama/status/1880000000000000042"
+
+    # 快照中完全没有该作者的 status：链接退回作者主页
+    lonely = by_word["a"]
+    assert (lonely["id"], lonely["url"]) == ("e5", "https://x.com/karpathy")
+
+
+def test_order_and_skipped_reasons():
+    _, ids, skipped = parse()
+
+    assert ids == ["1880000000000000042", "e1", "e3", "e5"]
+    assert skipped == {"too_short": 1, "carousel": 1, "video": 0, "no_author": 1}
@@ -0,0 +1,73 @@
+"""
+冷启动测试：导入 graph 和构建工作流时不加载 LangGraph / LangChain / OpenAI SDK / requests / numpy，
+lean 执行方式与 LangGraph 工作流结果一致
+用法: python3 -m pytest benchmarks/test_startup.py
+"""
+
+import json
+import subprocess
+import sys
+
+from benchmarks.bench_startup import ROOT, offline_env
+from benchmarks.replay import offline_pipeline, reset_state
+
+
+HEAVY_MODULES = ["langgraph", "langchain_core", "langsmith", "openai", "requests", "numpy"]
+
+
+def loaded_modules(code: str, env) -> list:
+    """在新进程中执行 code，返回其中已导入的重量级模块"""
+    script = f"{code}\nimport json, sys\nprint(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_heavy_imports_are_deferred(tmp_path):
+    env = offline_env(str(tmp_path))
+    assert loaded_modules("import graph", env) == []
+    # 构建工作流（创建 LLM / Telegram 客户端、打开数据库）后仍然没有导入
+    assert loaded_modules("import graph\ngraph.TwitterMonitorGraph()", env) == []
+
+
+def test_lean_runner_matches_langgraph():
+    with offline_pipeline() as (graph, llm, telegram):
+        results = {}
+        for lean in (False, True):
+            graph.config["lean"] = lean
+            reset_state(graph)
+            llm.requests.clear()
+            result = graph.run()
+            results[lean] = (
+                result["status"],
+                result["tweet_count"],
+                # 分块分析并发请求，顺序不固定
+                sorted(json.dumps(request["messages"], ensure_ascii=False) for request in llm.requests),
+            )
+
+        assert results[True] == results[False]
+        assert results[True][:2] == ("success", 24)
+        assert len(telegram.messages) == 2
+
+        # 没有新推文时两种方式都在 filter 之后结束，不调用 LLM、不推送
+        llm.requests.clear()
+        for lean in (True, False):
+            graph.config["lean"] = lean
+            assert graph.run()["tweet_count"] == 0
+        assert llm.requests == []
+        assert len(telegram.messages) == 2
+
+
+def test_lean_runner_follows_configured_steps():
+    with offline_pipeline() as (graph, llm, _):
+        graph.config.update(lean=True, topic_clustering=True)
+        reset_state(graph)
+
+        result = graph.run()
+
+        assert result["status"] == "success"
+        assert [name for name, _ in graph._steps()[0]] == ["fetch", "filter", "cluster", "analyse", "push"]
+        assert "同一话题共" in llm.requests[0]["messages"][-1]["content"]
+        # lean 模式从未编译 LangGraph
+        assert graph._graph is None
@@ -0,0 +1,80 @@
+"""
+监控数据库测试：调优 pragma、旧库升级、迁移失败回滚、分批清理
+用法: python3 -m pytest benchmarks/test_storage.py
+"""
+
+import sqlite3
+
+import pytest
+
+from agents import storage
+
+
+def index_names(conn: sqlite3.Connection) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_connect_enables_wal(tmp_path):
+    conn = storage.connect(tmp_path / "monitor.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_upgrade_legacy_database(tmp_path):
+    path = tmp_path / "monitor.db"
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE seen_tweets (tweet_id TEXT PRIMARY KEY, content TEXT, author TEXT, "
+        "seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    legacy.execute("INSERT INTO seen_tweets (tweet_id, content, author) VALUES ('1', 'hi', 'a')")
+    legacy.commit()
+    legacy.close()
+
+    conn = storage.connect(path)
+    assert storage.migrate(conn) == storage.MIGRATIONS[-1][0]
+    assert conn.execute("SELECT COUNT(*) FROM seen_tweets").fetchone()[0] == 1
+    assert {"idx_seen_tweets_seen_at", "idx_push_history_pushed_at"} <= index_names(conn)
+
+    # 再次启动不重复执行
+    assert storage.migrate(conn) == storage.schema_version(conn)
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    conn = storage.connect(tmp_path / "monitor.db")
+    storage.migrate(conn)
+    version = storage.schema_version(conn)
+
+    broken = [(version + 1, "坏迁移", "CREATE TABLE half_done (id INTEGER); SELECT * FROM missing")]
+    with pytest.raises(sqlite3.OperationalError):
+        storage.migrate(conn, storage.MIGRATIONS + broken)
+
+    assert storage.schema_version(conn) == version
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+
+
+def test_purge_in_bounded_batches(tmp_path):
+    conn = storage.connect(tmp_path / "monitor.db")
+    storage.migrate(conn)
+    conn.executemany(
+        "INSERT INTO seen_tweets (tweet_id, seen_at) VALUES (?, datetime('now', ?))",
+        [(str(i), "-30 days" if i < 250 else "-1 days") for i in range(300)],
+    )
+    conn.commit()
+
+    # 每批 100 行、最多 2 批：第一次只删 200 行，剩余留给下一次
+    assert storage.purge_older_than(conn, "seen_tweets", "seen_at", 7, batch_size=100, max_batches=2) == 200
+    assert storage.purge_older_than(conn, "seen_tweets", "seen_at", 7, batch_size=100, max_batches=2) == 50
+    assert conn.execute("SELECT COUNT(*) FROM seen_tweets").fetchone()[0] == 50
+
+
+def test_purge_uses_index(tmp_path):
+    conn = storage.connect(tmp_path / "monitor.db")
+    storage.migrate(conn)
+    plan = " ".join(
+        row[-1]
+        for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT rowid FROM seen_tweets WHERE seen_at < datetime('now', '-7 days')"
+        )
+    )
+    assert "idx_seen_tweets_seen_at" in plan
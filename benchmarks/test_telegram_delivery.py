@@ -0,0 +1,122 @@
+"""
+Telegram 投递测试：本地模拟 Bot API 注入 429 / 5xx，验证 retry_after、指数退避、重启后恰好投递一次和去重键
+用法: python3 -m pytest benchmarks/test_telegram_delivery.py
+"""
+
+import time
+
+import pytest
+
+from agents.push_agent import PushAgent
+from agents.push_agent.delivery import FAILED, PENDING, SENT, TelegramDelivery
+from benchmarks.fakes import StubBotAPI
+
+
+@pytest.fixture
+def telegram():
+    with StubBotAPI(retry_after=0.3) as server:
+        yield server
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return str(tmp_path / "outbox.db")
+
+
+def make_delivery(telegram, outbox, **kwargs) -> TelegramDelivery:
+    kwargs.setdefault("per_chat_interval", 0)
+    kwargs.setdefault("global_rate", 0)
+    return TelegramDelivery("TOKEN", outbox, api_base=telegram.base_url, **kwargs)
+
+
+def test_429_waits_for_retry_after(telegram, outbox):
+    delivery = make_delivery(telegram, outbox, max_attempts=1)
+    telegram.failures = [429, 429]
+
+    outbox_id = delivery.enqueue("1", "hello")
+    started = time.monotonic()
+    stats = delivery.flush(timeout=10)
+
+    # 两次 429 各等待 retry_after，且不计入重试次数上限
+    assert time.monotonic() - started >= 0.6
+    assert stats == {"sent": 1, "failed": 0, "pending": 0, "retries": 2}
+    assert delivery.status(outbox_id)["status"] == SENT
+    assert telegram.received == {"hello": 1}
+    delivery.close()
+
+
+def test_5xx_backs_off_then_gives_up(telegram, outbox, monkeypatch):
+    delays = []
+
+    def backoff(attempts):
+        delays.append(attempts)
+        return 0.01
+
+    monkeypatch.setattr(TelegramDelivery, "_backoff", staticmethod(backoff))
+    delivery = make_delivery(telegram, outbox, max_attempts=3)
+
+    telegram.failures = [502, 502]
+    recovered = delivery.enqueue("1", "recovered")
+    assert delivery.flush(timeout=10)["sent"] == 1
+    assert delays == [1, 2]
+    assert delivery.status(recovered) == {"status": SENT, "attempts": 3, "error": None, "message_id": 1}
+
+    telegram.failures = [502, 502, 502]
+    lost = delivery.enqueue("1", "lost")
+    assert delivery.flush(timeout=10)["failed"] == 1
+    assert delivery.status(lost)["status"] == FAILED
+    assert telegram.received == {"recovered": 1}
+    delivery.close()
+
+
+def test_pending_message_sent_exactly_once_after_restart(telegram, outbox, monkeypatch):
+    # 上次运行写入发件箱后、投递前进程退出
+    delivery = make_delivery(telegram, outbox)
+    delivery.enqueue("1", "left over", dedup_key="run:1:send")
+    delivery.close()
+
+    monkeypatch.setenv("TELEGRAM_API_BASE", telegram.base_url)
+    monkeypatch.setenv("TELEGRAM_PER_CHAT_INTERVAL", "0")
+    agent = PushAgent(bot_token="TOKEN", chat_id="1", outbox_path=outbox)
+    # 构造时不投递，不阻塞启动
+    assert telegram.messages == []
+    assert agent.delivery.pending_count() == 1
+
+    assert agent.execute("summary", tweet_count=1)["status"] == "success"
+    assert telegram.messages[0]["text"] == "left over"
+    assert len(telegram.messages) == 2
+
+    # 同一去重键重复入队：返回已发送的记录，不再发送
+    assert agent._send_message("left over", dedup_key="run:1:send")
+    assert telegram.received["left over"] == 1
+    agent.close()
+
+    agent = PushAgent(bot_token="TOKEN", chat_id="1", outbox_path=outbox)
+    assert agent.execute("summary", tweet_count=1)["status"] == "success"
+    assert telegram.received["left over"] == 1
+    agent.close()
+
+
+def test_identical_messages_without_key_are_all_sent(telegram, outbox):
+    delivery = make_delivery(telegram, outbox)
+    first = delivery.enqueue("1", "same text")
+    second = delivery.enqueue("1", "same text")
+
+    assert first != second
+    delivery.flush(timeout=10)
+    assert telegram.received == {"same text": 2}
+    delivery.close()
+
+
+def test_purge_keeps_pending_rows(telegram, outbox):
+    delivery = make_delivery(telegram, outbox)
+    sent = delivery.enqueue("1", "sent")
+    delivery.flush(timeout=10)
+    pending = delivery.enqueue("1", "pending")
+    delivery.conn.execute("UPDATE telegram_outbox SET created_at = created_at - 30 * 86400")
+    delivery.conn.commit()
+
+    assert delivery.purge_sent(older_than_days=7) == 1
+    assert delivery.status(sent) is None
+    assert delivery.status(pending)["status"] == PENDING
+    delivery.close()
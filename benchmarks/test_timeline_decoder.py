@@ -0,0 +1,139 @@
+"""
+时间线解码测试：录制的 HomeTimeline 响应解码出的推文，以及 network 模式下一次运行只使用接口或只使用快照，不会重复输出同一条推文
+用法: python3 -m pytest benchmarks/test_timeline_decoder.py
+"""
+
+import json
+
+import pytest
+
+from agents.fetch_agent import FetchAgent
+from agents.fetch_agent.timeline import decode_timeline_response
+from benchmarks.bench_timeline_decoder import EXPECTED_IDS, FIXTURES
+
+
+SNAPSHOT_IDS = [
+    "1880000000000000000",
+    "1880000000000000007",
+    "1880000000000000014",
+    "1880000000000000021",
+    "1880000000000000028",
+]
+
+
+@pytest.fixture
+def payload():
+    with open(FIXTURES / "home_timeline_response.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeCapture:
+    """按顺序返回预设响应的 TimelineCapture 替身，errors 中为 None 的轮次正常返回"""
+
+    def __init__(self, batches, errors=()):
+        self.batches = list(batches)
+        self.errors = list(errors)
+        self.responses_seen = 0
+        self.stopped = False
+
+    def harvest(self):
+        error = self.errors.pop(0) if self.errors else None
+        if error is not None:
+            raise error
+        payloads = self.batches.pop(0) if self.batches else []
+        self.responses_seen += len(payloads)
+        return payloads
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.setenv("TIMELINE_FIRST_RESPONSE_TIMEOUT", "0.5")
+    agent = FetchAgent(data_dir=str(tmp_path), browser_driver="agent-browser", fetch_mode="network", scroll_count=3)
+    agent.wait_stats = {"chrome_startup": 0.0, "page_ready": 0.0, "scroll": 0.0}
+    with open(FIXTURES / "snapshot_home.json", encoding="utf-8") as f:
+        snapshot = f.read()
+    agent.snapshots = 0
+
+    def run_browser(*args):
+        if args[0] == "snapshot":
+            agent.snapshots += 1
+            return True, snapshot
+        # 滚动 / 等待新 article
+        return True, json.dumps({"success": True, "data": {"result": {"success": True, "ready": True}}})
+
+    agent._run_browser = run_browser
+    return agent
+
+
+def collect(agent, capture):
+    result = agent._scroll_and_collect(capture)
+    assert result["status"] == "success"
+    ids = [t["id"] for t in result["data"]["tweets"]]
+    # 一次运行中同一条推文只出现一次
+    assert len(ids) == len(set(ids))
+    return sorted(ids)
+
+
+def test_decode_recorded_response(payload):
+    tweets = decode_timeline_response(payload)
+    # 推广条目被跳过，转推展开为原推文
+    assert [t["id"] for t in tweets] == EXPECTED_IDS
+    for tweet in tweets:
+        assert tweet["author"] and tweet["content"]
+        assert tweet["url"].endswith(f"/status/{tweet['id']}")
+
+
+def test_network_batches_never_mix_snapshot_tweets(agent, payload):
+    capture = FakeCapture([[payload], [], [payload]])
+
+    assert collect(agent, capture) == sorted(EXPECTED_IDS)
+    assert agent.snapshots == 0
+    assert capture.stopped
+
+
+def test_waits_for_first_response_instead_of_snapshot(agent, payload):
+    # 刷新后前两次读取时响应还没到
+    capture = FakeCapture([[], [], [payload]])
+
+    assert collect(agent, capture) == sorted(EXPECTED_IDS)
+    assert agent.snapshots == 0
+    assert agent.wait_stats["page_ready"] > 0
+
+
+def test_snapshot_only_run_when_no_response_arrives(agent, payload):
+    # 等待超时后改为只读取快照，之后才到达的接口响应不再混入
+    capture = FakeCapture([[]] * 10 + [[payload]] * 3)
+
+    assert collect(agent, capture) == sorted(SNAPSHOT_IDS)
+    assert agent.snapshots == 3
+    assert capture.stopped
+
+
+def test_capture_error_before_first_response_falls_back_to_snapshot(agent):
+    capture = FakeCapture([], errors=[RuntimeError("Network.getResponseBody failed")])
+
+    assert collect(agent, capture) == sorted(SNAPSHOT_IDS)
+    assert agent.snapshots == 3
+
+
+def test_capture_error_after_first_response_skips_batch(agent, payload):
+    capture = FakeCapture([[payload], [payload]], errors=[None, RuntimeError("Network.getResponseBody failed")])
+
+    assert collect(agent, capture) == sorted(EXPECTED_IDS)
+    assert agent.snapshots == 0
+
+
+def test_merge_dedupes_by_status_id(agent):
+    # 同一条推文：快照正文截断，接口正文为 note_tweet 全文
+    batches = [
+        [{"id": "1881000000000000001", "author": "alice", "content": "Short…", "timestamp": 1}],
+        [{"id": "1881000000000000001", "author": "alice", "content": "Longer note tweet text", "timestamp": 1},
+         {"id": "e5", "author": "bob", "content": "no status link", "timestamp": 2}],
+        [{"id": "e9", "author": "bob", "content": "no status link", "timestamp": 2}],
+    ]
+    agent._collect_batch = lambda capture: batches.pop(0)
+
+    assert collect(agent, None) == ["1881000000000000001", "e5"]
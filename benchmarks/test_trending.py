@@ -0,0 +1,162 @@
+"""
+互动趋势测试：速度 / 加速度计算（numpy 与纯 Python 一致）、快照窗口、升温排名、打包排序和工作流中的升温列表
+用法: python3 -m pytest benchmarks/test_trending.py
+"""
+
+import random
+
+import pytest
+
+from agents import storage, trending
+from agents.analyse_agent.packer import PromptPacker
+from agents.trending import EngagementTracker, compute_trends
+from benchmarks.replay import offline_pipeline, reset_state
+
+
+HOUR = 3600
+NOW = 1_760_000_000
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    conn = storage.connect(tmp_path / "monitor.db")
+    storage.migrate(conn)
+    return EngagementTracker(conn)
+
+
+def tweet(tweet_id, likes, posted=NOW - 48 * HOUR, **extra):
+    return {
+        "id": tweet_id,
+        "author": f"user{tweet_id}",
+        "content": f"tweet {tweet_id}",
+        "timestamp": posted,
+        "engagement": {"likes": likes, "reposts": 0, "replies": 0},
+        **extra,
+    }
+
+
+def trends_of(groups, posted):
+    """按推文分组的 (时间, 互动) 序列 → 每条推文的 {velocity, acceleration, trend_rate}"""
+    velocity, acceleration, rate = compute_trends(
+        [len(g) for g in groups],
+        [t for g in groups for t, _ in g],
+        [e for g in groups for _, e in g],
+        posted,
+    )
+    return [
+        {"velocity": v, "acceleration": a, "trend_rate": r}
+        for v, a, r in zip(velocity, acceleration, rate)
+    ]
+
+
+def test_velocity_and_acceleration():
+    single, steady, speeding, slowing = trends_of(
+        [
+            [(10.0, 100.0)],
+            [(8.0, 100.0), (9.0, 200.0), (10.0, 300.0)],
+            [(8.0, 100.0), (9.0, 150.0), (10.0, 350.0)],
+            [(8.0, 100.0), (9.0, 400.0), (10.0, 450.0)],
+        ],
+        [6.0, None, None, None],
+    )
+    # 只有一次快照：发布以来的平均速度
+    assert single == {"velocity": 25.0, "acceleration": 0.0, "trend_rate": 25.0}
+    assert (steady["velocity"], steady["acceleration"], steady["trend_rate"]) == (100.0, 0.0, 100.0)
+    assert (speeding["velocity"], speeding["acceleration"], speeding["trend_rate"]) == (200.0, 150.0, 350.0)
+    assert (slowing["velocity"], slowing["acceleration"], slowing["trend_rate"]) == (50.0, -250.0, 0.0)
+
+
+def test_two_snapshots_compare_with_lifetime_average():
+    (trend,) = trends_of([[(10.0, 100.0), (11.0, 300.0)]], [0.0])
+    # 前 10 小时平均 10 / 小时，最近 1 小时 200 / 小时
+    assert trend["velocity"] == 200.0
+    assert trend["acceleration"] == 190.0
+
+
+def test_pure_python_matches_numpy(monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(3)
+    groups, posted = [], []
+    for _ in range(500):
+        t, e, points = 100.0, float(rng.randrange(1000)), []
+        for _ in range(rng.randint(1, 3)):
+            t += rng.choice([0.0, 0.1, 0.5, 2.0])
+            e += rng.randrange(-5, 300)
+            points.append((t, e))
+        groups.append(points)
+        posted.append(rng.choice([None, 90.0, 99.9]))
+
+    with_numpy = trends_of(groups, posted)
+    monkeypatch.setattr(trending, "np", None)
+    without = trends_of(groups, posted)
+    for a, b in zip(with_numpy, without):
+        for key in ("velocity", "acceleration", "trend_rate"):
+            assert a[key] == pytest.approx(b[key])
+
+
+def test_snapshot_window_and_same_run_overwrite(tracker):
+    for hours, likes in enumerate([10, 20, 30, 40]):
+        tracker.record([tweet("1", likes)], NOW + hours * HOUR)
+    tracker.record([tweet("1", 45)], NOW + 3 * HOUR)
+
+    history = tracker.history(["1", "missing"])
+    assert history == {"1": [(NOW + HOUR, 20), (NOW + 2 * HOUR, 30), (NOW + 3 * HOUR, 45)]}
+
+
+def test_rising_prefers_accelerating_over_big(tracker):
+    # 老推文：互动多但增长放缓；新推文：互动少但在加速
+    big, rising = "100", "200"
+    for hours, (big_likes, rising_likes) in enumerate([(50_000, 100), (50_400, 400), (50_500, 1200)]):
+        tracker.record([tweet(big, big_likes), tweet(rising, rising_likes)], NOW + hours * HOUR)
+
+    tweets = [tweet(big, 50_500), tweet(rising, 1200)]
+    ranked = tracker.rising(tweets)
+    assert [t["id"] for t in ranked] == [rising]
+    assert ranked[0]["trend_rate"] == 1300.0
+    assert tracker.rising(tweets, exclude={rising}) == []
+
+    tracker.annotate(tweets)
+    selected, _ = PromptPacker(half_life_hours=0).select(tweets, max_count=1)
+    assert [t["id"] for t in selected] == [rising]
+
+
+def test_snapshot_ref_ids_are_not_tracked(tracker):
+    # 快照兜底的 ref_id 跨运行指向不同推文，不能拼成同一条互动序列
+    assert tracker.record([tweet("e12", 10), tweet("1", 10)], NOW) == 1
+    assert tracker.record([tweet("e12", 5000)], NOW + HOUR) == 0
+    assert tracker.history(["e12", "1"]) == {"1": [(NOW, 10)]}
+    assert tracker.rising([tweet("e12", 9000)]) == []
+
+
+def test_purge_expired(tracker):
+    tracker.record([tweet("1", 10)], 1_000)
+    tracker.record([tweet("1", 20)], NOW * 2)
+    assert tracker.purge_expired() == 1
+
+
+def test_filter_stage_records_snapshots_and_surfaces_rising():
+    with offline_pipeline() as (graph, _, _):
+        reset_state(graph)
+        graph.run()
+        conn = graph.db_conn
+        assert conn.execute("SELECT COUNT(*) FROM engagement_snapshots").fetchone()[0] == 24
+
+        # 把上一次运行的快照挪到一小时前，并把其中一条的互动调低，模拟它在这一小时里起飞
+        conn.execute("UPDATE engagement_snapshots SET run_ts = run_ts - 3600")
+        tweets = graph.fetch_agent.execute()["data"]["tweets"]
+        target = max(tweets, key=lambda t: t["engagement"].get("likes", 0))
+        conn.execute(
+            "UPDATE engagement_snapshots SET likes = 0, reposts = 0, replies = 0 WHERE tweet_id = ?",
+            (str(target["id"]),),
+        )
+        conn.commit()
+
+        graph._run_started += 1
+        update = graph._filter_node({"tweets": tweets})
+        assert update["new_tweets"] == []
+        assert [t["id"] for t in update["trending"]] == [target["id"]]
+        sighted = {str(t["id"]) for t in tweets if not graph.ad_classifier.is_ad(t)}
+        assert conn.execute("SELECT COUNT(*) FROM engagement_snapshots").fetchone()[0] == 24 + len(sighted)
+
+        message = graph.push_agent._format_message("summary", 0, "p", "m", [], trending=update["trending"])
+        assert "正在升温" in message and f"@{target['author']}" in message
@@ -1,22 +1,41 @@
 """
 Twitter Monitor - LangGraph 工作流
-使用 StateGraph 串联 Fetch → Filter → Analyse → Push
+使用 StateGraph 串联 Fetch → Filter → Cluster → Analyse → Push
+（LEAN_RUNNER / --lean 时不编译 LangGraph，按同样的节点顺序直接调用）
+每个节点完成后保存检查点，推送失败或中断的运行可用 --resume 从最后完成的节点继续
 """
 
 import os
 import sys
+import time
+import random
+import signal
+import argparse
+import threading
 import sqlite3
+import uuid
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Annotated
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Annotated
 from datetime import datetime
 from typing_extensions import TypedDict
 from dotenv import load_dotenv
 
-from langgraph.graph import StateGraph, START, END
-
-from agents.fetch_agent import FetchAgent
-from agents.analyse_agent import AnalyseAgent
+from agents import metrics, storage
+from agents.fetch_agent import FetchAgent, MultiSourceFetchAgent, parse_sources
+from agents.analyse_agent import AnalyseAgent, IncrementalAnalysis
+from agents.llm_factory import LLMFactory
 from agents.push_agent import PushAgent
+from agents.ad_classifier import AdClassifier
+from agents.seen_store import SeenTweetStore
+from agents.dedup import NearDuplicateIndex
+from agents.clustering import TopicClusterer
+from agents.archive import TweetArchive
+from agents.trending import EngagementTracker
+from agents.checkpoint import DONE, Checkpoint, RunCheckpoints
+
+if TYPE_CHECKING:
+    # LangGraph 导入耗时较长，只在第一次构建工作流时导入（lean 模式完全不导入）
+    from langgraph.graph.state import CompiledStateGraph
 
 
 load_dotenv(Path(__file__).parent / ".env")
@@ -27,12 +46,20 @@ class MonitorState(TypedDict):
 
     tweets: List[Dict[str, Any]]
     new_tweets: List[Dict[str, Any]]
+    clusters: List[Dict[str, Any]]
+    trending: List[Dict[str, Any]]
     summary: str
     provider: str
     model: str
     tweet_count: int
+    message_id: Optional[int]
     error: Optional[str]
     status: str
+    run_id: str
+    # 本次运行的新推文 [tweet_id, content, author, 近似重复签名 hex]，推送成功后才标记为已读
+    seen_rows: List[List[str]]
+    # 多来源抓取的新高水位（来源名 → 最大推文 ID），与 seen_rows 一起提交
+    cursors: Dict[str, str]
 
 
 class TwitterMonitorGraph:
@@ -41,35 +68,79 @@ class TwitterMonitorGraph:
     def __init__(self):
         self.config = self._load_config()
         self.db_conn: Optional[sqlite3.Connection] = None
-
-        self.fetch_agent = FetchAgent(
+        self.seen_store: Optional[SeenTweetStore] = None
+        self.near_dup: Optional[NearDuplicateIndex] = None
+        self.archive: Optional[TweetArchive] = None
+        self.engagement: Optional[EngagementTracker] = None
+        self.checkpoints: Optional[RunCheckpoints] = None
+        self._last_purge = 0.0
+        self._run_started = time.time()
+        self._analysis: Optional[IncrementalAnalysis] = None
+
+        fetch_kwargs = dict(
             session=self.config["browser_session"],
             data_dir=str(self.config["data_dir"]),
             scroll_count=self.config["scroll_count"],
+            max_scroll_count=self.config["max_scroll_count"],
         )
-        self.analyse_agent = AnalyseAgent(provider=self.config["llm_provider"])
+        seen_filter = self._unseen_tweets if self.config["adaptive_scroll"] else None
+        sources = self.config["fetch_sources"]
+        if [s["name"] for s in sources] == ["home"]:
+            self.fetch_agent = FetchAgent(**fetch_kwargs, seen_filter=seen_filter)
+        else:
+            # 多个来源：每个来源一个标签页并发抓取
+            self.fetch_agent = MultiSourceFetchAgent(sources, seen_filter=seen_filter, **fetch_kwargs)
+        self.analyse_agent = AnalyseAgent()
         self.push_agent = PushAgent()
+        self.ad_classifier = AdClassifier.from_file()
+        self.clusterer = TopicClusterer(threshold=self.config["cluster_threshold"])
 
         self._init_db()
-        self.graph = self._build_graph()
+        self._graph: Optional["CompiledStateGraph"] = None
 
         self._print_banner()
 
     def _load_config(self) -> Dict[str, Any]:
+        data_dir = Path(os.path.expanduser(os.getenv("DATA_DIR", "~/.twitter-monitor")))
         return {
-            "data_dir": Path(
-                os.path.expanduser(os.getenv("DATA_DIR", "~/.twitter-monitor"))
-            ),
+            "data_dir": data_dir,
             "browser_session": os.getenv("BROWSER_SESSION", "twitter"),
             "scroll_count": int(os.getenv("SCROLL_COUNT", "3")),
-            "llm_provider": os.getenv("LLM_PROVIDER", "local"),
+            "max_scroll_count": int(os.getenv("MAX_SCROLL_COUNT", "10")),
+            "adaptive_scroll": os.getenv("ADAPTIVE_SCROLL", "true").lower() == "true",
+            "llm_provider": " → ".join(LLMFactory.get_chain()),
+            "retention_days": int(os.getenv("DB_RETENTION_DAYS", "7")),
+            "seen_index": os.getenv("SEEN_INDEX", "sql").strip().lower() == "memory",
+            "fetch_sources": parse_sources(os.getenv("FETCH_SOURCES", "home")),
+            "metrics": os.getenv("METRICS", "true").lower() == "true",
+            "metrics_textfile": os.path.expanduser(
+                os.getenv("METRICS_TEXTFILE") or str(data_dir / "metrics.prom")
+            ),
+            "metrics_retention_days": int(os.getenv("METRICS_RETENTION_DAYS", "90")),
+            "stream_push": os.getenv("STREAM_PUSH", "false").lower() == "true",
+            "pipeline": os.getenv("PIPELINE", "false").lower() == "true",
+            "near_dup": os.getenv("NEAR_DUP", "true").lower() == "true",
+            "near_dup_threshold": float(os.getenv("NEAR_DUP_THRESHOLD", "0.7")),
+            "near_dup_days": int(os.getenv("NEAR_DUP_DAYS", "3")),
+            "topic_clustering": os.getenv("TOPIC_CLUSTERING", "true").lower() == "true",
+            "cluster_threshold": float(os.getenv("CLUSTER_THRESHOLD", "0.35")),
+            "archive": os.getenv("ARCHIVE", "true").lower() == "true",
+            "archive_retention_days": int(os.getenv("ARCHIVE_RETENTION_DAYS", "0")),
+            "trending": os.getenv("TRENDING", "true").lower() == "true",
+            "trending_top": int(os.getenv("TRENDING_TOP", "5")),
+            "trending_min_rate": float(os.getenv("TRENDING_MIN_RATE", "10")),
+            "engagement_retention_days": int(os.getenv("ENGAGEMENT_RETENTION_DAYS", "7")),
+            "lean": os.getenv("LEAN_RUNNER", "false").lower() == "true",
+            "checkpoints": os.getenv("RUN_CHECKPOINTS", "true").lower() == "true",
+            "checkpoint_retention_days": int(os.getenv("CHECKPOINT_RETENTION_DAYS", "7")),
+            "outbox_retention_days": int(os.getenv("TELEGRAM_OUTBOX_RETENTION_DAYS", "7")),
         }
 
     def _print_banner(self):
         print("\n" + "=" * 60)
         print("📱 Twitter/X 智能监控系统")
         print("=" * 60)
-        print("架构模式: LangGraph StateGraph")
+        print(f"架构模式: {'Lean（顺序执行节点）' if self.config['lean'] else 'LangGraph StateGraph'}")
         print(f"LLM Provider: {self.config['llm_provider']}")
         print("=" * 60 + "\n")
 
@@ -77,53 +148,167 @@ class TwitterMonitorGraph:
         db_path = self.config["data_dir"] / "twitter_monitor.db"
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        self.db_conn = sqlite3.connect(db_path)
-        self.db_conn.execute("""
-            CREATE TABLE IF NOT EXISTS seen_tweets (
-                tweet_id TEXT PRIMARY KEY,
-                content TEXT,
-                author TEXT,
-                seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        # 多来源抓取时，高水位判断会在抓取线程中读取已读记录
+        self.db_conn = storage.connect(db_path, check_same_thread=False)
+        storage.migrate(self.db_conn)
+
+        self.seen_store = SeenTweetStore(
+            self.db_conn,
+            retention_days=self.config["retention_days"],
+            use_memory_index=self.config["seen_index"],
+        )
+        if self.config["near_dup"]:
+            self.near_dup = NearDuplicateIndex(
+                self.db_conn,
+                threshold=self.config["near_dup_threshold"],
+                history_days=self.config["near_dup_days"],
             )
-        """)
-        self.db_conn.execute("""
-            CREATE TABLE IF NOT EXISTS push_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pushed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                tweet_count INTEGER,
-                summary TEXT
+        if self.config["archive"]:
+            self.archive = TweetArchive(
+                self.db_conn, retention_days=self.config["archive_retention_days"]
             )
-        """)
-        self.db_conn.commit()
-        retention_days = int(os.getenv("DB_RETENTION_DAYS", "7"))
-        self.db_conn.execute(
-            f"DELETE FROM seen_tweets WHERE seen_at < datetime('now', '-{retention_days} days')"
-        )
-        self.db_conn.commit()
-
-    def _build_graph(self) -> StateGraph:
-        """构建 LangGraph 工作流"""
+        if self.config["trending"]:
+            self.engagement = EngagementTracker(
+                self.db_conn, retention_days=self.config["engagement_retention_days"]
+            )
+        if self.config["checkpoints"]:
+            self.checkpoints = RunCheckpoints(
+                self.db_conn, retention_days=self.config["checkpoint_retention_days"]
+            )
+        self._purge_expired()
+
+    def _purge_expired(self):
+        """清理超过保留期的已读记录、签名、归档、快照、检查点、指标和已发送的发件箱记录"""
+        self.seen_store.purge_expired()
+        if self.near_dup is not None:
+            self.near_dup.purge_expired()
+        if self.archive is not None:
+            self.archive.purge_expired()
+        if self.engagement is not None:
+            self.engagement.purge_expired()
+        if self.checkpoints is not None:
+            self.checkpoints.purge_expired()
+        if self.config["metrics"]:
+            metrics.purge(self.db_conn, self.config["metrics_retention_days"])
+        if self.push_agent.delivery is not None:
+            self.push_agent.delivery.purge_sent(self.config["outbox_retention_days"])
+        self._last_purge = time.monotonic()
+
+    def _steps(self, start: Optional[str] = None) -> tuple:
+        """
+        工作流的节点顺序（LangGraph 和 lean 两种执行方式共用）
+
+        Args:
+            start: 从该节点开始（恢复运行时跳过已完成的节点）
+
+        Returns:
+            ([(节点名, 节点函数), ...], 之后由 _should_continue 决定是否继续的节点名)
+        """
+        if self.config["pipeline"]:
+            # 流水线：抓取节点内逐批过滤并提前开始分析，analyse 节点只等待剩余部分
+            steps = [("fetch", self._pipeline_fetch_node)]
+            gate = "fetch"
+        else:
+            steps = [("fetch", self._fetch_node), ("filter", self._filter_node)]
+            gate = "filter"
+            # 话题聚类需要完整的推文集合，流水线模式下推文在抓取期间已分块分析，不经过此节点
+            if self.config["topic_clustering"]:
+                steps.append(("cluster", self._cluster_node))
+        steps += [("analyse", self._analyse_node), ("push", self._push_node)]
+        if start is not None:
+            steps = steps[[name for name, _ in steps].index(start):]
+        return steps, gate
+
+    @property
+    def graph(self) -> "CompiledStateGraph":
+        """编译后的 LangGraph 工作流（第一次访问时构建）"""
+        if self._graph is None:
+            self._graph = self._build_graph()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph: "CompiledStateGraph"):
+        self._graph = graph
+
+    def _build_graph(self, start: Optional[str] = None) -> "CompiledStateGraph":
+        """构建 LangGraph 工作流（start 指定时从该节点开始）"""
+        from langgraph.graph import StateGraph, START, END
+
+        steps, gate = self._steps(start)
+        names = [name for name, _ in steps]
         builder = StateGraph(MonitorState)
-
-        builder.add_node("fetch", self._fetch_node)
-        builder.add_node("filter", self._filter_node)
-        builder.add_node("analyse", self._analyse_node)
-        builder.add_node("push", self._push_node)
-
-        builder.add_edge(START, "fetch")
-        builder.add_edge("fetch", "filter")
-        builder.add_conditional_edges(
-            "filter", self._should_continue, {"continue": "analyse", "end": END}
-        )
-        builder.add_edge("analyse", "push")
-        builder.add_edge("push", END)
+        for name, node in steps:
+            builder.add_node(name, self._checkpointed(name, self._timed_node(name, node)))
+
+        builder.add_edge(START, names[0])
+        for name, next_node in zip(names, names[1:]):
+            if name == gate:
+                builder.add_conditional_edges(
+                    name, self._should_continue, {"continue": next_node, "end": END}
+                )
+            else:
+                builder.add_edge(name, next_node)
+        builder.add_edge(names[-1], END)
 
         return builder.compile()
 
+    def _run_lean(self, state: MonitorState, start: Optional[str] = None) -> MonitorState:
+        """不编译 LangGraph，按 _steps() 的顺序直接调用节点，每个节点的返回值合并进状态"""
+        state = dict(state)
+        steps, gate = self._steps(start)
+        for name, node in steps:
+            state.update(self._checkpointed(name, self._timed_node(name, node))(state))
+            if name == gate and self._should_continue(state) == "end":
+                break
+        return state
+
+    @staticmethod
+    def _timed_node(name: str, node):
+        """记录节点耗时（node_seconds{node=...}）"""
+
+        def timed(state: MonitorState) -> dict:
+            with metrics.timer("node_seconds", node=name):
+                return node(state)
+
+        timed.__name__ = node.__name__
+        return timed
+
+    def _checkpointed(self, name: str, node):
+        """节点成功完成后保存检查点；出错或推送失败的节点不保存，恢复时从它重新执行"""
+
+        def checkpointed(state: MonitorState) -> dict:
+            update = node(state)
+            if (
+                self.checkpoints is not None
+                and not update.get("error")
+                and update.get("status") != "push_failed"
+            ):
+                self.checkpoints.save(state["run_id"], name, {**state, **update})
+            return update
+
+        checkpointed.__name__ = node.__name__
+        return checkpointed
+
+    def _remember_message(self, state: MonitorState, message_id: int):
+        """把已发送的流式消息记入最近一次检查点（失败的节点本身不保存检查点）"""
+        if self.checkpoints is None:
+            return
+        checkpoint = self.checkpoints.load(state["run_id"])
+        if checkpoint is not None:
+            self.checkpoints.save(
+                checkpoint.run_id, checkpoint.node, {**checkpoint.state, "message_id": message_id}
+            )
+
     def _fetch_node(self, state: MonitorState) -> dict:
         """抓取推文节点"""
         print("[Node: fetch] 抓取推文...")
-        result = self.fetch_agent.execute()
+        return self._fetch()
+
+    def _fetch(self, on_batch=None) -> dict:
+        if isinstance(self.fetch_agent, MultiSourceFetchAgent):
+            result = self.fetch_agent.execute(cursors=self._load_cursors(), on_batch=on_batch)
+        else:
+            result = self.fetch_agent.execute(on_batch=on_batch)
 
         if result["status"] != "success":
             return {
@@ -133,94 +318,202 @@ class TwitterMonitorGraph:
             }
 
         tweets = result["data"]["tweets"]
-        print(f"  → 获取到 {len(tweets)} 条推文")
-        return {"tweets": tweets, "status": "success"}
+        print(
+            f"  → 获取到 {len(tweets)} 条推文 "
+            f"(滚动 {result['data']['scrolls']} 次, 停止原因: {result['data']['stop_reason']})"
+        )
+        # 高水位和已读标记一起在推送成功后提交（_commit_seen），推送失败的推文下次还能抓到
+        return {"tweets": tweets, "status": "success", "cursors": result["data"].get("cursors", {})}
+
+    def _load_cursors(self) -> Dict[str, str]:
+        """读取各抓取来源的高水位（上次抓到的最大推文 ID）"""
+        return dict(self.db_conn.execute("SELECT source, high_water_id FROM fetch_cursors"))
+
+    def _save_cursors(self, cursors: Dict[str, str]):
+        self.db_conn.executemany(
+            """
+            INSERT INTO fetch_cursors (source, high_water_id, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(source) DO UPDATE SET
+                high_water_id = excluded.high_water_id,
+                updated_at = excluded.updated_at
+            """,
+            list(cursors.items()),
+        )
+        self.db_conn.commit()
+
+    def _pipeline_fetch_node(self, state: MonitorState) -> dict:
+        """
+        流水线抓取节点：每次滚动得到的新推文立即过滤，
+        凑满一块（ANALYSE_CHUNK_SIZE）即在后台开始 map 分析，不等抓取结束
+        """
+        print("[Node: fetch] 流水线抓取（逐批过滤，提前开始分析）...")
+        analysis = self.analyse_agent.start_incremental()
+        new_tweets: List[Dict[str, Any]] = []
+        seen_rows: List[List[str]] = []
+        ad_reasons: Dict[str, int] = {}
+        duplicates = 0
+        processed = set()
+        lock = threading.Lock()
+
+        def on_batch(batch: List[Dict[str, Any]]):
+            nonlocal duplicates
+            # 多来源抓取时会在多个线程中同时调用
+            with lock:
+                batch = [t for t in batch if str(t["id"]) not in processed]
+                processed.update(str(t["id"]) for t in batch)
+                fresh, reasons, collapsed, rows = self._filter_batch(batch)
+                for reason, count in reasons.items():
+                    ad_reasons[reason] = ad_reasons.get(reason, 0) + count
+                duplicates += collapsed
+                new_tweets.extend(fresh)
+                seen_rows.extend(rows)
+            if fresh:
+                analysis.add(fresh)
+
+        update = self._fetch(on_batch)
+        if update.get("error"):
+            analysis.cancel()
+            return update
+        # 补齐回调失败或未经过回调的推文（如多来源合并时才出现的）
+        on_batch(update["tweets"])
+
+        self._print_filter_stats(ad_reasons, new_tweets, duplicates)
+        if not new_tweets:
+            analysis.cancel()
+            self._commit_seen({**update, "seen_rows": seen_rows})
+            return {**update, "new_tweets": [], "tweet_count": 0, "trending": [], "seen_rows": seen_rows}
+
+        print(f"  → 抓取期间已开始分析 {analysis.submitted} 块")
+        self._analysis = analysis
+        new_tweets.sort(key=lambda t: t.get("timestamp", 0), reverse=True)
+        return {
+            **update,
+            "new_tweets": new_tweets,
+            "tweet_count": len(new_tweets),
+            "trending": self._rising(update["tweets"], new_tweets),
+            "seen_rows": seen_rows,
+        }
 
     def _filter_node(self, state: MonitorState) -> dict:
         """过滤新推文节点"""
         print("[Node: filter] 过滤新推文...")
         tweets = state.get("tweets", [])
-        new_tweets = []
-        ad_count = 0
+        new_tweets, ad_reasons, duplicates, seen_rows = self._filter_batch(tweets)
+        self._print_filter_stats(ad_reasons, new_tweets, duplicates)
+        if not new_tweets:
+            # 没有需要推送的内容，直接提交（广告之外全是近似重复等情况）
+            self._commit_seen({**state, "seen_rows": seen_rows})
+        return {
+            "new_tweets": new_tweets,
+            "tweet_count": len(new_tweets),
+            "trending": self._rising(tweets, new_tweets),
+            "seen_rows": seen_rows,
+        }
 
+    def _rising(
+        self, tweets: List[Dict[str, Any]], new_tweets: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """本次抓到的已读推文中正在加速升温的（新推文本身已在推文列表中）"""
+        if self.engagement is None:
+            return []
+        rising = self.engagement.rising(
+            [t for t in tweets if not self.ad_classifier.is_ad(t)],
+            exclude={str(t["id"]) for t in new_tweets},
+            top=self.config["trending_top"],
+            min_rate=self.config["trending_min_rate"],
+        )
+        if rising:
+            print(f"  → {len(rising)} 条已读推文正在升温")
+        return rising
+
+    def _filter_batch(self, tweets: List[Dict[str, Any]]) -> tuple:
+        """
+        过滤一批推文并归档新推文，近似重复的新推文折叠为一条代表推文；
+        所有非广告推文记录互动快照，新推文附带速度 / 加速度。
+        新推文在推送成功后才标记为已读（_commit_seen），这里只返回待提交的记录
+
+        Returns:
+            (新推文列表, 广告原因 → 数量, 折叠的近似重复数, 待标记已读的记录)
+        """
+        # 跳过广告，批内按 ID 去重
+        candidates: Dict[str, Dict[str, Any]] = {}
+        ad_reasons: Dict[str, int] = {}
         for tweet in tweets:
-            tweet_id = str(tweet["id"])
-
-            # 检查是否是广告
-            if self._is_ad(tweet):
-                ad_count += 1
-                continue  # 跳过广告
+            reason = self.ad_classifier.classify(tweet)
+            if reason:
+                ad_reasons[reason] = ad_reasons.get(reason, 0) + 1
+                continue
+            candidates.setdefault(str(tweet["id"]), tweet)
+
+        # 已读推文也记录互动快照，后续运行据此计算速度 / 加速度
+        if self.engagement is not None:
+            self.engagement.record(candidates.values(), int(self._run_started))
+
+        # 一次集合查询
+        unseen_ids = self.seen_store.filter_unseen(candidates.keys())
+        new_tweets = [candidates[tweet_id] for tweet_id in unseen_ids]
+        seen_rows = [
+            [tweet_id, tweet.get("content", ""), tweet.get("author", "")]
+            for tweet_id, tweet in zip(unseen_ids, new_tweets)
+        ]
 
-            cursor = self.db_conn.execute(
-                "SELECT 1 FROM seen_tweets WHERE tweet_id = ?", (tweet_id,)
+        # 归档全部新推文（折叠近似重复之前，保留每条原文）
+        if self.archive is not None:
+            self.archive.add(new_tweets)
+        if self.engagement is not None:
+            self.engagement.annotate(new_tweets)
+
+        duplicates = 0
+        signatures: Dict[str, bytes] = {}
+        if self.near_dup is not None:
+            new_tweets, duplicates = self.near_dup.collapse(new_tweets)
+            signatures = self.near_dup.pop_pending()
+        # 签名随状态进入检查点，恢复的运行推送成功后同样能保存
+        for row in seen_rows:
+            signature = signatures.get(row[0])
+            row.append(signature.hex() if signature is not None else "")
+        return new_tweets, ad_reasons, duplicates, seen_rows
+
+    def _commit_seen(self, state: MonitorState):
+        """
+        把本次运行的新推文标记为已读，保存近似重复签名并推进抓取高水位
+        （推送成功或没有需要推送的内容时调用）
+        """
+        seen_rows = state.get("seen_rows", [])
+        if state.get("cursors"):
+            self._save_cursors(state["cursors"])
+        self.seen_store.mark_seen(
+            [(tweet_id, content, author) for tweet_id, content, author, _ in seen_rows]
+        )
+        if self.near_dup is not None:
+            self.near_dup.save(
+                (tweet_id, bytes.fromhex(signature))
+                for tweet_id, _, _, signature in seen_rows
+                if signature
             )
-            if cursor.fetchone() is None:
-                new_tweets.append(tweet)
-                self.db_conn.execute(
-                    "INSERT OR IGNORE INTO seen_tweets (tweet_id, content, author) VALUES (?, ?, ?)",
-                    (tweet_id, tweet.get("content", ""), tweet.get("author", "")),
-                )
-        self.db_conn.commit()
 
-        print(f"  → 过滤掉 {ad_count} 条广告")
+    @staticmethod
+    def _print_filter_stats(
+        ad_reasons: Dict[str, int], new_tweets: List[Dict[str, Any]], duplicates: int = 0
+    ):
+        print(f"  → 过滤掉 {sum(ad_reasons.values())} 条广告")
+        if ad_reasons:
+            top = sorted(ad_reasons.items(), key=lambda kv: kv[1], reverse=True)[:5]
+            print(f"    原因: {', '.join(f'{r}×{n}' for r, n in top)}")
+        if duplicates:
+            print(f"  → 折叠 {duplicates} 条近似重复推文")
         print(f"  → {len(new_tweets)} 条新推文")
-        return {"new_tweets": new_tweets, "tweet_count": len(new_tweets)}
+
+    def _unseen_tweets(self, tweets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """抓取过程中的高水位判断：返回非广告且以前未见过的推文（不写入数据库）"""
+        candidates = {str(t["id"]): t for t in tweets if not self.ad_classifier.is_ad(t)}
+        unseen = set(self.seen_store.filter_unseen(candidates))
+        return [tweet for tweet_id, tweet in candidates.items() if tweet_id in unseen]
 
     def _is_ad(self, tweet: dict) -> bool:
         """检测推文是否为广告或低质量内容"""
-        content = tweet.get("content", "").lower()
-        author = tweet.get("author", "").lower()
-        engagement = tweet.get("engagement", {})
-
-        # 广告关键词列表
-        ad_keywords = [
-            "promoted",
-            "ad",
-            "sponsored",
-            "推广",
-            "广告",
-            "赞助",
-            "点击链接",
-            "立即购买",
-            "限时优惠",
-            "免费领取",
-            "扫码",
-            "加微信",
-            "加vx",
-            "咨询微信",
-            "详情咨询",
-            "私信了解",
-            "点击下方",
-            "戳链接",
-            "#sponsored",
-        ]
-
-        # 检查内容是否包含广告关键词
-        for keyword in ad_keywords:
-            if keyword in content:
-                return True
-
-        # 检查是否是已知的广告账号
-        ad_accounts = [
-            "promoted",
-            "ad",
-            "sponsor",
-        ]
-        for account in ad_accounts:
-            if account in author:
-                return True
-
-        # 过滤低质量推文（互动数过低可能是垃圾内容）
-        # 但要注意不要过滤刚发布的新推文
-        views = engagement.get("views", 0)
-        likes = engagement.get("likes", 0)
-        replies = engagement.get("replies", 0)
-
-        # 如果浏览量 > 1000 但点赞数 < 5，可能是低质量内容
-        if views > 1000 and likes < 5 and replies < 2:
-            return True
-
-        return False
+        return self.ad_classifier.is_ad(tweet)
 
     def _should_continue(self, state: MonitorState) -> str:
         """条件判断：是否继续分析"""
@@ -231,27 +524,74 @@ class TwitterMonitorGraph:
             return "end"
         return "continue"
 
+    def _cluster_node(self, state: MonitorState) -> dict:
+        """话题聚类节点：同一话题只把代表推文和簇大小交给 LLM"""
+        print("[Node: cluster] 话题聚类...")
+        new_tweets = state.get("new_tweets", [])
+        clusters = self.clusterer.cluster(new_tweets)
+        metrics.observe("topic_clusters", len(clusters))
+        print(f"  → {len(new_tweets)} 条推文 → {len(clusters)} 个话题")
+        return {"clusters": clusters}
+
     def _analyse_node(self, state: MonitorState) -> dict:
         """AI 分析节点"""
         print("[Node: analyse] AI 分析中...")
         new_tweets = state.get("new_tweets", [])
 
-        result = self.analyse_agent.execute(new_tweets)
+        # 流式推送：先把推文列表发出去，摘要边生成边编辑同一条消息
+        stream = None
+        if self.config["stream_push"]:
+            llm = self.analyse_agent.llm
+            stream = self.push_agent.start_stream(
+                state.get("tweet_count", len(new_tweets)),
+                llm.provider,
+                llm.model,
+                new_tweets,
+                trending=state.get("trending", []),
+                # 恢复运行：上次分析失败前已发送的消息
+                message_id=state.get("message_id"),
+            )
+            if stream is not None and not state.get("message_id"):
+                metrics.observe("first_message_seconds", time.time() - self._run_started)
+                print(f"  → 推文列表已推送 ({time.time() - self._run_started:.1f}s)，摘要生成中")
+
+        on_delta = stream.update if stream is not None else None
+        analysis, self._analysis = self._analysis, None
+        if analysis is not None:
+            # 流水线模式：抓取期间已提交的块继续完成，这里只提交剩余推文并归并
+            result = analysis.finish(on_delta=on_delta)
+        else:
+            # 聚类后只分析每个话题的代表推文
+            tweets = state.get("clusters") or new_tweets
+            result = self.analyse_agent.execute(tweets, on_delta=on_delta)
 
         if result["status"] != "success":
-            return {"error": f"分析失败: {result.get('error')}", "status": "error"}
+            update = {"error": f"分析失败: {result.get('error')}", "status": "error"}
+            if stream is not None:
+                # 已发送的"生成中"消息改为失败提示，并记入检查点，恢复运行时继续编辑这条消息
+                stream.fail()
+                update["message_id"] = stream.message_id
+                self._remember_message(state, stream.message_id)
+            return update
 
         data = result["data"]
-        print(f"  → 分析完成 (使用 {data['provider']}/{data['model']})")
+        cache_note = ", 缓存命中" if data.get("cached") else ""
+        stream_note = f", 流式编辑 {stream.edits} 次" if stream is not None else ""
+        print(f"  → 分析完成 (使用 {data['provider']}/{data['model']}{cache_note}{stream_note})")
         return {
             "summary": data["summary"],
             "provider": data["provider"],
             "model": data["model"],
+            "message_id": stream.message_id if stream is not None else None,
         }
 
     def _push_node(self, state: MonitorState) -> dict:
         """推送节点"""
         print("[Node: push] 推送到 Telegram...")
+        if state.get("error"):
+            # 分析失败：没有摘要可推送（流式消息已在分析节点改为失败提示），保留错误以便恢复
+            print(f"  ⚠️ 跳过推送: {state['error']}")
+            return {"status": "error", "error": state["error"]}
 
         result = self.push_agent.execute(
             summary=state.get("summary", ""),
@@ -259,39 +599,87 @@ class TwitterMonitorGraph:
             provider=state.get("provider", "unknown"),
             model=state.get("model", "unknown"),
             tweets=state.get("new_tweets", []),  # 传递原始推文列表
+            trending=state.get("trending", []),
+            message_id=state.get("message_id"),
+            # 同一运行的消息只入队一次：恢复运行时重试发件箱中的原消息，而不是再发一条
+            dedup_key=f"run:{state['run_id']}" if state.get("run_id") else None,
         )
 
         if result["status"] == "success":
             print("  → 推送成功")
+            if not state.get("message_id"):
+                # 非流式推送：读者第一次看到内容就是这条完整消息
+                metrics.observe("first_message_seconds", time.time() - self._run_started)
             self.db_conn.execute(
                 "INSERT INTO push_history (tweet_count, summary) VALUES (?, ?)",
                 (state.get("tweet_count", 0), state.get("summary", "")),
             )
             self.db_conn.commit()
+            self._commit_seen(state)
             return {"status": "success"}
         else:
             print(f"  ⚠️ 推送失败: {result.get('error')}")
             return {"status": "push_failed"}
 
-    def run(self) -> Dict[str, Any]:
-        """执行工作流"""
-        start_time = datetime.now()
-        print(f"[{start_time.strftime('%H:%M:%S')}] 开始执行 LangGraph 工作流\n")
-
-        initial_state: MonitorState = {
-            "tweets": [],
-            "new_tweets": [],
-            "summary": "",
-            "provider": "",
-            "model": "",
-            "tweet_count": 0,
-            "error": None,
-            "status": "pending",
-        }
+    def run(self, resume: Optional[Checkpoint] = None) -> Dict[str, Any]:
+        """
+        执行工作流
 
-        result = self.graph.invoke(initial_state)
+        Args:
+            resume: 从该检查点的下一个节点继续（由 resume() 传入），None 表示新的运行
+        """
+        start_time = datetime.now()
+        self._run_started = time.time()
+        mode = "lean" if self.config["lean"] else "LangGraph"
+        start = None
+        if resume is None:
+            run_id = f"{start_time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+            print(f"[{start_time.strftime('%H:%M:%S')}] 开始执行 {mode} 工作流 (run {run_id})\n")
+        else:
+            run_id = resume.run_id
+            names = [name for name, _ in self._steps()[0]]
+            start = names[names.index(resume.node) + 1]
+            print(
+                f"[{start_time.strftime('%H:%M:%S')}] 恢复 {mode} 工作流 (run {run_id})，"
+                f"跳过已完成的 {', '.join(names[:names.index(start)])}\n"
+            )
+        if self.config["metrics"]:
+            metrics.start_run(run_id)
+        if self.near_dup is not None:
+            self.near_dup.new_run()
 
-        duration = (datetime.now() - start_time).total_seconds()
+        if resume is None:
+            state: MonitorState = {
+                "tweets": [],
+                "new_tweets": [],
+                "clusters": [],
+                "trending": [],
+                "summary": "",
+                "provider": "",
+                "model": "",
+                "tweet_count": 0,
+                "message_id": None,
+                "error": None,
+                "status": "pending",
+                "run_id": run_id,
+                "seen_rows": [],
+                "cursors": {},
+            }
+        else:
+            state = resume.state
+
+        result = {"status": "error", "error": "工作流异常退出"}
+        try:
+            if self.config["lean"]:
+                result = self._run_lean(state, start)
+            elif start is None:
+                result = self.graph.invoke(state)
+            else:
+                result = self._build_graph(start).invoke(state)
+        finally:
+            duration = (datetime.now() - start_time).total_seconds()
+            self._flush_metrics(duration, result.get("status", "unknown"))
+            self._finish_run(run_id, result)
         print(f"\n[完成] 耗时 {duration:.1f}s")
 
         return {
@@ -301,12 +689,123 @@ class TwitterMonitorGraph:
             "model": result.get("model", ""),
             "error": result.get("error"),
             "duration_seconds": duration,
+            "run_id": run_id,
         }
 
+    def _finish_run(self, run_id: str, result: Dict[str, Any]):
+        """记录检查点的最终状态；未正常结束时丢弃本次运行还没提交的近似重复签名"""
+        done = result.get("status") == "success" and not result.get("error")
+        if self.checkpoints is not None:
+            status = DONE if done else ("error" if result.get("error") else result.get("status", "error"))
+            self.checkpoints.finish(run_id, status)
+        if not done and self.near_dup is not None:
+            self.near_dup.discard()
+
+    def resume(self, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        从检查点恢复一次未完成的运行（推送失败、出错或进程中断），已完成的节点不再执行
+
+        Args:
+            run_id: 要恢复的运行，None 表示最近一次运行
+
+        Returns:
+            与 run() 相同；没有可恢复的运行时返回 None
+        """
+        checkpoint = self.checkpoints.load(run_id) if self.checkpoints is not None else None
+        if checkpoint is None or not checkpoint.resumable:
+            print(f"没有可恢复的运行{f' ({run_id})' if run_id else ''}")
+            return None
+
+        steps, gate = self._steps()
+        names = [name for name, _ in steps]
+        if checkpoint.node not in names:
+            print(f"⚠️ 检查点节点 {checkpoint.node} 不在当前工作流中（PIPELINE / TOPIC_CLUSTERING 配置已改变？）")
+            return None
+        if checkpoint.node == names[-1] or (
+            checkpoint.node == gate and self._should_continue(checkpoint.state) == "end"
+        ):
+            # 最后一个节点已完成，只是进程在记录结束状态前退出
+            if checkpoint.node == names[-1]:
+                self._commit_seen(checkpoint.state)
+            self.checkpoints.finish(checkpoint.run_id, DONE)
+            print(f"运行 {checkpoint.run_id} 已执行到 {checkpoint.node}，无需恢复")
+            return None
+        return self.run(resume=checkpoint)
+
+    def _flush_metrics(self, duration: float, status: str):
+        """结束本次运行的指标记录，写入 metrics 表和 Prometheus textfile"""
+        metrics.observe("run_seconds", duration, status=status)
+        recorder = metrics.end_run()
+        if recorder is None:
+            return
+
+        nodes = [
+            f"{dict(labels)['node']} {stats[1]:.1f}s"
+            for (name, labels), stats in recorder.samples.items()
+            if name == "node_seconds"
+        ]
+        if nodes:
+            print(f"\n[耗时] {' | '.join(nodes)}")
+
+        try:
+            recorder.flush(self.db_conn, self.config["metrics_textfile"])
+        except (sqlite3.Error, OSError) as e:
+            print(f"  ⚠️ 写入指标失败: {e}")
+
+    def run_daemon(
+        self,
+        interval: float,
+        jitter: float = 0,
+        stop_event: Optional[threading.Event] = None,
+    ):
+        """
+        常驻模式：复用同一个工作流实例和浏览器，按固定间隔（加随机抖动）循环执行
+
+        Args:
+            interval: 两次执行之间的间隔（秒）
+            jitter: 随机抖动上限（秒），避免固定节奏
+            stop_event: 停止信号，set 后在当前轮次结束时退出
+        """
+        stop_event = stop_event or threading.Event()
+        cycle = 0
+        failed_run = None
+
+        while not stop_event.is_set():
+            cycle += 1
+            print(f"\n{'=' * 60}\n[Daemon] 第 {cycle} 轮\n{'=' * 60}")
+
+            if time.monotonic() - self._last_purge > 3600:
+                self._purge_expired()
+
+            try:
+                # 上一轮推送失败：这一轮恢复那次运行（只重试推送），只恢复一次，再失败下一轮重新抓取
+                result = self.resume(failed_run) if failed_run else None
+                if result is None:
+                    result = self.run()
+                    failed_run = result["run_id"] if result["status"] == "push_failed" else None
+                else:
+                    failed_run = None
+                if result["status"] not in ("success", "push_failed"):
+                    print(f"⚠️ 本轮执行失败: {result.get('error')}")
+            except Exception as e:
+                failed_run = None
+                print(f"❌ 本轮执行异常: {e}")
+
+            delay = max(0.0, interval + random.uniform(-jitter, jitter))
+            print(f"[Daemon] 下一轮将在 {delay:.0f}s 后开始")
+            stop_event.wait(delay)
+
+        print("[Daemon] 收到停止信号，退出循环")
+
     def cleanup(self):
         if self.db_conn:
+            storage.optimize(self.db_conn)
             self.db_conn.close()
 
+        self.fetch_agent.close()
+        self.analyse_agent.llm.close()
+        self.push_agent.close()
+
         # 关闭 Chrome（如果是自动启动的）
         import subprocess
         cdp_port = int(os.getenv("CDP_PORT", "9222"))
@@ -324,11 +823,154 @@ class TwitterMonitorGraph:
         self.cleanup()
 
 
+def _install_signal_handlers(stop_event: threading.Event):
+    """第一次信号：当前轮结束后优雅退出；第二次信号：立即中断"""
+
+    def handle(signum, frame):
+        if stop_event.is_set():
+            raise KeyboardInterrupt
+        print(f"\n[Daemon] 收到信号 {signal.Signals(signum).name}，当前轮结束后退出...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle)
+    signal.signal(signal.SIGTERM, handle)
+
+
+def print_metrics_report(days: int):
+    """按阶段输出最近 days 天的 p50 / p95（只读取数据库，不启动浏览器）"""
+    db_path = Path(os.path.expanduser(os.getenv("DATA_DIR", "~/.twitter-monitor"))) / "twitter_monitor.db"
+    conn = storage.connect(db_path)
+    storage.migrate(conn)
+    rows = metrics.report(conn, days)
+    conn.close()
+
+    if not rows:
+        print(f"最近 {days} 天没有指标记录")
+        return
+
+    print(f"{'指标':<28}{'标签':<44}{'次数':>6}{'p50':>12}{'p95':>12}{'max':>12}")
+    print("-" * 114)
+    for row in rows:
+        labels = ",".join(f"{k}={v}" for k, v in row["labels"].items())
+        print(
+            f"{row['name']:<28}{labels[:43]:<44}{row['runs']:>6}"
+            f"{row['p50']:>12.3f}{row['p95']:>12.3f}{row['max']:>12.3f}"
+        )
+
+
+def _parse_date(value: str) -> float:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYY-MM-DD: {value}")
+
+
+def search_archive(args: argparse.Namespace):
+    """检索推文归档并输出（只读取数据库，不启动浏览器）"""
+    db_path = Path(os.path.expanduser(os.getenv("DATA_DIR", "~/.twitter-monitor"))) / "twitter_monitor.db"
+    conn = storage.connect(db_path)
+    storage.migrate(conn)
+    started = time.perf_counter()
+    tweets = TweetArchive(conn).search(
+        " ".join(args.query),
+        author=args.author,
+        since=args.since,
+        # --until 当天也包含在内
+        until=args.until + 86400 if args.until is not None else None,
+        limit=args.limit,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    conn.close()
+
+    for tweet in tweets:
+        published = datetime.fromtimestamp(tweet["timestamp"]).strftime("%Y-%m-%d %H:%M")
+        likes = tweet.get("engagement", {}).get("likes", 0)
+        content = " ".join(tweet.get("content", "").split())
+        print(f"{published}  @{tweet.get('author', '')}  ❤️ {likes}")
+        print(f"  {content[:200]}")
+        if tweet.get("url"):
+            print(f"  {tweet['url']}")
+    print(f"\n共 {len(tweets)} 条（{elapsed:.1f}ms）")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Twitter Monitor (LangGraph)")
+    parser.add_argument(
+        "--daemon", action="store_true", help="常驻模式，按间隔循环执行"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=float(os.getenv("DAEMON_INTERVAL_SECONDS", "120")),
+        help="常驻模式执行间隔（秒）",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=float(os.getenv("DAEMON_JITTER_SECONDS", "15")),
+        help="常驻模式随机抖动上限（秒）",
+    )
+    parser.add_argument(
+        "--metrics-report",
+        type=int,
+        metavar="DAYS",
+        help="输出最近 DAYS 天各阶段耗时的 p50 / p95 后退出",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="录制浏览器 snapshot / eval 原始输出到 DIR（供 benchmarks 离线回放）",
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="不编译 LangGraph，按顺序直接执行各节点（启动更快，等同 LEAN_RUNNER=true）",
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="",
+        metavar="RUN_ID",
+        help="从检查点恢复未完成的运行（默认最近一次），不重新抓取和分析",
+    )
+    subcommands = parser.add_subparsers(dest="command")
+    search = subcommands.add_parser("search", help="检索推文归档后退出")
+    search.add_argument("query", nargs="*", help="关键词（空格分隔，全部命中）")
+    search.add_argument("--author", help="作者用户名")
+    search.add_argument("--since", type=_parse_date, metavar="YYYY-MM-DD", help="起始日期")
+    search.add_argument("--until", type=_parse_date, metavar="YYYY-MM-DD", help="结束日期（含）")
+    search.add_argument("--limit", type=int, default=20, help="最多返回条数")
+    args = parser.parse_args()
+
+    if args.record:
+        os.environ["RECORD_DIR"] = args.record
+    if args.lean:
+        os.environ["LEAN_RUNNER"] = "true"
+
+    if args.metrics_report:
+        print_metrics_report(args.metrics_report)
+        return
+
+    if args.command == "search":
+        search_archive(args)
+        return
+
     print(f"[{datetime.now()}] Starting Twitter Monitor (LangGraph)...\n")
 
+    if args.daemon:
+        stop_event = threading.Event()
+        _install_signal_handlers(stop_event)
+        with TwitterMonitorGraph() as monitor:
+            monitor.run_daemon(args.interval, args.jitter, stop_event)
+        return
+
     with TwitterMonitorGraph() as monitor:
-        result = monitor.run()
+        if args.resume is not None:
+            result = monitor.resume(args.resume or None)
+            if result is None:
+                return
+        else:
+            result = monitor.run()
 
         if result["status"] == "success":
             if result.get("tweet_count", 0) > 0: